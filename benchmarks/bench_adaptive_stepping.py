@@ -0,0 +1,76 @@
+import time
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.utils.robot import JointState, Motion
+from itmobotics_sim.utils.controllers import JointPositionsController
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env.pybullet_adaptive_stepping import AdaptiveStepping
+
+N_STEPS = 3000
+TIME_STEP = 1e-3
+N_CUBES = 10
+
+
+def run(stepping_params: dict) -> dict:
+    # The robot base rests on the plane and its arm moves while cubes fall, hit the plane and come to rest
+    sim = PyBulletWorld(gui_mode=GUI_MODE.DIRECT, time_step=TIME_STEP)
+    sim.add_object('plane', 'plane.urdf', fixed=True, save=True)
+    robot = sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0.0, -1.0, 0.0), 'robot')
+    robot.joint_controller_params = {'kp': np.full(6, 0.1), 'kd': np.full(6, 1.0)}
+    cube_names = ['cube_{:d}'.format(i) for i in range(N_CUBES)]
+    for i, name in enumerate(cube_names):
+        sim.add_object(name, 'cube_small.urdf', SE3(0.1 * i, 0.0, 0.2 + 0.05 * i), fixed=False, save=True)
+    stepping = None if stepping_params is None else AdaptiveStepping(sim.client, **stepping_params)
+    sim.set_adaptive_stepping(stepping)
+    controller = JointPositionsController(robot)
+    motion = Motion('ee_tool', 6)
+    initial = np.array([0.0, -np.pi / 2, np.pi / 2, -np.pi / 2, -np.pi / 2, 0.0])
+    errors = np.empty(N_STEPS)
+    penetration = 0.0
+    start = time.perf_counter()
+    for i in range(N_STEPS):
+        target = initial + 0.3 * np.sin(2.0 * np.pi * sim.sim_time)
+        motion.joint_state = JointState.from_position(target)
+        controller.send_control_to_robot(motion)
+        sim.sim_step()
+        errors[i] = np.linalg.norm(robot.joint_state.joint_positions - target)
+        for name in cube_names:
+            contacts = sim.contact_points(name)
+            if contacts.shape[0] > 0:
+                penetration = max(penetration, -float(contacts['distance'].min()))
+    wall_time = time.perf_counter() - start
+    heights = [sim.client.getBasePositionAndOrientation(sim.model_id(name))[0][2] for name in cube_names]
+    result = {
+        'wall_time_per_second': wall_time / sim.sim_time,
+        'tracking_error': float(np.sqrt(np.mean(errors**2))),
+        'penetration': penetration,
+        'rest_height': float(np.mean(heights)),
+    }
+    if stepping is not None:
+        result.update(stepping.stats)
+    return result
+
+
+def main():
+    # Gains of position control act in every substep, so the tracking depends on the lowest substeps
+    runs = {
+        'fixed': None,
+        'adaptive': {},
+        'adaptive, 4+ substeps': {'min_substeps': 4, 'max_substeps': 8, 'min_solver_iterations': 20},
+    }
+    print('{:>22s} {:>14s} {:>20s} {:>16s} {:>16s} {:>16s}'.format(
+        'stepping', 'wall s/sim s', 'joint RMS error, rad', 'penetration, mm', 'rest height, mm', 'cost/sim s'
+    ))
+    for name, stepping_params in runs.items():
+        result = run(stepping_params)
+        cost = result.get('cost_per_second', 4 * 100 / TIME_STEP)
+        print('{:>22s} {:14.3f} {:20.5f} {:16.3f} {:16.3f} {:16.0f}'.format(
+            name, result['wall_time_per_second'], result['tracking_error'], result['penetration'] * 1e3,
+            result['rest_height'] * 1e3, cost
+        ))
+
+
+if __name__ == "__main__":
+    main()
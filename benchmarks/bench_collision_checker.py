@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.utils.robot import JointState
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env.pybullet_collision_checker import CollisionChecker
+
+N_SAMPLES = 5000
+
+
+def world_loop(sim: PyBulletWorld, robot, configurations: np.ndarray) -> np.ndarray:
+    # Checks written against the world: reset joints and look for contacts of moving links with the table
+    base_link = sim.link_id('robot', 'base_link')
+    valid = np.zeros(configurations.shape[0], dtype=bool)
+    for i, q in enumerate(configurations):
+        robot.reset_joint_state(JointState.from_position(q))
+        sim.sim_step()
+        valid[i] = not np.any(sim.contact_points('robot', 'table')['link_a'] > base_link)
+    return valid
+
+
+def main():
+    sim = PyBulletWorld(gui_mode=GUI_MODE.DIRECT, kinematic=True)
+    sim.add_object('table', 'tests/urdf/table.urdf', fixed=True, save=True)
+    robot = sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0.0, 0.0, 0.625), 'robot')
+    rng = np.random.default_rng(0)
+    lower, upper = robot.joint_limits.limit_positions
+    configurations = rng.uniform(lower, upper, (N_SAMPLES, lower.shape[0]))
+
+    print('{:>24s} {:>12s} {:>10s}'.format('checker', 'checks/s', 'valid, %'))
+    start = time.perf_counter()
+    valid = world_loop(sim, robot, configurations[:N_SAMPLES // 5])
+    print('{:>24s} {:12.0f} {:10.1f}'.format(
+        'world loop', valid.shape[0] / (time.perf_counter() - start), 100.0 * valid.mean()
+    ))
+    for num_workers in (0, 2, 4):
+        with CollisionChecker(sim, 'robot', num_workers=num_workers) as checker:
+            # Workers are started by the first parallel check
+            checker.check(configurations[:100])
+            checker.reset_stats()
+            valid = checker.check(configurations)
+            print('{:>24s} {:12.0f} {:10.1f}'.format(
+                'batched, {:d} workers'.format(num_workers), checker.stats['checks_per_second'], 100.0 * valid.mean()
+            ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import time
+import itertools
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+
+N_OBJECTS = [10, 50, 100, 200, 400]
+N_REPEATS = 5
+
+
+def brute_force_matrix(sim: PyBulletWorld, tollerance: float = 0.001) -> np.ndarray:
+    ids = [sim.client.getBodyUniqueId(i) for i in range(sim.client.getNumBodies())]
+    matrix = np.zeros((len(ids), len(ids)), dtype=bool)
+    for i, j in itertools.combinations(range(len(ids)), 2):
+        if len(sim.client.getClosestPoints(ids[i], ids[j], tollerance)) > 0:
+            matrix[i, j] = matrix[j, i] = True
+    return matrix
+
+
+def timeit(fn) -> float:
+    start = time.perf_counter()
+    for _ in range(N_REPEATS):
+        fn()
+    return (time.perf_counter() - start) / N_REPEATS
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print('{:>8s} {:>16s} {:>16s} {:>10s}'.format('objects', 'broadphase, ms', 'all pairs, ms', 'speedup'))
+    for n in N_OBJECTS:
+        sim = PyBulletWorld(gui_mode=GUI_MODE.DIRECT, time_step=0.01)
+        side = np.sqrt(n) * 0.1
+        for i in range(n):
+            position = rng.uniform([-side, -side, 0.0], [side, side, 0.5])
+            sim.add_object('cube_{:d}'.format(i), 'cube_small.urdf', base_transform=SE3(*position), fixed=False)
+        sim.sim_step()
+
+        broadphase_time = timeit(sim.collision_matrix)
+        brute_force_time = timeit(lambda: brute_force_matrix(sim))
+        print('{:8d} {:16.2f} {:16.2f} {:10.1f}'.format(
+            n, broadphase_time * 1e3, brute_force_time * 1e3, brute_force_time / broadphase_time
+        ))
+        del sim
+
+
+if __name__ == "__main__":
+    main()
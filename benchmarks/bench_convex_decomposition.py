@@ -0,0 +1,50 @@
+import shutil
+import tempfile
+import time
+
+from spatialmath import SE3
+
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env.pybullet_convex_decomposition import ConvexDecompositionCache
+
+N_STEPS = 500
+URDFS = ['tests/urdf/hole_round.urdf', 'tests/urdf/peg_round.urdf']
+
+
+def step_time(collision_cache: ConvexDecompositionCache) -> float:
+    sim = PyBulletWorld(gui_mode=GUI_MODE.DIRECT, time_step=1e-3, collision_cache=collision_cache)
+    # The peg is dropped into the hole, its contacts stay during the whole run
+    sim.add_object('hole', URDFS[0], SE3(0.0, 0.0, 0.0), fixed=True)
+    sim.add_object('peg', URDFS[1], SE3(0.04, 0.04, 0.03), fixed=False)
+    start = time.perf_counter()
+    for _ in range(N_STEPS):
+        sim.sim_step()
+    return (time.perf_counter() - start) / N_STEPS
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    cache = ConvexDecompositionCache(directory)
+    start = time.perf_counter()
+    for urdf in URDFS:
+        cache.process_urdf(urdf)
+    preprocessing_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for urdf in URDFS:
+        cache.cached_urdf(urdf)
+    lookup_time = (time.perf_counter() - start) / len(URDFS)
+
+    original_time = step_time(None)
+    decomposed_time = step_time(cache)
+    shutil.rmtree(directory)
+
+    print('preprocessing of {:d} URDFs: {:.1f} s, cache lookup: {:.2f} ms'.format(
+        len(URDFS), preprocessing_time, lookup_time * 1e3
+    ))
+    print('peg in hole step time: concave meshes {:.2f} ms, convex decomposition {:.2f} ms'.format(
+        original_time * 1e3, decomposed_time * 1e3
+    ))
+
+
+if __name__ == "__main__":
+    main()
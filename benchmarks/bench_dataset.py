@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.utils.robot import JointState
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env import pybullet_dataset
+from itmobotics_sim.pybullet_env.pybullet_dataset import DatasetLogger, DatasetReader
+
+N_EPISODES = 5
+EPISODE_LENGTH = 1000
+TEST_JOINT_POSE = np.array([0.0, -np.pi/2, np.pi/2, 0.0, np.pi/2, 0.0])
+
+
+def run_episode(sim, robot, on_step):
+    sim.reset()
+    for i in range(EPISODE_LENGTH):
+        command = TEST_JOINT_POSE + 0.2 * np.sin(0.01 * i)
+        robot.reset_joint_state(JointState.from_position(command))
+        sim.sim_step()
+        on_step(command)
+
+
+def main():
+    sim = PyBulletWorld(gui_mode=GUI_MODE.DIRECT, time_step=0.01, time_scale=1)
+    robot = sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0, 0, 0.625), 'robot')
+    directory = tempfile.mkdtemp()
+
+    start = time.perf_counter()
+    for _ in range(N_EPISODES):
+        run_episode(sim, robot, lambda command: None)
+    base_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for episode in range(N_EPISODES):
+        columns = {'time': [], 'joint_positions': [], 'ee_transform': [], 'command': []}
+
+        def append(command):
+            columns['time'].append(sim.sim_time)
+            columns['joint_positions'].append(robot.joint_state.joint_positions.copy())
+            columns['ee_transform'].append(robot.ee_state('ee_tool').tf.A)
+            columns['command'].append(command)
+        run_episode(sim, robot, append)
+        for name, values in columns.items():
+            np.save(os.path.join(directory, '{:s}_{:d}.npy'.format(name, episode)), np.array(values))
+    lists_time = time.perf_counter() - start
+
+    command = np.zeros(6)
+
+    def set_command(value):
+        command[:] = value
+    logger = DatasetLogger(
+        os.path.join(directory, 'dataset'),
+        {
+            'joint_positions': pybullet_dataset.joint_positions('robot'),
+            'ee_transform': pybullet_dataset.ee_transform('robot', 'ee_tool'),
+            'command': lambda world: command,
+        },
+        shard_size=2**20
+    )
+    sim.attach_logger(logger)
+    start = time.perf_counter()
+    for _ in range(N_EPISODES):
+        logger.begin_episode()
+        run_episode(sim, robot, set_command)
+    logger.close()
+    logger_time = time.perf_counter() - start
+    sim.detach_logger(logger)
+
+    reader = DatasetReader(os.path.join(directory, 'dataset'))
+    start = time.perf_counter()
+    for episode in reader.iter_episodes(columns=['joint_positions']):
+        episode['joint_positions'].sum()
+    read_time = time.perf_counter() - start
+
+    n_steps = N_EPISODES * EPISODE_LENGTH
+    print('{:d} steps, logging overhead per step: lists and np.save {:.1f} us, DatasetLogger {:.1f} us'.format(
+        n_steps, (lists_time - base_time) / n_steps * 1e6, (logger_time - base_time) / n_steps * 1e6
+    ))
+    print('lazy read of one column of {:d} episodes: {:.2f} ms'.format(reader.num_episodes, read_time * 1e3))
+    shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import time
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.utils.robot import JointState
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+
+N_TICKS = 1000
+BUDGET = 1e-3
+test_joint_pose = np.array([0.0, -np.pi/2, np.pi/2, 0.0, np.pi/2, 0.0])
+
+
+def main():
+    sim = PyBulletWorld(gui_mode=GUI_MODE.DIRECT, time_step=1e-3)
+    sim.add_object('table', 'tests/urdf/table.urdf', save=True)
+    robot1 = sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0.0, -0.4, 0.625), 'robot1')
+    robot2 = sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0.0, 0.4, 0.625), 'robot2')
+    monitors = [
+        sim.add_distance_monitor('robot1_safety', 'robot1', ['robot2', 'table']),
+        sim.add_distance_monitor('robot2_safety', 'robot2', ['robot1', 'table']),
+    ]
+
+    rng = np.random.default_rng(0)
+    query_time = []
+    for _ in range(N_TICKS):
+        for robot in (robot1, robot2):
+            robot.reset_joint_state(JointState.from_position(test_joint_pose + rng.uniform(-0.3, 0.3, 6)))
+        sim.sim_step()
+        start = time.perf_counter()
+        for monitor in monitors:
+            monitor.distances
+        query_time.append(time.perf_counter() - start)
+
+    query_time = np.array(query_time)
+    print('pairs per tick: {:d}'.format(sum(m.distances.size for m in monitors)))
+    print('mean query time: {:.3f} ms, p99: {:.3f} ms, budget: {:.3f} ms'.format(
+        query_time.mean() * 1e3, np.percentile(query_time, 99) * 1e3, BUDGET * 1e3
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import time
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env.pybullet_domain_randomization import DomainRandomizer, Uniform
+
+N_OBJECTS = 20
+N_EPISODES = 1000
+PROPERTIES = {
+    'mass': Uniform(0.8, 1.2),
+    'lateral_friction': Uniform(0.5, 1.0),
+    'rolling_friction': Uniform(0.0, 0.01),
+    'restitution': Uniform(0.0, 0.2),
+}
+
+
+def main():
+    sim = PyBulletWorld(gui_mode=GUI_MODE.DIRECT, time_step=1e-3)
+    sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0.0, -0.5, 0.0), 'robot')
+    names = ['cube_{:d}'.format(i) for i in range(N_OBJECTS)]
+    for i, name in enumerate(names):
+        sim.add_object(name, 'cube_small.urdf', SE3(0.1 * i, 0.0, 0.5), fixed=False, save=True)
+
+    randomizer = DomainRandomizer(sim, seed=0)
+    for name in names:
+        for property_name, distribution in PROPERTIES.items():
+            randomizer.add(name, property_name, distribution, relative=property_name == 'mass')
+        randomizer.add(name, 'base_position', Uniform([-0.02, -0.02, 0.0], [0.02, 0.02, 0.0]), relative=True)
+    randomizer.add('robot', 'kp', Uniform(0.5, 2.0), relative=True)
+    randomizer.add('robot', 'kd', Uniform(0.5, 2.0), relative=True)
+
+    start = time.perf_counter()
+    samples = randomizer.sample(N_EPISODES)
+    sample_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for episode in range(100):
+        randomizer.apply(episode)
+    apply_time = (time.perf_counter() - start) / 100
+
+    # Hand-written loop with one changeDynamics call per property
+    keywords = {'mass': 'mass', 'lateral_friction': 'lateralFriction', 'rolling_friction': 'rollingFriction', 'restitution': 'restitution'}
+    start = time.perf_counter()
+    for episode in range(100):
+        for name in names:
+            for property_name, keyword in keywords.items():
+                sim.client.changeDynamics(
+                    sim.model_id(name), -1, **{keyword: float(samples['{:s}/base/{:s}'.format(name, property_name)][episode])}
+                )
+    loop_time = (time.perf_counter() - start) / 100
+
+    start = time.perf_counter()
+    for _ in range(10):
+        sim.reset()
+    reset_time = (time.perf_counter() - start) / 10
+
+    print('terms: {:d}, episodes: {:d}'.format(len(randomizer.term_names), N_EPISODES))
+    print('sample all episodes:          {:8.2f} ms'.format(sample_time * 1e3))
+    print('apply one episode:            {:8.2f} ms'.format(apply_time * 1e3))
+    print('per-property changeDynamics:  {:8.2f} ms (dynamics only)'.format(loop_time * 1e3))
+    print('world reset:                  {:8.2f} ms'.format(reset_time * 1e3))
+
+
+if __name__ == "__main__":
+    main()
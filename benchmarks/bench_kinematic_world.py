@@ -0,0 +1,59 @@
+import time
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.utils.robot import JointState
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+
+N_SAMPLES = 2000
+
+
+def run(kinematic: bool) -> dict:
+    start = time.perf_counter()
+    sim = PyBulletWorld(gui_mode=GUI_MODE.DIRECT, time_step=1e-3, kinematic=kinematic)
+    sim.add_object('table', 'tests/urdf/table.urdf', fixed=True, save=True)
+    robot = sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0.0, 0.0, 0.625), 'robot')
+    setup_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(N_SAMPLES):
+        sim.sim_step()
+    step_time = (time.perf_counter() - start) / N_SAMPLES
+
+    # Reachability sampling: random joint states checked for collisions with the table
+    rng = np.random.default_rng(0)
+    lower, upper = robot.joint_limits.limit_positions
+    samples = rng.uniform(lower, upper, (N_SAMPLES, lower.shape[0]))
+    base_link = sim.link_id('robot', 'base_link')
+    collisions = 0
+    start = time.perf_counter()
+    for q in samples:
+        robot.reset_joint_state(JointState.from_position(q))
+        sim.sim_step()
+        contacts = sim.contact_points('robot', 'table')
+        collisions += int(np.any(contacts['link_a'] > base_link))
+    sample_time = (time.perf_counter() - start) / N_SAMPLES
+
+    start = time.perf_counter()
+    for _ in range(10):
+        sim.reset()
+    reset_time = (time.perf_counter() - start) / 10
+    return {'setup': setup_time, 'step': step_time, 'sample': sample_time, 'reset': reset_time, 'collisions': collisions}
+
+
+def main():
+    print('{:>10s} {:>10s} {:>10s} {:>16s} {:>10s} {:>12s}'.format(
+        'world', 'setup, ms', 'step, us', 'IK sample, us', 'reset, ms', 'collisions'
+    ))
+    # URDF files are parsed and cached by the first world
+    run(kinematic=False)
+    for name, kinematic in (('dynamic', False), ('kinematic', True)):
+        result = run(kinematic)
+        print('{:>10s} {:10.1f} {:10.1f} {:16.1f} {:10.1f} {:12d}'.format(
+            name, result['setup'] * 1e3, result['step'] * 1e6, result['sample'] * 1e6, result['reset'] * 1e3, result['collisions']
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import time
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+
+OBJECT_COUNTS = [10, 100, 500, 1000]
+URDF = 'cube_small.urdf'
+
+
+def bin_transforms(n: int) -> np.ndarray:
+    # Cubes stacked in a 10 x 10 grid of columns
+    i = np.arange(n)
+    transforms = np.tile(np.eye(4), (n, 1, 1))
+    transforms[:, 0, 3] = 0.06 * (i % 10)
+    transforms[:, 1, 3] = 0.06 * (i // 10 % 10)
+    transforms[:, 2, 3] = 0.03 + 0.06 * (i // 100)
+    return transforms
+
+
+def main():
+    sim = PyBulletWorld(gui_mode=GUI_MODE.DIRECT, time_step=1e-3)
+    print('{:>6s} {:>16s} {:>16s} {:>16s} {:>16s}'.format(
+        'N', 'add_object, ms', 'add_objects, ms', 'reset before, ms', 'reset after, ms'
+    ))
+    for n in OBJECT_COUNTS:
+        transforms = bin_transforms(n)
+
+        sim.reset()
+        start = time.perf_counter()
+        for i in range(n):
+            sim.add_object('cube_{:d}'.format(i), URDF, SE3(transforms[i], check=False), fixed=False, save=True)
+        single_time = time.perf_counter() - start
+        start = time.perf_counter()
+        sim.reset()
+        single_reset_time = time.perf_counter() - start
+        for i in range(n):
+            sim.remove_object('cube_{:d}'.format(i))
+
+        sim.reset()
+        start = time.perf_counter()
+        sim.add_objects('cube', URDF, transforms, fixed=False, save=True)
+        batch_time = time.perf_counter() - start
+        start = time.perf_counter()
+        sim.reset()
+        batch_reset_time = time.perf_counter() - start
+        sim.remove_objects('cube')
+
+        print('{:6d} {:16.1f} {:16.1f} {:16.1f} {:16.1f}'.format(
+            n, single_time * 1e3, batch_time * 1e3, single_reset_time * 1e3, batch_reset_time * 1e3
+        ))
+
+
+if __name__ == "__main__":
+    main()
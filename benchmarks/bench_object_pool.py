@@ -0,0 +1,56 @@
+import time
+
+from spatialmath import SE3
+
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+
+N_CYCLES = 200
+N_OBJECTS = 20
+URDFS = ['cube_small.urdf', 'tests/urdf/peg_round.urdf']
+
+
+def spawn_cycle_time(sim: PyBulletWorld, urdf: str) -> float:
+    # Average time of one add_object and remove_object pair
+    sim.add_object('warmup', urdf, SE3(0.0, 0.0, 0.5), fixed=False)
+    sim.remove_object('warmup')
+    start = time.perf_counter()
+    for i in range(N_CYCLES):
+        sim.add_object('object', urdf, SE3(0.01 * (i % 10), 0.0, 0.5), fixed=False)
+        sim.remove_object('object')
+    return (time.perf_counter() - start) / N_CYCLES
+
+
+def reset_time(sim: PyBulletWorld, urdf: str) -> float:
+    for i in range(N_OBJECTS):
+        sim.add_object('object_{:d}'.format(i), urdf, SE3(0.1 * i, 0.0, 0.5), fixed=False, save=True)
+    sim.reset()
+    start = time.perf_counter()
+    for _ in range(10):
+        sim.reset()
+    result = (time.perf_counter() - start) / 10
+    for i in range(N_OBJECTS):
+        sim.remove_object('object_{:d}'.format(i))
+    sim.reset()
+    return result
+
+
+def main():
+    sim = PyBulletWorld(gui_mode=GUI_MODE.DIRECT, time_step=1e-3)
+    print('{:>28s} {:>16s} {:>16s} {:>16s} {:>16s}'.format(
+        'URDF', 'spawn load, us', 'spawn pool, us', 'reset load, ms', 'reset pool, ms'
+    ))
+    for urdf in URDFS:
+        sim.set_object_pooling(False)
+        sim.reset()
+        load_cycle = spawn_cycle_time(sim, urdf)
+        load_reset = reset_time(sim, urdf)
+        sim.set_object_pooling(True)
+        pool_cycle = spawn_cycle_time(sim, urdf)
+        pool_reset = reset_time(sim, urdf)
+        print('{:>28s} {:16.1f} {:16.1f} {:16.1f} {:16.1f}'.format(
+            urdf, load_cycle * 1e6, pool_cycle * 1e6, load_reset * 1e3, pool_reset * 1e3
+        ))
+
+
+if __name__ == "__main__":
+    main()
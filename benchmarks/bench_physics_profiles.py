@@ -0,0 +1,65 @@
+import time
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.utils.robot import JointState, Motion
+from itmobotics_sim.utils.controllers import JointPositionsController
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE, PHYSICS_PROFILES
+
+N_STEPS = 1000
+TIME_STEP = 1e-3
+
+
+def reaching(profile) -> tuple:
+    # UR5e follows a joint space sine wave in free space
+    sim = PyBulletWorld(gui_mode=GUI_MODE.DIRECT, time_step=TIME_STEP, physics_profile=profile)
+    robot = sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0.0, 0.0, 0.0), 'robot')
+    robot.joint_controller_params = {'kp': np.full(6, 0.1), 'kd': np.full(6, 1.0)}
+    controller = JointPositionsController(robot)
+    initial = np.array([0.0, -np.pi / 2, np.pi / 2, -np.pi / 2, -np.pi / 2, 0.0])
+    robot.reset_joint_state(JointState.from_position(initial))
+    motion = Motion('ee_tool', 6)
+    errors = np.empty(N_STEPS)
+    start = time.perf_counter()
+    for i in range(N_STEPS):
+        target = initial + 0.3 * np.sin(2.0 * np.pi * sim.sim_time)
+        motion.joint_state = JointState.from_position(target)
+        controller.send_control_to_robot(motion)
+        sim.sim_step()
+        errors[i] = np.linalg.norm(robot.joint_state.joint_positions - target)
+    return N_STEPS / (time.perf_counter() - start), float(np.sqrt(np.mean(errors**2)))
+
+
+def peg_in_hole(profile) -> tuple:
+    # The peg is dropped into the hole, the penetration shows contact accuracy
+    sim = PyBulletWorld(gui_mode=GUI_MODE.DIRECT, time_step=TIME_STEP, physics_profile=profile)
+    sim.add_object('hole', 'tests/urdf/hole_round.urdf', SE3(0.0, 0.0, 0.0), fixed=True)
+    sim.add_object('peg', 'tests/urdf/peg_round.urdf', SE3(0.04, 0.04, 0.03), fixed=False)
+    penetration = 0.0
+    start = time.perf_counter()
+    for _ in range(N_STEPS):
+        sim.sim_step()
+    steps_per_second = N_STEPS / (time.perf_counter() - start)
+    for _ in range(100):
+        sim.sim_step()
+        contacts = sim.contact_points('peg', 'hole')
+        if contacts.shape[0] > 0:
+            penetration = max(penetration, -float(contacts['distance'].min()))
+    return steps_per_second, penetration
+
+
+def main():
+    print('{:>18s} {:>14s} {:>20s} {:>14s} {:>18s}'.format(
+        'profile', 'UR5e steps/s', 'joint RMS error, rad', 'peg steps/s', 'penetration, mm'
+    ))
+    for profile in PHYSICS_PROFILES:
+        reaching_rate, tracking_error = reaching(profile)
+        peg_rate, penetration = peg_in_hole(profile)
+        print('{:>18s} {:14.0f} {:20.5f} {:14.0f} {:18.3f}'.format(
+            profile, reaching_rate, tracking_error, peg_rate, penetration * 1e3
+        ))
+
+
+if __name__ == "__main__":
+    main()
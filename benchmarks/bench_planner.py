@@ -0,0 +1,68 @@
+import time
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env.pybullet_collision_checker import CollisionChecker
+from itmobotics_sim.pybullet_env.pybullet_planner import RRTConnect, LazyPRM, shortcut_path
+
+N_QUERIES = 10
+START = np.array([-1.2, -1.2, 1.5, -1.9, -np.pi/2, 0.0])
+GOAL = np.array([1.2, -1.2, 1.5, -1.9, -np.pi/2, 0.0])
+
+
+def scene(name: str) -> PyBulletWorld:
+    sim = PyBulletWorld(gui_mode=GUI_MODE.DIRECT, kinematic=True)
+    sim.add_object('table', 'tests/urdf/table.urdf', fixed=True, save=True)
+    if name in ('box', 'fixtures'):
+        sim.add_object('box', 'cube.urdf', SE3(-0.6, 0.0, 0.85), fixed=True, scale_size=0.3)
+    if name == 'fixtures':
+        sim.add_object('hole', 'tests/urdf/hole_round.urdf', SE3(-0.4, 0.35, 0.625), fixed=True)
+        sim.add_object('post', 'cube.urdf', SE3(-0.45, -0.4, 0.85), fixed=True, scale_size=0.15)
+    sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0.0, 0.0, 0.625), 'robot')
+    return sim
+
+
+def run(checker: CollisionChecker, planner) -> dict:
+    # Query times include shortcutting of the found path
+    times = []
+    lengths = []
+    for _ in range(N_QUERIES):
+        start = time.perf_counter()
+        path = planner.plan(START, GOAL)
+        if path is None:
+            continue
+        path = shortcut_path(checker, path, seed=0)
+        times.append(time.perf_counter() - start)
+        lengths.append(np.sum(np.linalg.norm(np.diff(path, axis=0), axis=1)))
+    return {'time': np.mean(times), 'max_time': np.max(times), 'success': len(times) / N_QUERIES, 'length': np.mean(lengths)}
+
+
+def main():
+    print('{:>10s} {:>22s} {:>10s} {:>10s} {:>9s} {:>8s}'.format(
+        'scene', 'planner', 'mean, ms', 'max, ms', 'success', 'length'
+    ))
+    for scene_name in ('table', 'box', 'fixtures'):
+        sim = scene(scene_name)
+        for num_workers in (0, 2):
+            with CollisionChecker(sim, 'robot', margin=0.01, num_workers=num_workers) as checker:
+                # Workers are started by the first parallel check
+                checker.check(np.tile(START, (100, 1)))
+                planners = [('RRT-Connect', RRTConnect(checker, seed=0))]
+                prm = LazyPRM(checker, seed=0)
+                start = time.perf_counter()
+                prm.grow()
+                roadmap_time = time.perf_counter() - start
+                planners.append(('lazy PRM', prm))
+                for planner_name, planner in planners:
+                    result = run(checker, planner)
+                    print('{:>10s} {:>22s} {:10.1f} {:10.1f} {:9.1f} {:8.2f}'.format(
+                        scene_name, '{:s}, {:d} workers'.format(planner_name, num_workers),
+                        result['time'] * 1e3, result['max_time'] * 1e3, result['success'], result['length']
+                    ))
+                print('{:>10s} {:>22s} {:10.1f}'.format(scene_name, 'PRM roadmap, {:d} workers'.format(num_workers), roadmap_time * 1e3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env.pybullet_reachability import ReachabilityMap, ReachabilityMapBuilder
+
+N_SAMPLES = 50000
+N_LOOKUPS = 1000000
+
+
+def main():
+    sim = PyBulletWorld(gui_mode=GUI_MODE.DIRECT, kinematic=True)
+    sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0.0, 0.0, 0.625), 'robot')
+
+    print('{:>24s} {:>12s} {:>14s}'.format('build', 'time, s', 'per second'))
+    for num_workers in (0, 2):
+        with ReachabilityMapBuilder(sim, 'robot', 'ee_tool', resolution=0.05, num_workers=num_workers, seed=0) as builder:
+            # Workers are started by the first batch
+            builder.sample(100)
+            start = time.perf_counter()
+            builder.sample(N_SAMPLES)
+            sample_time = time.perf_counter() - start
+            print('{:>24s} {:12.2f} {:14.0f}'.format('FK, {:d} workers'.format(num_workers), sample_time, N_SAMPLES / sample_time))
+            reachability_map = builder.map
+            if num_workers == 0:
+                holes = int(np.count_nonzero(np.any(reachability_map.reachable, axis=3)[..., np.newaxis] & ~reachability_map.reachable))
+                start = time.perf_counter()
+                filled = builder.solve_ik()
+                ik_time = time.perf_counter() - start
+                print('{:>24s} {:12.2f} {:14.0f}   {:d} of {:d} cells filled'.format(
+                    'IK, 0 workers', ik_time, holes / ik_time, filled, holes
+                ))
+
+    print('\n{:>24s} {:>12s}'.format('lookup', 'ns per pose'))
+    rng = np.random.default_rng(0)
+    positions = rng.uniform(reachability_map.origin, reachability_map.origin + np.array(reachability_map.shape) * reachability_map.resolution, (N_LOOKUPS, 3))
+    transforms = np.tile(np.eye(4), (N_LOOKUPS, 1, 1))
+    transforms[:, :3, 3] = positions
+    for name, poses in (('positions', positions), ('transforms', transforms)):
+        start = time.perf_counter()
+        reachability_map.lookup(poses)
+        print('{:>24s} {:12.1f}'.format(name, (time.perf_counter() - start) / N_LOOKUPS * 1e9))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'map.npz')
+        start = time.perf_counter()
+        reachability_map.save(path)
+        save_time = time.perf_counter() - start
+        start = time.perf_counter()
+        ReachabilityMap.load(path)
+        load_time = time.perf_counter() - start
+        print('\nmap {:s} x {:d} directions: {:.1f} kB on disk, {:.1f} kB in memory, save {:.1f} ms, load {:.1f} ms'.format(
+            str(reachability_map.shape), reachability_map.directions.shape[0], os.path.getsize(path) / 1e3,
+            (reachability_map.reachable.nbytes + reachability_map.manipulability.nbytes) / 1e3, save_time * 1e3, load_time * 1e3
+        ))
+
+
+if __name__ == "__main__":
+    main()
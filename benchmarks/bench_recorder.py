@@ -0,0 +1,84 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+import pybullet as p
+
+from itmobotics_sim.pybullet_env.pybullet_recorder import PyBulletRecorder
+from itmobotics_sim.pybullet_env.pybullet_record_file import record_dtype
+
+N_FRAMES = 5000
+TIME_STEP = 0.001
+
+POLICIES = {
+    'every step': {},
+    '60 fps': {'fps': 60},
+    'sparse': {'position_tolerance': 1e-3, 'angle_tolerance': 1e-2},
+    'sparse quantized': {'position_tolerance': 1e-3, 'angle_tolerance': 1e-2, 'position_resolution': 1e-4},
+    '60 fps sparse quantized': {
+        'fps': 60, 'position_tolerance': 1e-3, 'angle_tolerance': 1e-2, 'position_resolution': 1e-4
+    },
+}
+
+
+def move_robot(robot_id: int, step: int):
+    # The robot moves during the first half of the record and stays still afterwards
+    t = min(step, N_FRAMES // 2) * TIME_STEP
+    for joint_id in range(p.getNumJoints(robot_id)):
+        p.resetJointState(robot_id, joint_id, 0.5 * np.sin(2.0 * t + joint_id))
+
+
+def main():
+    p.connect(p.DIRECT)
+    p.setGravity(0, 0, -9.82)
+    table_id = p.loadURDF('tests/urdf/table.urdf', useFixedBase=True)
+    robot_id = p.loadURDF('tests/urdf/iiwa14_pybullet.urdf', basePosition=[0, 0, 0.625], useFixedBase=True)
+
+    recorder = PyBulletRecorder()
+    recorder.register_object(table_id, 'tests/urdf/table.urdf')
+    recorder.register_object(robot_id, 'tests/urdf/iiwa14_pybullet.urdf')
+
+    start = time.perf_counter()
+    for _ in range(N_FRAMES):
+        recorder.add_keyframe()
+    keyframe_time = (time.perf_counter() - start) / N_FRAMES
+
+    start = time.perf_counter()
+    legacy_states = []
+    for _ in range(N_FRAMES):
+        legacy_states.append({link.name: link.get_keyframe() for link in recorder.links})
+    legacy_time = (time.perf_counter() - start) / N_FRAMES
+
+    start = time.perf_counter()
+    recorder.get_formatted_output()
+    output_time = time.perf_counter() - start
+
+    print('tracked visuals: {:d}'.format(len(recorder.links)))
+    print('add_keyframe: {:.1f} us per frame, per link trackers: {:.1f} us per frame'.format(
+        keyframe_time * 1e6, legacy_time * 1e6
+    ))
+    print('storage: {:d} bytes per frame'.format(record_dtype(len(recorder.links)).itemsize))
+    print('get_formatted_output for {:d} frames: {:.3f} s'.format(N_FRAMES, output_time))
+
+    print('streamed record of {:.1f} s at {:.0f} Hz:'.format(N_FRAMES * TIME_STEP, 1.0 / TIME_STEP))
+    record_path = os.path.join(tempfile.mkdtemp(), 'bench.rec')
+    for name, policy in POLICIES.items():
+        recorder.set_policy(**policy)
+        recorder.start_stream(record_path)
+        recording_time = 0.0
+        for i in range(N_FRAMES):
+            move_robot(robot_id, i)
+            start = time.perf_counter()
+            recorder.add_keyframe(i * TIME_STEP)
+            recording_time += time.perf_counter() - start
+        recorder.stop_stream()
+        print('  {:<24s} {:6.1f} us per step, file size {:9d} bytes'.format(
+            name, recording_time / N_FRAMES * 1e6, os.path.getsize(record_path)
+        ))
+        os.remove(record_path)
+    p.disconnect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import time
+
+from spatialmath import SE3
+
+from itmobotics_sim.pybullet_env import pybullet_recorder
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+
+N_OBJECTS = 30
+N_REPEATS = 20
+
+
+def main():
+    sim = PyBulletWorld(gui_mode=GUI_MODE.DIRECT, time_step=0.01, time_scale=1)
+    sim.add_robot('tests/urdf/iiwa14_pybullet.urdf', SE3(0, 0, 0.625), 'robot')
+    for i in range(N_OBJECTS):
+        sim.add_object('table_{:d}'.format(i), 'tests/urdf/table.urdf', SE3(3.0 * i, 0, 0), save=True)
+
+    parse_time = 0.0
+    for _ in range(N_REPEATS):
+        # Emptying the cache reproduces parsing of every URDF on each registration
+        pybullet_recorder._URDF_VISUALS_CACHE.clear()
+        start = time.perf_counter()
+        sim.register_objects_for_record()
+        parse_time += time.perf_counter() - start
+
+    cached_time = 0.0
+    for _ in range(N_REPEATS):
+        start = time.perf_counter()
+        sim.register_objects_for_record()
+        cached_time += time.perf_counter() - start
+
+    print('register_objects_for_record with {:d} objects: {:.2f} ms parsing URDF, {:.2f} ms cached'.format(
+        N_OBJECTS + 1, parse_time / N_REPEATS * 1e3, cached_time / N_REPEATS * 1e3
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import time
+
+from spatialmath import SE3
+
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+
+N_STEPS = 500
+WORLD_COUNTS = [1, 2, 4, 8]
+
+
+def main():
+    for n_worlds in WORLD_COUNTS:
+        worlds = []
+        for i in range(n_worlds):
+            sim = PyBulletWorld(gui_mode=GUI_MODE.DIRECT, time_step=0.01, time_scale=1)
+            sim.add_object('table', 'tests/urdf/table.urdf', save=True)
+            sim.add_robot('tests/urdf/iiwa14_pybullet.urdf', SE3(0, 0, 0.625), 'robot')
+            sim.register_objects_for_record()
+            worlds.append(sim)
+
+        # Steps with and without recording alternate, so both see the same simulation states
+        step_time = 0.0
+        record_time = 0.0
+        for i in range(2 * N_STEPS):
+            recording = i % 2 == 1
+            for sim in worlds:
+                if recording:
+                    sim.start_record()
+                else:
+                    sim.stop_record()
+            start = time.perf_counter()
+            for sim in worlds:
+                sim.sim_step()
+            if recording:
+                record_time += time.perf_counter() - start
+            else:
+                step_time += time.perf_counter() - start
+
+        print('{:d} worlds: recording overhead {:.1f} us per world step'.format(
+            n_worlds, (record_time - step_time) / (N_STEPS * n_worlds) * 1e6
+        ))
+        del worlds
+
+
+if __name__ == "__main__":
+    main()
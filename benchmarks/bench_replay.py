@@ -0,0 +1,61 @@
+import time
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.utils.robot import JointState
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env.pybullet_replay import StateLog, KinematicReplay
+
+TIME_STEP = 0.01
+N_STEPS = 1000
+CAMERA_FPS = 25
+TEST_JOINT_POSE = np.array([0.0, -np.pi/2, np.pi/2, 0.0, np.pi/2, 0.0])
+
+
+def main():
+    sim = PyBulletWorld(gui_mode=GUI_MODE.DIRECT, time_step=TIME_STEP, time_scale=1)
+    sim.add_object('table', 'tests/urdf/table.urdf', save=True)
+    robot = sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0, 0, 0.625), 'robot')
+    sim.connect_camera('camera', 'robot', 'camera_link', resolution=(320, 240), fps=CAMERA_FPS)
+
+    log = StateLog.from_world(sim)
+    start = time.perf_counter()
+    for i in range(N_STEPS):
+        robot.reset_joint_state(JointState.from_position(TEST_JOINT_POSE + 0.3 * np.sin(0.01 * i)))
+        sim.sim_step()
+        log.capture(sim)
+    simulation_time = time.perf_counter() - start
+    duration = N_STEPS * TIME_STEP
+
+    replay = KinematicReplay(sim, log)
+    seek_times = np.random.uniform(0.0, duration, N_STEPS)
+    start = time.perf_counter()
+    for t in seek_times:
+        replay.seek(t)
+    seek_time = (time.perf_counter() - start) / N_STEPS
+
+    start = time.perf_counter()
+    for _ in replay.play():
+        pass
+    play_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    n_images = 0
+    for _ in replay.play(period=1.0 / CAMERA_FPS):
+        sim.get_image('camera')
+        n_images += 1
+    render_time = time.perf_counter() - start
+
+    print('log of {:.0f} s, simulated in {:.2f} s'.format(duration, simulation_time))
+    print('random seek: {:.1f} us per frame'.format(seek_time * 1e6))
+    print('replay of every frame without rendering: {:.3f} s, {:.0f}x faster than real time'.format(
+        play_time, duration / play_time
+    ))
+    print('replay with {:d} camera images {:d}x{:d}: {:.2f} s, {:.1f}x faster than real time'.format(
+        n_images, 320, 240, render_time, duration / render_time
+    ))
+
+
+if __name__ == "__main__":
+    main()
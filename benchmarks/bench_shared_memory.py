@@ -0,0 +1,93 @@
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.utils.robot import JointState
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env.pybullet_shared_memory import SharedSegment, SharedMemoryBridge
+
+N_TICKS = 2000
+N_READS = 20000
+JOINT_POSE = np.array([0.0, -np.pi/2, np.pi/2, 0.0, np.pi/2, 0.0])
+LINKS = [('robot', 'ee_tool'), ('robot', 'camera_link'), ('robot', 'wrist_3_link')]
+
+
+def per_call(function, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        function()
+    return (time.perf_counter() - start) / n
+
+
+def pipe_round_trip(values: dict, n: int) -> float:
+    # Serialized transport of the same snapshot, the receiving end is a thread of this process
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    def receive():
+        for _ in range(n):
+            pickle.loads(receiver.recv_bytes())
+    thread = threading.Thread(target=receive)
+    start = time.perf_counter()
+    thread.start()
+    for _ in range(n):
+        sender.send_bytes(pickle.dumps(values, protocol=pickle.HIGHEST_PROTOCOL))
+    thread.join()
+    duration = (time.perf_counter() - start) / n
+    receiver.close()
+    sender.close()
+    return duration
+
+
+def main():
+    sim = PyBulletWorld(gui_mode=GUI_MODE.DIRECT, time_step=1e-3, kinematic=True)
+    sim.add_object('table', 'tests/urdf/table.urdf', fixed=True, save=True)
+    robot = sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0.0, 0.0, 0.625), 'robot')
+    robot.reset_joint_state(JointState.from_position(JOINT_POSE))
+    sim.connect_camera('camera', 'robot', 'camera_link', resolution=(640, 480), fps=30)
+    name = 'itmobotics_bench_{:d}'.format(os.getpid())
+
+    step_time = per_call(sim.sim_step, N_TICKS)
+    with SharedMemoryBridge(sim, name, links=LINKS) as bridge:
+        capture_time = per_call(lambda: bridge.capture(sim), N_TICKS)
+        sim.attach_logger(bridge)
+        published_step_time = per_call(sim.sim_step, N_TICKS)
+        sim.detach_logger(bridge)
+
+        state = SharedSegment.attach(name + '_state')
+        snapshot = state.empty()
+        read_time = per_call(lambda: state.read(snapshot), N_READS)
+        positions = state.arrays['robot/joint_positions']
+        view_time = per_call(lambda: (state.version, positions[0], state.version), N_READS)
+        pipe_time = pipe_round_trip(snapshot, N_READS // 10)
+        state_size = state.size
+        del positions
+        state.close()
+
+    with SharedMemoryBridge(sim, name + '_camera', robot_names=[], cameras=['camera']) as bridge:
+        camera = bridge.camera('camera')
+        frame = sim.get_image('camera')
+        def publish_frame():
+            camera.write({'color': frame[0], 'depth': frame[1]})
+        frame_write_time = per_call(publish_frame, 200)
+        frame_snapshot = camera.empty()
+        frame_read_time = per_call(lambda: camera.read(frame_snapshot), 200)
+        frame_pipe_time = pipe_round_trip({'color': frame[0], 'depth': frame[1].astype(np.float32)}, 200)
+
+    print(f"state segment: {state_size} bytes, {len(snapshot)} arrays")
+    print(f"{'sim_step':>32}: {step_time * 1e6:8.1f} us")
+    print(f"{'sim_step with bridge':>32}: {published_step_time * 1e6:8.1f} us")
+    print(f"{'state publish + command':>32}: {capture_time * 1e6:8.1f} us")
+    print(f"{'seqlock snapshot read':>32}: {read_time * 1e6:8.2f} us")
+    print(f"{'zero-copy versioned access':>32}: {view_time * 1e6:8.2f} us")
+    print(f"{'pickle + pipe round trip':>32}: {pipe_time * 1e6:8.2f} us")
+    print(f"{'640x480 frame publish':>32}: {frame_write_time * 1e6:8.1f} us")
+    print(f"{'640x480 frame snapshot read':>32}: {frame_read_time * 1e6:8.1f} us")
+    print(f"{'640x480 pickle + pipe':>32}: {frame_pipe_time * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
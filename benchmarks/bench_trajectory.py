@@ -0,0 +1,85 @@
+import time
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.utils.robot import EEState, JointState, Motion
+from itmobotics_sim.utils.controllers import JointPositionsController, EEPositionToEEVelocityController, EEVelocityToJointVelocityController
+from itmobotics_sim.utils.trajectory import JointTrajectory, CartesianTrajectory, TrajectoryExecutor
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+
+START = np.array([0.0, -np.pi/2, np.pi/2, 0.0, np.pi/2, 0.0])
+GOAL = np.array([0.5, -1.2, 1.2, -0.3, np.pi/2, 0.4])
+DURATION = 2.0
+TIME_STEP = 1e-3
+
+
+def quintic(t: float) -> tuple:
+    tau = t / DURATION
+    return tau**3 * (10.0 - 15.0 * tau + 6.0 * tau**2), 30.0 * tau**2 * (1.0 - tau)**2 / DURATION
+
+
+def joint_loop(controller, steps: int):
+    # Motion is built and interpolated every tick
+    for i in range(steps):
+        s, ds = quintic(i * TIME_STEP)
+        motion = Motion('ee_tool', 6)
+        motion.joint_state = JointState.from_position(START + s * (GOAL - START))
+        motion.joint_state.joint_velocities = ds * (GOAL - START)
+        controller.send_control_to_robot(motion)
+
+
+def cartesian_loop(controller, start: SE3, goal: SE3, steps: int):
+    delta = start.inv() @ goal
+    for i in range(steps):
+        s, ds = quintic(i * TIME_STEP)
+        motion = Motion('ee_tool', 6)
+        motion.ee_state = EEState.from_tf(start @ delta.interp1(s), 'ee_tool')
+        controller.send_control_to_robot(motion)
+
+
+def executor_loop(executor: TrajectoryExecutor):
+    executor.reset()
+    while not executor.done:
+        executor.step()
+
+
+def timed(function, *args) -> float:
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    sim = PyBulletWorld(gui_mode=GUI_MODE.DIRECT, time_step=TIME_STEP, kinematic=True)
+    robot = sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0.0, 0.0, 0.625), 'robot')
+    robot.reset_joint_state(JointState.from_position(START))
+    start_tf = robot.ee_state('ee_tool').tf
+    goal_tf = SE3(0.05, 0.05, -0.05) @ start_tf @ SE3.Rz(0.3)
+
+    precompute = time.perf_counter()
+    joint_trajectory = JointTrajectory.quintic(START, GOAL, DURATION, TIME_STEP)
+    precompute_joint = time.perf_counter() - precompute
+    precompute = time.perf_counter()
+    cartesian_trajectory = CartesianTrajectory.quintic(start_tf, goal_tf, DURATION, TIME_STEP)
+    precompute_cartesian = time.perf_counter() - precompute
+    steps = len(joint_trajectory)
+
+    # The controllers send to the robot without the simulation steps, so only the feeding is measured
+    joint_controller = JointPositionsController(robot)
+    cartesian_controller = EEPositionToEEVelocityController(robot)
+    cartesian_controller.connect_controller(EEVelocityToJointVelocityController(robot))
+
+    results = {
+        'joint per-tick motion': timed(joint_loop, joint_controller, steps),
+        'joint executor': timed(executor_loop, TrajectoryExecutor(joint_controller, joint_trajectory)),
+        'cartesian per-tick motion': timed(cartesian_loop, cartesian_controller, start_tf, goal_tf, steps),
+        'cartesian executor': timed(executor_loop, TrajectoryExecutor(cartesian_controller, cartesian_trajectory, 'ee_tool')),
+    }
+    print(f"{steps} ticks, precomputation: joint {precompute_joint * 1e3:.2f} ms, cartesian {precompute_cartesian * 1e3:.2f} ms")
+    for name, duration in results.items():
+        print(f"{name:>26}: {duration / steps * 1e6:8.1f} us/tick")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import os
+import time
+import uuid
+import xml.etree.ElementTree
+
+import numpy as np
+import pybullet
+import pybullet_utils.bullet_client as bc
+from spatialmath import SE3
+
+from itmobotics_sim.pybullet_env.urdf_editor import URDFEditor, URDFScratch
+
+N_VARIANTS = 200
+ROBOT_URDF = 'tests/urdf/ur5e_pybullet.urdf'
+TOOL_URDFS = ['tests/urdf/peg_round.urdf', 'tests/urdf/hole_round.urdf']
+
+
+def legacy_compose(tool_urdf: str, tf: SE3) -> str:
+    # Pipeline of connect_tool before the scratch directory: parse both files, join and save next to the robot
+    robot_et = xml.etree.ElementTree.parse(ROBOT_URDF)
+    tool_root = xml.etree.ElementTree.parse(tool_urdf).getroot()
+    for element in list(tool_root):
+        robot_et.getroot().append(element)
+    joint = xml.etree.ElementTree.SubElement(robot_et.getroot(), 'joint', name='tool_joint', type='fixed')
+    xml.etree.ElementTree.SubElement(joint, 'parent', link='ee_tool')
+    xml.etree.ElementTree.SubElement(joint, 'child', link=tool_root.find('link').attrib['name'])
+    xml.etree.ElementTree.SubElement(joint, 'origin', xyz='{:f} {:f} {:f}'.format(*tf.t), rpy='0 0 0')
+    path = os.path.join(os.path.dirname(ROBOT_URDF), str(uuid.uuid4()) + '_tmp.urdf')
+    with open(path, 'wb') as f:
+        robot_et.write(f, encoding='utf-8')
+    return path
+
+
+def scratch_compose(scratch: URDFScratch, tool_urdf: str, tf: SE3) -> str:
+    editor = URDFEditor(ROBOT_URDF)
+    editor.joinURDF(URDFEditor(tool_urdf), 'ee_tool', tf.A)
+    return scratch.write(editor)
+
+
+def measure(compose, remove) -> tuple:
+    client = bc.BulletClient(connection_mode=pybullet.DIRECT)
+    rng = np.random.default_rng(0)
+    compose_time = 0.0
+    load_time = 0.0
+    for i in range(N_VARIANTS):
+        tf = SE3(*rng.uniform(-0.05, 0.05, 3))
+        start = time.perf_counter()
+        path = compose(TOOL_URDFS[i % len(TOOL_URDFS)], tf)
+        compose_time += time.perf_counter() - start
+        start = time.perf_counter()
+        body_id = client.loadURDF(path)
+        load_time += time.perf_counter() - start
+        client.removeBody(body_id)
+        remove(path)
+    client.disconnect()
+    return compose_time / N_VARIANTS, load_time / N_VARIANTS
+
+
+def main():
+    scratch = URDFScratch()
+    results = {
+        'parse and save to disk': measure(legacy_compose, os.remove),
+        'cached trees to ' + os.path.dirname(scratch.directory): measure(
+            lambda tool_urdf, tf: scratch_compose(scratch, tool_urdf, tf), scratch.remove
+        ),
+    }
+    scratch.cleanup()
+    print('{:d} robot and tool compositions'.format(N_VARIANTS))
+    for name, (compose_time, load_time) in results.items():
+        print('  {:<32s} compose {:6.2f} ms, loadURDF {:6.2f} ms, {:6.1f} compositions/s'.format(
+            name, compose_time * 1e3, load_time * 1e3, 1.0 / (compose_time + load_time)
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import time
+import xml.etree.ElementTree
+
+from itmobotics_sim.pybullet_env.urdf_editor import KinematicTree
+
+LINK_COUNTS = [50, 200, 1000, 4000]
+
+
+def legacy_root_link(urdf_root: xml.etree.ElementTree.Element) -> str:
+    # Root search of URDFEditor before the kinematic tree index
+    link_connections = {}
+    for joint in urdf_root.findall('joint'):
+        parent_link = joint.find('parent').attrib['link']
+        link_connections[parent_link] = [child.attrib['link'] for child in joint.findall('child')]
+    start_link = next(iter(link_connections))
+    last_link = start_link
+    while True:
+        for lc in link_connections.keys():
+            if start_link in link_connections[lc]:
+                start_link = lc
+                break
+        if last_link == start_link:
+            break
+        last_link = start_link
+    return last_link
+
+
+def chain_urdf(num_links: int) -> xml.etree.ElementTree.Element:
+    # Joints are listed from the tip, the worst case of the legacy search
+    root = xml.etree.ElementTree.Element('robot', name='chain')
+    for i in range(num_links):
+        xml.etree.ElementTree.SubElement(root, 'link', name='link_{:d}'.format(i))
+    for i in range(num_links - 1, 0, -1):
+        joint = xml.etree.ElementTree.SubElement(root, 'joint', name='joint_{:d}'.format(i), type='revolute')
+        xml.etree.ElementTree.SubElement(joint, 'parent', link='link_{:d}'.format(i - 1))
+        xml.etree.ElementTree.SubElement(joint, 'child', link='link_{:d}'.format(i))
+    return root
+
+
+def measure(function, *args) -> float:
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    print('{:>6s} {:>16s} {:>16s}'.format('links', 'legacy root, ms', 'tree index, ms'))
+    for num_links in LINK_COUNTS:
+        root = chain_urdf(num_links)
+        legacy_time = measure(legacy_root_link, root)
+        tree_time = measure(KinematicTree, root)
+        assert KinematicTree(root).root_link == legacy_root_link(root) == 'link_0'
+        print('{:6d} {:16.2f} {:16.2f}'.format(num_links, legacy_time * 1e3, tree_time * 1e3))
+
+
+if __name__ == "__main__":
+    main()
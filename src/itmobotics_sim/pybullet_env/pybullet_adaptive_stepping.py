@@ -0,0 +1,147 @@
+from __future__ import annotations
+import time
+
+import numpy as np
+
+import pybullet_utils.bullet_client as bc
+
+
+class AdaptiveStepping:
+    """Substeps and solver iterations adapted to contact activity of the last step
+
+    The stepping has levels from (``min_substeps``, ``min_solver_iterations``) to (``max_substeps``,
+    ``max_solver_iterations``), substeps are doubled from level to level. After every step the contacts
+    are inspected: the highest level is taken when new contacts appear or the deepest penetration exceeds
+    ``penetration_threshold`` and keeps growing, the level is lowered by one after every ``relax_steps``
+    steps without such events.
+    Resting contacts with constant penetration, e.g. of a robot base placed on a table, do not raise the level.
+    The chosen level is applied before the next step, so contact forces of the last step are still
+    scaled with its own number of substeps. Contacts are taken from ``ContactCache`` of the world,
+    so they are requested from the physics server once per step. Attach the stepping by ``PyBulletWorld.set_adaptive_stepping``.
+    Gains of joint position and velocity control act in every substep, so ``min_substeps`` of a robot
+    tracking joint targets should match the substeps its gains were tuned for.
+
+    Args:
+        pybullet_client (bc.BulletClient): client of the simulated world
+        min_substeps (int, optional): substeps in free space. Defaults to 1.
+        max_substeps (int, optional): substeps during impacts. Defaults to 8.
+        min_solver_iterations (int, optional): solver iterations in free space. Defaults to 10.
+        max_solver_iterations (int, optional): solver iterations during impacts. Defaults to 100.
+        penetration_threshold (float, optional): penetration depth in meters which raises the level. Defaults to 1e-3.
+        relax_steps (int, optional): number of quiet steps before the level is lowered. Defaults to 20.
+    """
+
+    def __init__(
+        self,
+        pybullet_client: bc.BulletClient,
+        min_substeps: int = 1,
+        max_substeps: int = 8,
+        min_solver_iterations: int = 10,
+        max_solver_iterations: int = 100,
+        penetration_threshold: float = 1e-3,
+        relax_steps: int = 20
+    ):
+        assert 1 <= min_substeps <= max_substeps, "Substeps should satisfy 1 <= min_substeps <= max_substeps"
+        assert 1 <= min_solver_iterations <= max_solver_iterations,\
+            "Solver iterations should satisfy 1 <= min_solver_iterations <= max_solver_iterations"
+        self.__p = pybullet_client
+        num_levels = int(np.floor(np.log2(max_substeps / min_substeps))) + 1
+        substeps = np.minimum(min_substeps * 2**np.arange(num_levels), max_substeps)
+        substeps[-1] = max_substeps
+        iterations = np.linspace(min_solver_iterations, max_solver_iterations, num_levels).round().astype(int)
+        # Single level with equal bounds of substeps still adapts solver iterations
+        if num_levels == 1 and min_solver_iterations != max_solver_iterations:
+            substeps = np.array([min_substeps, min_substeps])
+            iterations = np.array([min_solver_iterations, max_solver_iterations])
+        self.__levels = list(zip(substeps.tolist(), iterations.tolist()))
+        self.__penetration_threshold = penetration_threshold
+        self.__relax_steps = relax_steps
+        self.reset_stats()
+        self.reset()
+
+    @property
+    def levels(self) -> list[tuple]:
+        """list[tuple]: (substeps, solver iterations) of every level"""
+        return list(self.__levels)
+
+    @property
+    def level(self) -> int:
+        """int: level used by the next step"""
+        return self.__level
+
+    def reset(self):
+        """start from the lowest level, the parameters are applied again before the next step"""
+        self.__level = 0
+        self.__applied_level = None
+        self.__quiet_steps = 0
+        self.__num_contacts = 0
+        self.__penetration = 0.0
+
+    def reset_stats(self):
+        """clear statistics"""
+        self.__num_steps = 0
+        self.__simulated_time = 0.0
+        self.__wall_time = 0.0
+        self.__cost = 0
+        self.__level_steps = np.zeros(len(self.__levels), dtype=int)
+        self.__step_start = None
+
+    @property
+    def stats(self) -> dict:
+        """dict: statistics since the last ``reset_stats``
+
+        * ``steps``: number of steps
+        * ``level_steps``: number of steps done at every level
+        * ``mean_substeps``, ``mean_solver_iterations``: averages over steps
+        * ``cost_per_second``: substeps times solver iterations per simulated second
+        * ``wall_time_per_second``: time of ``stepSimulation`` per simulated second
+        """
+        steps = max(self.__num_steps, 1)
+        simulated_time = max(self.__simulated_time, 1e-12)
+        substeps, iterations = np.array(self.__levels).T
+        return {
+            'steps': self.__num_steps,
+            'level_steps': self.__level_steps.tolist(),
+            'mean_substeps': float(self.__level_steps @ substeps) / steps,
+            'mean_solver_iterations': float(self.__level_steps @ iterations) / steps,
+            'cost_per_second': self.__cost / simulated_time,
+            'wall_time_per_second': self.__wall_time / simulated_time,
+        }
+
+    def before_step(self):
+        """apply parameters of the current level"""
+        if self.__applied_level != self.__level:
+            substeps, iterations = self.__levels[self.__level]
+            self.__p.setPhysicsEngineParameter(numSubSteps=substeps, numSolverIterations=iterations)
+            self.__applied_level = self.__level
+        self.__step_start = time.perf_counter()
+
+    def after_step(self, time_step: float, contacts: np.ndarray):
+        """Choose the level of the next step from contacts of the finished one
+
+        Args:
+            time_step (float): simulated time of the step
+            contacts (np.ndarray): contacts of the step from ``ContactCache.contacts``, every contact is stored twice
+        """
+        if self.__step_start is not None:
+            self.__wall_time += time.perf_counter() - self.__step_start
+            self.__step_start = None
+        substeps, iterations = self.__levels[self.__level]
+        self.__num_steps += 1
+        self.__simulated_time += time_step
+        self.__cost += substeps * iterations
+        self.__level_steps[self.__level] += 1
+
+        num_contacts = contacts.shape[0] // 2
+        penetration = -float(np.min(contacts['distance'])) if num_contacts > 0 else 0.0
+        deepening = penetration > self.__penetration_threshold and penetration > self.__penetration + 1e-6
+        if deepening or num_contacts > self.__num_contacts:
+            self.__level = len(self.__levels) - 1
+            self.__quiet_steps = 0
+        else:
+            self.__quiet_steps += 1
+            if self.__quiet_steps >= self.__relax_steps and self.__level > 0:
+                self.__level -= 1
+                self.__quiet_steps = 0
+        self.__num_contacts = num_contacts
+        self.__penetration = penetration
@@ -0,0 +1,78 @@
+from __future__ import annotations
+from typing import Tuple
+
+import numpy as np
+
+import pybullet_utils.bullet_client as bc
+
+
+def link_aabbs(pybullet_client: bc.BulletClient, body_id: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Axis aligned bounding boxes of every link of the body
+
+    Args:
+        pybullet_client (bc.BulletClient): client that owns the body
+        body_id (int): unique body id
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: (n,) link indices starting from the base (-1),
+            (n, 3) lower and (n, 3) upper corners in world space
+    """
+    link_ids = np.arange(-1, pybullet_client.getNumJoints(body_id))
+    aabb_min = np.empty((link_ids.shape[0], 3))
+    aabb_max = np.empty((link_ids.shape[0], 3))
+    get_aabb = pybullet_client.getAABB
+    for i, link_id in enumerate(link_ids):
+        aabb_min[i], aabb_max[i] = get_aabb(body_id, int(link_id))
+    return link_ids, aabb_min, aabb_max
+
+
+def body_aabb(pybullet_client: bc.BulletClient, body_id: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Axis aligned bounding box that encloses all links of the body
+
+    Args:
+        pybullet_client (bc.BulletClient): client that owns the body
+        body_id (int): unique body id
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (3,) lower and (3,) upper corners in world space
+    """
+    _, aabb_min, aabb_max = link_aabbs(pybullet_client, body_id)
+    return aabb_min.min(axis=0), aabb_max.max(axis=0)
+
+
+def overlapping_pairs(aabb_min: np.ndarray, aabb_max: np.ndarray, margin: float = 0.0) -> np.ndarray:
+    """Sweep and prune broadphase over a set of boxes
+
+    Boxes are sorted along the X axis, so every box is compared only with the boxes
+    which X intervals overlap its own one instead of all others.
+
+    Args:
+        aabb_min (np.ndarray): (n, 3) lower corners of the boxes
+        aabb_max (np.ndarray): (n, 3) upper corners of the boxes
+        margin (float, optional): distance by which boxes are inflated before the test. Defaults to 0.0.
+
+    Returns:
+        np.ndarray: (k, 2) index pairs (i < j) of the overlapping boxes
+    """
+    aabb_min = np.asarray(aabb_min, dtype=float) - margin
+    aabb_max = np.asarray(aabb_max, dtype=float) + margin
+    if aabb_min.shape[0] < 2:
+        return np.zeros((0, 2), dtype=int)
+
+    order = np.argsort(aabb_min[:, 0], kind='stable')
+    sorted_min = aabb_min[order]
+    sorted_max = aabb_max[order]
+
+    # Every box i is overlapped along X by boxes i+1..end[i]-1 of the sorted list
+    end = np.searchsorted(sorted_min[:, 0], sorted_max[:, 0], side='right')
+    counts = np.maximum(end - np.arange(order.shape[0]) - 1, 0)
+    first = np.repeat(np.arange(order.shape[0]), counts)
+    offsets = np.arange(first.shape[0]) - np.repeat(np.cumsum(counts) - counts, counts)
+    second = first + 1 + offsets
+
+    overlap = np.all(
+        (sorted_min[first, 1:] <= sorted_max[second, 1:]) & (sorted_min[second, 1:] <= sorted_max[first, 1:]),
+        axis=1
+    )
+    pairs = np.stack([order[first[overlap]], order[second[overlap]]], axis=1)
+    return np.sort(pairs, axis=1)
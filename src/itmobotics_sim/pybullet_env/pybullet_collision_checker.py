@@ -0,0 +1,384 @@
+from __future__ import annotations
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import pybullet
+import pybullet_utils.bullet_client as bc
+
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld
+from itmobotics_sim.pybullet_env.urdf_editor import URDFEditor
+
+
+def scene_description(
+    world: PyBulletWorld,
+    robot_name: str,
+    obstacle_names: list[str] = None,
+    self_collision: bool = True,
+    allowed_pairs: list[tuple] = None
+) -> dict:
+    """Picklable description of the robot and obstacles in their current poses
+
+    Args:
+        world (PyBulletWorld): world of the models
+        robot_name (str): name of the checked robot
+        obstacle_names (list[str], optional): names of obstacle models, all other models by default
+        self_collision (bool, optional): check collisions between links of the robot. Defaults to True.
+        allowed_pairs (list[tuple], optional): pairs of robot link names which may touch each other. Defaults to None.
+
+    Returns:
+        dict: description used by ``ShadowScene``
+    """
+    p = world.client
+    if obstacle_names is None:
+        obstacle_names = [name for name in world.model_names if name != robot_name]
+
+    def model(name: str) -> dict:
+        urdf_filename, scale_size = world.model_urdf(name)
+        # Paths are absolute, so the URDF is found by the other client whichever search path of the world it is in
+        resolved_filename = URDFEditor.find_urdf(urdf_filename, world.additional_paths)
+        if resolved_filename != '':
+            urdf_filename = os.path.abspath(resolved_filename)
+        body_id = world.model_id(name)
+        # Bases are placed by their inertial frames like in resetBasePositionAndOrientation
+        position, orientation = p.getBasePositionAndOrientation(body_id)
+        joint_ids = [j for j in range(p.getNumJoints(body_id)) if p.getJointInfo(body_id, j)[3] > -1]
+        return {
+            'name': name,
+            'urdf_filename': urdf_filename,
+            'scale_size': scale_size,
+            'position': list(position),
+            'orientation': list(orientation),
+            'joint_ids': joint_ids,
+            'joint_positions': [state[0] for state in p.getJointStates(body_id, joint_ids)] if joint_ids else [],
+        }
+
+    description = {
+        'robot': model(robot_name),
+        'obstacles': [model(name) for name in obstacle_names],
+        'self_collision': self_collision,
+        'allowed_pairs': [tuple(pair) for pair in allowed_pairs] if allowed_pairs is not None else [],
+    }
+    return description
+
+
+class ShadowScene:
+    """Kinematic copy of the scene in its own DIRECT client
+
+    Obstacles are loaded with fixed bases, the robot joints are set directly and collisions are
+    detected without stepping the simulation. Links fixed to the robot base do not move with the
+    configuration, so their contacts with obstacles are ignored, e.g. of the base placed on a table.
+    Pairs of robot links touching in every one of ``SELF_CONTACT_SAMPLES`` random configurations are
+    ignored as well, like adjacent links in an allowed collision matrix, together with ``allowed_pairs``
+    of the description. The current configuration of the robot is not used, so a robot in self-collision
+    does not make its collision allowed.
+
+    Args:
+        description (dict): scene from ``scene_description``
+        margin (float, optional): minimal clearance between the robot and obstacles. Defaults to 0.0.
+    """
+
+    SELF_CONTACT_SAMPLES = 50
+
+    def __init__(self, description: dict, margin: float = 0.0):
+        self.__p = bc.BulletClient(connection_mode=pybullet.DIRECT)
+        self.__margin = margin
+        self.__obstacle_ids = [self.__load(obstacle, 0) for obstacle in description['obstacles']]
+
+        robot = description['robot']
+        flags = 0
+        if description['self_collision']:
+            flags = self.__p.URDF_USE_SELF_COLLISION | self.__p.URDF_USE_SELF_COLLISION_EXCLUDE_PARENT
+        self.__robot_id = self.__load(robot, flags)
+        self.__joint_ids = list(robot['joint_ids'])
+        joint_info = [self.__p.getJointInfo(self.__robot_id, j) for j in range(self.__p.getNumJoints(self.__robot_id))]
+        limits = np.array([joint_info[j][8:10] for j in self.__joint_ids], dtype=float).reshape(-1, 2)
+        # Joints without limits have lower limit above the upper one
+        limited = limits[:, 0] < limits[:, 1]
+        self.__lower = np.where(limited, limits[:, 0], -np.inf)
+        self.__upper = np.where(limited, limits[:, 1], np.inf)
+
+        # Link moves with the configuration when a movable joint is on its path from the base
+        moving = {}
+        for j, info in enumerate(joint_info):
+            moving[j] = info[3] > -1 or moving.get(info[16], False)
+        self.__static_links = {-1} | {j for j, m in moving.items() if not m}
+        self.__allowed_pairs = self.__permanent_contacts()
+        link_ids = {self.__p.getBodyInfo(self.__robot_id)[0].decode('utf-8'): -1}
+        link_ids.update({info[12].decode('utf-8'): j for j, info in enumerate(joint_info)})
+        for link_a, link_b in description['allowed_pairs']:
+            self.__allowed_pairs.add((link_ids[link_a], link_ids[link_b]))
+
+    @property
+    def num_joints(self) -> int:
+        return len(self.__joint_ids)
+
+    @property
+    def joint_limits(self) -> tuple:
+        """tuple: lower and upper position limits, infinite for joints without limits"""
+        return self.__lower.copy(), self.__upper.copy()
+
+    @property
+    def client(self) -> bc.BulletClient:
+        return self.__p
+
+    @property
+    def robot_id(self) -> int:
+        return self.__robot_id
+
+    @property
+    def joint_ids(self) -> list[int]:
+        """list[int]: joints set by configurations"""
+        return list(self.__joint_ids)
+
+    def __load(self, model: dict, flags: int) -> int:
+        body_id = self.__p.loadURDF(model['urdf_filename'], useFixedBase=True, globalScaling=model['scale_size'], flags=flags)
+        self.__p.resetBasePositionAndOrientation(body_id, model['position'], model['orientation'])
+        if len(model['joint_ids']) > 0:
+            self.__p.resetJointStatesMultiDof(body_id, model['joint_ids'], [[q] for q in model['joint_positions']])
+        return body_id
+
+    def __self_contacts(self, configuration: np.ndarray) -> set:
+        if len(self.__joint_ids) > 0:
+            self.__p.resetJointStatesMultiDof(self.__robot_id, self.__joint_ids, configuration.reshape(-1, 1).tolist())
+        self.__p.performCollisionDetection()
+        contacts = self.__p.getContactPoints(bodyA=self.__robot_id, bodyB=self.__robot_id)
+        return set(tuple(sorted((c[3], c[4]))) for c in contacts if c[8] < 0.0)
+
+    def __permanent_contacts(self) -> set:
+        # Fixed seed gives the same pairs in every worker of the checker
+        rng = np.random.default_rng(0)
+        lower = np.where(np.isfinite(self.__lower), self.__lower, -np.pi)
+        upper = np.where(np.isfinite(self.__upper), self.__upper, np.pi)
+        pairs = None
+        for _ in range(self.SELF_CONTACT_SAMPLES):
+            contacts = self.__self_contacts(rng.uniform(lower, upper))
+            pairs = contacts if pairs is None else pairs & contacts
+            if len(pairs) == 0:
+                break
+        return pairs if pairs is not None else set()
+
+    def check(self, configurations: np.ndarray) -> np.ndarray:
+        """Check configurations of the robot joints
+
+        Args:
+            configurations (np.ndarray): (B, n_joints) joint positions
+
+        Returns:
+            np.ndarray: (B,) True for collision-free configurations within the joint limits
+        """
+        configurations = np.asarray(configurations, dtype=float).reshape(-1, len(self.__joint_ids))
+        valid = np.all((configurations >= self.__lower) & (configurations <= self.__upper), axis=1)
+        robot_id = self.__robot_id
+        joint_ids = self.__joint_ids
+        margin = self.__margin
+        obstacle_ids = self.__obstacle_ids
+        static_links = self.__static_links
+        allowed_pairs = self.__allowed_pairs
+        reset_joints = self.__p.resetJointStatesMultiDof
+        detect = self.__p.performCollisionDetection
+        contact_points = self.__p.getContactPoints
+        closest_points = self.__p.getClosestPoints
+        for i in np.flatnonzero(valid).tolist():
+            reset_joints(robot_id, joint_ids, configurations[i].reshape(-1, 1).tolist())
+            detect()
+            contacts = contact_points(bodyA=robot_id)
+            if margin > 0.0:
+                # Contact manifolds keep a few points only, so clearance to obstacles is queried directly
+                contacts = [c for c in contacts if c[2] == robot_id]
+                for obstacle_id in obstacle_ids:
+                    contacts.extend(closest_points(robot_id, obstacle_id, margin))
+            for c in contacts:
+                if c[2] == robot_id:
+                    if c[8] >= 0.0 or (c[3], c[4]) in allowed_pairs or (c[4], c[3]) in allowed_pairs:
+                        continue
+                elif c[8] >= margin or c[3] in static_links:
+                    continue
+                valid[i] = False
+                break
+        return valid
+
+    def close(self):
+        try:
+            self.__p.disconnect()
+        except pybullet.error:
+            pass
+
+
+# Shadow scene of a worker process
+_WORKER_SCENE = None
+
+
+def _init_worker(description: dict, margin: float):
+    global _WORKER_SCENE
+    _WORKER_SCENE = ShadowScene(description, margin)
+
+
+def _check_in_worker(configurations: np.ndarray) -> np.ndarray:
+    return _WORKER_SCENE.check(configurations)
+
+
+class CollisionChecker:
+    """Batched collision checks of robot configurations on a kinematic shadow copy of the world
+
+    The checker copies the robot and obstacles into a ``ShadowScene`` in its own client, so checks
+    neither move the robot of the world nor depend on its simulation step. The copy is taken when
+    the checker is created, ``sync`` takes it again after obstacles were moved, added or removed.
+    With ``num_workers`` the batches are split between worker processes, each of them has its own
+    shadow scene. Workers are started by the first parallel check and pay off for large batches.
+
+    Args:
+        world (PyBulletWorld): world of the robot and obstacles
+        robot_name (str): name of the checked robot
+        obstacle_names (list[str], optional): names of obstacle models, all other models by default
+        margin (float, optional): minimal clearance between the robot and obstacles, configurations
+            with obstacles closer than the margin are invalid. Defaults to 0.0.
+        self_collision (bool, optional): check collisions between links of the robot. Defaults to True.
+        num_workers (int, optional): number of worker processes, 0 to check in this process. Defaults to 0.
+        allowed_pairs (list[tuple], optional): pairs of robot link names which may touch each other,
+            see ``ShadowScene``. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        world: PyBulletWorld,
+        robot_name: str,
+        obstacle_names: list[str] = None,
+        margin: float = 0.0,
+        self_collision: bool = True,
+        num_workers: int = 0,
+        allowed_pairs: list[tuple] = None
+    ):
+        self.__world = world
+        self.__robot_name = robot_name
+        self.__obstacle_names = obstacle_names
+        self.__margin = margin
+        self.__self_collision = self_collision
+        self.__num_workers = num_workers
+        self.__allowed_pairs = allowed_pairs
+        self.__executor = None
+        self.__scene = None
+        self.sync()
+        self.reset_stats()
+
+    def __enter__(self) -> CollisionChecker:
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def num_joints(self) -> int:
+        return self.__scene.num_joints
+
+    @property
+    def num_workers(self) -> int:
+        return self.__num_workers
+
+    @property
+    def joint_limits(self) -> tuple:
+        """tuple: lower and upper position limits, infinite for joints without limits"""
+        return self.__scene.joint_limits
+
+    @property
+    def scene(self) -> ShadowScene:
+        """ShadowScene: shadow copy checked in this process"""
+        return self.__scene
+
+    @property
+    def stats(self) -> dict:
+        """dict: number of ``checks``, their ``time`` in seconds and ``checks_per_second`` since the last ``reset_stats``"""
+        return {
+            'checks': self.__checks,
+            'time': self.__time,
+            'checks_per_second': self.__checks / self.__time if self.__time > 0.0 else 0.0,
+        }
+
+    def reset_stats(self):
+        self.__checks = 0
+        self.__time = 0.0
+
+    def sync(self):
+        """Copy the current scene of the world, workers are restarted by the next parallel check"""
+        self.__shutdown_workers()
+        if self.__scene is not None:
+            self.__scene.close()
+        self.__description = scene_description(
+            self.__world, self.__robot_name, self.__obstacle_names, self.__self_collision, self.__allowed_pairs
+        )
+        self.__scene = ShadowScene(self.__description, self.__margin)
+
+    def check(self, configurations: np.ndarray) -> np.ndarray:
+        """Check configurations of the robot joints
+
+        Args:
+            configurations (np.ndarray): (B, n_joints) joint positions or a single (n_joints,) configuration
+
+        Returns:
+            np.ndarray: (B,) validity mask, True for collision-free configurations within the joint limits,
+                bool for a single configuration
+        """
+        configurations = np.asarray(configurations, dtype=float)
+        single = configurations.ndim == 1
+        configurations = configurations.reshape(-1, self.num_joints)
+        start = time.perf_counter()
+        if self.__num_workers > 0 and configurations.shape[0] > self.__num_workers:
+            valid = self.__check_parallel(configurations)
+        else:
+            valid = self.__scene.check(configurations)
+        self.__time += time.perf_counter() - start
+        self.__checks += configurations.shape[0]
+        return bool(valid[0]) if single else valid
+
+    def check_edges(self, starts: np.ndarray, ends: np.ndarray, resolution: float = 0.05) -> np.ndarray:
+        """Check straight joint-space motions between configurations
+
+        Every edge is discretized so that no joint moves more than ``resolution`` between checked
+        configurations, configurations of all edges are checked as one batch.
+
+        Args:
+            starts (np.ndarray): (E, n_joints) first configurations of the edges
+            ends (np.ndarray): (E, n_joints) last configurations of the edges
+            resolution (float, optional): maximal joint motion between checked configurations. Defaults to 0.05.
+
+        Returns:
+            np.ndarray: (E,) True for edges with all configurations valid
+        """
+        starts = np.asarray(starts, dtype=float).reshape(-1, self.num_joints)
+        ends = np.asarray(ends, dtype=float).reshape(-1, self.num_joints)
+        if starts.shape[0] == 0:
+            return np.zeros(0, dtype=bool)
+        deltas = ends - starts
+        steps = np.maximum(np.ceil(np.max(np.abs(deltas), axis=1) / resolution).astype(int), 1)
+        offsets = np.concatenate([[0], np.cumsum(steps + 1)[:-1]])
+        edges = np.repeat(np.arange(starts.shape[0]), steps + 1)
+        fractions = (np.arange(edges.shape[0]) - offsets[edges]) / steps[edges]
+        valid = self.check(starts[edges] + fractions[:, np.newaxis] * deltas[edges])
+        return np.logical_and.reduceat(valid, offsets)
+
+    def __check_parallel(self, configurations: np.ndarray) -> np.ndarray:
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(
+                max_workers=self.__num_workers,
+                # Forked children would share the connection of the parent client
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.__description, self.__margin)
+            )
+        chunks = np.array_split(configurations, min(4 * self.__num_workers, configurations.shape[0]))
+        return np.concatenate(list(self.__executor.map(_check_in_worker, chunks)))
+
+    def __shutdown_workers(self):
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
+
+    def close(self):
+        """Stop workers and disconnect the shadow scene"""
+        self.__shutdown_workers()
+        if self.__scene is not None:
+            self.__scene.close()
+            self.__scene = None
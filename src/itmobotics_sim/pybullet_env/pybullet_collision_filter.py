@@ -0,0 +1,282 @@
+from __future__ import annotations
+import itertools
+import time
+from typing import Callable
+
+import numpy as np
+
+import pybullet_utils.bullet_client as bc
+
+
+# Filters PyBullet gives to loaded links: static links, e.g. fixed bases, do not collide with each other
+DEFAULT_GROUP = 1
+DEFAULT_MASK = -1
+STATIC_GROUP = 2
+STATIC_MASK = -1 ^ 2
+
+
+def load_group_mask(pybullet_client: bc.BulletClient, body_id: int, link_id: int) -> tuple:
+    """Collision filter group and mask the link got on load
+
+    Filters can not be queried, links with zero mass were loaded as static ones.
+
+    Args:
+        pybullet_client (bc.BulletClient): client of the simulated world
+        body_id (int): unique body id
+        link_id (int): link index, -1 for the base
+
+    Returns:
+        tuple: group and mask of the link
+    """
+    if pybullet_client.getDynamicsInfo(body_id, link_id)[0] == 0.0:
+        return STATIC_GROUP, STATIC_MASK
+    return DEFAULT_GROUP, DEFAULT_MASK
+
+
+class CollisionFilterManager:
+    """Collision filtering rules of the world models
+
+    Rules are kept by model and link names and are applied again every time
+    the body of a model is reloaded (after reset, tool connection or object replacement).
+    PyBullet may give the same id to the reloaded body, so the models are tracked
+    by pair of body id and number of the body load.
+
+    Args:
+        pybullet_client (bc.BulletClient): client of the simulated world
+        models (Callable[[], dict]): returns (body id, load number) for every model name of the world
+    """
+
+    def __init__(self, pybullet_client: bc.BulletClient, models: Callable[[], dict]):
+        self.__p = pybullet_client
+        self.__models = models
+        self.__adjacent_rules = {}
+        self.__pair_rules = []
+        self.__group_mask_rules = []
+        self.__applied_models = {}
+
+    def exclude_adjacent_links(self, model_name: str, grandparents: bool = True):
+        """Disable collisions between links connected by a joint
+
+        Args:
+            model_name (str): name of robot or object
+            grandparents (bool, optional): also disable collisions with the parent of the parent link. Defaults to True.
+        """
+        self.__adjacent_rules[model_name] = grandparents
+        self.apply(force=True)
+
+    def disable_pair(self, model_a: str, model_b: str, links_a: list[str] = None, links_b: list[str] = None):
+        """Disable collisions between links of two models
+
+        Args:
+            model_a (str): name of the first robot or object
+            model_b (str): name of the second robot or object, may be equal to the first one
+            links_a (list[str], optional): links of the first model, all links by default
+            links_b (list[str], optional): links of the second model, all links by default
+        """
+        self.__pair_rules.append((model_a, model_b, links_a, links_b))
+        self.apply(force=True)
+
+    def set_group_mask(self, model_name: str, group: int, mask: int, links: list[str] = None):
+        """Set collision filter group and mask of model links
+
+        Two links collide only if group of each one intersects with mask of another one.
+
+        Args:
+            model_name (str): name of robot or object
+            group (int): collision group bits
+            mask (int): bits of groups the links collide with
+            links (list[str], optional): links of the model, all links by default
+        """
+        self.__group_mask_rules.append((model_name, group, mask, links))
+        self.apply(force=True)
+
+    @property
+    def has_rules(self) -> bool:
+        """bool: any rule is registered"""
+        return len(self.__adjacent_rules) > 0 or len(self.__pair_rules) > 0 or len(self.__group_mask_rules) > 0
+
+    def clear(self):
+        """forget all rules, filters of already loaded bodies stay untouched"""
+        self.__adjacent_rules = {}
+        self.__pair_rules = []
+        self.__group_mask_rules = []
+        self.__applied_models = {}
+
+    def release(self, model_name: str):
+        """Enable collisions disabled by the rules of the model, before its body is reused by another model
+
+        Args:
+            model_name (str): name of robot or object
+        """
+        model_ids = self.__model_ids()
+        if model_name not in model_ids:
+            return
+        body_id = model_ids[model_name]
+        pairs = set(self.__rule_pairs(model_ids, {model_name}))
+        if model_name in self.__adjacent_rules:
+            pairs.update(
+                self.__canonical_pair(body_id, a, body_id, b)
+                for a, b in self.__adjacent_pairs(body_id, self.__adjacent_rules[model_name])
+            )
+        self.__set_enabled({model_name: body_id}, pairs)
+        self.__applied_models.pop(model_name, None)
+
+    def apply(self, force: bool = False):
+        """Apply rules to the models which bodies were reloaded since the last call
+
+        Args:
+            force (bool, optional): apply all rules again. Defaults to False.
+        """
+        if not self.has_rules:
+            return
+        models = self.__models()
+        if not force and all(self.__applied_models.get(name) == model for name, model in models.items()):
+            return
+        changed = set(name for name, model in models.items() if force or self.__applied_models.get(name) != model)
+        model_ids = self.__model_ids()
+
+        for model_name, grandparents in self.__adjacent_rules.items():
+            if model_name in changed:
+                for link_a, link_b in self.__adjacent_pairs(model_ids[model_name], grandparents):
+                    self.__p.setCollisionFilterPair(model_ids[model_name], model_ids[model_name], link_a, link_b, 0)
+        for body_a, link_a, body_b, link_b in self.__rule_pairs(model_ids, changed):
+            self.__p.setCollisionFilterPair(body_a, body_b, link_a, link_b, 0)
+        for model_name, group, mask, links in self.__group_mask_rules:
+            if model_name in changed:
+                for link_id in self.__link_indices(model_ids[model_name], links):
+                    self.__p.setCollisionFilterGroupMask(model_ids[model_name], link_id, group, mask)
+        self.__applied_models = models
+
+    def report(self, n_steps: int = 0) -> dict:
+        """Number of pruned link pairs and gain in simulation step time
+
+        To measure the step time, the simulation is stepped ``n_steps`` times with and without
+        filters from the same saved state, which is restored afterwards. Links with group and mask
+        rules are compared with links of other models with the group and mask given on load,
+        only the pairs that collided with the load filters are counted.
+
+        Args:
+            n_steps (int, optional): number of steps for time measurement, zero to skip it. Defaults to 0.
+
+        Returns:
+            dict: pruned pairs by adjacency, pair and group mask rules, step times in seconds if measured
+        """
+        model_ids = self.__model_ids()
+        adjacent_pairs = set()
+        for model_name, grandparents in self.__adjacent_rules.items():
+            if model_name in model_ids:
+                body_id = model_ids[model_name]
+                adjacent_pairs.update(
+                    self.__canonical_pair(body_id, a, body_id, b) for a, b in self.__adjacent_pairs(body_id, grandparents)
+                )
+        rule_pairs = set(self.__rule_pairs(model_ids, set(model_ids.keys()))) - adjacent_pairs
+
+        group_mask_pairs = self.__group_mask_pruned_pairs(model_ids)
+
+        result = {
+            'adjacent_pairs': len(adjacent_pairs),
+            'rule_pairs': len(rule_pairs),
+            'group_mask_pairs': len(group_mask_pairs),
+            # The same pair may be pruned by several rules
+            'pruned_pairs': len(adjacent_pairs | rule_pairs | group_mask_pairs),
+        }
+
+        if n_steps > 0:
+            state_id = self.__p.saveState()
+            filtered_time = self.__step_time(n_steps)
+            self.__p.restoreState(stateId=state_id)
+            self.__set_enabled(model_ids, adjacent_pairs | rule_pairs)
+            unfiltered_time = self.__step_time(n_steps)
+            self.__p.restoreState(stateId=state_id)
+            self.__p.removeState(state_id)
+            self.apply(force=True)
+            result['step_time_filtered'] = filtered_time
+            result['step_time_unfiltered'] = unfiltered_time
+            result['step_time_saved'] = unfiltered_time - filtered_time
+        return result
+
+    def __model_ids(self) -> dict:
+        return {name: model[0] for name, model in self.__models().items()}
+
+    def __step_time(self, n_steps: int) -> float:
+        start = time.perf_counter()
+        for _ in range(n_steps):
+            self.__p.stepSimulation()
+        return (time.perf_counter() - start) / n_steps
+
+    def __set_enabled(self, model_ids: dict, pairs: set):
+        for body_a, link_a, body_b, link_b in pairs:
+            self.__p.setCollisionFilterPair(body_a, body_b, link_a, link_b, 1)
+        for model_name, _, _, links in self.__group_mask_rules:
+            if model_name in model_ids:
+                for link_id in self.__link_indices(model_ids[model_name], links):
+                    self.__p.setCollisionFilterGroupMask(
+                        model_ids[model_name], link_id, *load_group_mask(self.__p, model_ids[model_name], link_id)
+                    )
+
+    def __rule_pairs(self, model_ids: dict, changed: set) -> list:
+        pairs = []
+        for model_a, model_b, links_a, links_b in self.__pair_rules:
+            if model_a not in model_ids or model_b not in model_ids:
+                continue
+            if model_a not in changed and model_b not in changed:
+                continue
+            body_a, body_b = model_ids[model_a], model_ids[model_b]
+            for link_a, link_b in itertools.product(
+                self.__link_indices(body_a, links_a), self.__link_indices(body_b, links_b)
+            ):
+                if body_a == body_b and link_a == link_b:
+                    continue
+                pairs.append(self.__canonical_pair(body_a, link_a, body_b, link_b))
+        return pairs
+
+    @staticmethod
+    def __canonical_pair(body_a: int, link_a: int, body_b: int, link_b: int) -> tuple:
+        return (body_a, link_a, body_b, link_b) if (body_a, link_a) <= (body_b, link_b) else (body_b, link_b, body_a, link_a)
+
+    def __group_mask_pruned_pairs(self, model_ids: dict) -> set:
+        groups = {}
+        for model_name, group, mask, links in self.__group_mask_rules:
+            if model_name in model_ids:
+                for link_id in self.__link_indices(model_ids[model_name], links):
+                    groups[(model_ids[model_name], link_id)] = (group, mask)
+        if len(groups) == 0:
+            return set()
+
+        # Sorted keys give canonical pairs for i < j
+        keys = sorted(set(
+            (body_id, link_id) for body_id in model_ids.values()
+            for link_id in range(-1, self.__p.getNumJoints(body_id))
+        ))
+        bodies = np.array([key[0] for key in keys])
+        load_filters = np.array([load_group_mask(self.__p, *key) for key in keys]).reshape(-1, 2)
+        group = np.array([groups[key][0] if key in groups else load_filters[k, 0] for k, key in enumerate(keys)])
+        mask = np.array([groups[key][1] if key in groups else load_filters[k, 1] for k, key in enumerate(keys)])
+        ruled = np.array([key in groups for key in keys])
+
+        i, j = np.triu_indices(len(keys), k=1)
+        load_group, load_mask = load_filters[:, 0], load_filters[:, 1]
+        # Pairs the load filters already prune, e.g. two static links, are not counted
+        pruned = (((group[i] & mask[j]) == 0) | ((group[j] & mask[i]) == 0)) & (
+            ((load_group[i] & load_mask[j]) != 0) & ((load_group[j] & load_mask[i]) != 0)
+        )
+        # Links of the same body are compared only if both have explicit rules
+        considered = (ruled[i] | ruled[j]) & ((bodies[i] != bodies[j]) | (ruled[i] & ruled[j]))
+        return set(keys[a] + keys[b] for a, b in zip(i[pruned & considered].tolist(), j[pruned & considered].tolist()))
+
+    def __adjacent_pairs(self, body_id: int, grandparents: bool) -> list:
+        parents = {link_id: self.__p.getJointInfo(body_id, link_id)[16] for link_id in range(self.__p.getNumJoints(body_id))}
+        pairs = []
+        for link_id, parent_id in parents.items():
+            pairs.append((link_id, parent_id))
+            if grandparents and parent_id != -1:
+                pairs.append((link_id, parents[parent_id]))
+        return pairs
+
+    def __link_indices(self, body_id: int, links: list[str]) -> list[int]:
+        if links is None:
+            return list(range(-1, self.__p.getNumJoints(body_id)))
+        link_ids = {self.__p.getBodyInfo(body_id)[0].decode('utf-8'): -1}
+        for link_id in range(self.__p.getNumJoints(body_id)):
+            link_ids[self.__p.getJointInfo(body_id, link_id)[12].decode('utf-8')] = link_id
+        return [link_ids[link] for link in links]
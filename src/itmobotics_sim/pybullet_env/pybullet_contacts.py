@@ -0,0 +1,144 @@
+from __future__ import annotations
+from typing import Callable
+
+import numpy as np
+
+import pybullet_utils.bullet_client as bc
+
+
+CONTACT_DTYPE = np.dtype([
+    ('body_a', np.int32),
+    ('body_b', np.int32),
+    ('link_a', np.int32),
+    ('link_b', np.int32),
+    ('position_on_a', np.float64, (3,)),
+    ('position_on_b', np.float64, (3,)),
+    ('normal_on_b', np.float64, (3,)),
+    ('distance', np.float64),
+    ('normal_force', np.float64),
+    ('lateral_friction_1', np.float64),
+    ('lateral_friction_dir_1', np.float64, (3,)),
+    ('lateral_friction_2', np.float64),
+    ('lateral_friction_dir_2', np.float64, (3,)),
+])
+
+
+class ContactCache:
+    """Contact points of the last simulation step
+
+    Contacts are requested from the physics server only once after every invalidation
+    and are kept as structured array of ``CONTACT_DTYPE``. Every contact is stored twice,
+    once for each body of the pair, so that the ``body_a`` field always refers to the body
+    the contact is queried for and all queries are slices of the sorted array.
+    PyBullet reports the impulse of the last substep divided by the whole time step,
+    so forces are rescaled by the number of substeps.
+
+    Args:
+        pybullet_client (bc.BulletClient): client of the simulated world
+        detect_collisions (Callable[[], None], optional): called before contacts are requested,
+            e.g. to run collision detection in a world without simulation steps. Defaults to None.
+    """
+
+    def __init__(self, pybullet_client: bc.BulletClient, detect_collisions: Callable[[], None] = None):
+        self.__p = pybullet_client
+        self.__detect_collisions = detect_collisions
+        self.__contacts = None
+        self.__bodies = None
+
+    def invalidate(self):
+        """drop contacts of the previous step"""
+        self.__contacts = None
+        self.__bodies = None
+
+    @property
+    def contacts(self) -> np.ndarray:
+        """np.ndarray: all contacts of the step in both orientations sorted by ``body_a`` and ``link_a``"""
+        if self.__contacts is None:
+            self.__update()
+        return self.__contacts
+
+    def body_contacts(self, body_id: int, other_body_id: int = None) -> np.ndarray:
+        """Contacts of the body
+
+        Args:
+            body_id (int): body which contacts are requested, it is always ``body_a`` of the result
+            other_body_id (int, optional): only contacts with this body are returned. Defaults to None.
+
+        Returns:
+            np.ndarray: structured array of ``CONTACT_DTYPE``
+        """
+        contacts = self.contacts
+        begin, end = np.searchsorted(self.__bodies, [body_id, body_id + 1])
+        body_contacts = contacts[begin:end]
+        if other_body_id is not None:
+            body_contacts = body_contacts[body_contacts['body_b'] == other_body_id]
+        return body_contacts
+
+    def link_normal_forces(self, body_id: int, num_links: int) -> np.ndarray:
+        """Sum of normal forces applied to every link of the body
+
+        Args:
+            body_id (int): unique body id
+            num_links (int): number of links without the base
+
+        Returns:
+            np.ndarray: (num_links + 1,) forces, the first element corresponds to the base link
+        """
+        body_contacts = self.body_contacts(body_id)
+        return np.bincount(body_contacts['link_a'] + 1, weights=body_contacts['normal_force'], minlength=num_links + 1)
+
+    def wrench(self, body_id: int, reference_point: np.ndarray) -> np.ndarray:
+        """Total wrench applied to the body by contacts
+
+        Args:
+            body_id (int): unique body id
+            reference_point (np.ndarray): (3,) point in world space the torque is computed about
+
+        Returns:
+            np.ndarray: (6,) force and torque in world space
+        """
+        body_contacts = self.body_contacts(body_id)
+        forces = (
+            body_contacts['normal_force'][:, None] * body_contacts['normal_on_b']
+            + body_contacts['lateral_friction_1'][:, None] * body_contacts['lateral_friction_dir_1']
+            + body_contacts['lateral_friction_2'][:, None] * body_contacts['lateral_friction_dir_2']
+        )
+        torques = np.cross(body_contacts['position_on_a'] - reference_point, forces)
+        return np.concatenate([forces.sum(axis=0), torques.sum(axis=0)])
+
+    def __update(self):
+        if self.__detect_collisions is not None:
+            self.__detect_collisions()
+        raw_contacts = self.__p.getContactPoints()
+        num_substeps = max(self.__p.getPhysicsEngineParameters()['numSubSteps'], 1)
+        contacts = np.empty(2 * len(raw_contacts), dtype=CONTACT_DTYPE)
+        if len(raw_contacts) > 0:
+            _, body_a, body_b, link_a, link_b, position_on_a, position_on_b, normal_on_b, distance, normal_force, \
+                lateral_friction_1, lateral_friction_dir_1, lateral_friction_2, lateral_friction_dir_2 = zip(*raw_contacts)
+            n = len(raw_contacts)
+            direct, swapped = contacts[:n], contacts[n:]
+            direct['body_a'], swapped['body_b'] = body_a, body_a
+            direct['body_b'], swapped['body_a'] = body_b, body_b
+            direct['link_a'], swapped['link_b'] = link_a, link_a
+            direct['link_b'], swapped['link_a'] = link_b, link_b
+            direct['position_on_a'], swapped['position_on_b'] = position_on_a, position_on_a
+            direct['position_on_b'], swapped['position_on_a'] = position_on_b, position_on_b
+            direct['normal_on_b'] = normal_on_b
+            direct['lateral_friction_dir_1'] = lateral_friction_dir_1
+            direct['lateral_friction_dir_2'] = lateral_friction_dir_2
+            for field in ('normal_on_b', 'lateral_friction_dir_1', 'lateral_friction_dir_2'):
+                swapped[field] = -direct[field]
+            for field, values in (
+                ('distance', distance),
+                ('normal_force', normal_force),
+                ('lateral_friction_1', lateral_friction_1),
+                ('lateral_friction_2', lateral_friction_2)
+            ):
+                direct[field] = values
+                swapped[field] = values
+            for field in ('normal_force', 'lateral_friction_1', 'lateral_friction_2'):
+                direct[field] *= num_substeps
+                swapped[field] *= num_substeps
+        contacts = contacts[np.lexsort((contacts['link_a'], contacts['body_a']))]
+        self.__contacts = contacts
+        self.__bodies = contacts['body_a']
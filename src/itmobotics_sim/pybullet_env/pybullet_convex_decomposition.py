@@ -0,0 +1,218 @@
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import pybullet
+
+from itmobotics_sim.pybullet_env.urdf_editor import URDFEditor, resolve_mesh_filename
+
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')), 'itmobotics_sim', 'vhacd'
+)
+SUPPORTED_MESHES = ('.obj', '.stl')
+
+# Hashes of files by parameters and path with mtime and size of the hashed file, shared by all caches
+_FILE_HASHES = {}
+
+_STL_RECORD = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attribute', '<u2')])
+
+
+def read_stl(path: str) -> tuple:
+    """Read binary or ASCII STL mesh
+
+    Args:
+        path (str): path of the mesh
+
+    Returns:
+        tuple: (n, 3) unique vertices and (m, 3) vertex indices of triangles
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    # Binary files may also start with "solid", so the size is checked first
+    if len(data) >= 84 and len(data) == 84 + _STL_RECORD.itemsize * int(np.frombuffer(data, '<u4', 1, 80)[0]):
+        triangles = np.frombuffer(data, _STL_RECORD, offset=84)['vertices'].reshape(-1, 3)
+    else:
+        triangles = np.array(
+            [line.split()[1:4] for line in data.decode('utf-8').splitlines() if line.strip().startswith('vertex')],
+            dtype=np.float32
+        )
+    vertices, indices = np.unique(triangles, axis=0, return_inverse=True)
+    return vertices.astype(float), indices.reshape(-1, 3)
+
+
+def decomposable(mesh_filename: str) -> bool:
+    """Mesh file exists and its format is supported by the decomposition"""
+    return os.path.splitext(mesh_filename)[1].lower() in SUPPORTED_MESHES and os.path.isfile(mesh_filename)
+
+
+def write_obj(path: str, vertices: np.ndarray, faces: np.ndarray):
+    """Write triangle mesh to OBJ file
+
+    Args:
+        path (str): path of the created file
+        vertices (np.ndarray): (n, 3) vertices
+        faces (np.ndarray): (m, 3) zero-based vertex indices of triangles
+    """
+    with open(path, 'w') as f:
+        f.write(''.join('v {:.9g} {:.9g} {:.9g}\n'.format(*vertex) for vertex in vertices.tolist()))
+        f.write(''.join('f {:d} {:d} {:d}\n'.format(*face) for face in (faces + 1).tolist()))
+
+
+class ConvexDecompositionCache:
+    """Cache of convex decompositions of collision meshes
+
+    Collision meshes are decomposed by ``pybullet.vhacd`` into sets of convex hulls, which PyBullet
+    loads as compound shapes instead of concave triangle meshes. Decompositions are stored by the hash
+    of the mesh content and the V-HACD parameters, URDF files with collision tags rewritten to the
+    decomposed meshes are stored by the hash of the URDF, its collision meshes and the parameters.
+    ``PyBulletWorld`` loads the rewritten URDF instead of the original one when it is in the cache.
+    Meshes other than OBJ and STL are left as they are.
+
+    Args:
+        directory (str, optional): cache directory, ``$XDG_CACHE_HOME/itmobotics_sim/vhacd`` by default
+        **vhacd_params: keyword arguments of ``pybullet.vhacd``, e.g. ``resolution`` or ``maxNumVerticesPerCH``
+    """
+
+    def __init__(self, directory: str = None, **vhacd_params):
+        self.__directory = DEFAULT_CACHE_DIRECTORY if directory is None else directory
+        self.__vhacd_params = vhacd_params
+        self.__params_key = json.dumps(vhacd_params, sort_keys=True).encode('utf-8')
+
+    @property
+    def directory(self) -> str:
+        return self.__directory
+
+    def mesh_path(self, mesh_filename: str) -> str:
+        """Path of the decomposition of the mesh in the cache, the file may not exist"""
+        return os.path.join(self.__directory, 'meshes', self.__hash(mesh_filename) + '.obj')
+
+    def urdf_path(self, urdf_filename: str) -> str:
+        """Path of the rewritten URDF in the cache, the file may not exist"""
+        urdf_filename = os.path.abspath(urdf_filename)
+        key = hashlib.sha1(self.__params_key)
+        key.update(self.__hash(urdf_filename).encode('utf-8'))
+        for mesh_filename in self.__collision_meshes(URDFEditor(urdf_filename)):
+            key.update(self.__hash(mesh_filename).encode('utf-8'))
+        return os.path.join(self.__directory, 'urdf', key.hexdigest() + '.urdf')
+
+    def cached_urdf(self, urdf_filename: str) -> str:
+        """Rewritten URDF if it was processed with the same meshes and parameters
+
+        Args:
+            urdf_filename (str): path of the original URDF
+
+        Returns:
+            str: path of the rewritten URDF, None if it is not in the cache
+        """
+        if not os.path.isdir(self.__directory) or not os.path.isfile(urdf_filename):
+            return None
+        path = self.urdf_path(urdf_filename)
+        return path if os.path.exists(path) else None
+
+    def decompose(self, mesh_filename: str) -> str:
+        """Decompose the mesh if it is not in the cache
+
+        Args:
+            mesh_filename (str): path of OBJ or STL mesh
+
+        Returns:
+            str: path of the OBJ file with convex hulls
+        """
+        path = self.mesh_path(mesh_filename)
+        if os.path.exists(path):
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(path)) as directory:
+            source = mesh_filename
+            if os.path.splitext(mesh_filename)[1].lower() == '.stl':
+                source = os.path.join(directory, 'source.obj')
+                write_obj(source, *read_stl(mesh_filename))
+            result = os.path.join(directory, 'result.obj')
+            pybullet.vhacd(source, result, os.path.join(directory, 'vhacd.log'), **self.__vhacd_params)
+            # Other processes see either no file or the complete one
+            os.replace(result, path)
+        return path
+
+    def process_urdf(self, urdf_filename: str) -> str:
+        """Decompose collision meshes of the URDF and write the URDF rewritten to use them
+
+        Args:
+            urdf_filename (str): path of the original URDF
+
+        Returns:
+            str: path of the rewritten URDF in the cache
+        """
+        path = self.urdf_path(urdf_filename)
+        if os.path.exists(path):
+            return path
+        editor = URDFEditor(os.path.abspath(urdf_filename))
+        directory = os.path.dirname(editor.urdf_filename)
+        for collision in editor.element_tree.getroot().iter('collision'):
+            for mesh in collision.iter('mesh'):
+                filename = resolve_mesh_filename(mesh.attrib.get('filename', ''), directory)
+                if decomposable(filename):
+                    mesh.attrib['filename'] = self.decompose(filename)
+                    # Convex hulls replace the concave triangle mesh
+                    collision.attrib.pop('concave', None)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(editor.tostring(absolute_meshes=True))
+        os.replace(path + '.tmp', path)
+        return path
+
+    def __collision_meshes(self, editor: URDFEditor) -> list[str]:
+        directory = os.path.dirname(editor.urdf_filename)
+        meshes = []
+        for collision in editor.iter('collision'):
+            for mesh in collision.iter('mesh'):
+                filename = resolve_mesh_filename(mesh.attrib.get('filename', ''), directory)
+                if decomposable(filename):
+                    meshes.append(filename)
+        return meshes
+
+    def __hash(self, filename: str) -> str:
+        stat = os.stat(filename)
+        cached = _FILE_HASHES.get((self.__params_key, filename))
+        if cached is None or cached[0] != (stat.st_mtime_ns, stat.st_size):
+            key = hashlib.sha1(self.__params_key)
+            with open(filename, 'rb') as f:
+                key.update(f.read())
+            cached = ((stat.st_mtime_ns, stat.st_size), key.hexdigest())
+            _FILE_HASHES[(self.__params_key, filename)] = cached
+        return cached[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Decompose collision meshes of URDF files into convex hulls',
+        epilog='Worlds created with default arguments look up the cache directory with default V-HACD parameters. '
+            'A cache built with --resolution or --max-vertices is used only by worlds created with '
+            'collision_cache=ConvexDecompositionCache(directory, resolution=..., maxNumVerticesPerCH=...).'
+    )
+    parser.add_argument('urdf', nargs='+', help='URDF files to process')
+    parser.add_argument('--cache', default=None, help='cache directory, default: ' + DEFAULT_CACHE_DIRECTORY)
+    parser.add_argument(
+        '--resolution', type=int, default=None,
+        help='voxel resolution of V-HACD, the cache is found only by worlds given the same resolution'
+    )
+    parser.add_argument(
+        '--max-vertices', type=int, default=None,
+        help='maximum number of vertices per convex hull, the cache is found only by worlds given the same maximum'
+    )
+    args = parser.parse_args()
+
+    # Parameters are part of the cache key, so only given parameters are passed
+    vhacd_params = {'resolution': args.resolution, 'maxNumVerticesPerCH': args.max_vertices}
+    cache = ConvexDecompositionCache(args.cache, **{key: value for key, value in vhacd_params.items() if value is not None})
+    for urdf_filename in args.urdf:
+        print('{:s} -> {:s}'.format(urdf_filename, cache.process_urdf(urdf_filename)))
+
+
+if __name__ == "__main__":
+    main()
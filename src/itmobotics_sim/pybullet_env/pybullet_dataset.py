@@ -0,0 +1,298 @@
+from __future__ import annotations
+import json
+import os
+import shutil
+from typing import Callable, Iterator
+
+import numpy as np
+
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld
+
+
+INDEX_FILENAME = 'index.json'
+TIME_COLUMN = 'time'
+DATASET_MODES = ('create', 'overwrite', 'append')
+
+
+def joint_positions(robot_name: str) -> Callable[[PyBulletWorld], np.ndarray]:
+    """Column of joint positions of the robot"""
+    return lambda world: world.get_robot(robot_name).joint_state.joint_positions
+
+
+def joint_velocities(robot_name: str) -> Callable[[PyBulletWorld], np.ndarray]:
+    """Column of joint velocities of the robot"""
+    return lambda world: world.get_robot(robot_name).joint_state.joint_velocities
+
+
+def joint_torques(robot_name: str) -> Callable[[PyBulletWorld], np.ndarray]:
+    """Column of joint torques of the robot"""
+    return lambda world: world.get_robot(robot_name).joint_state.joint_torques
+
+
+def ee_transform(robot_name: str, ee_link: str, ref_frame: str = 'global') -> Callable[[PyBulletWorld], np.ndarray]:
+    """Column of 4x4 homogeneous transforms of the end effector"""
+    return lambda world: world.get_robot(robot_name).ee_state(ee_link, ref_frame).tf.A
+
+
+def ee_twist(robot_name: str, ee_link: str, ref_frame: str = 'global') -> Callable[[PyBulletWorld], np.ndarray]:
+    """Column of (6,) twists of the end effector"""
+    return lambda world: world.get_robot(robot_name).ee_state(ee_link, ref_frame).twist
+
+
+def camera_color(camera_name: str) -> Callable[[PyBulletWorld], np.ndarray]:
+    """Column of (height, width, 3) uint8 color images of the camera"""
+    return lambda world: world.get_image(camera_name)[0]
+
+
+def camera_depth(camera_name: str) -> Callable[[PyBulletWorld], np.ndarray]:
+    """Column of (height, width) depth buffers of the camera"""
+    return lambda world: world.get_image(camera_name)[1]
+
+
+class DatasetLogger:
+    """Logger of episodes into sharded memory-mapped columns
+
+    Every column is a function of the world returning an array of fixed type and shape,
+    which are taken from its first value. The simulation time is always logged as ``time`` column.
+    Rows are written into preallocated ``.npy`` files of the current shard, a new shard is started
+    when the current one reaches ``shard_size`` bytes. The index file lists shards and row ranges
+    of every finished episode, it is replaced atomically, so ``DatasetReader`` in other processes
+    never sees unfinished episodes. Attach the logger by ``PyBulletWorld.attach_logger``
+    to capture a row after every simulation step.
+
+    Args:
+        directory (str): directory of the dataset, it is created if necessary
+        columns (dict): function of the world for every column name
+        shard_size (int, optional): size of one shard in bytes. Defaults to 256 MiB.
+        mode (str, optional): ``create`` refuses a non-empty directory, ``overwrite`` removes the dataset
+            in the directory, ``append`` adds episodes with the same columns to it. Defaults to 'create'.
+    """
+
+    def __init__(self, directory: str, columns: dict, shard_size: int = 256 * 2**20, mode: str = 'create'):
+        assert TIME_COLUMN not in columns, "Column name '{:s}' is reserved for the simulation time".format(TIME_COLUMN)
+        for name in columns:
+            # Columns are stored as files named after them in every shard
+            assert _is_column_name(name), "Column name '{:s}' is not a valid file name".format(name)
+        assert mode in DATASET_MODES, "Unknown dataset mode: {:s}, available modes: {:s}".format(mode, str(DATASET_MODES))
+        self.__directory = directory
+        self.__columns = dict(columns)
+        self.__shard_size = shard_size
+        self.__schema = None
+        self.__shards = []
+        self.__episodes = []
+        self.__episode = None
+        self.__arrays = None
+        self.__rows = None
+        self.__appended_schema = None
+        index_path = os.path.join(directory, INDEX_FILENAME)
+        if mode == 'create' and os.path.isdir(directory) and len(os.listdir(directory)) > 0:
+            raise FileExistsError('Dataset directory is not empty: {:s}'.format(directory))
+        if mode == 'overwrite' and os.path.isdir(directory):
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                if _is_shard_name(name):
+                    shutil.rmtree(path)
+                elif name.startswith(INDEX_FILENAME):
+                    os.remove(path)
+        if mode == 'append' and os.path.exists(index_path):
+            with open(index_path) as f:
+                index = json.load(f)
+            # Rows are written to new shards, the existing ones stay untouched
+            self.__appended_schema = index['schema']
+            self.__shards = index['shards']
+            self.__episodes = index['episodes']
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def directory(self) -> str:
+        return self.__directory
+
+    @property
+    def num_episodes(self) -> int:
+        """int: number of finished episodes"""
+        return len(self.__episodes)
+
+    def begin_episode(self):
+        """start a new episode, the current one is finished"""
+        self.end_episode()
+        self.__episode = []
+
+    def end_episode(self):
+        """finish the current episode and write the index"""
+        if self.__episode is None:
+            return
+        if len(self.__episode) > 0:
+            for arrays in self.__arrays.values():
+                arrays.flush()
+            self.__episodes.append({
+                'length': sum(stop - start for _, start, stop in self.__episode),
+                'segments': self.__episode
+            })
+            self.__write_index()
+        self.__episode = None
+
+    def capture(self, world: PyBulletWorld):
+        """Append a row of all columns, an episode is started if there is no current one
+
+        Args:
+            world (PyBulletWorld): logged world
+        """
+        values = {name: column(world) for name, column in self.__columns.items()}
+        values[TIME_COLUMN] = world.sim_time
+        if self.__schema is None:
+            self.__schema = {
+                name: {'dtype': np.asarray(value).dtype.str, 'shape': list(np.shape(value))} for name, value in values.items()
+            }
+            assert self.__appended_schema is None or self.__appended_schema == self.__schema, \
+                "Columns differ from the columns of the appended dataset"
+        if self.__episode is None:
+            self.__episode = []
+        if self.__arrays is None or self.__shards[-1]['rows'] == self.__shards[-1]['capacity']:
+            self.__new_shard()
+
+        shard = self.__shards[-1]
+        row = shard['rows']
+        for name, value in values.items():
+            self.__rows[name][row] = value
+        shard['rows'] += 1
+        if len(self.__episode) > 0 and self.__episode[-1][0] == shard['id'] and self.__episode[-1][2] == row:
+            self.__episode[-1][2] = row + 1
+        else:
+            self.__episode.append([shard['id'], row, row + 1])
+
+    def close(self):
+        """finish the current episode and release shard files"""
+        self.end_episode()
+        if self.__arrays is not None:
+            for arrays in self.__arrays.values():
+                arrays.flush()
+            self.__arrays = None
+            self.__rows = None
+
+    def __new_shard(self):
+        if self.__arrays is not None:
+            for arrays in self.__arrays.values():
+                arrays.flush()
+        row_size = sum(
+            np.dtype(column['dtype']).itemsize * int(np.prod(column['shape'], dtype=int)) for column in self.__schema.values()
+        )
+        shard = {'id': len(self.__shards), 'rows': 0, 'capacity': max(self.__shard_size // row_size, 1)}
+        shard_directory = os.path.join(self.__directory, _shard_name(shard['id']))
+        os.makedirs(shard_directory, exist_ok=True)
+        self.__arrays = {
+            name: np.lib.format.open_memmap(
+                os.path.join(shard_directory, name + '.npy'),
+                mode='w+',
+                dtype=np.dtype(column['dtype']),
+                shape=(shard['capacity'], *column['shape'])
+            )
+            for name, column in self.__schema.items()
+        }
+        # Plain array views of the maps are written, item assignment of np.memmap is several times slower
+        self.__rows = {name: arrays.view(np.ndarray) for name, arrays in self.__arrays.items()}
+        self.__shards.append(shard)
+
+    def __write_index(self):
+        index = {'schema': self.__schema, 'shards': self.__shards, 'episodes': self.__episodes}
+        path = os.path.join(self.__directory, INDEX_FILENAME)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(index, f)
+        os.replace(path + '.tmp', path)
+
+
+class DatasetReader:
+    """Lazy reader of the dataset written by ``DatasetLogger``
+
+    Shard columns are memory-mapped on the first access, episodes are slices of them.
+    The reader is picklable, so it may be passed to worker processes, which open their own maps.
+
+    Args:
+        directory (str): directory of the dataset
+    """
+
+    def __init__(self, directory: str):
+        self.__directory = directory
+        self.__arrays = {}
+        self.refresh()
+
+    def __getstate__(self) -> dict:
+        return {'directory': self.__directory}
+
+    def __setstate__(self, state: dict):
+        self.__init__(state['directory'])
+
+    def refresh(self):
+        """read the index again to see episodes finished since the last read"""
+        with open(os.path.join(self.__directory, INDEX_FILENAME)) as f:
+            index = json.load(f)
+        self.__schema = index['schema']
+        self.__episodes = index['episodes']
+
+    @property
+    def schema(self) -> dict:
+        """dict: ``dtype`` and ``shape`` of every column"""
+        return self.__schema
+
+    @property
+    def column_names(self) -> list[str]:
+        return list(self.__schema.keys())
+
+    @property
+    def num_episodes(self) -> int:
+        return len(self.__episodes)
+
+    def episode_length(self, episode: int) -> int:
+        return self.__episodes[episode]['length']
+
+    def episode(self, episode: int, columns: list[str] = None) -> dict:
+        """Columns of the episode
+
+        Args:
+            episode (int): index of the episode
+            columns (list[str], optional): requested columns, all columns by default
+
+        Returns:
+            dict: (length, ...) array for every column name, read-only memory-mapped view
+                if the episode is stored in one shard
+        """
+        columns = self.column_names if columns is None else columns
+        segments = self.__episodes[episode]['segments']
+        result = {}
+        for name in columns:
+            parts = [self.__column(shard, name)[start:stop] for shard, start, stop in segments]
+            result[name] = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        return result
+
+    def iter_episodes(self, columns: list[str] = None, episodes: list[int] = None) -> Iterator[dict]:
+        """Read episodes one by one
+
+        Args:
+            columns (list[str], optional): requested columns, all columns by default
+            episodes (list[int], optional): indices of the episodes, all episodes by default
+
+        Yields:
+            Iterator[dict]: columns of the episode, see ``episode``
+        """
+        episodes = range(self.num_episodes) if episodes is None else episodes
+        for episode in episodes:
+            yield self.episode(episode, columns)
+
+    def __column(self, shard: int, name: str) -> np.ndarray:
+        if (shard, name) not in self.__arrays:
+            self.__arrays[(shard, name)] = np.load(
+                os.path.join(self.__directory, _shard_name(shard), name + '.npy'), mmap_mode='r'
+            )
+        return self.__arrays[(shard, name)]
+
+
+def _shard_name(shard: int) -> str:
+    return 'shard_{:05d}'.format(shard)
+
+
+def _is_column_name(name: str) -> bool:
+    separators = [separator for separator in (os.sep, os.altsep) if separator is not None]
+    return name not in ('', '.', '..') and not any(separator in name for separator in separators) and '\0' not in name
+
+
+def _is_shard_name(name: str) -> bool:
+    return name.startswith('shard_') and name[len('shard_'):].isdigit()
@@ -0,0 +1,154 @@
+from __future__ import annotations
+from typing import Callable, Tuple
+
+import numpy as np
+
+import pybullet_utils.bullet_client as bc
+
+from itmobotics_sim.pybullet_env import pybullet_collision
+
+
+class DistanceMonitor:
+    """Minimum distances between links of a robot and registered obstacles
+
+    Distances are computed lazily once after every invalidation. Pairs of robot link and obstacle link
+    which bounding boxes are farther than ``max_distance`` are pruned before the narrow phase.
+    Links without obstacles closer than ``max_distance`` have ``inf`` distance.
+
+    Args:
+        pybullet_client (bc.BulletClient): client of the simulated world
+        resolve (Callable[[], Tuple[int, list[int], list[int]]]): returns current robot body id,
+            indices of monitored links and body ids of obstacles
+        link_names (list[str]): names of monitored links
+        obstacle_names (list[str]): names of obstacle models
+        max_distance (float): distance above which pairs are not evaluated
+    """
+
+    def __init__(
+        self,
+        pybullet_client: bc.BulletClient,
+        resolve: Callable[[], Tuple[int, list, list]],
+        link_names: list[str],
+        obstacle_names: list[str],
+        max_distance: float
+    ):
+        self.__p = pybullet_client
+        self.__resolve = resolve
+        self.__link_names = list(link_names)
+        self.__obstacle_names = list(obstacle_names)
+        self.__max_distance = max_distance
+        self.__distances = None
+        self.__points_on_robot = None
+        self.__points_on_obstacles = None
+
+    def invalidate(self):
+        """drop distances of the previous step"""
+        self.__distances = None
+
+    @property
+    def link_names(self) -> list[str]:
+        """list[str]: names of monitored links, rows of the distance array"""
+        return self.__link_names
+
+    @property
+    def obstacle_names(self) -> list[str]:
+        """list[str]: names of obstacles, columns of the distance array"""
+        return self.__obstacle_names
+
+    @property
+    def max_distance(self) -> float:
+        return self.__max_distance
+
+    @property
+    def distances(self) -> np.ndarray:
+        """np.ndarray: (n_links, n_obstacles) minimum distances, negative for penetration"""
+        if self.__distances is None:
+            self.__update()
+        return self.__distances
+
+    @property
+    def points_on_robot(self) -> np.ndarray:
+        """np.ndarray: (n_links, n_obstacles, 3) closest points on robot links in world space"""
+        if self.__distances is None:
+            self.__update()
+        return self.__points_on_robot
+
+    @property
+    def points_on_obstacles(self) -> np.ndarray:
+        """np.ndarray: (n_links, n_obstacles, 3) closest points on obstacles in world space"""
+        if self.__distances is None:
+            self.__update()
+        return self.__points_on_obstacles
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """np.ndarray: (n_links, n_obstacles, 3) vectors from robot links to the closest obstacle points"""
+        return self.points_on_obstacles - self.points_on_robot
+
+    @property
+    def min_distance(self) -> float:
+        """float: minimum distance over all links and obstacles"""
+        distances = self.distances
+        return float(distances.min()) if distances.size > 0 else np.inf
+
+    def __update(self):
+        robot_id, link_ids, obstacle_ids = self.__resolve()
+        shape = (len(link_ids), len(obstacle_ids))
+        distances = np.full(shape, np.inf)
+        points_on_robot = np.full(shape + (3,), np.nan)
+        points_on_obstacles = np.full(shape + (3,), np.nan)
+
+        if distances.size > 0:
+            # BulletClient resolves every attribute access, so methods are looked up once per update
+            get_aabb = self.__p.getAABB
+            get_closest_points = self.__p.getClosestPoints
+
+            link_min = np.empty((len(link_ids), 3))
+            link_max = np.empty((len(link_ids), 3))
+            for i, link_id in enumerate(link_ids):
+                link_min[i], link_max[i] = get_aabb(robot_id, link_id)
+
+            obstacle_index, obstacle_links, obstacle_min, obstacle_max = [], [], [], []
+            for j, body_id in enumerate(obstacle_ids):
+                body_links, body_min, body_max = pybullet_collision.link_aabbs(self.__p, body_id)
+                obstacle_index.append(np.full(body_links.shape[0], j))
+                obstacle_links.append(body_links)
+                obstacle_min.append(body_min)
+                obstacle_max.append(body_max)
+            obstacle_index = np.concatenate(obstacle_index)
+            obstacle_links = np.concatenate(obstacle_links)
+            obstacle_min = np.concatenate(obstacle_min)
+            obstacle_max = np.concatenate(obstacle_max)
+
+            # Distance between boxes is the lower bound of the distance between enclosed shapes
+            gap = np.maximum(
+                np.maximum(obstacle_min[None, :, :] - link_max[:, None, :], link_min[:, None, :] - obstacle_max[None, :, :]),
+                0.0
+            )
+            lower_bound = np.linalg.norm(gap, axis=2)
+            candidates = np.argwhere(lower_bound <= self.__max_distance)
+            candidates = candidates[np.argsort(lower_bound[candidates[:, 0], candidates[:, 1]], kind='stable')]
+
+            # The nearest boxes are checked first, so the found distance prunes the rest of the pairs
+            for i, k in candidates:
+                j = obstacle_index[k]
+                if lower_bound[i, k] > distances[i, j]:
+                    continue
+                closest_points = get_closest_points(
+                    robot_id,
+                    bodyB = obstacle_ids[j],
+                    distance = min(self.__max_distance, distances[i, j]),
+                    linkIndexA = link_ids[i],
+                    linkIndexB = int(obstacle_links[k])
+                )
+                if len(closest_points) == 0:
+                    continue
+                closest = min(closest_points, key=lambda cp: cp[8])
+                if closest[8] < distances[i, j]:
+                    distances[i, j] = closest[8]
+                    points_on_robot[i, j] = closest[5]
+                    points_on_obstacles[i, j] = closest[6]
+
+        self.__distances = distances
+        self.__points_on_robot = points_on_robot
+        self.__points_on_obstacles = points_on_obstacles
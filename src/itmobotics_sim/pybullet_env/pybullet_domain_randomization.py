@@ -0,0 +1,265 @@
+from __future__ import annotations
+import json
+
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld
+
+
+# Keyword arguments of changeDynamics and indices in getDynamicsInfo
+DYNAMICS_PROPERTIES = {
+    'mass': ('mass', 0),
+    'lateral_friction': ('lateralFriction', 1),
+    'restitution': ('restitution', 5),
+    'rolling_friction': ('rollingFriction', 6),
+    'spinning_friction': ('spinningFriction', 7),
+    'linear_damping': ('linearDamping', None),
+    'angular_damping': ('angularDamping', None),
+    'joint_damping': ('jointDamping', None),
+}
+GAIN_PROPERTIES = ('kp', 'kd', 'max_torque')
+POSE_PROPERTIES = ('base_position', 'base_orientation')
+# Damping of bodies is not reported by PyBullet, this is its default value
+DEFAULT_DAMPING = 0.04
+
+
+class Uniform:
+    """Uniform distribution in [low, high), bounds are broadcast to the shape of the property"""
+
+    def __init__(self, low, high):
+        self.low = np.asarray(low, dtype=float)
+        self.high = np.asarray(high, dtype=float)
+
+    def sample(self, rng: np.random.Generator, size: tuple) -> np.ndarray:
+        return rng.uniform(self.low, self.high, size)
+
+    def to_dict(self) -> dict:
+        return {'type': 'uniform', 'low': self.low.tolist(), 'high': self.high.tolist()}
+
+
+class LogUniform:
+    """Distribution which logarithm is uniform in [log(low), log(high)), e.g. for gains and stiffness"""
+
+    def __init__(self, low, high):
+        self.low = np.asarray(low, dtype=float)
+        self.high = np.asarray(high, dtype=float)
+
+    def sample(self, rng: np.random.Generator, size: tuple) -> np.ndarray:
+        return np.exp(rng.uniform(np.log(self.low), np.log(self.high), size))
+
+    def to_dict(self) -> dict:
+        return {'type': 'log_uniform', 'low': self.low.tolist(), 'high': self.high.tolist()}
+
+
+class Normal:
+    """Normal distribution clipped to [low, high]"""
+
+    def __init__(self, mean, std, low=-np.inf, high=np.inf):
+        self.mean = np.asarray(mean, dtype=float)
+        self.std = np.asarray(std, dtype=float)
+        self.low = np.asarray(low, dtype=float)
+        self.high = np.asarray(high, dtype=float)
+
+    def sample(self, rng: np.random.Generator, size: tuple) -> np.ndarray:
+        return np.clip(rng.normal(self.mean, self.std, size), self.low, self.high)
+
+    def to_dict(self) -> dict:
+        return {
+            'type': 'normal', 'mean': self.mean.tolist(), 'std': self.std.tolist(),
+            'low': self.low.tolist(), 'high': self.high.tolist()
+        }
+
+
+class DomainRandomizer:
+    """Randomization of dynamics, joint controller gains and base poses of world models
+
+    Every term is a distribution of one property of a model link. ``sample`` draws the values of all terms
+    for a number of episodes at once, ``apply`` sets the values of one episode without reloading models:
+    dynamics of every link are changed by one ``changeDynamics`` call, gains are set to
+    ``PyBulletRobot.joint_controller_params`` and poses by ``resetBasePositionAndOrientation``.
+    The samples are kept as applied values, so they can be saved and applied again in another run.
+
+    Properties:
+        * ``mass``, ``lateral_friction``, ``restitution``, ``rolling_friction``, ``spinning_friction``,
+          ``linear_damping``, ``angular_damping`` of the link, the inertia is scaled with the mass
+        * ``joint_damping`` of the joint of the link
+        * ``kp``, ``kd``, ``max_torque`` of the robot, sampled for every actuator
+        * ``base_position`` [x, y, z] and ``base_orientation`` [roll, pitch, yaw] of the model,
+          the orientation is stored as quaternion [x, y, z, w]
+
+    Args:
+        world (PyBulletWorld): world of the randomized models
+        seed (int, optional): seed of the random generator. Defaults to None.
+    """
+
+    def __init__(self, world: PyBulletWorld, seed: int = None):
+        self.__world = world
+        self.__p = world.client
+        self.__seed = seed
+        self.__rng = np.random.default_rng(seed)
+        self.__terms = {}
+        self.__samples = None
+
+    @property
+    def term_names(self) -> list[str]:
+        """list[str]: names of the terms ``<model>/<link>/<property>``, the base link is named ``base``"""
+        return list(self.__terms.keys())
+
+    @property
+    def num_episodes(self) -> int:
+        """int: number of sampled episodes"""
+        return 0 if self.__samples is None else next(iter(self.__samples.values())).shape[0]
+
+    @property
+    def samples(self) -> dict:
+        """dict: (n_episodes, ...) applied values for every term name"""
+        return self.__samples
+
+    def add(self, model_name: str, property_name: str, distribution, link: str = None, relative: bool = False) -> str:
+        """Add randomized property, nominal values are read from the world when the term is added
+
+        Args:
+            model_name (str): name of robot or object
+            property_name (str): randomized property, see the class description
+            distribution: ``Uniform``, ``LogUniform``, ``Normal`` or other object with ``sample(rng, size)``
+            link (str, optional): link name, the base link by default
+            relative (bool, optional): samples scale nominal dynamics and gains or offset nominal poses
+                instead of replacing them. Defaults to False.
+
+        Returns:
+            str: name of the term
+        """
+        assert property_name in DYNAMICS_PROPERTIES or property_name in GAIN_PROPERTIES or property_name in POSE_PROPERTIES,\
+            "Unknown property: {:s}".format(property_name)
+        body_id = self.__world.model_id(model_name)
+        link_id = -1 if link is None else self.__world.link_id(model_name, link)
+        term = {
+            'model': model_name, 'link': link, 'property': property_name,
+            'distribution': distribution, 'relative': relative, 'shape': ()
+        }
+        if property_name in GAIN_PROPERTIES:
+            assert link is None, "Gains are randomized for all actuators of the robot"
+            term['nominal'] = np.array(self.__world.get_robot(model_name).joint_controller_params[property_name], dtype=float)
+            term['shape'] = term['nominal'].shape
+        elif property_name in POSE_PROPERTIES:
+            assert link is None, "Poses are randomized for the base of the model"
+            position, orientation = self.__p.getBasePositionAndOrientation(body_id)
+            term['nominal'] = np.array(position if property_name == 'base_position' else orientation)
+            term['shape'] = (3,)
+        elif property_name == 'joint_damping':
+            assert link is not None, "Joint damping is randomized for the joint of the link"
+            term['nominal'] = self.__p.getJointInfo(body_id, link_id)[6]
+        else:
+            index = DYNAMICS_PROPERTIES[property_name][1]
+            dynamics = self.__p.getDynamicsInfo(body_id, link_id)
+            term['nominal'] = DEFAULT_DAMPING if index is None else dynamics[index]
+            if property_name == 'mass':
+                term['inertia'] = np.array(dynamics[2])
+
+        name = '{:s}/{:s}/{:s}'.format(model_name, 'base' if link is None else link, property_name)
+        self.__terms[name] = term
+        self.__samples = None
+        return name
+
+    def sample(self, n_episodes: int) -> dict:
+        """Draw values of all terms for the episodes
+
+        Args:
+            n_episodes (int): number of episodes
+
+        Returns:
+            dict: (n_episodes, ...) applied values for every term name
+        """
+        samples = {}
+        for name, term in self.__terms.items():
+            values = term['distribution'].sample(self.__rng, (n_episodes, *term['shape']))
+            if term['property'] == 'base_orientation':
+                rotations = R.from_euler('xyz', values)
+                if term['relative']:
+                    rotations = rotations * R.from_quat(term['nominal'])
+                values = rotations.as_quat()
+            elif term['relative'] and term['property'] == 'base_position':
+                values = term['nominal'] + values
+            elif term['relative']:
+                values = term['nominal'] * values
+            samples[name] = values
+        self.__samples = samples
+        return samples
+
+    def parameters(self, episode: int) -> dict:
+        """Applied values of the episode for every term name"""
+        return {name: values[episode] for name, values in self.__samples.items()}
+
+    def apply(self, episode: int):
+        """Set sampled values of the episode to the world models
+
+        Args:
+            episode (int): index of the sampled episode
+        """
+        assert self.__samples is not None, "Values were not sampled"
+        dynamics = {}
+        gains = {}
+        poses = {}
+        for name, term in self.__terms.items():
+            value = self.__samples[name][episode]
+            property_name = term['property']
+            if property_name in GAIN_PROPERTIES:
+                gains.setdefault(term['model'], {})[property_name] = value
+            elif property_name in POSE_PROPERTIES:
+                poses.setdefault(term['model'], {})[property_name] = value.tolist()
+            else:
+                kwargs = dynamics.setdefault((term['model'], term['link']), {})
+                kwargs[DYNAMICS_PROPERTIES[property_name][0]] = float(value)
+                if property_name == 'mass' and term['nominal'] > 0.0:
+                    kwargs['localInertiaDiagonal'] = (term['inertia'] * (value / term['nominal'])).tolist()
+
+        model_id = self.__world.model_id
+        change_dynamics = self.__p.changeDynamics
+        for (model_name, link), kwargs in dynamics.items():
+            link_id = -1 if link is None else self.__world.link_id(model_name, link)
+            change_dynamics(model_id(model_name), link_id, **kwargs)
+        for model_name, model_gains in gains.items():
+            robot = self.__world.get_robot(model_name)
+            params = dict(robot.joint_controller_params)
+            params.update(model_gains)
+            robot.joint_controller_params = params
+        for model_name, pose in poses.items():
+            body_id = model_id(model_name)
+            position, orientation = self.__p.getBasePositionAndOrientation(body_id)
+            self.__p.resetBasePositionAndOrientation(
+                body_id, pose.get('base_position', position), pose.get('base_orientation', orientation)
+            )
+
+    def save(self, path: str):
+        """Save sampled values with the description of terms to ``.npz`` file
+
+        Args:
+            path (str): path of the file
+        """
+        assert self.__samples is not None, "Values were not sampled"
+        terms = {
+            name: {
+                'model': term['model'], 'link': term['link'], 'property': term['property'],
+                'relative': term['relative'], 'distribution': term['distribution'].to_dict()
+                if hasattr(term['distribution'], 'to_dict') else repr(term['distribution'])
+            }
+            for name, term in self.__terms.items()
+        }
+        np.savez(
+            path,
+            terms=np.array(json.dumps({'seed': self.__seed, 'terms': terms})),
+            **{'values/' + name: values for name, values in self.__samples.items()}
+        )
+
+    def load(self, path: str):
+        """Load values saved by ``save`` instead of sampling, the terms should be added in advance
+
+        Args:
+            path (str): path of the ``.npz`` file
+        """
+        with np.load(path) as data:
+            samples = {key[len('values/'):]: data[key] for key in data.files if key.startswith('values/')}
+        if set(samples.keys()) != set(self.__terms.keys()):
+            raise KeyError('Saved terms {:s} do not match terms {:s}'.format(str(sorted(samples)), str(self.term_names)))
+        self.__samples = samples
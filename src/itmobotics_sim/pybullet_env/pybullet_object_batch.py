@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+
+import pybullet_utils.bullet_client as bc
+
+from itmobotics_sim.pybullet_env.urdf_editor import URDFEditor
+
+
+class ShapeTemplate:
+    """Shapes and dynamics of a single-link URDF reused for batched body creation
+
+    The URDF is loaded once, its collision and visual shapes are created again from the shape data
+    of the loaded body, which is removed afterwards. Shapes live until the simulation is reset.
+
+    Args:
+        pybullet_client (bc.BulletClient): client of the simulated world
+        urdf_filename (str): path of the URDF
+        scale_size (float): global scaling of the URDF
+    """
+
+    def __init__(self, pybullet_client: bc.BulletClient, urdf_filename: str, scale_size: float):
+        self.__p = pybullet_client
+        body_id = self.__p.loadURDF(urdf_filename, globalScaling=scale_size)
+        try:
+            dynamics = self.__p.getDynamicsInfo(body_id, -1)
+            self.mass = dynamics[0]
+            self.inertial_position = np.array(dynamics[3])
+            self.inertial_orientation = np.array(dynamics[4])
+            self.dynamics = {
+                'lateralFriction': dynamics[1],
+                'localInertiaDiagonal': dynamics[2],
+                'restitution': dynamics[5],
+                'rollingFriction': dynamics[6],
+                'spinningFriction': dynamics[7],
+                'collisionMargin': dynamics[11],
+            }
+            if dynamics[9] >= 0:
+                self.dynamics.update(contactStiffness=dynamics[9], contactDamping=dynamics[8])
+            self.collision_shape = self.__create_collision_shape(self.__p.getCollisionShapeData(body_id, -1))
+            self.visual_shape = self.__create_visual_shape(self.__p.getVisualShapeData(body_id))
+        finally:
+            self.__p.removeBody(body_id)
+
+    @staticmethod
+    def batchable(urdf_filename: str) -> bool:
+        """URDF has one link with at most one convex collision and one visual geometry"""
+        editor = URDFEditor(urdf_filename)
+        if len(editor.kinematic_tree.links) != 1 or len(editor.kinematic_tree.joints) > 0:
+            return False
+        collisions = list(editor.iter('collision'))
+        # Concave triangle meshes are created only by the URDF importer
+        if len(collisions) > 1 or any(collision.attrib.get('concave') == 'yes' for collision in collisions):
+            return False
+        return len(list(editor.iter('visual'))) <= 1
+
+    def __create_collision_shape(self, shapes: tuple) -> int:
+        if len(shapes) == 0:
+            return -1
+        _, _, geometry, dimensions, filename, position, orientation = shapes[0][:7]
+        # Collision frames are reported relative to the inertial frame, they are created relative to the link frame
+        inertial = R.from_quat(self.inertial_orientation)
+        return self.__p.createCollisionShape(
+            geometry,
+            collisionFramePosition=(self.inertial_position + inertial.apply(position)).tolist(),
+            collisionFrameOrientation=(inertial * R.from_quat(orientation)).as_quat().tolist(),
+            **self.__geometry(geometry, dimensions, filename, 'height')
+        )
+
+    def __create_visual_shape(self, shapes: tuple) -> int:
+        if len(shapes) == 0:
+            return -1
+        _, _, geometry, dimensions, filename, position, orientation, rgba = shapes[0][:8]
+        return self.__p.createVisualShape(
+            geometry,
+            visualFramePosition=position,
+            visualFrameOrientation=orientation,
+            rgbaColor=rgba,
+            **self.__geometry(geometry, dimensions, filename, 'length')
+        )
+
+    def __geometry(self, geometry: int, dimensions: tuple, filename: bytes, length_name: str) -> dict:
+        if geometry == self.__p.GEOM_SPHERE:
+            return {'radius': dimensions[0]}
+        if geometry == self.__p.GEOM_BOX:
+            return {'halfExtents': [d / 2.0 for d in dimensions]}
+        if geometry in (self.__p.GEOM_CYLINDER, self.__p.GEOM_CAPSULE):
+            return {'radius': dimensions[1], length_name: dimensions[0]}
+        if geometry == self.__p.GEOM_MESH:
+            return {'fileName': filename.decode('utf-8'), 'meshScale': dimensions}
+        return {'planeNormal': dimensions}
+
+    def spawn(self, transforms: np.ndarray, fixed: bool) -> np.ndarray:
+        """Create bodies with one batched call
+
+        Args:
+            transforms (np.ndarray): (n, 4, 4) homogeneous transforms of the link frames
+            fixed (bool): bodies have zero mass
+
+        Returns:
+            np.ndarray: (n,) body ids
+        """
+        rotations = R.from_matrix(transforms[:, :3, :3])
+        # Bodies are placed by their inertial frames
+        positions = transforms[:, :3, 3] + rotations.apply(self.inertial_position)
+        orientations = (rotations * R.from_quat(self.inertial_orientation)).as_quat()
+        body_ids = self.__p.createMultiBody(
+            baseMass=0.0 if fixed else self.mass,
+            baseCollisionShapeIndex=self.collision_shape,
+            baseVisualShapeIndex=self.visual_shape,
+            baseInertialFramePosition=self.inertial_position.tolist(),
+            baseInertialFrameOrientation=self.inertial_orientation.tolist(),
+            batchPositions=positions.tolist()
+        )
+        body_ids = np.atleast_1d(np.asarray(body_ids, dtype=int))
+        reset_base = self.__p.resetBasePositionAndOrientation
+        change_dynamics = self.__p.changeDynamics
+        for body_id, position, orientation in zip(body_ids.tolist(), positions.tolist(), orientations.tolist()):
+            reset_base(body_id, position, orientation)
+            change_dynamics(body_id, -1, **self.dynamics)
+        return body_ids
+
+
+class ObjectBatch:
+    """Objects of one URDF added by ``PyBulletWorld.add_objects``
+
+    The objects are named ``<name_prefix>_<index>``, their body ids and initial transforms are kept
+    in arrays instead of per-object entries. Removed objects have body id -1.
+
+    Args:
+        name_prefix (str): prefix of the object names
+        urdf_filename (str): path of the URDF
+        transforms (np.ndarray): (n, 4, 4) homogeneous transforms of the objects
+        fixed (bool): objects have fixed base
+        save (bool): objects are spawned again after the world reset
+        scale_size (float): global scaling of the URDF
+    """
+
+    def __init__(
+        self,
+        name_prefix: str,
+        urdf_filename: str,
+        transforms: np.ndarray,
+        fixed: bool,
+        save: bool,
+        scale_size: float
+    ):
+        transforms = np.asarray(transforms, dtype=float)
+        assert transforms.ndim == 3 and transforms.shape[1:] == (4, 4), "Transforms should have (N, 4, 4) shape"
+        self.name_prefix = name_prefix
+        self.urdf_filename = urdf_filename
+        self.transforms = transforms
+        self.fixed = fixed
+        self.save = save
+        self.scale_size = scale_size
+        self.ids = np.full(transforms.shape[0], -1, dtype=int)
+        self.link_id = {}
+        self.load_count = 0
+        self.__names = None
+
+    def __len__(self) -> int:
+        return self.ids.shape[0]
+
+    @property
+    def names(self) -> list[str]:
+        """list[str]: names of the objects which were not removed"""
+        # Names are used by the world on every model lookup, so they are kept until the ids change
+        if self.__names is None:
+            self.__names = ['{:s}_{:d}'.format(self.name_prefix, i) for i in np.flatnonzero(self.ids >= 0).tolist()]
+        return self.__names
+
+    def remove(self, index: int):
+        """Mark the object as removed, its body should be removed by the caller
+
+        Args:
+            index (int): index of the object in the batch
+        """
+        self.ids[index] = -1
+        self.__names = None
+
+    def index(self, name: str) -> int:
+        """Index of the object in the batch
+
+        Args:
+            name (str): object name
+
+        Returns:
+            int: index of the object, None if the name does not belong to the batch or the object was removed
+        """
+        prefix, _, index = name.rpartition('_')
+        if prefix != self.name_prefix or not index.isdigit():
+            return None
+        index = int(index)
+        if index >= self.ids.shape[0] or self.ids[index] < 0:
+            return None
+        return index
+
+    def spawn(self, pybullet_client: bc.BulletClient, urdf_filename: str, template: ShapeTemplate, load_count: int):
+        """Create bodies of the objects
+
+        Args:
+            pybullet_client (bc.BulletClient): client of the simulated world
+            urdf_filename (str): URDF loaded for every object when there is no template
+            template (ShapeTemplate): shapes of the URDF for batched creation, None to load the URDF one by one
+            load_count (int): number of the body load
+        """
+        if template is not None and len(self) > 0:
+            self.ids = template.spawn(self.transforms, self.fixed)
+        else:
+            rotations = R.from_matrix(self.transforms[:, :3, :3]).as_quat().tolist()
+            self.ids = np.array([
+                pybullet_client.loadURDF(
+                    urdf_filename,
+                    basePosition=position,
+                    baseOrientation=orientation,
+                    useFixedBase=self.fixed,
+                    globalScaling=self.scale_size,
+                    flags=pybullet_client.URDF_ENABLE_CACHED_GRAPHICS_SHAPES
+                )
+                for position, orientation in zip(self.transforms[:, :3, 3].tolist(), rotations)
+            ], dtype=int)
+            if self.ids.shape[0] > 0:
+                body_id = int(self.ids[0])
+                self.link_id = {
+                    pybullet_client.getJointInfo(body_id, joint_id)[12].decode('utf-8'): joint_id
+                    for joint_id in range(pybullet_client.getNumJoints(body_id))
+                }
+        self.load_count = load_count
+        self.__names = None
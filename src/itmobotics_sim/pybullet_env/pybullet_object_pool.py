@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import pybullet_utils.bullet_client as bc
+
+from itmobotics_sim.pybullet_env.pybullet_collision_filter import load_group_mask
+
+
+class ObjectPool:
+    """Pool of parked bodies reused by objects of the same URDF
+
+    A released body is not removed: it is moved to the parking position, its collisions are disabled
+    and the base of a dynamic body gets zero mass, so it is static and costs nothing in the simulation step.
+    An acquired body gets its mass, collisions and zero velocities back and is moved to the requested pose,
+    which takes microseconds instead of a URDF load. Bodies are parked by key, usually
+    (URDF filename, scale, fixed base, force-torque sensors), and are lost when the simulation is reset.
+
+    Args:
+        pybullet_client (bc.BulletClient): client of the simulated world
+        parking_position (tuple, optional): position of parked bodies far from the scene. Defaults to (0, 0, -1000).
+    """
+
+    def __init__(self, pybullet_client: bc.BulletClient, parking_position: tuple = (0.0, 0.0, -1000.0)):
+        self.__p = pybullet_client
+        self.__parking_position = list(parking_position)
+        self.__parked = {}
+        # Mass and inertia of dynamic bases, which are zeroed while the body is parked
+        self.__dynamics = {}
+        # Collision filter group and mask of every link restored by acquire
+        self.__filters = {}
+        self.__hits = 0
+        self.__misses = 0
+
+    @property
+    def num_parked(self) -> int:
+        """int: number of bodies waiting for reuse"""
+        return sum(len(bodies) for bodies in self.__parked.values())
+
+    @property
+    def stats(self) -> dict:
+        """dict: number of ``hits`` (reused bodies) and ``misses`` (acquisitions without parked body)"""
+        return {'hits': self.__hits, 'misses': self.__misses, 'parked': self.num_parked}
+
+    def acquire(self, key: tuple, position: list, orientation: list) -> int:
+        """Take a parked body and place it into the scene
+
+        Args:
+            key (tuple): key the body was released with
+            position (list): base position [x, y, z]
+            orientation (list): base orientation quaternion [x, y, z, w]
+
+        Returns:
+            int: body id, None if there is no parked body with the key
+        """
+        bodies = self.__parked.get(key)
+        if not bodies:
+            self.__misses += 1
+            return None
+        self.__hits += 1
+        body_id = bodies.pop()
+        num_joints = self.__p.getNumJoints(body_id)
+        if body_id in self.__dynamics:
+            mass, inertia = self.__dynamics.pop(body_id)
+            self.__p.changeDynamics(body_id, -1, mass=mass, localInertiaDiagonal=inertia)
+        self.__p.resetBasePositionAndOrientation(body_id, position, orientation)
+        self.__p.resetBaseVelocity(body_id, [0.0, 0.0, 0.0], [0.0, 0.0, 0.0])
+        if num_joints > 0:
+            # Joints start at zero like in a loaded URDF
+            self.__p.resetJointStatesMultiDof(
+                body_id, list(range(num_joints)), [[0.0]] * num_joints, targetVelocities=[[0.0]] * num_joints
+            )
+        for link_id, (group, mask) in enumerate(self.__filters.pop(body_id), start=-1):
+            self.__p.setCollisionFilterGroupMask(body_id, link_id, group, mask)
+        return body_id
+
+    def release(self, key: tuple, body_id: int, fixed: bool):
+        """Park the body for reuse
+
+        Args:
+            key (tuple): key of acquisitions which may reuse the body
+            body_id (int): unique body id
+            fixed (bool): body has fixed base, its mass is kept
+        """
+        link_ids = range(-1, self.__p.getNumJoints(body_id))
+        self.__filters[body_id] = [load_group_mask(self.__p, body_id, link_id) for link_id in link_ids]
+        for link_id in link_ids:
+            self.__p.setCollisionFilterGroupMask(body_id, link_id, 0, 0)
+        if not fixed:
+            dynamics = self.__p.getDynamicsInfo(body_id, -1)
+            self.__dynamics[body_id] = (dynamics[0], dynamics[2])
+            self.__p.changeDynamics(body_id, -1, mass=0.0)
+        self.__p.resetBasePositionAndOrientation(body_id, self.__parking_position, [0.0, 0.0, 0.0, 1.0])
+        self.__parked.setdefault(key, []).append(body_id)
+
+    def clear(self, remove_bodies: bool = False):
+        """Forget parked bodies
+
+        Args:
+            remove_bodies (bool, optional): remove parked bodies from the simulation,
+                bodies are already gone after ``resetSimulation``. Defaults to False.
+        """
+        if remove_bodies:
+            for bodies in self.__parked.values():
+                for body_id in bodies:
+                    self.__p.removeBody(body_id)
+        self.__parked = {}
+        self.__dynamics = {}
+        self.__filters = {}
@@ -0,0 +1,414 @@
+from __future__ import annotations
+import heapq
+import time
+
+import numpy as np
+
+from itmobotics_sim.utils.trajectory import sample_times, trapezoidal_scaling, trapezoidal_profile
+from itmobotics_sim.pybullet_env.pybullet_collision_checker import CollisionChecker
+
+
+def sampling_limits(checker: CollisionChecker) -> tuple:
+    """Joint limits of the checker with joints without limits sampled in [-pi, pi]"""
+    lower, upper = checker.joint_limits
+    return np.where(np.isfinite(lower), lower, -np.pi), np.where(np.isfinite(upper), upper, np.pi)
+
+
+def shortcut_path(
+    checker: CollisionChecker,
+    path: np.ndarray,
+    iterations: int = 50,
+    resolution: float = 0.05,
+    seed: int = None
+) -> np.ndarray:
+    """Replace parts of the path by straight collision-free motions
+
+    Waypoints are removed first greedily: every waypoint is connected with the farthest reachable one.
+    Random pairs of points on the path segments are connected afterwards.
+
+    Args:
+        checker (CollisionChecker): collision checker of the planned robot
+        path (np.ndarray): (k, n_joints) waypoints
+        iterations (int, optional): number of random shortcuts. Defaults to 50.
+        resolution (float, optional): maximal joint motion between checked configurations. Defaults to 0.05.
+        seed (int, optional): seed of the random generator. Defaults to None.
+
+    Returns:
+        np.ndarray: (m, n_joints) shortened path with the same start and goal
+    """
+    path = _remove_waypoints(checker, np.asarray(path, dtype=float), resolution)
+    rng = np.random.default_rng(seed)
+    for _ in range(iterations):
+        if path.shape[0] <= 2:
+            break
+        # Points on two different segments of the path
+        i, j = np.sort(rng.choice(path.shape[0] - 1, 2, replace=False))
+        a, b = rng.uniform(size=2)
+        start = path[i] + a * (path[i + 1] - path[i])
+        end = path[j] + b * (path[j + 1] - path[j])
+        old_length = np.linalg.norm(start - path[i + 1]) + np.linalg.norm(path[j] - end) +\
+            np.sum(np.linalg.norm(np.diff(path[i + 1:j + 1], axis=0), axis=1))
+        if np.linalg.norm(end - start) >= old_length or not checker.check_edges(start, end, resolution)[0]:
+            continue
+        path = np.concatenate([path[:i + 1], [start, end], path[j + 1:]])
+    return _remove_waypoints(checker, path, resolution)
+
+
+def _remove_waypoints(checker: CollisionChecker, path: np.ndarray, resolution: float) -> np.ndarray:
+    waypoints = [0]
+    while waypoints[-1] < path.shape[0] - 2:
+        # Edges from the waypoint to all later ones are checked as one batch
+        i = waypoints[-1]
+        valid = checker.check_edges(np.broadcast_to(path[i], path[i + 2:].shape), path[i + 2:], resolution)
+        # The next edge of the path was checked by the planner, possibly at other configurations
+        waypoints.append(i + 2 + int(np.flatnonzero(valid)[-1]) if np.any(valid) else i + 1)
+    if waypoints[-1] != path.shape[0] - 1:
+        waypoints.append(path.shape[0] - 1)
+    return path[waypoints]
+
+
+def time_parameterize(
+    path: np.ndarray,
+    max_velocities: np.ndarray,
+    max_accelerations: np.ndarray,
+    time_step: float
+) -> tuple:
+    """Sample the path with trapezoidal velocity profiles of its segments
+
+    The robot stops at every waypoint, so it moves along the straight segments checked by the planner.
+    Joints of a segment are synchronized by the slowest one.
+
+    Args:
+        path (np.ndarray): (k, n_joints) waypoints
+        max_velocities (np.ndarray): (n_joints,) velocity limits
+        max_accelerations (np.ndarray): (n_joints,) acceleration limits
+        time_step (float): sampling period, usually the control period
+
+    Returns:
+        tuple: (T,) times, (T, n_joints) positions and (T, n_joints) velocities, the last sample is the goal
+    """
+    path = np.asarray(path, dtype=float)
+    deltas = np.diff(path, axis=0)
+    # Velocity and acceleration of the segment parameter s in [0, 1]
+    velocities, accelerations, durations = trapezoidal_scaling(deltas, max_velocities, max_accelerations)
+    starts = np.concatenate([[0.0], np.cumsum(durations)])
+
+    times = sample_times(starts[-1], time_step)
+    segments = np.clip(np.searchsorted(starts, times, side='right') - 1, 0, deltas.shape[0] - 1)
+    s, ds, _ = trapezoidal_profile(
+        times - starts[segments], velocities[segments], accelerations[segments], durations[segments]
+    )
+    positions = path[segments] + s[:, np.newaxis] * deltas[segments]
+    return times, positions, ds[:, np.newaxis] * deltas[segments]
+
+
+class RRTConnect:
+    """Bidirectional RRT with greedy connection of the trees
+
+    Trees grow from the start and the goal in turns: one tree extends to a random configuration,
+    the other one connects to the new node. Nodes are kept in preallocated arrays and every
+    extension checks its discretized motion as one batch of the collision checker.
+
+    Args:
+        checker (CollisionChecker): collision checker of the planned robot
+        step_size (float, optional): maximal joint-space length of an extension. Defaults to 0.5.
+        resolution (float, optional): maximal joint motion between checked configurations. Defaults to 0.05.
+        max_nodes (int, optional): capacity of every tree. Defaults to 10000.
+        seed (int, optional): seed of the random generator. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        checker: CollisionChecker,
+        step_size: float = 0.5,
+        resolution: float = 0.05,
+        max_nodes: int = 10000,
+        seed: int = None
+    ):
+        self.__checker = checker
+        self.__step_size = step_size
+        self.__resolution = resolution
+        self.__max_nodes = max_nodes
+        self.__rng = np.random.default_rng(seed)
+        self.__lower, self.__upper = sampling_limits(checker)
+        self.__num_nodes = 0
+
+    @property
+    def num_nodes(self) -> int:
+        """int: number of nodes in both trees of the last query"""
+        return self.__num_nodes
+
+    def plan(self, start: np.ndarray, goal: np.ndarray, max_time: float = 10.0) -> np.ndarray:
+        """Find a collision-free path
+
+        Args:
+            start (np.ndarray): (n_joints,) start configuration
+            goal (np.ndarray): (n_joints,) goal configuration
+            max_time (float, optional): time limit in seconds. Defaults to 10.0.
+
+        Returns:
+            np.ndarray: (k, n_joints) waypoints from the start to the goal, None when the start or the goal
+                is invalid or no path was found in time
+        """
+        deadline = time.perf_counter() + max_time
+        start = np.asarray(start, dtype=float)
+        goal = np.asarray(goal, dtype=float)
+        self.__num_nodes = 0
+        if not np.all(self.__checker.check(np.stack([start, goal]))):
+            return None
+        if self.__checker.check_edges(start, goal, self.__resolution)[0]:
+            return np.stack([start, goal])
+
+        start_tree = self.__tree(start)
+        trees = [start_tree, self.__tree(goal)]
+        while time.perf_counter() < deadline:
+            tree, other = trees
+            if tree['size'] >= self.__max_nodes or other['size'] >= self.__max_nodes:
+                break
+            target = self.__rng.uniform(self.__lower, self.__upper)
+            node = self.__extend(tree, target, self.__step_size)
+            if node is not None:
+                # The other tree connects to the new node as far as possible
+                other_node = self.__extend(other, tree['nodes'][node], np.inf)
+                if other_node is not None and np.allclose(other['nodes'][other_node], tree['nodes'][node]):
+                    self.__num_nodes = tree['size'] + other['size']
+                    path = np.concatenate([self.__branch(tree, node), self.__branch(other, other_node)[-2::-1]])
+                    return path if tree is start_tree else path[::-1]
+            trees.reverse()
+        self.__num_nodes = trees[0]['size'] + trees[1]['size']
+        return None
+
+    def __tree(self, root: np.ndarray) -> dict:
+        nodes = np.empty((self.__max_nodes, root.shape[0]))
+        nodes[0] = root
+        parents = np.full(self.__max_nodes, -1, dtype=int)
+        return {'nodes': nodes, 'parents': parents, 'size': 1}
+
+    def __extend(self, tree: dict, target: np.ndarray, step_size: float) -> int:
+        """Grow the tree from its nearest node towards the target by at most ``step_size``
+
+        The motion is discretized and checked as one batch, the tree gets nodes every ``step_size``
+        of the planner up to the last valid configuration. Returns the last added node, None if no node was added.
+        """
+        size = tree['size']
+        nodes = tree['nodes']
+        nearest = int(np.argmin(np.sum((nodes[:size] - target)**2, axis=1)))
+        delta = target - nodes[nearest]
+        distance = np.linalg.norm(delta)
+        if distance > step_size:
+            delta *= step_size / distance
+            distance = step_size
+        num_steps = max(int(np.ceil(np.max(np.abs(delta)) / self.__resolution)), 1)
+        configurations = nodes[nearest] + np.outer(np.arange(1, num_steps + 1) / num_steps, delta)
+        valid = self.__checker.check(configurations)
+        num_valid = num_steps if np.all(valid) else int(np.argmin(valid))
+        if num_valid == 0:
+            return None
+        # Nodes of a long connection are spaced by the extension step
+        spacing = max(int(num_steps * min(self.__step_size / max(distance, 1e-12), 1.0)), 1)
+        indices = list(range(spacing - 1, num_valid, spacing))
+        if len(indices) == 0 or indices[-1] != num_valid - 1:
+            indices.append(num_valid - 1)
+        parent = nearest
+        for i in indices[:self.__max_nodes - size]:
+            nodes[tree['size']] = configurations[i]
+            tree['parents'][tree['size']] = parent
+            parent = tree['size']
+            tree['size'] += 1
+        return parent if parent != nearest else None
+
+    def __branch(self, tree: dict, node: int) -> np.ndarray:
+        indices = []
+        while node >= 0:
+            indices.append(node)
+            node = tree['parents'][node]
+        return tree['nodes'][indices[::-1]]
+
+
+class LazyPRM:
+    """Probabilistic roadmap with edges checked only when they are on a found path
+
+    Sampled nodes are checked as one batch, nodes are connected with their nearest neighbors without
+    checking the edges. A query searches the shortest path by A*, checks its unknown edges as one batch,
+    which is split between workers of the checker, and searches again without invalid edges.
+    The roadmap is densified by new samples when there is no path, it is kept for the next queries
+    while the scene of the checker does not change.
+
+    Args:
+        checker (CollisionChecker): collision checker of the planned robot
+        num_samples (int, optional): number of samples added to the roadmap at once. Defaults to 1000.
+        num_neighbors (int, optional): number of neighbors connected with every node. Defaults to 10.
+        resolution (float, optional): maximal joint motion between checked configurations. Defaults to 0.05.
+        seed (int, optional): seed of the random generator. Defaults to None.
+    """
+
+    UNKNOWN = 0
+    VALID = 1
+    INVALID = 2
+
+    def __init__(
+        self,
+        checker: CollisionChecker,
+        num_samples: int = 1000,
+        num_neighbors: int = 10,
+        resolution: float = 0.05,
+        seed: int = None
+    ):
+        self.__checker = checker
+        self.__num_samples = num_samples
+        self.__num_neighbors = num_neighbors
+        self.__resolution = resolution
+        self.__rng = np.random.default_rng(seed)
+        self.__lower, self.__upper = sampling_limits(checker)
+        self.__nodes = np.zeros((0, checker.num_joints))
+        self.__adjacency = []
+        self.__edges = {}
+
+    @property
+    def num_nodes(self) -> int:
+        return self.__nodes.shape[0]
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.__edges)
+
+    @property
+    def nodes(self) -> np.ndarray:
+        """np.ndarray: (num_nodes, n_joints) configurations of the roadmap"""
+        return self.__nodes
+
+    @property
+    def num_checked_edges(self) -> int:
+        """int: number of edges which were checked for collisions"""
+        return sum(state != self.UNKNOWN for state in self.__edges.values())
+
+    def clear(self):
+        """Forget the roadmap, e.g. after ``CollisionChecker.sync``"""
+        self.__nodes = np.zeros((0, self.__checker.num_joints))
+        self.__adjacency = []
+        self.__edges = {}
+
+    def grow(self, num_samples: int = None):
+        """Add valid samples to the roadmap
+
+        Args:
+            num_samples (int, optional): number of samples, ``num_samples`` of the planner by default
+        """
+        num_samples = self.__num_samples if num_samples is None else num_samples
+        samples = self.__rng.uniform(self.__lower, self.__upper, (num_samples, self.__checker.num_joints))
+        self.__add_nodes(samples[self.__checker.check(samples)])
+
+    def plan(self, start: np.ndarray, goal: np.ndarray, max_time: float = 10.0) -> np.ndarray:
+        """Find a collision-free path
+
+        Args:
+            start (np.ndarray): (n_joints,) start configuration
+            goal (np.ndarray): (n_joints,) goal configuration
+            max_time (float, optional): time limit in seconds. Defaults to 10.0.
+
+        Returns:
+            np.ndarray: (k, n_joints) waypoints from the start to the goal, None when the start or the goal
+                is invalid or no path was found in time
+        """
+        deadline = time.perf_counter() + max_time
+        start = np.asarray(start, dtype=float)
+        goal = np.asarray(goal, dtype=float)
+        if not np.all(self.__checker.check(np.stack([start, goal]))):
+            return None
+        if self.num_nodes == 0:
+            self.grow()
+        query = np.stack([start, goal])
+        self.__add_nodes(query)
+        # Query nodes are always the last ones, new samples are added before them
+        query_added = True
+        try:
+            while time.perf_counter() < deadline:
+                path = self.__search(self.num_nodes - 2, self.num_nodes - 1)
+                if path is None:
+                    self.__remove_last_nodes(2)
+                    query_added = False
+                    self.grow()
+                    self.__add_nodes(query)
+                    query_added = True
+                    continue
+                edges = [self.__key(a, b) for a, b in zip(path[:-1], path[1:])]
+                unknown = [edge for edge in edges if self.__edges[edge] == self.UNKNOWN]
+                if len(unknown) > 0:
+                    first_nodes, last_nodes = np.array(unknown).T
+                    valid = self.__checker.check_edges(
+                        self.__nodes[first_nodes], self.__nodes[last_nodes], self.__resolution
+                    )
+                    for edge, edge_valid in zip(unknown, valid.tolist()):
+                        self.__edges[edge] = self.VALID if edge_valid else self.INVALID
+                if all(self.__edges[edge] == self.VALID for edge in edges):
+                    return self.__nodes[path]
+            return None
+        finally:
+            # Query nodes are not kept in the roadmap
+            if query_added:
+                self.__remove_last_nodes(2)
+
+    def __key(self, a: int, b: int) -> tuple:
+        return (a, b) if a < b else (b, a)
+
+    def __add_nodes(self, nodes: np.ndarray):
+        first = self.num_nodes
+        self.__nodes = np.concatenate([self.__nodes, nodes])
+        self.__adjacency.extend([] for _ in range(nodes.shape[0]))
+        if self.num_nodes < 2:
+            return
+        k = min(self.__num_neighbors, self.num_nodes - 1)
+        # Distances of new nodes to all nodes are computed in blocks to bound the memory
+        for block in range(first, self.num_nodes, 1024):
+            queries = self.__nodes[block:block + 1024]
+            distances = np.sum(queries**2, axis=1)[:, np.newaxis] - 2.0 * queries @ self.__nodes.T +\
+                np.sum(self.__nodes**2, axis=1)
+            distances[np.arange(queries.shape[0]), np.arange(block, block + queries.shape[0])] = np.inf
+            neighbors = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            for i, node_neighbors in enumerate(neighbors.tolist()):
+                a = block + i
+                for b in node_neighbors:
+                    key = self.__key(a, b)
+                    if key not in self.__edges:
+                        self.__edges[key] = self.UNKNOWN
+                        self.__adjacency[a].append(b)
+                        self.__adjacency[b].append(a)
+
+    def __remove_last_nodes(self, count: int):
+        first = self.num_nodes - count
+        for a in range(first, self.num_nodes):
+            for b in self.__adjacency[a]:
+                self.__edges.pop(self.__key(a, b), None)
+                if b < first:
+                    self.__adjacency[b].remove(a)
+        self.__nodes = self.__nodes[:first]
+        del self.__adjacency[first:]
+
+    def __search(self, start: int, goal: int) -> list:
+        """A* over edges which are not known to be invalid"""
+        nodes = self.__nodes
+        heuristic = np.linalg.norm(nodes - nodes[goal], axis=1)
+        costs = {start: 0.0}
+        parents = {start: -1}
+        queue = [(heuristic[start], start)]
+        closed = set()
+        while queue:
+            _, a = heapq.heappop(queue)
+            if a == goal:
+                path = []
+                while a >= 0:
+                    path.append(a)
+                    a = parents[a]
+                return path[::-1]
+            if a in closed:
+                continue
+            closed.add(a)
+            for b in self.__adjacency[a]:
+                if b in closed or self.__edges[self.__key(a, b)] == self.INVALID:
+                    continue
+                cost = costs[a] + float(np.linalg.norm(nodes[a] - nodes[b]))
+                if cost < costs.get(b, np.inf):
+                    costs[b] = cost
+                    parents[b] = a
+                    heapq.heappush(queue, (cost + heuristic[b], b))
+        return None
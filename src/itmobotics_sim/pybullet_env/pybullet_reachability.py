@@ -0,0 +1,381 @@
+from __future__ import annotations
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld
+from itmobotics_sim.pybullet_env.pybullet_collision_checker import ShadowScene, scene_description
+
+
+def sphere_directions(n: int) -> np.ndarray:
+    """Nearly uniform unit vectors of the Fibonacci sphere
+
+    Args:
+        n (int): number of directions
+
+    Returns:
+        np.ndarray: (n, 3) unit vectors
+    """
+    i = np.arange(n) + 0.5
+    z = 1.0 - 2.0 * i / n
+    angle = np.pi * (1.0 + np.sqrt(5.0)) * i
+    radius = np.sqrt(1.0 - z**2)
+    return np.stack([radius * np.cos(angle), radius * np.sin(angle), z], axis=1)
+
+
+class ReachabilityMap:
+    """Voxelized reachability and manipulability of an end-effector link
+
+    Every voxel keeps the approach directions, i.e. directions of the link z-axis, in which its center
+    was reached, and the best manipulability of reaching configurations. Lookups compute voxel and
+    direction indices of the poses and take the values from arrays, so their cost does not depend on
+    the map size. Files keep directions as bits and manipulability as float16.
+
+    Args:
+        origin (np.ndarray): (3,) lower corner of the mapped box
+        resolution (float): edge length of voxels
+        shape (tuple): number of voxels along x, y and z
+        directions (np.ndarray): (n_directions, 3) unit approach directions
+        metadata (dict, optional): description of the robot and link. Defaults to None.
+    """
+
+    def __init__(self, origin: np.ndarray, resolution: float, shape: tuple, directions: np.ndarray, metadata: dict = None):
+        self.origin = np.asarray(origin, dtype=float)
+        self.resolution = float(resolution)
+        self.shape = tuple(int(n) for n in shape)
+        self.directions = np.asarray(directions, dtype=float)
+        self.metadata = {} if metadata is None else dict(metadata)
+        self.reachable = np.zeros(self.shape + (self.directions.shape[0],), dtype=bool)
+        self.manipulability = np.zeros(self.shape, dtype=np.float32)
+
+    @property
+    def reachability(self) -> np.ndarray:
+        """np.ndarray: fraction of reached approach directions of every voxel"""
+        return self.reachable.mean(axis=3)
+
+    def voxel_indices(self, positions: np.ndarray) -> tuple:
+        """Voxels of the positions
+
+        Args:
+            positions (np.ndarray): (B, 3) positions
+
+        Returns:
+            tuple: (B, 3) voxel indices and (B,) mask of positions inside the map
+        """
+        indices = np.floor((np.asarray(positions, dtype=float) - self.origin) / self.resolution).astype(int)
+        inside = np.all((indices >= 0) & (indices < self.shape), axis=1)
+        return np.where(inside[:, np.newaxis], indices, 0), inside
+
+    def direction_indices(self, directions: np.ndarray) -> np.ndarray:
+        """Nearest approach directions of the map
+
+        Args:
+            directions (np.ndarray): (B, 3) unit vectors
+
+        Returns:
+            np.ndarray: (B,) direction indices
+        """
+        return np.argmax(np.asarray(directions, dtype=float) @ self.directions.T, axis=1)
+
+    def voxel_centers(self, indices: np.ndarray) -> np.ndarray:
+        """(B, 3) positions of voxel centers by (B, 3) voxel indices"""
+        return self.origin + (np.asarray(indices) + 0.5) * self.resolution
+
+    def add(self, positions: np.ndarray, directions: np.ndarray, manipulability: np.ndarray):
+        """Mark link poses as reached
+
+        Args:
+            positions (np.ndarray): (B, 3) link positions
+            directions (np.ndarray): (B, 3) link z-axes
+            manipulability (np.ndarray): (B,) manipulability of the reaching configurations
+        """
+        indices, inside = self.voxel_indices(positions)
+        indices = indices[inside]
+        x, y, z = indices.T
+        self.reachable[x, y, z, self.direction_indices(np.asarray(directions)[inside])] = True
+        np.maximum.at(self.manipulability, (x, y, z), np.asarray(manipulability, dtype=np.float32)[inside])
+
+    def lookup(self, poses: np.ndarray) -> tuple:
+        """Reachability and manipulability of poses
+
+        Args:
+            poses (np.ndarray): (B, 3) positions or (B, 4, 4) homogeneous transforms of the link
+
+        Returns:
+            tuple: (B,) reachability and (B,) manipulability, reachability of positions is the fraction of
+                reached directions of their voxels, of transforms it is 1.0 if the direction of their z-axis
+                was reached. Poses outside the map have zeros.
+        """
+        poses = np.asarray(poses, dtype=float)
+        transforms = poses.ndim == 3
+        indices, inside = self.voxel_indices(poses[:, :3, 3] if transforms else poses.reshape(-1, 3))
+        x, y, z = indices.T
+        if transforms:
+            reachability = self.reachable[x, y, z, self.direction_indices(poses[:, :3, 2])].astype(float)
+        else:
+            reachability = self.reachable[x, y, z].mean(axis=1)
+        return np.where(inside, reachability, 0.0), np.where(inside, self.manipulability[x, y, z], 0.0)
+
+    def save(self, path: str):
+        """Save the map to compressed ``.npz`` file
+
+        Args:
+            path (str): path of the file
+        """
+        header = {
+            'origin': self.origin.tolist(),
+            'resolution': self.resolution,
+            'shape': list(self.shape),
+            'metadata': self.metadata,
+        }
+        np.savez_compressed(
+            path,
+            header=np.array(json.dumps(header)),
+            directions=self.directions,
+            reachable=np.packbits(self.reachable, axis=3),
+            manipulability=self.manipulability.astype(np.float16)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> ReachabilityMap:
+        """Load the map saved by ``save``
+
+        Args:
+            path (str): path of the ``.npz`` file
+
+        Returns:
+            ReachabilityMap: loaded map
+        """
+        with np.load(path) as data:
+            header = json.loads(str(data['header']))
+            reachability_map = cls(header['origin'], header['resolution'], header['shape'], data['directions'], header['metadata'])
+            num_directions = reachability_map.directions.shape[0]
+            reachability_map.reachable = np.unpackbits(data['reachable'], axis=3, count=num_directions).astype(bool)
+            reachability_map.manipulability = data['manipulability'].astype(np.float32)
+        return reachability_map
+
+
+class _Kinematics:
+    """Forward and inverse kinematics of the link on a shadow copy of the robot"""
+
+    def __init__(self, description: dict, link_id: int):
+        self.__scene = ShadowScene(description)
+        self.__p = self.__scene.client
+        self.__robot_id = self.__scene.robot_id
+        self.__joint_ids = self.__scene.joint_ids
+        self.__link_id = link_id
+        self.__lower, self.__upper = self.__scene.joint_limits
+
+    @property
+    def joint_limits(self) -> tuple:
+        """tuple: lower and upper position limits, joints without limits are sampled in [-pi, pi]"""
+        return np.where(np.isfinite(self.__lower), self.__lower, -np.pi), np.where(np.isfinite(self.__upper), self.__upper, np.pi)
+
+    def forward(self, configurations: np.ndarray) -> tuple:
+        """(B, 3) positions, (B, 3) z-axes and (B,) manipulability of the link"""
+        configurations = np.asarray(configurations, dtype=float)
+        positions = np.empty((configurations.shape[0], 3))
+        orientations = np.empty((configurations.shape[0], 4))
+        manipulability = np.empty(configurations.shape[0])
+        robot_id, link_id, joint_ids = self.__robot_id, self.__link_id, self.__joint_ids
+        reset_joints = self.__p.resetJointStatesMultiDof
+        link_state = self.__p.getLinkState
+        jacobian = self.__p.calculateJacobian
+        zeros = [0.0] * len(joint_ids)
+        for i, q in enumerate(configurations.tolist()):
+            reset_joints(robot_id, joint_ids, [[x] for x in q])
+            state = link_state(robot_id, link_id, computeForwardKinematics=True)
+            positions[i] = state[4]
+            orientations[i] = state[5]
+            jac_t, jac_r = jacobian(robot_id, link_id, [0.0, 0.0, 0.0], q, zeros, zeros)
+            J = np.vstack([jac_t, jac_r])
+            manipulability[i] = np.sqrt(max(np.linalg.det(J @ J.T), 0.0))
+        return positions, R.from_quat(orientations).as_matrix()[:, :, 2], manipulability
+
+    def inverse(self, positions: np.ndarray, directions: np.ndarray, seeds: np.ndarray, max_iterations: int) -> tuple:
+        """(B, n_joints) solutions for the link positions and z-axes, (B, 3) positions, (B, 3) z-axes
+        and (B,) manipulability of the solutions"""
+        # Orientations turn the z-axis to the directions by the shortest rotation
+        z = np.array([0.0, 0.0, 1.0])
+        axes = np.cross(z, directions)
+        norms = np.linalg.norm(axes, axis=1)
+        angles = np.arctan2(norms, directions @ z)
+        axes = np.where(norms[:, np.newaxis] > 1e-9, axes / np.maximum(norms, 1e-9)[:, np.newaxis], [1.0, 0.0, 0.0])
+        orientations = R.from_rotvec(axes * angles[:, np.newaxis]).as_quat()
+        robot_id, link_id, joint_ids = self.__robot_id, self.__link_id, self.__joint_ids
+        reset_joints = self.__p.resetJointStatesMultiDof
+        inverse_kinematics = self.__p.calculateInverseKinematics
+        solutions = np.empty_like(seeds)
+        # Iterations start from the seeds, usually configurations which reached the voxel in another direction
+        for i, (position, orientation, seed) in enumerate(zip(positions.tolist(), orientations.tolist(), seeds.tolist())):
+            reset_joints(robot_id, joint_ids, [[x] for x in seed])
+            solutions[i] = inverse_kinematics(
+                robot_id, link_id, position, orientation, maxNumIterations=max_iterations, residualThreshold=1e-4
+            )
+        # IK of PyBullet ignores joint limits without null space, so solutions are clipped and their poses computed again
+        solutions = np.clip(solutions, self.__lower, self.__upper)
+        return (solutions,) + self.forward(solutions)
+
+    def close(self):
+        self.__scene.close()
+
+
+# Kinematics of a worker process
+_WORKER_KINEMATICS = None
+
+
+def _init_worker(description: dict, link_id: int):
+    global _WORKER_KINEMATICS
+    _WORKER_KINEMATICS = _Kinematics(description, link_id)
+
+
+def _forward_in_worker(configurations: np.ndarray) -> tuple:
+    return _WORKER_KINEMATICS.forward(configurations)
+
+
+def _inverse_in_worker(args: tuple) -> tuple:
+    return _WORKER_KINEMATICS.inverse(*args)
+
+
+class ReachabilityMapBuilder:
+    """Builder of the reachability map of a robot link
+
+    ``sample`` marks link poses of random joint configurations within the joint limits, ``solve_ik``
+    fills approach directions which were not sampled in already reached voxels by inverse kinematics
+    seeded with the sampled configurations.
+    Kinematics is computed on a shadow copy of the robot without obstacles, batches are split between
+    worker processes when ``num_workers`` is set.
+
+    Args:
+        world (PyBulletWorld): world of the robot
+        robot_name (str): name of the robot
+        link (str): name of the mapped link, e.g. the end-effector
+        resolution (float, optional): edge length of voxels. Defaults to 0.05.
+        bounds (tuple, optional): lower and upper corners of the mapped box, the box around the base
+            with the reach of the link estimated by sampling by default
+        num_directions (int, optional): number of approach directions. Defaults to 32.
+        num_workers (int, optional): number of worker processes, 0 to compute in this process. Defaults to 0.
+        seed (int, optional): seed of the random generator. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        world: PyBulletWorld,
+        robot_name: str,
+        link: str,
+        resolution: float = 0.05,
+        bounds: tuple = None,
+        num_directions: int = 32,
+        num_workers: int = 0,
+        seed: int = None
+    ):
+        self.__description = scene_description(world, robot_name, obstacle_names=[], self_collision=False)
+        self.__link_id = world.link_id(robot_name, link)
+        self.__kinematics = _Kinematics(self.__description, self.__link_id)
+        self.__rng = np.random.default_rng(seed)
+        self.__lower, self.__upper = self.__kinematics.joint_limits
+        self.__num_workers = num_workers
+        self.__executor = None
+
+        if bounds is None:
+            base = np.array(self.__description['robot']['position'])
+            positions, _, _ = self.__kinematics.forward(self.__random_configurations(1000))
+            reach = np.max(np.linalg.norm(positions - base, axis=1)) + resolution
+            bounds = (base - reach, base + reach)
+        origin = np.asarray(bounds[0], dtype=float)
+        shape = np.maximum(np.ceil((np.asarray(bounds[1], dtype=float) - origin) / resolution).astype(int), 1)
+        metadata = {'urdf_filename': self.__description['robot']['urdf_filename'], 'link': link,
+                    'base_position': self.__description['robot']['position'],
+                    'base_orientation': self.__description['robot']['orientation']}
+        self.__map = ReachabilityMap(origin, resolution, shape, sphere_directions(num_directions), metadata)
+        self.__seeds = np.zeros(self.__map.shape + (self.__lower.shape[0],), dtype=np.float32)
+
+    def __enter__(self) -> ReachabilityMapBuilder:
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def map(self) -> ReachabilityMap:
+        return self.__map
+
+    def __random_configurations(self, n: int) -> np.ndarray:
+        return self.__rng.uniform(self.__lower, self.__upper, (n, self.__lower.shape[0]))
+
+    def __map_batches(self, function, worker_function, batches: list) -> list:
+        if self.__num_workers == 0:
+            return [function(*batch) if isinstance(batch, tuple) else function(batch) for batch in batches]
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(
+                max_workers=self.__num_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.__description, self.__link_id)
+            )
+        return list(self.__executor.map(worker_function, batches))
+
+    def sample(self, num_samples: int, batch_size: int = 5000):
+        """Mark link poses of random configurations
+
+        Args:
+            num_samples (int): number of configurations
+            batch_size (int, optional): configurations of one batch of a worker. Defaults to 5000.
+        """
+        configurations = self.__random_configurations(num_samples)
+        batches = np.array_split(configurations, max(int(np.ceil(num_samples / batch_size)), self.__num_workers, 1))
+        results = self.__map_batches(self.__kinematics.forward, _forward_in_worker, batches)
+        for batch, (positions, directions, manipulability) in zip(batches, results):
+            self.__add(batch, positions, directions, manipulability)
+
+    def solve_ik(self, max_iterations: int = 20, batch_size: int = 1000) -> int:
+        """Solve inverse kinematics for unreached approach directions of reached voxels
+
+        IK of every voxel starts from the configuration with the best manipulability which reached the voxel.
+        A direction is reached when the solution places the link into the voxel and its z-axis is the nearest
+        to the direction.
+
+        Args:
+            max_iterations (int, optional): iterations of one IK solution. Defaults to 20.
+            batch_size (int, optional): targets of one batch of a worker. Defaults to 1000.
+
+        Returns:
+            int: number of newly reached (voxel, direction) cells
+        """
+        reachable = self.__map.reachable
+        x, y, z, d = np.nonzero(np.any(reachable, axis=3)[..., np.newaxis] & ~reachable)
+        voxels = np.stack([x, y, z], axis=1)
+        positions = self.__map.voxel_centers(voxels)
+        directions = self.__map.directions[d]
+        seeds = self.__seeds[x, y, z].astype(float)
+        batches = [
+            (positions[i:i + batch_size], directions[i:i + batch_size], seeds[i:i + batch_size], max_iterations)
+            for i in range(0, positions.shape[0], batch_size)
+        ]
+        before = int(np.count_nonzero(reachable))
+        results = self.__map_batches(self.__kinematics.inverse, _inverse_in_worker, batches)
+        for i, (solutions, reached_positions, reached_directions, manipulability) in zip(range(0, positions.shape[0], batch_size), results):
+            indices, inside = self.__map.voxel_indices(reached_positions)
+            reached = inside & np.all(indices == voxels[i:i + batch_size], axis=1) &\
+                (self.__map.direction_indices(reached_directions) == d[i:i + batch_size])
+            self.__add(solutions[reached], reached_positions[reached], reached_directions[reached], manipulability[reached])
+        return int(np.count_nonzero(self.__map.reachable)) - before
+
+    def __add(self, configurations: np.ndarray, positions: np.ndarray, directions: np.ndarray, manipulability: np.ndarray):
+        # Configurations with the best manipulability of every voxel are kept as IK seeds
+        indices, inside = self.__map.voxel_indices(positions)
+        order = np.flatnonzero(inside)[np.argsort(manipulability[inside])]
+        x, y, z = indices[order].T
+        better = manipulability[order] >= self.__map.manipulability[x, y, z]
+        self.__seeds[x[better], y[better], z[better]] = configurations[order[better]]
+        self.__map.add(positions, directions, manipulability)
+
+    def close(self):
+        """Stop workers and disconnect the shadow copy"""
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
+        self.__kinematics.close()
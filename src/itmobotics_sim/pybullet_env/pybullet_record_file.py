@@ -0,0 +1,317 @@
+from __future__ import annotations
+import json
+import os
+import pickle
+import struct
+from typing import Tuple
+
+import numpy as np
+
+
+MAGIC = b'ITMREC01'
+_HEADER_SIZE_FORMAT = '<Q'
+_ALIGNMENT = 8
+_QUATERNION_SCALE = np.iinfo(np.int16).max
+NO_LINK = -1
+
+
+def record_dtype(num_links: int, sparse: bool = False, quantized: bool = False) -> np.dtype:
+    """Type of one record
+
+    Dense records keep poses of all links of a frame. Sparse records keep the pose of one link
+    which moved since its previous keyframe, frames without moved links are marked by the record
+    with ``NO_LINK`` link index.
+
+    Args:
+        num_links (int): number of tracked visual links
+        sparse (bool, optional): record of one link instead of the whole frame. Defaults to False.
+        quantized (bool, optional): poses are quantized to int16, see ``quantize_poses``. Defaults to False.
+
+    Returns:
+        np.dtype: structured type with ``time`` (float64) and ``poses`` (num_links, 7) fields for dense
+            records or ``time``, ``link`` (int32) and ``pose`` (7,) fields for sparse ones,
+            pose is [x, y, z, qx, qy, qz, qw]
+    """
+    pose_type = '<i2' if quantized else '<f4'
+    if sparse:
+        return np.dtype([('time', '<f8'), ('link', '<i4'), ('pose', pose_type, (7,))])
+    return np.dtype([('time', '<f8'), ('poses', pose_type, (num_links, 7))])
+
+
+def quantize_poses(poses: np.ndarray, position_resolution: float) -> np.ndarray:
+    """Quantize poses to int16
+
+    Positions are stored in units of ``position_resolution`` and clipped to the int16 range,
+    quaternion components are scaled to the whole int16 range.
+
+    Args:
+        poses (np.ndarray): (..., 7) poses [x, y, z, qx, qy, qz, qw]
+        position_resolution (float): position step in meters
+
+    Returns:
+        np.ndarray: (..., 7) int16 poses
+    """
+    limits = np.iinfo(np.int16)
+    scaled = np.concatenate([poses[..., :3] / position_resolution, poses[..., 3:] * _QUATERNION_SCALE], axis=-1)
+    return np.clip(np.rint(scaled), limits.min, limits.max).astype(np.int16)
+
+
+def dequantize_poses(poses: np.ndarray, position_resolution: float) -> np.ndarray:
+    """Restore poses quantized by ``quantize_poses``
+
+    Args:
+        poses (np.ndarray): (..., 7) int16 poses
+        position_resolution (float): position step in meters
+
+    Returns:
+        np.ndarray: (..., 7) float32 poses with normalized quaternions
+    """
+    poses = np.asarray(poses, dtype=np.float32)
+    orientations = poses[..., 3:] / np.linalg.norm(poses[..., 3:], axis=-1, keepdims=True)
+    return np.concatenate([poses[..., :3] * np.float32(position_resolution), orientations], axis=-1)
+
+
+def interpolate_sparse(records: np.ndarray, num_links: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Dense frames from sparse records
+
+    Frame times are all distinct times of the records. Poses of the frames between keyframes
+    of a link are interpolated linearly, quaternions are normalized after interpolation.
+
+    Args:
+        records (np.ndarray): (k,) sparse records with float pose in the order of recording
+        num_links (int): number of tracked visual links
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (n,) frame times and (n, num_links, 7) float32 poses,
+            poses of a link before its first keyframe are NaN
+    """
+    times = np.unique(records['time'])
+    poses = np.full((times.shape[0], num_links, 7), np.nan, dtype=np.float32)
+    order = np.argsort(records['link'], kind='stable')
+    links = records['link'][order]
+    bounds = np.searchsorted(links, np.arange(num_links + 1))
+    for link in range(num_links):
+        link_records = records[order[bounds[link]:bounds[link + 1]]]
+        if link_records.shape[0] == 0:
+            continue
+        key_times = link_records['time']
+        key_poses = link_records['pose'].astype(float)
+        # Quaternions q and -q are the same rotation, the closest one is interpolated
+        signs = np.where(np.sum(key_poses[1:, 3:] * key_poses[:-1, 3:], axis=1) < 0, -1.0, 1.0)
+        key_poses[1:, 3:] *= np.cumprod(signs)[:, None]
+
+        first = np.searchsorted(times, key_times[0])
+        frame_times = times[first:]
+        left = np.searchsorted(key_times, frame_times, side='right') - 1
+        right = np.minimum(left + 1, key_times.shape[0] - 1)
+        span = key_times[right] - key_times[left]
+        alpha = np.divide(frame_times - key_times[left], span, out=np.zeros_like(span), where=span > 0)[:, None]
+        frame_poses = (1.0 - alpha) * key_poses[left] + alpha * key_poses[right]
+        frame_poses[:, 3:] /= np.linalg.norm(frame_poses[:, 3:], axis=1, keepdims=True)
+        poses[first:, link] = frame_poses
+    return times, poses
+
+
+class RecordWriter:
+    """Append-only file of records
+
+    The file starts with ``MAGIC``, the size of the JSON header and the header itself
+    (names, mesh paths and scales of the tracked links, recording policy) padded to 8 bytes.
+    It is followed by fixed-size records of ``record_dtype``, so the offset of any record is known
+    without reading the file and the record times form the index for lookups by time.
+    Records are written in chunks, a crash loses at most the chunk that was not written yet.
+
+    Args:
+        path (str): path of the created file
+        links (list[dict]): ``name``, ``mesh_path`` and ``mesh_scale`` of every tracked link
+        sparse (bool, optional): records of moved links instead of whole frames. Defaults to False.
+        position_resolution (float, optional): position step of quantized poses, None for float poses
+        fps (float, optional): target frame rate of the record, None if every step is recorded
+    """
+
+    def __init__(
+        self,
+        path: str,
+        links: list[dict],
+        sparse: bool = False,
+        position_resolution: float = None,
+        fps: float = None
+    ):
+        self.__path = path
+        self.__dtype = record_dtype(len(links), sparse, position_resolution is not None)
+        self.__num_records = 0
+
+        header = json.dumps({
+            'links': links,
+            'sparse': sparse,
+            'position_resolution': position_resolution,
+            'fps': fps,
+            'dtype': self.__dtype.descr
+        }).encode('utf-8')
+        header += b' ' * (-(len(MAGIC) + struct.calcsize(_HEADER_SIZE_FORMAT) + len(header)) % _ALIGNMENT)
+        self.__file = open(path, 'wb')
+        self.__file.write(MAGIC)
+        self.__file.write(struct.pack(_HEADER_SIZE_FORMAT, len(header)))
+        self.__file.write(header)
+        self.__file.flush()
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.__dtype
+
+    @property
+    def num_records(self) -> int:
+        """int: number of records written to the file"""
+        return self.__num_records
+
+    @property
+    def closed(self) -> bool:
+        return self.__file.closed
+
+    def write(self, records: np.ndarray):
+        """Append records to the file
+
+        Args:
+            records (np.ndarray): (n,) array of ``dtype``
+        """
+        assert records.dtype == self.__dtype, "Records do not match the file header"
+        self.__file.write(np.ascontiguousarray(records).tobytes())
+        self.__file.flush()
+        self.__num_records += records.shape[0]
+
+    def close(self):
+        if not self.__file.closed:
+            self.__file.close()
+
+
+class RecordFile:
+    """Memory-mapped reader of the file written by ``RecordWriter``
+
+    Records are not loaded into memory, trailing bytes of the interrupted write are ignored.
+    Frames of sparse and quantized records are restored on access.
+
+    Args:
+        path (str): path of the record file
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            magic = f.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError('{:s} is not a record file'.format(path))
+            header_size, = struct.unpack(_HEADER_SIZE_FORMAT, f.read(struct.calcsize(_HEADER_SIZE_FORMAT)))
+            header = json.loads(f.read(header_size).decode('utf-8'))
+
+        self.__links = header['links']
+        self.__sparse = header['sparse']
+        self.__position_resolution = header['position_resolution']
+        self.__fps = header['fps']
+        self.__dtype = record_dtype(len(self.__links), self.__sparse, self.__position_resolution is not None)
+        offset = len(MAGIC) + struct.calcsize(_HEADER_SIZE_FORMAT) + header_size
+        num_records = (os.path.getsize(path) - offset) // self.__dtype.itemsize
+        if num_records > 0:
+            self.__records = np.memmap(path, dtype=self.__dtype, mode='r', offset=offset, shape=(num_records,))
+        else:
+            self.__records = np.zeros(0, dtype=self.__dtype)
+        self.__times = None
+        self.__poses = None
+
+    @property
+    def links(self) -> list[dict]:
+        """list[dict]: ``name``, ``mesh_path`` and ``mesh_scale`` of every tracked link"""
+        return self.__links
+
+    @property
+    def sparse(self) -> bool:
+        return self.__sparse
+
+    @property
+    def position_resolution(self) -> float:
+        """float: position step of quantized poses, None if poses are not quantized"""
+        return self.__position_resolution
+
+    @property
+    def fps(self) -> float:
+        """float: target frame rate of the record, None if every step was recorded"""
+        return self.__fps
+
+    @property
+    def records(self) -> np.ndarray:
+        """np.ndarray: memory-mapped records of ``record_dtype``"""
+        return self.__records
+
+    @property
+    def num_frames(self) -> int:
+        return self.times.shape[0]
+
+    @property
+    def times(self) -> np.ndarray:
+        """np.ndarray: (n,) times of the frames"""
+        if self.__times is None:
+            self.__times = np.unique(self.__records['time']) if self.__sparse else self.__records['time']
+        return self.__times
+
+    @property
+    def poses(self) -> np.ndarray:
+        """np.ndarray: (n, links, 7) poses of the frames, memory-mapped for dense float records,
+            NaN for the frames before the first keyframe of the link in sparse records"""
+        if self.__poses is None:
+            if self.__sparse:
+                records = self.__records
+                if self.__position_resolution is not None:
+                    records = np.empty(records.shape[0], dtype=record_dtype(len(self.__links), sparse=True))
+                    records['time'] = self.__records['time']
+                    records['link'] = self.__records['link']
+                    records['pose'] = dequantize_poses(self.__records['pose'], self.__position_resolution)
+                self.__times, self.__poses = interpolate_sparse(records, len(self.__links))
+            elif self.__position_resolution is not None:
+                self.__poses = dequantize_poses(self.__records['poses'], self.__position_resolution)
+            else:
+                self.__poses = self.__records['poses']
+        return self.__poses
+
+    def frame_at(self, time: float) -> int:
+        """Index of the last frame recorded not later than the time
+
+        Args:
+            time (float): time of the record
+
+        Returns:
+            int: frame index, 0 if time is before the first frame
+        """
+        return max(int(np.searchsorted(self.times, time, side='right')) - 1, 0)
+
+    def get_formatted_output(self) -> dict:
+        """Frames in the layout of ``PyBulletRecorder.get_formatted_output`` used by the Blender importer
+
+        Returns:
+            dict: mesh parameters and list of frames for every link name
+        """
+        retval = {}
+        for i, link in enumerate(self.__links):
+            poses = self.poses[:, i]
+            retval[link['name']] = {
+                'type': 'mesh',
+                'mesh_path': link['mesh_path'],
+                'mesh_scale': link['mesh_scale'],
+                'frames': [
+                    {'position': pose[:3], 'orientation': pose[3:]}
+                    for pose in poses[~np.isnan(poses[:, 0])].tolist()
+                ]
+            }
+        return retval
+
+
+def convert_to_pickle(record_path: str, pickle_path: str):
+    """Convert record file to the pickle file of the Blender importer
+
+    Args:
+        record_path (str): path of the file written by ``RecordWriter``
+        pickle_path (str): path of the created pickle file
+    """
+    with open(pickle_path, 'wb') as f:
+        pickle.dump(RecordFile(record_path).get_formatted_output(), f)
@@ -1,15 +1,74 @@
+import hashlib
 from os import getcwd
-from os.path import abspath, dirname, basename, splitext
+from os.path import abspath, dirname, basename, join, splitext
 
 import urdf_parser_py.urdf as URDF
 
 import pybullet as p
+import pybullet_utils.bullet_client as bc
 import numpy as np
 import pickle
 
+from itmobotics_sim.utils.math import quat_right_product_matrix, quat_rotation_tensor
+from itmobotics_sim.pybullet_env.pybullet_record_file import (
+    RecordWriter, RecordFile, record_dtype, quantize_poses, dequantize_poses, interpolate_sparse, NO_LINK
+)
+
+_URDF_VISUALS_CACHE = {}
+
+
+def urdf_visuals(urdf_path: str) -> tuple:
+    """Visual meshes described in the URDF file
+
+    Parsed descriptions are cached by the hash of the file content, so the same URDF is parsed once
+    per process however many times and from whichever world it is registered.
+
+    Args:
+        urdf_path (str): path of the URDF file
+
+    Returns:
+        tuple: (link name, visual index, xyz, rpy, mesh filename relative to the URDF, scale or None)
+            for every mesh visual, the visual index counts all visuals of the link
+    """
+    with open(urdf_path, 'rb') as f:
+        content = f.read()
+    key = hashlib.sha1(content).hexdigest()
+    if key not in _URDF_VISUALS_CACHE:
+        # Read .urdf xml file and build URDF DOM
+        robot: URDF.Robot = URDF.Robot.from_xml_string(content)
+        visuals = []
+        for link in robot.links:
+            for i, link_visual in enumerate(link.visuals):
+                if getattr(link_visual.geometry, 'filename', None) is None:
+                    continue
+                # Get transform TODO: Add normal checking that link does not have origin specification
+                origin = link_visual.origin
+                rpy = tuple(origin.rpy) if origin is not None and origin.rpy is not None else (0, 0, 0)
+                xyz = tuple(origin.xyz) if origin is not None and origin.xyz is not None else (0, 0, 0)
+                scale = link_visual.geometry.scale
+                visuals.append((
+                    link.name, i, xyz, rpy, link_visual.geometry.filename, None if scale is None else tuple(scale)
+                ))
+        _URDF_VISUALS_CACHE[key] = tuple(visuals)
+    return _URDF_VISUALS_CACHE[key]
+
+
 class PyBulletRecorder:
+    """Recorder of visual link poses for the Blender replay
+
+    Keyframes are stored in preallocated chunks of ``record_dtype`` records, every frame is read
+    with one batched link state query per body. A new chunk is started when the current one is full
+    or a new object is registered. In the streaming mode full chunks are appended to the record file
+    instead of being kept in memory. The recording policy (see ``set_policy``) decimates frames
+    to the target frame rate, keeps only keyframes of moved links and quantizes poses.
+
+    Args:
+        pybullet_client (bc.BulletClient, optional): client of the recorded world, the default pybullet connection if None
+        chunk_size (int, optional): number of frames in one storage chunk. Defaults to 4096.
+    """
     class LinkTracker:
-        def __init__(self, name, body_id, link_id, xyz, rpy, mesh_path, mesh_scale):
+        def __init__(self, name, body_id, link_id, xyz, rpy, mesh_path, mesh_scale, pybullet_client=None):
+            self.__p = pybullet_client if pybullet_client is not None else p
             self.body_id = body_id
             self.link_id = link_id
             self.mesh_path = mesh_path
@@ -22,17 +81,17 @@ class PyBulletRecorder:
             self.name = name
 
         def transform(self, position, orientation):
-            return p.multiplyTransforms(
+            return self.__p.multiplyTransforms(
                 position, orientation,
                 self.link_pose[0], self.link_pose[1],
             )
 
         def get_keyframe(self):
             if self.link_id == -1:
-                position, orientation = p.getBasePositionAndOrientation(self.body_id)
+                position, orientation = self.__p.getBasePositionAndOrientation(self.body_id)
                 position, orientation = self.transform(position=position, orientation=orientation)
             else:
-                link_state = p.getLinkState(self.body_id, self.link_id, computeForwardKinematics=True)
+                link_state = self.__p.getLinkState(self.body_id, self.link_id, computeForwardKinematics=True)
                 position, orientation = self.transform(position=link_state[4], orientation=link_state[5])
 
             return {
@@ -40,84 +99,360 @@ class PyBulletRecorder:
                 'orientation': list(orientation)
             }
 
-    def __init__(self):
-        self.states = []
+    def __init__(self, pybullet_client: bc.BulletClient = None, chunk_size: int = 4096):
+        self.__p = pybullet_client if pybullet_client is not None else p
         self.links = []
+        self.__chunk_size = chunk_size
+        self.__writer = None
+        self.__stream_path = None
+        self.__fps = None
+        self.__position_resolution = None
+        self.__sparse = False
+        self.__squared_position_tolerance = 0.0
+        self.__cos_half_angle_tolerance = 1.0
+        self.__update_queries()
+        self.reset()
+
+    def set_policy(
+        self,
+        fps: float = None,
+        position_tolerance: float = 0.0,
+        angle_tolerance: float = 0.0,
+        position_resolution: float = None
+    ):
+        """Set policy of the following recording, frames recorded before are dropped
+
+        With a nonzero tolerance a link gets a keyframe only if it moved farther than the tolerance
+        from its previous keyframe, the skipped frames are interpolated on replay.
+        The last pose before the movement is kept too, so the replay error stays within about twice the tolerance.
+
+        Args:
+            fps (float, optional): target frame rate, frames are skipped until ``1/fps`` passes, every frame by default
+            position_tolerance (float, optional): minimal position change of a keyframe in meters. Defaults to 0.0.
+            angle_tolerance (float, optional): minimal rotation of a keyframe in radians. Defaults to 0.0.
+            position_resolution (float, optional): position step of int16 quantized poses in meters,
+                poses are not quantized by default
+        """
+        assert self.__writer is None, "Policy can not be changed while the record is streamed to the file"
+        assert fps is None or fps > 0, "Frame rate must be positive"
+        self.__fps = fps
+        self.__position_resolution = position_resolution
+        self.__sparse = position_tolerance > 0.0 or angle_tolerance > 0.0
+        # Zero tolerance of one kind means that any change of it produces a keyframe
+        self.__squared_position_tolerance = position_tolerance ** 2
+        self.__cos_half_angle_tolerance = np.cos(angle_tolerance / 2) if angle_tolerance > 0.0 else 1.0
+        self.__update_queries()
+        self.reset()
+
+    @property
+    def sparse(self) -> bool:
+        """bool: only keyframes of moved links are recorded"""
+        return self.__sparse
 
     def register_object(self, body_id, urdf_path, global_scaling=1):
+        assert self.__writer is None, "Objects can not be registered while the record is streamed to the file"
         link_id_map = dict()
-        n_joints = p.getNumJoints(body_id)
+        n_joints = self.__p.getNumJoints(body_id)
 
         # Crate link name -> id mapping
-        baselink_name = p.getBodyInfo(body_id)[0].decode('gb2312')
+        baselink_name = self.__p.getBodyInfo(body_id)[0].decode('gb2312')
         link_id_map[baselink_name] = -1
         for link_id in range(0, n_joints):
-            link_name = p.getJointInfo(body_id, link_id)[12].decode('gb2312')
+            link_name = self.__p.getJointInfo(body_id, link_id)[12].decode('gb2312')
             link_id_map[link_name] = link_id
 
         # get abs path of the urdf file
         dir_path = dirname(abspath(urdf_path))
         file_name = splitext(basename(urdf_path))[0]
 
-        # Read .urdf xml file and build URDF DOM
-        robot: URDF.Robot = URDF.Robot.from_xml_file(urdf_path)
-
         # We go under all links and record only links that have visual mesh
-        for link in robot.links:
-            link_id = link_id_map[link.name]
-            if len(link.visuals) > 0:
-                for i, link_visual in enumerate(link.visuals):
-                    # TODO: check that scaling is correct if there is scale property
-                    ext_scale = 1.0
-                    mesh_scale = [global_scaling*ext_scale, global_scaling*ext_scale, global_scaling*ext_scale] if link_visual.geometry.scale is None  else [s * global_scaling * ext_scale for s in link_visual.geometry.scale] 
-
-                    # Get transform TODO: Add normal checking that link does not have origin specification
-                    try:
-                        rpy = link_visual.origin.rpy
-                    except:
-                        rpy = [0,0,0]
-                    try:
-                        xyz = link_visual.origin.xyz
-                    except:
-                        xyz = [0,0,0]
-
-                    # transform to global abspath
-                    mesh_abs_filepath = dir_path + '/' + link_visual.geometry.filename
-
-                    tracker = PyBulletRecorder.LinkTracker(
-                        name = file_name + f'_{body_id}_{link.name}_{i}',
-                        body_id = body_id,
-                        link_id = link_id,
-                        xyz = xyz,
-                        rpy = rpy,
-                        mesh_path = mesh_abs_filepath,
-                        mesh_scale=mesh_scale
-                    )
-                    self.links.append(tracker)
-
-
-    def add_keyframe(self):
-        # Ideally, call every p.stepSimulation()
-        current_state = {}
+        for link_name, i, xyz, rpy, filename, scale in urdf_visuals(urdf_path):
+            # TODO: check that scaling is correct if there is scale property
+            ext_scale = 1.0
+            mesh_scale = [global_scaling*ext_scale, global_scaling*ext_scale, global_scaling*ext_scale] if scale is None else [s * global_scaling * ext_scale for s in scale]
+
+            # transform to global abspath, composed URDFs already have absolute mesh paths
+            mesh_abs_filepath = join(dir_path, filename)
+
+            tracker = PyBulletRecorder.LinkTracker(
+                name = file_name + f'_{body_id}_{link_name}_{i}',
+                body_id = body_id,
+                link_id = link_id_map[link_name],
+                xyz = xyz,
+                rpy = rpy,
+                mesh_path = mesh_abs_filepath,
+                mesh_scale=mesh_scale,
+                pybullet_client=self.__p
+            )
+            self.links.append(tracker)
+        # Queries are rebuilt once before the next frame instead of after every registered object
+        self.__queries_outdated = True
+
+    def clear_objects(self):
+        """forget all registered objects and recorded frames"""
+        assert self.__writer is None, "Objects can not be removed while the record is streamed to the file"
+        self.links = []
+        self.__update_queries()
+        self.reset()
+
+    def __update_outdated_queries(self):
+        if self.__queries_outdated:
+            self.__update_queries()
+
+    def __update_queries(self):
+        self.__queries_outdated = False
+        self.__interpolated = None
+        # Every tracked link is requested once per frame even if it has several visuals
+        rows = {}
+        link_ids = {}
         for link in self.links:
-            current_state[link.name] = link.get_keyframe()
-        self.states.append(current_state)
+            if (link.body_id, link.link_id) not in rows:
+                rows[(link.body_id, link.link_id)] = len(rows)
+                link_ids.setdefault(link.body_id, []).append(link.link_id)
+        self.__queries = []
+        for body_id, body_link_ids in link_ids.items():
+            base_row = rows[(body_id, -1)] if -1 in body_link_ids else None
+            child_link_ids = [link_id for link_id in body_link_ids if link_id != -1]
+            child_rows = np.array([rows[(body_id, link_id)] for link_id in child_link_ids], dtype=int)
+            self.__queries.append((body_id, base_row, child_link_ids, child_rows))
+        self.__num_rows = len(rows)
+        self.__link_rows = np.array([rows[(link.body_id, link.link_id)] for link in self.links], dtype=int)
+        self.__dtype = record_dtype(len(self.links), self.sparse, self.__position_resolution is not None)
+        self.__key_poses = np.zeros((len(self.links), 7))
+        self.__key_frames = np.full(len(self.links), -1)
+        self.__previous_poses = np.zeros((len(self.links), 7))
+        # Visual origins are constant, so they are applied to link poses as precomputed linear operators
+        self.__offset_positions = quat_rotation_tensor(
+            np.array([link.link_pose[0] for link in self.links], dtype=float).reshape(-1, 3)
+        )
+        self.__offset_orientations = quat_right_product_matrix(
+            np.array([link.link_pose[1] for link in self.links], dtype=float).reshape(-1, 4)
+        )
+
+    def add_keyframe(self, time: float = None):
+        """Record poses of all tracked links, ideally call every p.stepSimulation()
+
+        Args:
+            time (float, optional): time of the frame, number of the frame by default.
+                It is required if the target frame rate is set.
+        """
+        self.__update_outdated_queries()
+        if self.__fps is not None:
+            assert time is not None, "Time of the frame is required for the target frame rate"
+            if self.__next_time is not None and time < self.__next_time - 1e-9:
+                return
+            # Frames follow a fixed schedule, so the rate does not drift when the steps do not divide the period
+            period = 1.0 / self.__fps
+            self.__next_time = (time if self.__next_time is None else self.__next_time) + period
+            if self.__next_time <= time + 1e-9:
+                # Slots missed by long steps are skipped
+                self.__next_time += np.floor((time - self.__next_time) / period + 1e-9 + 1.0) * period
+        if time is None:
+            time = self.__num_frames
+
+        poses = np.empty((self.__num_rows, 7))
+        get_base_pose = self.__p.getBasePositionAndOrientation
+        get_link_states = self.__p.getLinkStates
+        for body_id, base_row, child_link_ids, child_rows in self.__queries:
+            if base_row is not None:
+                position, orientation = get_base_pose(body_id)
+                poses[base_row] = position + orientation
+            if len(child_link_ids) > 0:
+                link_states = get_link_states(body_id, child_link_ids, computeForwardKinematics=True)
+                poses[child_rows] = [link_state[4] + link_state[5] for link_state in link_states]
+
+        poses = poses[self.__link_rows]
+        orientations = poses[:, 3:]
+        if self.__sparse or self.__position_resolution is not None:
+            visual_poses = np.empty((len(self.links), 7))
+        else:
+            self.__reserve_chunk()
+            record = self.__chunks[-1][self.__chunk_lengths[-1]]
+            self.__chunk_lengths[-1] += 1
+            record['time'] = time
+            visual_poses = record['poses']
+        visual_poses[:, :3] = poses[:, :3] + np.einsum('nijk,nj,nk->ni', self.__offset_positions, orientations, orientations)
+        visual_poses[:, 3:] = np.einsum('nij,nj->ni', self.__offset_orientations, orientations)
+
+        if self.__sparse:
+            self.__append_sparse(time, visual_poses)
+        elif self.__position_resolution is not None:
+            self.__reserve_chunk()
+            record = self.__chunks[-1][self.__chunk_lengths[-1]]
+            self.__chunk_lengths[-1] += 1
+            record['time'] = time
+            record['poses'] = quantize_poses(visual_poses, self.__position_resolution)
+        self.__num_frames += 1
+        self.__previous_time = time
+
+    def __append_sparse(self, time: float, poses: np.ndarray):
+        position_change = poses[:, :3] - self.__key_poses[:, :3]
+        moved = (
+            (self.__key_frames < 0)
+            | (np.einsum('ij,ij->i', position_change, position_change) > self.__squared_position_tolerance)
+            | (np.abs(np.einsum('ij,ij->i', poses[:, 3:], self.__key_poses[:, 3:])) < self.__cos_half_angle_tolerance)
+        )
+        moved_links = np.flatnonzero(moved)
+        if moved_links.shape[0] == 0:
+            records = np.zeros(1, dtype=self.__dtype)
+            records['time'] = time
+            records['link'] = NO_LINK
+        else:
+            # The pose of the previous frame closes the interval where the link was at rest
+            held_links = moved_links[self.__key_frames[moved_links] < self.__num_frames - 1]
+            held_links = held_links[self.__key_frames[held_links] >= 0]
+            records = np.empty(held_links.shape[0] + moved_links.shape[0], dtype=self.__dtype)
+            records['time'][:held_links.shape[0]] = self.__previous_time
+            records['time'][held_links.shape[0]:] = time
+            records['link'] = np.concatenate([held_links, moved_links])
+            record_poses = np.concatenate([self.__previous_poses[held_links], poses[moved_links]])
+            if self.__position_resolution is not None:
+                record_poses = quantize_poses(record_poses, self.__position_resolution)
+            records['pose'] = record_poses
+            self.__key_poses[moved_links] = poses[moved_links]
+            self.__key_frames[moved_links] = self.__num_frames
+        self.__previous_poses = poses
+
+        start = 0
+        while start < records.shape[0]:
+            self.__reserve_chunk()
+            chunk, length = self.__chunks[-1], self.__chunk_lengths[-1]
+            count = min(records.shape[0] - start, chunk.shape[0] - length)
+            chunk[length:length + count] = records[start:start + count]
+            self.__chunk_lengths[-1] += count
+            start += count
+
+    def __reserve_chunk(self):
+        if (
+            len(self.__chunks) == 0
+            or self.__chunk_lengths[-1] == self.__chunks[-1].shape[0]
+            or self.__chunks[-1].dtype != self.__dtype
+        ):
+            self.__new_chunk()
+
+    def __new_chunk(self):
+        if self.__writer is not None and len(self.__chunks) > 0:
+            # Written chunk is reused, so memory does not grow in the streaming mode
+            self.__writer.write(self.__chunks[-1][:self.__chunk_lengths[-1]])
+            self.__chunk_lengths[-1] = 0
+            return
+        self.__chunks.append(np.empty(self.__chunk_size, dtype=self.__dtype))
+        self.__chunk_lengths.append(0)
+
+    def start_stream(self, path: str):
+        """Stream the following frames to the record file
+
+        Frames recorded in memory before are dropped. The file is readable by ``RecordFile``
+        while the record goes on and may be converted to the Blender pickle by ``convert_to_pickle``.
+
+        Args:
+            path (str): path of the created record file
+        """
+        self.__update_outdated_queries()
+        self.reset()
+        self.__writer = RecordWriter(
+            path,
+            [{'name': link.name, 'mesh_path': link.mesh_path, 'mesh_scale': list(link.mesh_scale)} for link in self.links],
+            sparse=self.sparse,
+            position_resolution=self.__position_resolution,
+            fps=self.__fps
+        )
+        self.__stream_path = path
+
+    def flush(self):
+        """write frames of the current chunk to the record file"""
+        if self.__writer is not None and len(self.__chunks) > 0:
+            self.__writer.write(self.__chunks[-1][:self.__chunk_lengths[-1]])
+            self.__chunk_lengths[-1] = 0
+
+    def stop_stream(self):
+        """flush and close the record file, ``get_formatted_output`` reads it until reset"""
+        if self.__writer is not None:
+            self.flush()
+            self.__writer.close()
+            self.__writer = None
+            self.__chunks = []
+            self.__chunk_lengths = []
+
+    @property
+    def streaming(self) -> bool:
+        return self.__writer is not None
+
+    @property
+    def stream_path(self) -> str:
+        """str: path of the last record file, None if the record was not streamed"""
+        return self.__stream_path
 
     def reset(self):
-        self.states = []
+        self.stop_stream()
+        self.__stream_path = None
+        self.__chunks = []
+        self.__chunk_lengths = []
+        self.__num_frames = 0
+        self.__next_time = None
+        self.__previous_time = None
+        self.__key_frames[:] = -1
+        self.__interpolated = None
+
+    @property
+    def num_frames(self) -> int:
+        """int: number of recorded frames including the streamed ones"""
+        return self.__num_frames
+
+    def link_frames(self, link_index: int) -> np.ndarray:
+        """Recorded poses of the tracked link kept in memory
+
+        Args:
+            link_index (int): index of the link in ``links``
+
+        Returns:
+            np.ndarray: (n, 7) positions and quaternions [x, y, z, qx, qy, qz, qw] of the frames
+                recorded after the link registration, interpolated between keyframes of the sparse record
+        """
+        self.__update_outdated_queries()
+        if self.sparse:
+            poses = self.__sparse_poses()[:, link_index]
+            return poses[~np.isnan(poses[:, 0])]
+
+        poses = [
+            chunk['poses'][:length, link_index]
+            for chunk, length in zip(self.__chunks, self.__chunk_lengths) if chunk['poses'].shape[1] > link_index
+        ]
+        if len(poses) == 0:
+            return np.zeros((0, 7), dtype=np.float32)
+        poses = np.concatenate(poses)
+        if self.__position_resolution is not None:
+            return dequantize_poses(poses, self.__position_resolution)
+        return poses
+
+    def __sparse_poses(self) -> np.ndarray:
+        # Keyframes are interpolated for all links at once, the result is kept until the next frame
+        key = (self.__num_frames, sum(self.__chunk_lengths))
+        if self.__interpolated is None or self.__interpolated[0] != key:
+            chunks = [chunk[:length] for chunk, length in zip(self.__chunks, self.__chunk_lengths) if chunk.dtype == self.__dtype]
+            records = np.concatenate(chunks) if len(chunks) > 0 else np.zeros(0, dtype=self.__dtype)
+            if self.__position_resolution is not None:
+                quantized = records
+                records = np.empty(quantized.shape[0], dtype=record_dtype(len(self.links), sparse=True))
+                records['time'], records['link'] = quantized['time'], quantized['link']
+                records['pose'] = dequantize_poses(quantized['pose'], self.__position_resolution)
+            _, poses = interpolate_sparse(records, len(self.links))
+            self.__interpolated = (key, poses)
+        return self.__interpolated[1]
 
     def get_formatted_output(self):
+        if self.__stream_path is not None:
+            self.flush()
+            return RecordFile(self.__stream_path).get_formatted_output()
         retval = {}
-        for link in self.links:
-            out_frames = []
-            for state in self.states:
-                if link.name in state:
-                    out_frames.append(state[link.name] )
+        for i, link in enumerate(self.links):
             retval[link.name] = {
                 'type': 'mesh',
                 'mesh_path': link.mesh_path,
                 'mesh_scale': link.mesh_scale,
-                'frames': out_frames
+                'frames': [
+                    {'position': pose[:3], 'orientation': pose[3:]} for pose in self.link_frames(i).tolist()
+                ]
             }
         return retval
 
@@ -127,5 +462,6 @@ class PyBulletRecorder:
         else:
             print("[Recorder] Saving state to {}".format(path))
             # print(self.get_formatted_output())
-            pickle.dump(self.get_formatted_output(), open(path, 'wb'))
+            with open(path, 'wb') as f:
+                pickle.dump(self.get_formatted_output(), f)
 
@@ -0,0 +1,336 @@
+from __future__ import annotations
+from typing import Iterator, Union
+
+import numpy as np
+
+import pybullet_utils.bullet_client as bc
+
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld
+from itmobotics_sim.pybullet_env.pybullet_record_file import RecordFile
+
+
+def movable_joints(pybullet_client: bc.BulletClient, body_id: int) -> list[int]:
+    """Indices of revolute and prismatic joints of the body
+
+    Args:
+        pybullet_client (bc.BulletClient): client that owns the body
+        body_id (int): unique body id
+
+    Returns:
+        list[int]: joint indices
+    """
+    return [
+        joint_id for joint_id in range(pybullet_client.getNumJoints(body_id))
+        if pybullet_client.getJointInfo(body_id, joint_id)[2] in (pybullet_client.JOINT_REVOLUTE, pybullet_client.JOINT_PRISMATIC)
+    ]
+
+
+class TimeIndex:
+    """Index of frames by time
+
+    Frames recorded with constant period are found by arithmetic in O(1),
+    other ones by binary search.
+
+    Args:
+        times (np.ndarray): (n,) nondecreasing times of the frames
+    """
+
+    def __init__(self, times: np.ndarray):
+        self.__times = np.asarray(times, dtype=float)
+        self.__period = None
+        if self.__times.shape[0] > 1:
+            steps = np.diff(self.__times)
+            if np.allclose(steps, steps[0], rtol=1e-6, atol=1e-9) and steps[0] > 0:
+                self.__period = float(steps[0])
+
+    @property
+    def uniform(self) -> bool:
+        """bool: frames have constant period"""
+        return self.__period is not None
+
+    def frame_at(self, time: float) -> int:
+        """Index of the last frame not later than the time
+
+        Args:
+            time (float): requested time
+
+        Returns:
+            int: frame index clipped to the recorded frames
+        """
+        last = self.__times.shape[0] - 1
+        if self.__period is not None:
+            index = int(np.floor((time - self.__times[0]) / self.__period + 1e-6))
+        else:
+            index = int(np.searchsorted(self.__times, time, side='right')) - 1
+        return min(max(index, 0), last)
+
+
+class StateLog:
+    """Log of base poses and joint positions of world models
+
+    Rows are kept in preallocated arrays which capacity is doubled when they are full.
+    The log is saved to and loaded from ``.npz`` file.
+
+    Args:
+        joint_indices (dict): movable joint indices for every logged model name
+        capacity (int, optional): initial number of rows. Defaults to 1024.
+    """
+
+    def __init__(self, joint_indices: dict, capacity: int = 1024):
+        self.__joint_indices = {name: list(indices) for name, indices in joint_indices.items()}
+        self.__num_frames = 0
+        self.__times = np.empty(capacity)
+        self.__base_poses = {name: np.empty((capacity, 7)) for name in self.__joint_indices}
+        self.__joint_positions = {name: np.empty((capacity, len(indices))) for name, indices in self.__joint_indices.items()}
+
+    @classmethod
+    def from_world(cls, world: PyBulletWorld, model_names: list[str] = None, capacity: int = 1024) -> StateLog:
+        """Empty log of the world models
+
+        Args:
+            world (PyBulletWorld): logged world
+            model_names (list[str], optional): logged robots and objects, all models by default
+            capacity (int, optional): initial number of rows. Defaults to 1024.
+
+        Returns:
+            StateLog: log ready for ``capture``
+        """
+        if model_names is None:
+            model_names = world.model_names
+        return cls(
+            {name: movable_joints(world.client, world.model_id(name)) for name in model_names},
+            capacity
+        )
+
+    @classmethod
+    def load(cls, path: str) -> StateLog:
+        """Load log saved by ``save``
+
+        Args:
+            path (str): path of the ``.npz`` file
+
+        Returns:
+            StateLog: loaded log
+        """
+        with np.load(path) as data:
+            model_names = [str(name) for name in data['model_names']]
+            log = cls(
+                {name: data['joint_indices/' + name].tolist() for name in model_names},
+                capacity=max(data['times'].shape[0], 1)
+            )
+            log.__num_frames = data['times'].shape[0]
+            log.__times[:log.__num_frames] = data['times']
+            for name in model_names:
+                log.__base_poses[name][:log.__num_frames] = data['base_poses/' + name]
+                log.__joint_positions[name][:log.__num_frames] = data['joint_positions/' + name]
+        return log
+
+    def save(self, path: str):
+        """Save log to ``.npz`` file
+
+        Args:
+            path (str): path of the file
+        """
+        data = {'model_names': np.array(self.model_names), 'times': self.times}
+        for name in self.model_names:
+            data['joint_indices/' + name] = np.array(self.__joint_indices[name], dtype=int)
+            data['base_poses/' + name] = self.base_poses(name)
+            data['joint_positions/' + name] = self.joint_positions(name)
+        np.savez(path, **data)
+
+    @property
+    def model_names(self) -> list[str]:
+        return list(self.__joint_indices.keys())
+
+    @property
+    def num_frames(self) -> int:
+        return self.__num_frames
+
+    @property
+    def times(self) -> np.ndarray:
+        """np.ndarray: (n,) times of the frames"""
+        return self.__times[:self.__num_frames]
+
+    def joint_indices(self, model_name: str) -> list[int]:
+        return self.__joint_indices[model_name]
+
+    def base_poses(self, model_name: str) -> np.ndarray:
+        """Logged base poses of the model
+
+        Args:
+            model_name (str): name of robot or object
+
+        Returns:
+            np.ndarray: (n, 7) positions and quaternions [x, y, z, qx, qy, qz, qw]
+        """
+        return self.__base_poses[model_name][:self.__num_frames]
+
+    def joint_positions(self, model_name: str) -> np.ndarray:
+        """Logged positions of movable joints of the model
+
+        Args:
+            model_name (str): name of robot or object
+
+        Returns:
+            np.ndarray: (n, k) positions in the order of ``joint_indices``
+        """
+        return self.__joint_positions[model_name][:self.__num_frames]
+
+    def capture(self, world: PyBulletWorld):
+        """Append current state of the logged models, ideally call after every world.sim_step()
+
+        Args:
+            world (PyBulletWorld): logged world
+        """
+        if self.__num_frames == self.__times.shape[0]:
+            self.__grow()
+        row = self.__num_frames
+        client = world.client
+        get_base_pose = client.getBasePositionAndOrientation
+        get_joint_states = client.getJointStates
+        self.__times[row] = world.sim_time
+        for name, indices in self.__joint_indices.items():
+            body_id = world.model_id(name)
+            position, orientation = get_base_pose(body_id)
+            self.__base_poses[name][row] = position + orientation
+            if len(indices) > 0:
+                self.__joint_positions[name][row] = [state[0] for state in get_joint_states(body_id, indices)]
+        self.__num_frames += 1
+
+    def __grow(self):
+        capacity = max(2 * self.__times.shape[0], 1)
+        self.__times = np.resize(self.__times, capacity)
+        for name in self.__joint_indices:
+            self.__base_poses[name] = np.resize(self.__base_poses[name], (capacity, 7))
+            self.__joint_positions[name] = np.resize(
+                self.__joint_positions[name], (capacity, len(self.__joint_indices[name]))
+            )
+
+
+class KinematicReplay:
+    """Kinematic replay of a log in the world
+
+    States are applied with ``resetJointStatesMultiDof`` and ``resetBasePositionAndOrientation``
+    without simulation steps. ``StateLog`` drives the world models with the same names.
+    ``RecordFile`` of the recorder is replayed by visual-only bodies with the recorded meshes,
+    which are created in the world and removed by ``close``.
+    The world should not be reset during the replay, since body ids of the models change.
+
+    Args:
+        world (PyBulletWorld): world the log is replayed in
+        log (Union[StateLog, RecordFile]): replayed log
+        detect_collisions (bool, optional): update contacts after every applied frame. Defaults to False.
+    """
+
+    def __init__(self, world: PyBulletWorld, log: Union[StateLog, RecordFile], detect_collisions: bool = False):
+        self.__world = world
+        self.__p = world.client
+        self.__log = log
+        self.__detect_collisions = detect_collisions
+        self.__index = TimeIndex(log.times)
+        self.__frame = None
+        self.__visual_bodies = []
+
+        if isinstance(log, StateLog):
+            self.__models = [
+                (
+                    world.model_id(name),
+                    log.base_poses(name),
+                    log.joint_indices(name),
+                    log.joint_positions(name)[:, :, None]
+                )
+                for name in log.model_names
+            ]
+        else:
+            self.__models = []
+            self.__poses = log.poses
+            for link in log.links:
+                visual_id = self.__p.createVisualShape(
+                    self.__p.GEOM_MESH, fileName=link['mesh_path'], meshScale=link['mesh_scale']
+                )
+                self.__visual_bodies.append(
+                    self.__p.createMultiBody(baseMass=0, baseCollisionShapeIndex=-1, baseVisualShapeIndex=visual_id)
+                )
+
+    @property
+    def times(self) -> np.ndarray:
+        """np.ndarray: (n,) times of the replayed frames"""
+        return self.__log.times
+
+    @property
+    def num_frames(self) -> int:
+        return self.__log.num_frames
+
+    @property
+    def frame(self) -> int:
+        """int: index of the applied frame, None before the first seek"""
+        return self.__frame
+
+    def seek(self, time: float) -> int:
+        """Apply the last frame recorded not later than the time
+
+        Args:
+            time (float): time of the log
+
+        Returns:
+            int: index of the applied frame
+        """
+        return self.apply_frame(self.__index.frame_at(time))
+
+    def apply_frame(self, frame: int) -> int:
+        """Apply the frame to the world
+
+        Args:
+            frame (int): index of the frame
+
+        Returns:
+            int: index of the applied frame
+        """
+        reset_base = self.__p.resetBasePositionAndOrientation
+        reset_joints = self.__p.resetJointStatesMultiDof
+        for body_id, base_poses, joint_indices, joint_positions in self.__models:
+            pose = base_poses[frame]
+            reset_base(body_id, pose[:3], pose[3:])
+            if len(joint_indices) > 0:
+                reset_joints(body_id, joint_indices, joint_positions[frame])
+        if len(self.__visual_bodies) > 0:
+            for body_id, pose in zip(self.__visual_bodies, self.__poses[frame].tolist()):
+                # Sparse records have no pose before the first keyframe of the link
+                if pose[0] == pose[0]:
+                    reset_base(body_id, pose[:3], pose[3:])
+        if self.__detect_collisions:
+            self.__p.performCollisionDetection()
+        self.__world.sim_time = float(self.__log.times[frame])
+        self.__frame = frame
+        return frame
+
+    def play(self, start_time: float = None, stop_time: float = None, period: float = None) -> Iterator[float]:
+        """Apply frames one by one
+
+        Args:
+            start_time (float, optional): time of the first frame, the beginning of the log by default
+            stop_time (float, optional): time after which the replay stops, the end of the log by default
+            period (float, optional): time between applied frames, every recorded frame by default
+
+        Yields:
+            Iterator[float]: time of the applied frame
+        """
+        times = self.times
+        start_time = times[0] if start_time is None else start_time
+        stop_time = times[-1] if stop_time is None else stop_time
+        if period is None:
+            first = self.__index.frame_at(start_time)
+            last = self.__index.frame_at(stop_time)
+            for frame in range(first, last + 1):
+                self.apply_frame(frame)
+                yield float(times[frame])
+        else:
+            for time in np.arange(start_time, stop_time + period * 1e-6, period):
+                self.seek(time)
+                yield float(time)
+
+    def close(self):
+        """remove visual bodies created for the recorder log"""
+        for body_id in self.__visual_bodies:
+            self.__p.removeBody(body_id)
+        self.__visual_bodies = []
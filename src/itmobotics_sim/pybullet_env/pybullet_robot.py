@@ -3,7 +3,6 @@ import time
 import copy
 from json import tool
 from ntpath import join
-import uuid
 
 import numpy as np
 from spatialmath import SE3, SO3
@@ -17,7 +16,7 @@ from scipy.spatial.transform import Rotation as R
 from itmobotics_sim.utils import robot
 from itmobotics_sim.utils import math
 
-from itmobotics_sim.pybullet_env.urdf_editor import URDFEditor
+from itmobotics_sim.pybullet_env.urdf_editor import URDFEditor, URDFScratch, KinematicTree
 
 
 class SimulationException(Exception):
@@ -31,7 +30,9 @@ class PyBulletRobot(robot.Robot):
         joint_controller_params: dict = None,
         use_self_collision = True,
         additional_path: list[str] = [],
-        fixed_base: bool = True
+        fixed_base: bool = True,
+        urdf_scratch: URDFScratch = None,
+        kinematic: bool = False
     ):
         super().__init__(urdf_filename, base_transform)
         self.__p = pybullet_client
@@ -46,14 +47,24 @@ class PyBulletRobot(robot.Robot):
         self.__joint_id_for_link = {}
 
         self.__additional_path = additional_path
+        # Compositions with connected tools are written to the scratch directory
+        self.__urdf_scratch = urdf_scratch
+        if self.__urdf_scratch is None:
+            self.__urdf_scratch = URDFScratch()
         self.__external_models = {}
         self.__tool_list = []
         self.__cameras = {}
 
         self.__use_self_collision = use_self_collision
         self.__fixed_base = fixed_base
+        # Kinematic robot has no motors and sensors, joint states are set directly
+        self.__kinematic = kinematic
+        self.__kinematic_velocity = None
 
         self.__joint_limits: robot.JointLimits = None
+        self.__load_count = 0
+        self.__loaded_urdf_filename = None
+        self.__kinematic_tree = None
         # print(self.__p)
         self.reset()
 
@@ -67,8 +78,7 @@ class PyBulletRobot(robot.Robot):
 
     def __del__(self):
         for m in self.__external_models.keys():
-            if os.path.exists(self.__external_models[m]["urdf_filename"]):
-                os.remove(self.__external_models[m]["urdf_filename"])
+            self.__urdf_scratch.remove(self.__external_models[m]["urdf_filename"])
     
     def connect_tool(self, tool_name: str, external_urdf_filename: str, root_link: str, tf: SE3 = SE3(), save = False):
         if not self.__initialized:
@@ -80,11 +90,7 @@ class PyBulletRobot(robot.Robot):
         
         main_editor.joinURDF(child_editor, root_link, tf.A)
 
-        head = os.path.split(self._urdf_filename)[0]
-        newname = str(uuid.uuid4()) + '_tmp'+ '.urdf'
-        newpath = os.path.join(head, newname)
-        self._urdf_filename = newpath
-        main_editor.save(self._urdf_filename)
+        self._urdf_filename = self.__urdf_scratch.write(main_editor)
         self.__external_models[tool_name] = {"urdf_filename": self._urdf_filename, "root_link": root_link, "tf": tf, "save": save}
         self.__tool_list.append(tool_name)
 
@@ -234,7 +240,11 @@ class PyBulletRobot(robot.Robot):
     def _send_jointcontrol_velocity(self, velocity: np.ndarray) -> bool:
         if not self.__initialized:
             return False
-        
+
+        if self.__kinematic:
+            # Velocities are integrated by kinematic_step
+            self.__kinematic_velocity = np.array(velocity, dtype=float)
+            return True
         self.__recalc_torque = None
         self.__p.setJointMotorControlArray(self.__robot_id,
             self.__actuators_id_list,
@@ -248,6 +258,10 @@ class PyBulletRobot(robot.Robot):
         if not self.__initialized:
             return False
 
+        if self.__kinematic:
+            self.__kinematic_velocity = None
+            self.__set_kinematic_state(np.asarray(position, dtype=float), np.zeros(self.__num_actuators))
+            return True
         self.__recalc_torque = None
         self.__p.setJointMotorControlArray(self.__robot_id,
             self.__actuators_id_list,
@@ -263,6 +277,8 @@ class PyBulletRobot(robot.Robot):
     def _send_jointcontrol_torque(self, torque: np.ndarray) -> bool:
         if not self.__initialized:
             return False
+        if self.__kinematic:
+            raise SimulationException('Kinematic robot does not support torque control')
         
         self.__recalc_torque = torque
         self.__p.setJointMotorControlArray(self.__robot_id, self.__actuators_id_list,
@@ -275,6 +291,36 @@ class PyBulletRobot(robot.Robot):
         )
         return True
     
+    def kinematic_step(self, time_step: float):
+        """Integrate joint velocities of the kinematic robot, called by the world instead of motors
+
+        Args:
+            time_step (float): duration of the step
+        """
+        if not self.__kinematic or self.__kinematic_velocity is None:
+            return
+        positions = np.array([state[0] for state in self.__p.getJointStates(self.__robot_id, self.__actuators_id_list)])
+        # Motors of the dynamic robot can not exceed velocity limits either,
+        # velocities are scaled together to keep the direction of the motion
+        upper = self.__joint_limits.limit_velocities[1]
+        limited = upper > 0.0
+        ratio = np.max(np.abs(self.__kinematic_velocity[limited]) / upper[limited], initial=1.0)
+        velocities = self.__kinematic_velocity / ratio
+        positions = positions + velocities * time_step
+        # Joints without limits have lower limit greater than upper one
+        lower, upper = self.__joint_limits.limit_positions
+        limited = lower < upper
+        positions[limited] = np.clip(positions[limited], lower[limited], upper[limited])
+        self.__set_kinematic_state(positions, velocities)
+
+    def __set_kinematic_state(self, positions: np.ndarray, velocities: np.ndarray):
+        self.__p.resetJointStatesMultiDof(
+            self.__robot_id,
+            self.__actuators_id_list,
+            positions[:, None].tolist(),
+            targetVelocities=velocities[:, None].tolist()
+        )
+
     def _update_ee_state(self, tool_state: robot.EEState):
         # print(p.getNumJoints(self.__robot_id))
         if not self.__initialized:
@@ -346,6 +392,8 @@ class PyBulletRobot(robot.Robot):
             flags=flags_bullet,
             useFixedBase=self.__fixed_base,
         )
+        self.__load_count += 1
+        self.__loaded_urdf_filename = self._urdf_filename
         self.__joint_id_for_link = {}
         self.__actuators_name_list = []
 
@@ -378,17 +426,18 @@ class PyBulletRobot(robot.Robot):
             tuple(_t_limits)
         )
         self._joint_state = robot.JointState(self.__num_actuators)
-        self.__p.setJointMotorControlArray(self.__robot_id, self.__actuators_id_list,
-                                    self.__p.VELOCITY_CONTROL, 
-                                    forces=np.zeros(self.__num_actuators))
+        self.__kinematic_velocity = None
+        if not self.__kinematic:
+            self.__p.setJointMotorControlArray(self.__robot_id, self.__actuators_id_list,
+                                        self.__p.VELOCITY_CONTROL, 
+                                        forces=np.zeros(self.__num_actuators))
         self.__initialized = True
 
-        self._send_jointcontrol_torque(np.zeros(self.__num_actuators))
+        if not self.__kinematic:
+            self._send_jointcontrol_torque(np.zeros(self.__num_actuators))
         
-        # print("Num joints", self.__joint_id_for_link)
-
-        for _id in range(self.__p.getNumJoints(self.__robot_id)):
-            self.__p.enableJointForceTorqueSensor(self.__robot_id, _id, 1)
+            for _id in range(self.__p.getNumJoints(self.__robot_id)):
+                self.__p.enableJointForceTorqueSensor(self.__robot_id, _id, 1)
         
         self.__recalc_torque = np.zeros(self.__num_actuators)
         self._update_joint_state(self._joint_state)
@@ -401,9 +450,18 @@ class PyBulletRobot(robot.Robot):
     def joint_controller_params(self) -> dict:
         return self.__joint_controller_params
 
+    @property
+    def kinematic(self) -> bool:
+        """bool: joint states are set directly without motors and sensors"""
+        return self.__kinematic
+
     @property
     def robot_id(self) -> int:
         return self.__robot_id
+
+    @property
+    def load_count(self) -> int:
+        return self.__load_count
     
     @property
     def joint_limits(self) -> robot.JointLimits:
@@ -413,6 +471,15 @@ class PyBulletRobot(robot.Robot):
     def urdf_filename(self) -> str:
         return self._urdf_filename
     
+    @property
+    def kinematic_tree(self) -> KinematicTree:
+        """KinematicTree: links and joints of the loaded body including connected tools"""
+        urdf_filename = self._urdf_filename if self.__loaded_urdf_filename is None else self.__loaded_urdf_filename
+        if self.__kinematic_tree is None or self.__kinematic_tree[0] != urdf_filename:
+            editor = URDFEditor(urdf_filename, self.__additional_path)
+            self.__kinematic_tree = (urdf_filename, editor.kinematic_tree)
+        return self.__kinematic_tree[1]
+
     def link_id(self, link_name: str) -> int:
         return self.__joint_id_for_link[link_name]
     
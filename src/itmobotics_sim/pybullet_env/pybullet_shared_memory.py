@@ -0,0 +1,376 @@
+from __future__ import annotations
+import json
+import sys
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+from itmobotics_sim.utils.robot import JointState, Motion, RobotControllerType
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld
+
+
+SEGMENT_FORMAT = 'itmobotics_sim.shared_segment.1'
+# Header: uint64 sequence counter, size of the JSON layout and offset of the arrays, padded to the alignment
+HEADER_SIZE = 64
+ALIGNMENT = 64
+# Command types of the command segment, zero means no command
+COMMAND_TYPES = {
+    1: RobotControllerType.JOINT_POSITIONS,
+    2: RobotControllerType.JOINT_VELOCITIES,
+    3: RobotControllerType.JOINT_TORQUES,
+}
+
+
+
+def _aligned(size: int) -> int:
+    return (size + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _open_untracked(name: str) -> shared_memory.SharedMemory:
+    # Resource tracker unlinks registered segments at exit, attached ones are left to their creator
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args: None
+    try:
+        return shared_memory.SharedMemory(name)
+    finally:
+        resource_tracker.register = register
+
+
+class SharedSegment:
+    """Named shared-memory segment of fixed arrays guarded by a seqlock
+
+    The segment starts with a header and the JSON layout of the arrays, so other processes
+    attach to it by the name only. The sequence counter of the header is odd while the writer
+    changes the arrays and is incremented again when it finishes, so ``version`` is the number
+    of finished writes. Readers either copy a consistent snapshot by ``read`` or access
+    ``arrays`` without copies and compare ``version`` before and after their access.
+    There should be only one writer of a segment.
+    Create segments by ``create`` and attach to existing ones by ``attach``.
+
+    Args:
+        memory (shared_memory.SharedMemory): opened segment
+        fields (list[dict]): name, dtype, shape and offset of every array
+        data_offset (int): offset of the arrays from the start of the segment
+        owner (bool): the segment is unlinked by ``close``
+    """
+
+    def __init__(self, memory: shared_memory.SharedMemory, fields: list, data_offset: int, owner: bool):
+        self.__memory = memory
+        self.__owner = owner
+        self.__sequence = np.ndarray((1,), dtype=np.uint64, buffer=memory.buf, offset=0)
+        self.__arrays = {
+            field['name']: np.ndarray(tuple(field['shape']), dtype=np.dtype(field['dtype']), buffer=memory.buf,
+                offset=data_offset + field['offset'])
+            for field in fields
+        }
+
+    @classmethod
+    def create(cls, name: str, fields: dict) -> SharedSegment:
+        """Create a zero-initialized segment
+
+        Args:
+            name (str): name of the segment, it should not exist
+            fields (dict): (dtype, shape) of every array name
+
+        Returns:
+            SharedSegment: segment owned by the caller
+        """
+        layout = []
+        size = 0
+        for field_name, (dtype, shape) in fields.items():
+            dtype = np.dtype(dtype)
+            shape = [int(dim) for dim in np.atleast_1d(shape)] if np.ndim(shape) > 0 else []
+            layout.append({'name': field_name, 'dtype': dtype.str, 'shape': shape, 'offset': size})
+            size = _aligned(size + dtype.itemsize * int(np.prod(shape)))
+        description = json.dumps({'format': SEGMENT_FORMAT, 'fields': layout}).encode()
+        data_offset = HEADER_SIZE + _aligned(len(description))
+
+        memory = shared_memory.SharedMemory(name, create=True, size=data_offset + max(size, 1))
+        memory.buf[:data_offset + size] = bytes(data_offset + size)
+        memory.buf[HEADER_SIZE:HEADER_SIZE + len(description)] = description
+        header = np.ndarray((3,), dtype=np.uint64, buffer=memory.buf)
+        header[1:] = len(description), data_offset
+        del header
+        return cls(memory, layout, data_offset, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> SharedSegment:
+        """Attach to a segment created by another object or process
+
+        Args:
+            name (str): name of the segment
+
+        Returns:
+            SharedSegment: segment which is not unlinked by ``close``
+        """
+        memory = _open_untracked(name)
+        header = np.ndarray((3,), dtype=np.uint64, buffer=memory.buf)
+        size, data_offset = int(header[1]), int(header[2])
+        del header
+        description = json.loads(bytes(memory.buf[HEADER_SIZE:HEADER_SIZE + size]))
+        assert description['format'] == SEGMENT_FORMAT, "Unknown format of segment {:s}: {}".format(name, description['format'])
+        return cls(memory, description['fields'], data_offset, owner=False)
+
+    def __enter__(self) -> SharedSegment:
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def name(self) -> str:
+        return self.__memory.name
+
+    @property
+    def size(self) -> int:
+        return self.__memory.size
+
+    @property
+    def field_names(self) -> list[str]:
+        return list(self.__arrays.keys())
+
+    @property
+    def arrays(self) -> dict:
+        """dict: arrays in the shared memory by field names, they are views without copies"""
+        return self.__arrays
+
+    @property
+    def sequence(self) -> int:
+        """int: sequence counter, odd while the arrays are written"""
+        return int(self.__sequence[0])
+
+    @property
+    def version(self) -> int:
+        """int: number of finished writes"""
+        return int(self.__sequence[0]) // 2
+
+    def begin_write(self):
+        """mark the arrays as inconsistent before changing them"""
+        self.__sequence[0] += 1
+
+    def end_write(self):
+        """publish changed arrays as the next version"""
+        self.__sequence[0] += 1
+
+    def write(self, values: dict):
+        """Copy the values into the arrays as one version
+
+        Args:
+            values (dict): values of some arrays by field names
+        """
+        self.begin_write()
+        for name, value in values.items():
+            self.__arrays[name][...] = value
+        self.end_write()
+
+    def empty(self) -> dict:
+        """dict: private arrays with the layout of the segment for ``read``"""
+        return {name: np.empty_like(array) for name, array in self.__arrays.items()}
+
+    def read(self, out: dict = None, max_retries: int = 1000) -> Tuple[Optional[int], dict]:
+        """Copy a consistent snapshot of the arrays
+
+        The copy is repeated when the writer changed the arrays during it.
+
+        Args:
+            out (dict, optional): arrays the snapshot is copied to, see ``empty``. Defaults to None.
+            max_retries (int, optional): number of attempts. Defaults to 1000.
+
+        Returns:
+            Tuple[Optional[int], dict]: version of the snapshot or None when there was no consistent one, and the arrays
+        """
+        if out is None:
+            out = self.empty()
+        for _ in range(max_retries):
+            begin = int(self.__sequence[0])
+            if begin & 1:
+                continue
+            for name, array in self.__arrays.items():
+                np.copyto(out[name], array)
+            if int(self.__sequence[0]) == begin:
+                return begin // 2, out
+        return None, out
+
+    def close(self):
+        """Detach from the segment, the owner also removes it
+
+        Views of ``arrays`` taken by the caller should be released before.
+        """
+        if self.__memory is None:
+            return
+        self.__arrays = {}
+        self.__sequence = None
+        self.__memory.close()
+        if self.__owner:
+            self.__memory.unlink()
+        self.__memory = None
+
+
+class SharedMemoryBridge:
+    """Publisher of the world state to shared memory and subscriber of robot commands
+
+    The state segment ``<name>_state`` holds the simulation time (``time``), joint positions,
+    velocities and torques of the robots (``<robot>/joint_positions`` etc.) and poses of the
+    selected links (``<model>/<link>/pose``, [x, y, z, qx, qy, qz, qw] in the world frame).
+    Every camera has its own segment ``<name>_camera_<camera>`` with ``time``, ``color`` (height, width, 3)
+    uint8 and ``depth`` (height, width) float32 arrays, it is written only when the world renders a new frame.
+    The command segment ``<name>_command`` has ``<robot>/control_type`` with a key of ``COMMAND_TYPES``
+    and ``<robot>/target`` joint values for every commanded robot. The last consistent command is sent
+    to the robot after every step, so it acts from the next step on.
+    Attach the bridge by ``PyBulletWorld.attach_logger`` to publish after every simulation step,
+    consumers open the segments by ``SharedSegment.attach``.
+
+    Args:
+        world (PyBulletWorld): published world
+        name (str): prefix of the segment names
+        robot_names (list[str], optional): robots with published joint states, all robots by default
+        links (list[Tuple[str, str]], optional): published (model name, link name) pairs. Defaults to None.
+        cameras (list[str], optional): published cameras connected by ``connect_camera``. Defaults to None.
+        command_robot_names (list[str], optional): robots accepting commands, all published robots by default
+    """
+
+    def __init__(
+        self,
+        world: PyBulletWorld,
+        name: str,
+        robot_names: list[str] = None,
+        links: list[Tuple[str, str]] = None,
+        cameras: list[str] = None,
+        command_robot_names: list[str] = None
+    ):
+        self.__robot_names = list(world.robot_names if robot_names is None else robot_names)
+        self.__links = list(links or [])
+        self.__cameras = list(cameras or [])
+        self.__command_robot_names = list(self.__robot_names if command_robot_names is None else command_robot_names)
+        self.__segments = []
+
+        state_fields = {'time': (np.float64, ())}
+        for robot_name in self.__robot_names:
+            num_joints = world.get_robot(robot_name).num_joints
+            for field in ('joint_positions', 'joint_velocities', 'joint_torques'):
+                state_fields['{:s}/{:s}'.format(robot_name, field)] = (np.float64, (num_joints,))
+        for model_name, link in self.__links:
+            world.link_id(model_name, link)
+            state_fields['{:s}/{:s}/pose'.format(model_name, link)] = (np.float64, (7,))
+        self.__state = self.__create(name + '_state', state_fields)
+
+        self.__camera_segments = {}
+        self.__camera_frames = {}
+        for camera in self.__cameras:
+            color, depth = world.get_image(camera)
+            self.__camera_segments[camera] = self.__create('{:s}_camera_{:s}'.format(name, camera), {
+                'time': (np.float64, ()),
+                'color': (np.uint8, color.shape),
+                'depth': (np.float32, depth.shape),
+            })
+            self.__camera_frames[camera] = None
+
+        command_fields = {}
+        self.__motions = {}
+        for robot_name in self.__command_robot_names:
+            num_joints = world.get_robot(robot_name).num_joints
+            command_fields[robot_name + '/control_type'] = (np.int64, ())
+            command_fields[robot_name + '/target'] = (np.float64, (num_joints,))
+            self.__motions[robot_name] = Motion.from_joint_state(JointState(num_joints))
+        self.__command = self.__create(name + '_command', command_fields)
+        self.__command_buffer = self.__command.empty()
+        self.__command_version = 0
+
+        self.capture(world)
+
+    def __create(self, name: str, fields: dict) -> SharedSegment:
+        try:
+            segment = SharedSegment.create(name, fields)
+        except BaseException:
+            self.close()
+            raise
+        self.__segments.append(segment)
+        return segment
+
+    def __enter__(self) -> SharedMemoryBridge:
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def state(self) -> SharedSegment:
+        return self.__state
+
+    @property
+    def command(self) -> SharedSegment:
+        return self.__command
+
+    def camera(self, camera_name: str) -> SharedSegment:
+        return self.__camera_segments[camera_name]
+
+    @property
+    def segment_names(self) -> list[str]:
+        return [segment.name for segment in self.__segments]
+
+    @property
+    def command_version(self) -> int:
+        """int: version of the last applied command"""
+        return self.__command_version
+
+    def capture(self, world: PyBulletWorld):
+        """Publish the state of the world and send the last command to the robots
+
+        Args:
+            world (PyBulletWorld): published world
+        """
+        client = world.client
+        arrays = self.__state.arrays
+        self.__state.begin_write()
+        arrays['time'][...] = world.sim_time
+        for robot_name in self.__robot_names:
+            joint_state = world.get_robot(robot_name).joint_state
+            arrays[robot_name + '/joint_positions'][:] = joint_state.joint_positions
+            arrays[robot_name + '/joint_velocities'][:] = joint_state.joint_velocities
+            arrays[robot_name + '/joint_torques'][:] = joint_state.joint_torques
+        for model_name, link in self.__links:
+            body_id = world.model_id(model_name)
+            link_id = world.link_id(model_name, link)
+            position, orientation = client.getLinkState(body_id, link_id, computeForwardKinematics=1)[4:6]
+            pose = arrays['{:s}/{:s}/pose'.format(model_name, link)]
+            pose[:3] = position
+            pose[3:] = orientation
+        self.__state.end_write()
+
+        for camera, segment in self.__camera_segments.items():
+            frame = world.get_image(camera)
+            # The world keeps the last frame until the camera renders the next one
+            if frame is self.__camera_frames[camera]:
+                continue
+            self.__camera_frames[camera] = frame
+            segment.begin_write()
+            segment.arrays['time'][...] = world.sim_time
+            segment.arrays['color'][...] = frame[0]
+            segment.arrays['depth'][...] = frame[1]
+            segment.end_write()
+
+        self.__apply_command(world)
+
+    def __apply_command(self, world: PyBulletWorld):
+        if self.__command.version == 0:
+            return
+        version, command = self.__command.read(self.__command_buffer, max_retries=100)
+        if version is None:
+            # The writer holds the segment, the last command stays active
+            return
+        self.__command_version = version
+        for robot_name, motion in self.__motions.items():
+            control_type = COMMAND_TYPES.get(int(command[robot_name + '/control_type']))
+            if control_type is None:
+                continue
+            setattr(motion.joint_state, control_type.value, command[robot_name + '/target'])
+            world.get_robot(robot_name).set_control(motion, control_type)
+
+    def close(self):
+        """Remove the segments"""
+        for segment in self.__segments:
+            segment.close()
+        self.__segments = []
@@ -1,6 +1,7 @@
 import os, sys
 import time
 import enum
+from typing import Tuple, Union
 
 import numpy as np
 from spatialmath import SE3, SO3
@@ -14,18 +15,74 @@ from itmobotics_sim.pybullet_env.pybullet_robot import PyBulletRobot, Simulation
 from itmobotics_sim.utils import robot
 from itmobotics_sim.utils import converters
 from itmobotics_sim.pybullet_env.pybullet_recorder import PyBulletRecorder
+from itmobotics_sim.pybullet_env import pybullet_collision
+from itmobotics_sim.pybullet_env.pybullet_contacts import ContactCache
+from itmobotics_sim.pybullet_env.pybullet_distance_monitor import DistanceMonitor
+from itmobotics_sim.pybullet_env.pybullet_collision_filter import CollisionFilterManager
+from itmobotics_sim.pybullet_env.urdf_editor import URDFEditor, URDFScratch
+from itmobotics_sim.pybullet_env.pybullet_convex_decomposition import ConvexDecompositionCache
+from itmobotics_sim.pybullet_env.pybullet_object_batch import ObjectBatch, ShapeTemplate
+from itmobotics_sim.pybullet_env.pybullet_object_pool import ObjectPool
+from itmobotics_sim.pybullet_env.pybullet_adaptive_stepping import AdaptiveStepping
 
 class GUI_MODE(enum.Enum):
     DIRECT = enum.auto()
     SIMPLE_GUI = enum.auto()
 
+# Keyword arguments of setPhysicsEngineParameter which may be set by a physics profile
+PHYSICS_PARAMETERS = (
+    'numSolverIterations',
+    'numSubSteps',
+    'erp',
+    'contactERP',
+    'frictionERP',
+    'contactBreakingThreshold',
+    'deterministicOverlappingPairs',
+    'enableConeFriction',
+    'solverResidualThreshold',
+)
+# PyBullet defaults of the parameters, contactBreakingThreshold is shared by all clients of the process
+PYBULLET_PHYSICS_PARAMETERS = {
+    'numSolverIterations': 50,
+    'numSubSteps': 0,
+    'erp': 0.2,
+    'contactERP': 0.08,
+    'frictionERP': 0.2,
+    'contactBreakingThreshold': 0.02,
+    'deterministicOverlappingPairs': 0,
+    'enableConeFriction': 1,
+    'solverResidualThreshold': 1e-7,
+}
+# Named physics profiles from the cheapest to the most accurate one, see bench_physics_profiles.
+# Every profile sets all parameters, so switching the profile does not keep values of the previous one
+PHYSICS_PROFILES = {
+    'fast': {**PYBULLET_PHYSICS_PARAMETERS, 'numSolverIterations': 10, 'numSubSteps': 1},
+    'balanced': {**PYBULLET_PHYSICS_PARAMETERS, 'numSolverIterations': 50, 'numSubSteps': 2},
+    'contact-accurate': {**PYBULLET_PHYSICS_PARAMETERS, 'numSolverIterations': 100, 'numSubSteps': 4},
+}
+DEFAULT_PHYSICS_PROFILE = 'contact-accurate'
+
 class PyBulletWorld():
-    def __init__(self, gui_mode: GUI_MODE = GUI_MODE.SIMPLE_GUI, time_step:float = 1e-3, time_scale:float = 1):
+    def __init__(
+        self,
+        gui_mode: GUI_MODE = GUI_MODE.SIMPLE_GUI,
+        time_step:float = 1e-3,
+        time_scale:float = 1,
+        collision_cache: Union[ConvexDecompositionCache, bool] = True,
+        physics_profile = DEFAULT_PHYSICS_PROFILE,
+        kinematic: bool = False
+    ):
         self.__time_step = time_step
         self.__time_scale = max(time_scale, 1.0)
         assert self.__time_scale < 1e5, "Large time scale doesn't support, please choose less than 1e5"
         assert self.__time_step < 1.0, "Large time step doesn't support, please choose less than 1.0 sec"
         self.__robots = {}
+        self.__physics_parameters = self.__profile_parameters(physics_profile)
+        self.__physics_profile = physics_profile
+        self.__adaptive_stepping = None
+        # Kinematic world does not step the dynamics, collisions are detected on demand
+        self.__kinematic = kinematic
+        self.__collisions_detected = False
 
         self.__pybullet_gui_mode = pybullet.DIRECT
         self.__blender_recorder = None
@@ -33,21 +90,45 @@ class PyBulletWorld():
         if gui_mode == GUI_MODE.SIMPLE_GUI:
             self.__pybullet_gui_mode = pybullet.GUI
         
-        self.__blender_recorder = PyBulletRecorder()
         self.__recording = False
 
         self.__p = bc.BulletClient(connection_mode=self.__pybullet_gui_mode)
+        self.__blender_recorder = PyBulletRecorder(self.__p)
 
         self.__p.setAdditionalSearchPath(pybullet_data.getDataPath())
         self.additional_paths = [pybullet_data.getDataPath()]
+        self.__contacts = ContactCache(self.__p, self.__detect_collisions if kinematic else None)
 
         self.__objects = {}
+        self.__object_batches = {}
+        self.__shape_templates = {}
+        self.__object_pool = None
         self.__cameras = {}
+        self.__distance_monitors = {}
+        self.__loggers = []
+        self.__urdf_scratch = URDFScratch()
+        # URDFs with decomposed collision meshes are loaded when they were preprocessed,
+        # True takes the cache in the default directory, False or None disables the lookup
+        if collision_cache is True:
+            collision_cache = ConvexDecompositionCache()
+        elif collision_cache is False:
+            collision_cache = None
+        self.__collision_cache = collision_cache
+        self.__object_load_count = 0
+        self.__collision_filter = CollisionFilterManager(self.__p, self.__model_loads)
+        # Rules are applied in the step only after models were loaded or removed
+        self.__collision_filter_dirty = True
+        self.__collision_filter_robot_loads = {}
         self.reset()
 
     def __del__(self):
         print("Pybullet disconnecting")
-        self.__p.disconnect()
+        try:
+            self.__p.disconnect()
+        except pybullet.error:
+            # The client may be finalized first when the world is collected with its reference cycles
+            pass
+        self.__urdf_scratch.cleanup()
         del self.__p
         del self.__robots
         del self.__objects
@@ -57,21 +138,103 @@ class PyBulletWorld():
         if name in self.__robots.keys():
             raise SimulationException('A robot with that name ({:s}) already exists'.format(name))
         self.__robots[name] = PyBulletRobot(
-            urdf_filename,
+            self.__collision_urdf(urdf_filename),
             self.__p,
             base_transform,
             additional_path = self.additional_paths,
             fixed_base=fixed,
-            use_self_collision=self_collide
+            use_self_collision=self_collide,
+            urdf_scratch=self.__urdf_scratch,
+            kinematic=self.__kinematic
         )
+        self.__apply_collision_filter()
         return self.__robots[name]
     
     def add_object(self, name:str, urdf_filename: str, base_transform: SE3 = SE3(), fixed: bool = True, save: bool = False, scale_size: float = 1.0):
+        if self.__batch_name(name):
+            raise SimulationException('An object with that name ({:s}) is added by add_objects'.format(name))
         if name in self.__objects.keys():
             self.remove_object(name)
             print('Replace object with name {:s}'.format(name))
         self.__append_object(name, urdf_filename, base_transform, fixed, save, scale_size)
+        self.__apply_collision_filter()
     
+    def add_objects(
+        self,
+        name_prefix: str,
+        urdf_filename: str,
+        transforms: np.ndarray,
+        fixed: bool = True,
+        save: bool = False,
+        scale_size: float = 1.0
+    ) -> ObjectBatch:
+        """Add many objects of one URDF
+
+        Objects of single-link URDFs are created by one ``createMultiBody`` call with batch positions
+        from collision and visual shapes shared by all objects, other URDFs are loaded one by one.
+        The objects are named ``<name_prefix>_<index>`` and are used by name like objects of ``add_object``.
+
+        Args:
+            name_prefix (str): prefix of the object names, objects with the same prefix are replaced
+            urdf_filename (str): path of the URDF
+            transforms (np.ndarray): (N, 4, 4) homogeneous transforms of the objects
+            fixed (bool, optional): objects have fixed base. Defaults to True.
+            save (bool, optional): objects are spawned again after the world reset. Defaults to False.
+            scale_size (float, optional): global scaling of the URDF. Defaults to 1.0.
+
+        Returns:
+            ObjectBatch: registry of the objects with their body ids
+        """
+        if name_prefix in self.__object_batches:
+            self.remove_objects(name_prefix)
+        batch = ObjectBatch(name_prefix, urdf_filename, transforms, fixed, save, scale_size)
+        clashes = [name for name in self.__objects if self.__batch_name(name, batch)]
+        if len(clashes) > 0:
+            raise SimulationException('Objects with names {:s} are already added by add_object'.format(str(clashes)))
+        self.__spawn_batch(batch)
+        self.__object_batches[name_prefix] = batch
+        self.__apply_collision_filter()
+        return batch
+
+    def remove_objects(self, name_prefix: str):
+        """Remove all objects added by ``add_objects`` with the prefix
+
+        Args:
+            name_prefix (str): prefix of the object names
+        """
+        assert name_prefix in self.__object_batches, "Undefined objects: {:s}".format(name_prefix)
+        for body_id in self.__object_batches.pop(name_prefix).ids.tolist():
+            if body_id >= 0:
+                self.__p.removeBody(body_id)
+        self.__collision_filter_dirty = True
+
+    def __spawn_batch(self, batch: ObjectBatch):
+        urdf_filename = self.__collision_urdf(batch.urdf_filename)
+        key = (urdf_filename, batch.scale_size)
+        if key not in self.__shape_templates:
+            # Shapes are shared by all batches of the URDF until the simulation is reset
+            resolved_filename = URDFEditor.find_urdf(urdf_filename, self.additional_paths)
+            batchable = resolved_filename != '' and ShapeTemplate.batchable(resolved_filename)
+            self.__shape_templates[key] = ShapeTemplate(self.__p, urdf_filename, batch.scale_size) if batchable else None
+        self.__object_load_count += 1
+        batch.spawn(self.__p, urdf_filename, self.__shape_templates[key], self.__object_load_count)
+
+    def __batch_name(self, name: str, batch: ObjectBatch = None) -> bool:
+        # Removed objects of the batch keep their names, they are spawned again after the reset
+        prefix, _, index = name.rpartition('_')
+        if batch is None:
+            batch = self.__object_batches.get(prefix)
+        if batch is None or prefix != batch.name_prefix or not index.isdigit():
+            return False
+        return str(int(index)) == index and int(index) < len(batch)
+
+    def __batch_object(self, name: str) -> Tuple[ObjectBatch, int]:
+        batch = self.__object_batches.get(name.rpartition('_')[0])
+        if batch is None:
+            return None, None
+        index = batch.index(name)
+        return (None, None) if index is None else (batch, index)
+
     def connect_camera(self, 
         name: str, 
         model_name: str, 
@@ -182,13 +345,17 @@ class PyBulletWorld():
     def __append_object(self, name:str, urdf_filename: str, base_transform: SE3, fixed: bool, save: bool, scale_size: float, enable_ft: bool = False):
         base_pose = base_transform.t.tolist() # World position [x,y,z]
         base_orient = R.from_matrix(base_transform.R).as_quat().tolist() # Quaternioun [x,y,z,w]
-        obj_id = self.__p.loadURDF(
-            urdf_filename,
-            basePosition=base_pose,
-            baseOrientation=base_orient,
-            useFixedBase=fixed,
-            globalScaling=scale_size
-        )
+        obj_id = None
+        if self.__object_pool is not None:
+            obj_id = self.__object_pool.acquire((urdf_filename, scale_size, fixed, enable_ft), base_pose, base_orient)
+        if obj_id is None:
+            obj_id = self.__p.loadURDF(
+                self.__collision_urdf(urdf_filename),
+                basePosition=base_pose,
+                baseOrientation=base_orient,
+                useFixedBase=fixed,
+                globalScaling=scale_size
+            )
         num_joints = self.__p.getNumJoints(obj_id)
         link_id = {}
         for _id in range(num_joints):
@@ -197,8 +364,10 @@ class PyBulletWorld():
             if enable_ft:
                 self.__p.enableJointForceTorqueSensor(obj_id, _id, 1)
         
+        self.__object_load_count += 1
         self.__objects[name] = {
             "id": obj_id,
+            "load_count": self.__object_load_count,
             "urdf_filename": urdf_filename,
             "base_tf": base_transform,
             "fixed": fixed,
@@ -208,15 +377,58 @@ class PyBulletWorld():
             "enable_ft": enable_ft
         }
     
+    def __collision_urdf(self, urdf_filename: str) -> str:
+        if self.__collision_cache is None:
+            return urdf_filename
+        cached_urdf = self.__collision_cache.cached_urdf(URDFEditor.find_urdf(urdf_filename, self.additional_paths))
+        return urdf_filename if cached_urdf is None else cached_urdf
+
     def remove_object(self, name: str):
+        batch, index = self.__batch_object(name)
+        if batch is not None:
+            self.__p.removeBody(int(batch.ids[index]))
+            batch.remove(index)
+            self.__collision_filter_dirty = True
+            return
         assert name in self.__objects, "Undefined object: {:s}".format(name)
-        self.__p.removeBody(self.__objects[name]["id"])
+        obj = self.__objects[name]
+        if self.__object_pool is not None:
+            # The body may be reused by another object, so collisions disabled by the rules are restored
+            self.__collision_filter.release(name)
+            self.__object_pool.release(
+                (obj["urdf_filename"], obj["scale_size"], obj["fixed"], obj["enable_ft"]), obj["id"], obj["fixed"]
+            )
+        else:
+            self.__p.removeBody(obj["id"])
         del self.__objects[name]
+        self.__collision_filter_dirty = True
+
+    def set_object_pooling(self, enabled: bool):
+        """Recycle bodies of removed objects instead of loading URDF again
+
+        Removed objects are parked in ``ObjectPool`` and objects added with the same URDF, scale and base
+        are taken from it. The world reset keeps the simulation: robots are reloaded, saved objects are
+        moved back to their initial poses through the pool and other objects are parked.
+
+        Args:
+            enabled (bool): enable pooling, disabling removes parked bodies
+        """
+        if enabled and self.__object_pool is None:
+            self.__object_pool = ObjectPool(self.__p)
+        elif not enabled and self.__object_pool is not None:
+            self.__object_pool.clear(remove_bodies=True)
+            self.__object_pool = None
+
+    @property
+    def object_pool(self) -> ObjectPool:
+        """ObjectPool: pool of parked bodies, None if pooling is disabled"""
+        return self.__object_pool
 
     def remove_robot(self, name: str):
         assert name in self.__robots, "Undefined object: {:s}".format(name)
         self.__p.removeBody(self.__robots[name].robot_id)
         del self.__robots[name]
+        self.__collision_filter_dirty = True
 
     def link_state(self, model_name: str, link: str, reference_model_name: str = "", reference_link: str = "global") -> robot.EEState:
         link_state = robot.EEState.from_tf(SE3(0.0, 0.0, 0.0), ee_link=link, ref_link=reference_link)
@@ -228,6 +440,9 @@ class PyBulletWorld():
                 elif model_name in self.__robots:
                     pr = self.__p.getLinkState(self.__robots[model_name].robot_id, self.__robots[model_name].link_id(link), computeLinkVelocity=1)
                     pb_joint_state = self.__p.getJointState(self.__robots[model_name].robot_id, self.__robots[model_name].link_id(link))
+                elif self.__batch_object(model_name)[0] is not None:
+                    pr = self.__p.getLinkState(self.__model_id(model_name), self.__link_id(model_name, link), computeLinkVelocity=1)
+                    pb_joint_state = self.__p.getJointState(self.__model_id(model_name), self.__link_id(model_name, link))
                 else:
                     raise KeyError(
                         'Unknown model name. Please check that object or robot model has been added to the simulator \
@@ -256,6 +471,8 @@ class PyBulletWorld():
             pr = self.__p.getLinkState(self.__objects[reference_model_name]["id"], self.__objects[reference_model_name]["link_id"][reference_link], computeLinkVelocity=1)
         elif reference_model_name in self.__robots:
             pr = self.__p.getLinkState(self.__robots[reference_model_name].robot_id, self.__robots[reference_model_name].link_id(reference_link), computeLinkVelocity=1)
+        elif self.__batch_object(reference_model_name)[0] is not None:
+            pr = self.__p.getLinkState(self.__model_id(reference_model_name), self.__link_id(reference_model_name, reference_link), computeLinkVelocity=1)
         else:
             raise SimulationException(
                 'Unknown reference model name. Please check that object or robot model has been added to the simulator\
@@ -276,38 +493,295 @@ class PyBulletWorld():
         return link_state
     
     def is_collide_with(self, model_name: str, tollerance: float = 0.001):
+        modelA_id = self.__model_id(model_name)
+        # Overlapping objects are taken from the broadphase, which is updated by collision detection
+        self.__detect_collisions()
+        aabb_min, aabb_max = pybullet_collision.body_aabb(self.__p, modelA_id)
+        overlapping = self.__p.getOverlappingObjects(aabb_min - tollerance, aabb_max + tollerance)
+        candidates = set() if overlapping is None else set(body_id for body_id, _ in overlapping)
+
         collision_list = []
+        for modelB_name, modelB_id in self.__model_ids().items():
+            if modelB_id == modelA_id or modelB_id not in candidates:
+                continue
+            closest_points = self.__p.getClosestPoints(
+                modelA_id,
+                bodyB = modelB_id,
+                distance = tollerance
+            )
+            if len(closest_points)>0:
+                collision_list.append(modelB_name)
+        return collision_list
+
+    def collision_matrix(self, tollerance: float = 0.001) -> Tuple[np.ndarray, dict]:
+        """Collisions between all models of the world
+
+        Bounding boxes of all models are pruned by the sweep and prune broadphase,
+        so the narrow phase is called only for the pairs which boxes overlap.
+
+        Args:
+            tollerance (float, optional): distance below which models are considered as colliding. Defaults to 0.001.
+
+        Returns:
+            Tuple[np.ndarray, dict]: (n, n) symmetric boolean matrix with rows in order of ``model_names`` and
+                dictionary that maps colliding pair of model names to list of pairs of its colliding link names
+        """
+        model_ids = self.__model_ids()
+        names = list(model_ids.keys())
+        ids = list(model_ids.values())
+        matrix = np.zeros((len(ids), len(ids)), dtype=bool)
+        link_pairs = {}
+        if len(ids) == 0:
+            return matrix, link_pairs
+
+        aabbs = [pybullet_collision.body_aabb(self.__p, body_id) for body_id in ids]
+        aabb_min = np.array([aabb[0] for aabb in aabbs])
+        aabb_max = np.array([aabb[1] for aabb in aabbs])
+
+        for i, j in pybullet_collision.overlapping_pairs(aabb_min, aabb_max, tollerance):
+            closest_points = self.__p.getClosestPoints(ids[i], bodyB = ids[j], distance = tollerance)
+            if len(closest_points) == 0:
+                continue
+            matrix[i, j] = matrix[j, i] = True
+            link_pairs[(names[i], names[j])] = sorted(set(
+                (self.__link_name(ids[i], cp[3]), self.__link_name(ids[j], cp[4])) for cp in closest_points
+            ))
+        return matrix, link_pairs
+
+    def contact_points(self, model_name: str, other_model_name: str = None) -> np.ndarray:
+        """Contacts of the model at the last simulation step
+
+        Args:
+            model_name (str): name of robot or object, it is always ``body_a`` of the result
+            other_model_name (str, optional): only contacts with this model are returned. Defaults to None.
+
+        Returns:
+            np.ndarray: structured array of ``pybullet_contacts.CONTACT_DTYPE``
+        """
+        other_id = None if other_model_name is None else self.__model_id(other_model_name)
+        return self.__contacts.body_contacts(self.__model_id(model_name), other_id)
+
+    def link_contact_forces(self, model_name: str) -> dict:
+        """Sum of contact normal forces applied to every link of the model
+
+        Args:
+            model_name (str): name of robot or object
+
+        Returns:
+            dict: force for every link name of the model
+        """
+        body_id = self.__model_id(model_name)
+        forces = self.__contacts.link_normal_forces(body_id, self.__p.getNumJoints(body_id))
+        return {self.__link_name(body_id, link_id): forces[link_id + 1] for link_id in range(-1, forces.shape[0] - 1)}
+
+    def contact_wrench(self, model_name: str) -> np.ndarray:
+        """Total wrench applied to the model by contacts
+
+        Args:
+            model_name (str): name of robot or object
+
+        Returns:
+            np.ndarray: (6,) force and torque about the model base in world space
+        """
+        body_id = self.__model_id(model_name)
+        base_position, _ = self.__p.getBasePositionAndOrientation(body_id)
+        return self.__contacts.wrench(body_id, np.asarray(base_position))
+
+    def add_distance_monitor(
+        self,
+        name: str,
+        robot_name: str,
+        obstacle_names: list[str],
+        max_distance: float = 0.5,
+        link_names: list[str] = None
+    ) -> DistanceMonitor:
+        """Register minimum distance monitoring between robot links and obstacles
+
+        Distances are evaluated at most once per simulation step on the first access to the monitor.
+
+        Args:
+            name (str): name of the monitor
+            robot_name (str): name of the monitored robot
+            obstacle_names (list[str]): names of obstacle robots or objects
+            max_distance (float, optional): distance above which pairs are not evaluated. Defaults to 0.5.
+            link_names (list[str], optional): monitored links, all links with collision shapes by default.
+
+        Returns:
+            DistanceMonitor: monitor with (n_links, n_obstacles) distance array
+        """
+        if name in self.__distance_monitors:
+            raise SimulationException('A distance monitor with that name ({:s}) already exists'.format(name))
+        robot_id = self.__model_id(robot_name)
+        for obstacle_name in obstacle_names:
+            self.__model_id(obstacle_name)
+        if link_names is None:
+            link_names = [
+                self.__link_name(robot_id, link_id) for link_id in range(-1, self.__p.getNumJoints(robot_id))
+                if len(self.__p.getCollisionShapeData(robot_id, link_id)) > 0
+            ]
+
+        def resolve():
+            body_id = self.__model_id(robot_name)
+            base_name = self.__link_name(body_id, -1)
+            return (
+                body_id,
+                [-1 if link == base_name else self.__link_id(robot_name, link) for link in link_names],
+                [self.__model_id(obstacle_name) for obstacle_name in obstacle_names]
+            )
+
+        self.__distance_monitors[name] = DistanceMonitor(self.__p, resolve, link_names, obstacle_names, max_distance)
+        return self.__distance_monitors[name]
+
+    def get_distance_monitor(self, name: str) -> DistanceMonitor:
+        return self.__distance_monitors[name]
+
+    def remove_distance_monitor(self, name: str):
+        assert name in self.__distance_monitors, "Undefined distance monitor: {:s}".format(name)
+        del self.__distance_monitors[name]
+
+    def __link_id(self, model_name: str, link: str) -> int:
         if model_name in self.__robots:
-            modelA_id = self.__robots[model_name].robot_id
-        elif model_name in self.__objects:
-            modelA_id = self.__objects[model_name]['id']
-        
-        for modelB_name in self.__objects:
-            if modelA_id!= self.__objects[modelB_name]['id']:
-                closest_points = self.__p.getClosestPoints(
-                    modelA_id,
-                    bodyB = self.__objects[modelB_name]['id'],
-                    distance = tollerance
-                )
-                if len(closest_points)>0:
-                    collision_list.append(modelB_name)
-        for modelB_name in self.__robots:
-            if modelA_id!= self.__robots[modelB_name].robot_id:
-                closest_points = self.__p.getClosestPoints(
-                    modelA_id,
-                    bodyB = self.__robots[modelB_name].robot_id,
-                    distance = tollerance
-                )
-                if len(closest_points)>0:
-                    collision_list.append(modelB_name)
+            return self.__robots[model_name].link_id(link)
+        if model_name in self.__objects:
+            return self.__objects[model_name]['link_id'][link]
+        batch, _ = self.__batch_object(model_name)
+        if batch is None:
+            raise KeyError('Unknown model name: {:s}'.format(model_name))
+        return batch.link_id[link]
 
-        return collision_list
+    def link_id(self, model_name: str, link: str) -> int:
+        """Index of the link in the body of the robot or object
+
+        Args:
+            model_name (str): name of robot or object
+            link (str): link name, the base link is not indexed
+
+        Returns:
+            int: link index used by PyBullet functions
+        """
+        return self.__link_id(model_name, link)
+
+    def model_urdf(self, model_name: str) -> Tuple[str, float]:
+        """URDF loaded for the robot or object
+
+        Args:
+            model_name (str): name of robot or object
+
+        Returns:
+            Tuple[str, float]: path of the loaded URDF and its global scaling
+        """
+        if model_name in self.__robots:
+            return self.__robots[model_name].urdf_filename, 1.0
+        if model_name in self.__objects:
+            obj = self.__objects[model_name]
+            return self.__collision_urdf(obj['urdf_filename']), obj['scale_size']
+        batch, _ = self.__batch_object(model_name)
+        if batch is None:
+            raise KeyError('Unknown model name: {:s}'.format(model_name))
+        return self.__collision_urdf(batch.urdf_filename), batch.scale_size
+
+    def model_id(self, model_name: str) -> int:
+        """Unique body id of the robot or object
+
+        Args:
+            model_name (str): name of robot or object
+
+        Returns:
+            int: body id in the world client, it changes when the body is reloaded
+        """
+        return self.__model_id(model_name)
+
+    def __model_id(self, model_name: str) -> int:
+        if model_name in self.__robots:
+            return self.__robots[model_name].robot_id
+        if model_name in self.__objects:
+            return self.__objects[model_name]['id']
+        batch, index = self.__batch_object(model_name)
+        if batch is not None:
+            return int(batch.ids[index])
+        raise KeyError(
+            'Unknown model name: {:s}.\n List of added robot models: {:s}.\n List of added object models: {:s}'.format(
+                model_name,
+                str(list(self.__robots.keys())),
+                str(list(self.__objects.keys()))
+            )
+        )
+
+    def __model_ids(self) -> dict:
+        model_ids = {name: self.__robots[name].robot_id for name in self.__robots}
+        model_ids.update({name: self.__objects[name]['id'] for name in self.__objects})
+        for batch in self.__object_batches.values():
+            model_ids.update(zip(batch.names, batch.ids[batch.ids >= 0].tolist()))
+        return model_ids
+
+    def __model_loads(self) -> dict:
+        model_loads = {name: (robot.robot_id, robot.load_count) for name, robot in self.__robots.items()}
+        model_loads.update({name: (obj['id'], obj['load_count']) for name, obj in self.__objects.items()})
+        for batch in self.__object_batches.values():
+            model_loads.update(zip(batch.names, ((body_id, batch.load_count) for body_id in batch.ids[batch.ids >= 0].tolist())))
+        return model_loads
+
+    def __link_name(self, body_id: int, link_id: int) -> str:
+        if link_id == -1:
+            return self.__p.getBodyInfo(body_id)[0].decode('utf-8')
+        return self.__p.getJointInfo(body_id, link_id)[12].decode('utf-8')
+
+    def collision_filter_report(self, n_steps: int = 100) -> dict:
+        """Number of link pairs pruned by collision filter rules and saved step time
+
+        Args:
+            n_steps (int, optional): number of steps for time measurement, zero to skip it. Defaults to 100.
+
+        Returns:
+            dict: report of ``CollisionFilterManager.report``
+        """
+        report = self.__collision_filter.report(n_steps)
+        self.__invalidate_step_caches()
+        return report
+
+    def __detect_collisions(self):
+        if self.__kinematic and not self.__collisions_detected:
+            self.__p.performCollisionDetection()
+            self.__collisions_detected = True
+
+    def __invalidate_step_caches(self):
+        self.__collisions_detected = False
+        self.__contacts.invalidate()
+        for monitor in self.__distance_monitors.values():
+            monitor.invalidate()
+
+    def __apply_collision_filter(self):
+        self.__collision_filter.apply()
+        self.__collision_filter_dirty = False
+        self.__collision_filter_robot_loads = {name: r.load_count for name, r in self.__robots.items()}
+
+    def __collision_filter_outdated(self) -> bool:
+        if not self.__collision_filter.has_rules:
+            return False
+        if self.__collision_filter_dirty or len(self.__collision_filter_robot_loads) != len(self.__robots):
+            return True
+        # Robots are reloaded by themselves on tool connection
+        return any(self.__collision_filter_robot_loads.get(name) != r.load_count for name, r in self.__robots.items())
 
     def sim_step(self):
-        self.__p.stepSimulation()
+        if self.__collision_filter_outdated():
+            self.__apply_collision_filter()
+        if self.__kinematic:
+            for r in self.__robots.values():
+                r.kinematic_step(self.__time_step)
+            self.__invalidate_step_caches()
+        else:
+            if self.__adaptive_stepping is not None:
+                self.__adaptive_stepping.before_step()
+            self.__p.stepSimulation()
+            self.__invalidate_step_caches()
+            if self.__adaptive_stepping is not None:
+                self.__adaptive_stepping.after_step(self.__time_step, self.__contacts.contacts)
         self.__sim_time += self.__time_step
         if self.__recording:
-            self.__blender_recorder.add_keyframe()
+            self.__blender_recorder.add_keyframe(self.__sim_time)
+        for logger in self.__loggers:
+            logger.capture(self)
         if self.__pybullet_gui_mode == pybullet.GUI:
             dt = max(self.__time_step/self.__time_scale - (self.__last_real_time - time.time()), 0)
             time.sleep(dt)
@@ -316,17 +790,89 @@ class PyBulletWorld():
     @property
     def time_step(self):
         return self.__time_step
+
+    @property
+    def kinematic(self) -> bool:
+        """bool: the world sets joint states directly and does not simulate dynamics
+
+        Robots have no motors and force-torque sensors: joint position targets are applied immediately,
+        joint velocities are integrated by ``sim_step``, torque control is not supported.
+        ``sim_step`` only invalidates cached queries, collision detection runs on the first contact
+        query after it. Contacts have zero forces, since the constraint solver is not run.
+        """
+        return self.__kinematic
+
+    @property
+    def physics_profile(self):
+        """Union[str, dict]: name of the physics profile or custom parameters"""
+        return self.__physics_profile
+
+    @property
+    def physics_parameters(self) -> dict:
+        """dict: parameters of setPhysicsEngineParameter applied by the profile"""
+        return dict(self.__physics_parameters)
+
+    def set_physics_profile(self, physics_profile):
+        """Apply physics profile now and after every reset
+
+        Args:
+            physics_profile (Union[str, dict]): name from ``PHYSICS_PROFILES`` or custom parameters,
+                keyword arguments of setPhysicsEngineParameter listed in ``PHYSICS_PARAMETERS``.
+                Parameters missing in a custom profile are taken from the default profile.
+        """
+        self.__physics_parameters = self.__profile_parameters(physics_profile)
+        self.__physics_profile = physics_profile
+        self.__p.setPhysicsEngineParameter(**self.__physics_parameters)
+        if self.__adaptive_stepping is not None:
+            self.__adaptive_stepping.reset()
+
+    def set_adaptive_stepping(self, adaptive_stepping: AdaptiveStepping = None):
+        """Adapt substeps and solver iterations of every step to contact activity
+
+        Args:
+            adaptive_stepping (AdaptiveStepping, optional): stepping created for the world client,
+                None to return to the parameters of the physics profile. Defaults to None.
+        """
+        self.__adaptive_stepping = adaptive_stepping
+        if adaptive_stepping is None:
+            self.__p.setPhysicsEngineParameter(**self.__physics_parameters)
+        else:
+            adaptive_stepping.reset()
+
+    @property
+    def adaptive_stepping(self) -> AdaptiveStepping:
+        """AdaptiveStepping: stepping of the world, None if the physics profile is used"""
+        return self.__adaptive_stepping
+
+    @staticmethod
+    def __profile_parameters(physics_profile) -> dict:
+        if isinstance(physics_profile, str):
+            if physics_profile not in PHYSICS_PROFILES:
+                raise KeyError('Unknown physics profile: {:s}. Available profiles: {:s}'.format(
+                    physics_profile, str(list(PHYSICS_PROFILES.keys()))
+                ))
+            return dict(PHYSICS_PROFILES[physics_profile])
+        for k in physics_profile:
+            assert k in PHYSICS_PARAMETERS, "Unknown physics parameter: {:s}".format(k)
+        parameters = dict(PHYSICS_PROFILES[DEFAULT_PHYSICS_PROFILE])
+        parameters.update(physics_profile)
+        return parameters
     
     
     def reset(self):
+        # Pooled bodies survive the reset, so the simulation itself is kept
+        pooled = self.__object_pool is not None
+        if not pooled:
+            for r in self.__robots.keys():
+                self.__robots[r].clear_id()
 
-        for r in self.__robots.keys():
-            self.__robots[r].clear_id()
-
-        self.__p.resetSimulation()
+            self.__p.resetSimulation()
+        self.__invalidate_step_caches()
         self.__p.setGravity(0, 0, -9.82)
         self.__p.setTimeStep(self.__time_step)
-        self.__p.setPhysicsEngineParameter(fixedTimeStep=self.__time_step, numSolverIterations=100, numSubSteps=4)
+        self.__p.setPhysicsEngineParameter(fixedTimeStep=self.__time_step, **self.__physics_parameters)
+        if self.__adaptive_stepping is not None:
+            self.__adaptive_stepping.reset()
         self.__p.setRealTimeSimulation(False)
         
         for r in self.__robots.keys():
@@ -335,8 +881,10 @@ class PyBulletWorld():
         self.__sim_time = 0.0
         self.__last_real_time = time.time()
         
-        for n in self.__objects:
+        for n in list(self.__objects):
             obj = dict(self.__objects[n])
+            if pooled:
+                self.remove_object(n)
             if obj["save"]:
                 self.__append_object(
                     n,
@@ -347,6 +895,17 @@ class PyBulletWorld():
                     obj["scale_size"],
                     obj["enable_ft"]
                 )
+        if not pooled:
+            self.__shape_templates = {}
+        for name_prefix, batch in list(self.__object_batches.items()):
+            if pooled:
+                for body_id in batch.ids[batch.ids >= 0].tolist():
+                    self.__p.removeBody(body_id)
+            if batch.save:
+                self.__spawn_batch(batch)
+            else:
+                del self.__object_batches[name_prefix]
+        self.__apply_collision_filter()
         
         self.__blender_recorder.reset()
     
@@ -358,16 +917,19 @@ class PyBulletWorld():
         return self.__robots[robot_name]
 
     def register_objects_for_record(self):
-        self.__blender_recorder.reset()
         if self.__blender_recorder is None:
             print('Blender is not active')
             return
+        self.__blender_recorder.clear_objects()
 
         # Add objects observer
         for robot in self.__robots.values():
             self.__blender_recorder.register_object(robot.robot_id, robot.urdf_filename)
         for obj in self.__objects.values():
             self.__blender_recorder.register_object(obj["id"], obj["urdf_filename"])
+        for batch in self.__object_batches.values():
+            for body_id in batch.ids[batch.ids >= 0].tolist():
+                self.__blender_recorder.register_object(body_id, batch.urdf_filename)
 
     def save_scene_record(self, filename) -> bool:
         if self.__blender_recorder is None:
@@ -377,19 +939,93 @@ class PyBulletWorld():
         self.__blender_recorder.save(filename)
         return True
     
-    def start_record(self):
+    def attach_logger(self, logger):
+        """Call ``logger.capture(world)`` after every simulation step
+
+        Args:
+            logger: object with ``capture(world)`` method, e.g. ``StateLog`` or ``DatasetLogger``
+        """
+        self.__loggers.append(logger)
+
+    def detach_logger(self, logger):
+        self.__loggers.remove(logger)
+
+    def set_record_policy(
+        self,
+        fps: float = None,
+        position_tolerance: float = 0.0,
+        angle_tolerance: float = 0.0,
+        position_resolution: float = None
+    ):
+        """Set recording policy of the scene record, see ``PyBulletRecorder.set_policy``
+
+        Args:
+            fps (float, optional): target frame rate of the record, every simulation step by default
+            position_tolerance (float, optional): minimal position change of a link keyframe in meters. Defaults to 0.0.
+            angle_tolerance (float, optional): minimal rotation of a link keyframe in radians. Defaults to 0.0.
+            position_resolution (float, optional): position step of int16 quantized poses, not quantized by default
+        """
+        self.__blender_recorder.set_policy(fps, position_tolerance, angle_tolerance, position_resolution)
+
+    def start_record(self, stream_path: str = None):
+        """Start recording of keyframes every simulation step
+
+        Args:
+            stream_path (str, optional): record file the frames are streamed to instead of memory,
+                see ``PyBulletRecorder.start_stream``. Defaults to None.
+        """
+        if stream_path is not None:
+            self.__blender_recorder.start_stream(stream_path)
+        elif self.__blender_recorder.stream_path is not None:
+            # Record in memory should not return the file of the previous streamed record
+            self.__blender_recorder.reset()
         self.__recording = True
     def stop_record(self):
         self.__recording = False
+        self.__blender_recorder.stop_stream()
     
     @property
     def robot_names(self) -> list[str]:
         return list(self.__robots.keys())
 
+    @property
+    def model_names(self) -> list[str]:
+        return list(self.__model_ids().keys())
+
+    @property
+    def collision_filter(self) -> CollisionFilterManager:
+        return self.__collision_filter
+
     @property
     def sim_time(self) -> float:
         return self.__sim_time
 
+    @sim_time.setter
+    def sim_time(self, sim_time: float):
+        """Set time of the state applied without simulation step, e.g. by kinematic replay
+
+        Cached contacts and distances of the previous state are dropped and cameras render the new state
+        on the next request.
+        """
+        self.__sim_time = sim_time
+        self.__invalidate_step_caches()
+        for camera in self.__cameras.values():
+            camera['time_frame'] = -np.inf
+
     @property
     def client(self) -> float:
         return self.__p
+
+    @property
+    def collision_cache(self) -> ConvexDecompositionCache:
+        """ConvexDecompositionCache: cache of preprocessed URDFs loaded instead of the original ones, None disables the lookup"""
+        return self.__collision_cache
+
+    @collision_cache.setter
+    def collision_cache(self, collision_cache: ConvexDecompositionCache):
+        self.__collision_cache = collision_cache
+
+    @property
+    def urdf_scratch(self) -> URDFScratch:
+        """URDFScratch: scratch directory of composed URDF files, it is removed with the world"""
+        return self.__urdf_scratch
@@ -1,17 +1,261 @@
 from __future__ import annotations
+import copy
+import os
 import pathlib
-from typing import Tuple
+import shutil
+import tempfile
+import uuid
+import weakref
 import xml.etree.ElementTree
+from xml.sax.saxutils import quoteattr
 import numpy as np
 
 from scipy.spatial.transform import Rotation as R
 
 
+# Parsed URDF roots by file path with mtime and size of the parsed file, they are never modified
+_ELEMENT_TREES = {}
+# Serialized top-level elements, they are shared between compositions and never modified
+_ELEMENT_BYTES = weakref.WeakKeyDictionary()
+# Directories of the files top-level elements were parsed from, relative meshes are found there
+_ELEMENT_DIRECTORIES = weakref.WeakKeyDictionary()
+# Copies of shared top-level elements with absolute mesh paths, None if the element has no relative meshes
+_ABSOLUTE_ELEMENTS = weakref.WeakKeyDictionary()
+
+
+def _parse_urdf(urdf_filename: str) -> xml.etree.ElementTree.Element:
+    stat = os.stat(urdf_filename)
+    key = os.path.abspath(urdf_filename)
+    cached = _ELEMENT_TREES.get(key)
+    if cached is None or cached[0] != (stat.st_mtime_ns, stat.st_size):
+        root = xml.etree.ElementTree.parse(urdf_filename).getroot()
+        for element in root:
+            _ELEMENT_DIRECTORIES[element] = os.path.dirname(key)
+        cached = ((stat.st_mtime_ns, stat.st_size), root)
+        _ELEMENT_TREES[key] = cached
+    return cached[1]
+
+
+def resolve_mesh_filename(filename: str, directory: str) -> str:
+    """Absolute path of the mesh given relative to the directory of the URDF
+
+    Args:
+        filename (str): ``filename`` attribute of the mesh
+        directory (str): directory of the URDF file
+
+    Returns:
+        str: absolute path if the mesh exists there, otherwise the filename unchanged
+    """
+    if filename and '://' not in filename and not os.path.isabs(filename):
+        mesh_path = os.path.join(os.path.abspath(directory), filename)
+        if os.path.exists(mesh_path):
+            return mesh_path
+    return filename
+
+
+def _shallow_copy(root: xml.etree.ElementTree.Element) -> xml.etree.ElementTree.Element:
+    copied_root = xml.etree.ElementTree.Element(root.tag, root.attrib)
+    copied_root.text = root.text
+    copied_root.extend(root)
+    return copied_root
+
+
+def _deep_copy(element: xml.etree.ElementTree.Element) -> xml.etree.ElementTree.Element:
+    copied = copy.deepcopy(element)
+    directory = _ELEMENT_DIRECTORIES.get(element)
+    if directory is not None:
+        _ELEMENT_DIRECTORIES[copied] = directory
+    return copied
+
+
+def _absolute_meshes(element: xml.etree.ElementTree.Element, shared: bool) -> xml.etree.ElementTree.Element:
+    if shared and element in _ABSOLUTE_ELEMENTS:
+        resolved = _ABSOLUTE_ELEMENTS[element]
+        return element if resolved is None else resolved
+    resolved = None
+    directory = _ELEMENT_DIRECTORIES.get(element)
+    if directory is not None and any(
+        resolve_mesh_filename(mesh.attrib.get('filename'), directory) != mesh.attrib.get('filename')
+        for mesh in element.iter('mesh')
+    ):
+        resolved = copy.deepcopy(element)
+        for mesh in resolved.iter('mesh'):
+            if 'filename' in mesh.attrib:
+                mesh.attrib['filename'] = resolve_mesh_filename(mesh.attrib['filename'], directory)
+    if shared:
+        _ABSOLUTE_ELEMENTS[element] = resolved
+    return element if resolved is None else resolved
+
+
+def _tostring(root: xml.etree.ElementTree.Element, shared: set) -> bytes:
+    attributes = ''.join(' {:s}={:s}'.format(key, quoteattr(value)) for key, value in root.attrib.items())
+    parts = ['<?xml version=\'1.0\' encoding=\'utf-8\'?>\n<{:s}{:s}>'.format(root.tag, attributes).encode('utf-8')]
+    for element in root:
+        if element in shared:
+            parts.append(_element_bytes(element))
+        else:
+            parts.append(xml.etree.ElementTree.tostring(element, encoding='unicode').encode('utf-8'))
+    parts.append('</{:s}>\n'.format(root.tag).encode('utf-8'))
+    return b''.join(parts)
+
+
+def _remove_scratch(directory: str):
+    for path in [path for path in _ELEMENT_TREES if os.path.dirname(path) == directory]:
+        del _ELEMENT_TREES[path]
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def _element_bytes(element: xml.etree.ElementTree.Element) -> bytes:
+    data = _ELEMENT_BYTES.get(element)
+    if data is None:
+        data = xml.etree.ElementTree.tostring(element, encoding='unicode').encode('utf-8')
+        _ELEMENT_BYTES[element] = data
+    return data
+
+
+class KinematicTree:
+    """Index of the kinematic tree of the URDF
+
+    The index is built in one pass over links and joints of the element tree, so construction
+    takes O(n) and parent, children, joint type and depth of a link are found in O(1).
+    Links are also kept in topological order (every parent before its children).
+
+    Args:
+        urdf_root (xml.etree.ElementTree.Element): ``robot`` element of the URDF
+
+    Raises:
+        ValueError: joint refers to unknown link, link has several parent joints or links form a cycle
+    """
+
+    def __init__(self, urdf_root: xml.etree.ElementTree.Element):
+        links = [link.attrib['name'] for link in urdf_root.findall('link')]
+        self.__parent_joint = dict.fromkeys(links)
+        self.__child_joints = {link: [] for link in links}
+        self.__joint_type = {}
+        self.__joint_parent = {}
+        self.__joint_child = {}
+        for joint in urdf_root.findall('joint'):
+            name = joint.attrib['name']
+            parent_link = joint.find('parent').attrib['link']
+            for child in joint.findall('child'):
+                child_link = child.attrib['link']
+                for link in (parent_link, child_link):
+                    if link not in self.__parent_joint:
+                        raise ValueError("Joint {:s} refers to unknown link {:s}".format(name, link))
+                if self.__parent_joint[child_link] is not None:
+                    raise ValueError("Link {:s} has several parent joints".format(child_link))
+                self.__parent_joint[child_link] = name
+                self.__child_joints[parent_link].append(name)
+                self.__joint_child[name] = child_link
+            self.__joint_parent[name] = parent_link
+            self.__joint_type[name] = joint.attrib['type']
+
+        self.__roots = [link for link in links if self.__parent_joint[link] is None]
+        self.__depth = dict.fromkeys(self.__roots, 0)
+        self.__order = list(self.__roots)
+        for link in self.__order:
+            for joint in self.__child_joints[link]:
+                child_link = self.__joint_child[joint]
+                self.__depth[child_link] = self.__depth[link] + 1
+                self.__order.append(child_link)
+        if len(self.__order) != len(links):
+            raise ValueError("Links {:s} form a cycle".format(
+                ', '.join(link for link in links if link not in self.__depth)
+            ))
+
+    @property
+    def root_link(self) -> str:
+        """str: first link without parent joint"""
+        return self.__roots[0]
+
+    @property
+    def roots(self) -> list[str]:
+        """list[str]: links without parent joint, a valid URDF has exactly one"""
+        return self.__roots
+
+    @property
+    def links(self) -> list[str]:
+        """list[str]: links in topological order"""
+        return self.__order
+
+    @property
+    def joints(self) -> list[str]:
+        return list(self.__joint_type.keys())
+
+    def parent_joint(self, link: str) -> str:
+        """Joint connecting the link to its parent, None for the root link"""
+        return self.__parent_joint[link]
+
+    def parent_link(self, link: str) -> str:
+        """Parent link of the link, None for the root link"""
+        joint = self.__parent_joint[link]
+        return None if joint is None else self.__joint_parent[joint]
+
+    def child_joints(self, link: str) -> list[str]:
+        """Joints connecting the link to its children"""
+        return self.__child_joints[link]
+
+    def child_links(self, link: str) -> list[str]:
+        """Children links of the link"""
+        return [self.__joint_child[joint] for joint in self.__child_joints[link]]
+
+    def joint_type(self, joint: str) -> str:
+        """URDF type of the joint: revolute, continuous, prismatic, fixed, floating or planar"""
+        return self.__joint_type[joint]
+
+    def joint_parent(self, joint: str) -> str:
+        return self.__joint_parent[joint]
+
+    def joint_child(self, joint: str) -> str:
+        return self.__joint_child[joint]
+
+    def depth(self, link: str) -> int:
+        """Number of joints between the link and the root link"""
+        return self.__depth[link]
+
+    def chain(self, base_link: str, tip_link: str) -> list[str]:
+        """Joints of the chain from the base link to the tip link
+
+        Args:
+            base_link (str): first link of the chain
+            tip_link (str): last link of the chain, descendant of the base link
+
+        Raises:
+            ValueError: tip link is not a descendant of the base link
+
+        Returns:
+            list[str]: joints from the base link to the tip link
+        """
+        joints = []
+        link = tip_link
+        while link != base_link:
+            joint = self.__parent_joint[link]
+            if joint is None:
+                raise ValueError("Link {:s} is not a descendant of {:s}".format(tip_link, base_link))
+            joints.append(joint)
+            link = self.__joint_parent[joint]
+        joints.reverse()
+        return joints
+
+
 class URDFEditor:
+    """Editor of the URDF element tree
+
+    Parsed files are cached by path and modification time. Top-level links and joints of the cached
+    tree are shared between editors and compositions until the editor's ``element_tree`` is accessed,
+    then the editor gets its own copies of them, so in place edits do not leak into the cache.
+
+    Args:
+        urdf_filename (str): path of the URDF file
+        additional_path (list[str], optional): directories where the file is searched
+    """
+
     def __init__(self, urdf_filename: str, additional_path: list[str] = []):
-        self.urdf_filename = self._find_urdf(urdf_filename, additional_path)
+        self.urdf_filename = self.find_urdf(urdf_filename, additional_path)
         # Open original file
-        self.__et = xml.etree.ElementTree.parse(self.urdf_filename)
+        self.__et = xml.etree.ElementTree.ElementTree(_shallow_copy(_parse_urdf(self.urdf_filename)))
+        # Top-level elements shared with the parse cache and other editors, they are never modified
+        self.__shared = set(self.__et.getroot())
 
         self.__xmlJointTemplate = """<?xml version="1.0"?>
         <joint name="%(name)s" type="%(type)s">
@@ -20,63 +264,47 @@ class URDFEditor:
           <origin rpy="%(r)s %(p)s %(yy)s" xyz="%(x)s %(y)s %(z)s"/>
         </joint>
         """
-        self.__connections, self.__root_link = self.__parse()
+        self.__tree = KinematicTree(self.__et.getroot())
 
-    def __parse(self)-> Tuple[dict, str]:
-        link_list = []
+    @property
+    def element_tree(self) -> xml.etree.ElementTree.ElementTree:
+        """xml.etree.ElementTree.ElementTree: tree of the editor, it may be modified in place"""
         root = self.__et.getroot()
-        for link in root.iter('link'):
-            link_list.append(link.attrib['name'])
+        if self.__shared:
+            for i, element in enumerate(root):
+                if element in self.__shared:
+                    root[i] = _deep_copy(element)
+            self.__shared.clear()
+        return self.__et
 
-        joint_connections = {}
-        link_connections = {}
-        for joint in root.findall('joint'):
-            joint_connection = {}
-            parent_link = joint.find('parent').attrib['link']
-            child_links = joint.findall('child')
-            joint_connection[parent_link] = []
-            link_connections[parent_link] = []
-            for cl in child_links:
-                joint_connection[parent_link].append(cl.attrib['link'])
-                link_connections[parent_link].append(cl.attrib['link'])
-            joint_connections[joint.attrib['name']] = joint_connection
-        # print(link_connections)
-
-        if len(link_connections) == 0:
-            last_link = link_list[0]
-        else:
-            start_link = next(iter(link_connections))
-            last_link = start_link
-            while True:
-                for lc in link_connections.keys():
-                    if start_link in link_connections[lc]:
-                        start_link = lc
-                        break
-                if last_link == start_link:
-                    break
-                last_link = start_link
-        return link_connections, last_link
-
-        # get_childs = lambda cl: [get_childs(c) for c in cl.keys()]
-    
     @property
-    def element_tree(self):
-        return self.__et
+    def root_link(self) -> str:
+        return self.__tree.root_link
+
+    def iter(self, tag: str = None):
+        """Iterate over elements of the tree with the tag without copying them, they must not be modified
+
+        Args:
+            tag (str, optional): tag of the elements, all elements by default
+        """
+        return self.__et.getroot().iter(tag)
 
     @property
-    def root_link(self):
-        return self.__root_link
+    def kinematic_tree(self) -> KinematicTree:
+        """KinematicTree: index of links and joints, it is rebuilt after ``joinURDF``"""
+        return self.__tree
 
     def joinURDF(self, joined_urdf: URDFEditor, connect_link: str, transform: np.array):
-        join_et = joined_urdf.element_tree
         join_root_link = joined_urdf.root_link
         
-        join_root_xml = join_et.getroot()
-        for link in join_root_xml.findall('link'):
-            self.__et.getroot().append(link)
-        
-        for link in join_root_xml.findall('joint'):
-            self.__et.getroot().append(link)
+        # Elements owned by the joined editor are copied, so its later edits do not change the composition
+        join_root_xml = joined_urdf.__et.getroot()
+        for element in join_root_xml.findall('link') + join_root_xml.findall('joint'):
+            if element in joined_urdf.__shared:
+                self.__shared.add(element)
+            else:
+                element = _deep_copy(element)
+            self.__et.getroot().append(element)
 
         # import xml.etree.ElementTree as ET
         # tree = ET.parse('country_data.xml')
@@ -97,15 +325,108 @@ class URDFEditor:
         # print(joint_xml_string)
         new_joint_xml = xml.etree.ElementTree.fromstring(joint_xml_string)
         self.__et.getroot().append(new_joint_xml)
+        self.__tree = KinematicTree(self.__et.getroot())
 
     def save(self, filename: str):
         with open(filename, 'wb') as f:
             self.__et.write(f, encoding='utf-8')
 
+    def tostring(self, absolute_meshes: bool = False) -> bytes:
+        """Serialized URDF, serialization of the elements shared with other compositions is reused
+
+        Args:
+            absolute_meshes (bool, optional): relative mesh paths are written as absolute ones, so the document may be loaded from any directory
+
+        Returns:
+            bytes: utf-8 encoded URDF document
+        """
+        return _tostring(*self._composition(absolute_meshes))
+
+    def _composition(self, absolute_meshes: bool) -> tuple[xml.etree.ElementTree.Element, set]:
+        root = xml.etree.ElementTree.Element(self.__et.getroot().tag, self.__et.getroot().attrib)
+        shared = set()
+        for element in self.__et.getroot():
+            is_shared = element in self.__shared
+            if absolute_meshes:
+                element = _absolute_meshes(element, is_shared)
+            if is_shared:
+                shared.add(element)
+            root.append(element)
+        return root, shared
+
     @staticmethod
-    def _find_urdf(urdf_filename: str, additional_path: list[str]) -> str:
+    def find_urdf(urdf_filename: str, additional_path: list[str]) -> str:
+        """Path of the URDF file relative to the working directory or one of the additional directories
+
+        Args:
+            urdf_filename (str): path of the URDF file
+            additional_path (list[str]): directories where the file is searched after the working directory
+
+        Returns:
+            str: path of the first existing file, empty string if the file is not found
+        """
         additional_path = [''] + additional_path
         for path in (pathlib.Path(path, urdf_filename) for path in additional_path):
             if path.is_file():
                 return str(path)
         return ''
+
+
+class URDFScratch:
+    """Scratch directory of composed URDF files
+
+    The directory is created in tmpfs (``/dev/shm``) when it is available, so compositions are
+    loaded without disk writes. Relative mesh paths are written as absolute ones. Element trees of the
+    written files are kept in the parse cache, so a written composition is edited again without parsing. The directory is removed by
+    ``cleanup``, when the object is garbage collected or at interpreter exit.
+
+    Args:
+        directory (str, optional): parent of the scratch directory, ``/dev/shm`` or the system temporary directory by default
+    """
+
+    def __init__(self, directory: str = None):
+        if directory is None:
+            directory = '/dev/shm' if os.access('/dev/shm', os.W_OK) else tempfile.gettempdir()
+        self.__directory = tempfile.mkdtemp(prefix='itmobotics_sim_', dir=directory)
+        self.__finalizer = weakref.finalize(self, _remove_scratch, self.__directory)
+
+    @property
+    def directory(self) -> str:
+        return self.__directory
+
+    def write(self, editor: URDFEditor, name: str = None) -> str:
+        """Write the composition to the scratch directory
+
+        Args:
+            editor (URDFEditor): composed URDF
+            name (str, optional): name of the file without extension, unique name by default
+
+        Returns:
+            str: path of the written file
+        """
+        assert self.__finalizer.alive, "Scratch directory was removed"
+        path = os.path.join(self.__directory, (str(uuid.uuid4()) if name is None else name) + '.urdf')
+        root, shared = editor._composition(absolute_meshes=True)
+        with open(path, 'wb') as f:
+            f.write(_tostring(root, shared))
+        stat = os.stat(path)
+        # Elements owned by the editor may be modified later, the cache keeps their copies
+        for i, element in enumerate(root):
+            if element not in shared:
+                root[i] = _deep_copy(element)
+        _ELEMENT_TREES[path] = ((stat.st_mtime_ns, stat.st_size), root)
+        return path
+
+    def remove(self, path: str):
+        """Remove the written file
+
+        Args:
+            path (str): path returned by ``write``
+        """
+        _ELEMENT_TREES.pop(path, None)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def cleanup(self):
+        """remove the scratch directory with all written files"""
+        self.__finalizer()
@@ -33,4 +33,100 @@ def vec2SE3(vec: np.ndarray) -> SE3:
     only_rot_vec = np.copy(vec)
     only_rot_vec[:3] = 0.0
     result = SE3(vec[:3]) @ Twist3(only_rot_vec).SE3()
-    return result
\ No newline at end of file
+    return result
+
+def quat_multiply(q1: np.ndarray, q2: np.ndarray) -> np.ndarray:
+    """quaternion product
+
+    Hamilton product of quaternions in [x, y, z, w] order, broadcasted over leading dimensions
+
+    Args:
+        q1 (np.ndarray): (..., 4) left quaternions
+        q2 (np.ndarray): (..., 4) right quaternions
+
+    Returns:
+        np.ndarray: (..., 4) quaternions q1 * q2
+    """
+    x1, y1, z1, w1 = np.moveaxis(np.asarray(q1), -1, 0)
+    x2, y2, z2, w2 = np.moveaxis(np.asarray(q2), -1, 0)
+    return np.stack([
+        w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+        w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
+        w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2,
+        w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2,
+    ], axis=-1)
+
+
+def quat_rotate(q: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """rotate vectors by quaternions
+
+    Args:
+        q (np.ndarray): (..., 4) unit quaternions in [x, y, z, w] order
+        v (np.ndarray): (..., 3) vectors
+
+    Returns:
+        np.ndarray: (..., 3) rotated vectors
+    """
+    q = np.asarray(q)
+    u = q[..., :3]
+    t = 2.0 * np.cross(u, v)
+    return v + q[..., 3:] * t + np.cross(u, t)
+
+
+def quat_right_product_matrix(q: np.ndarray) -> np.ndarray:
+    """matrix of right quaternion product
+
+    Matrix M such that quat_multiply(p, q) == M @ p for any quaternion p.
+    It allows to apply the same constant rotation to many quaternions with a single matrix product.
+
+    Args:
+        q (np.ndarray): (..., 4) quaternions in [x, y, z, w] order
+
+    Returns:
+        np.ndarray: (..., 4, 4) product matrices
+    """
+    x, y, z, w = np.moveaxis(np.asarray(q, dtype=float), -1, 0)
+    return np.stack([
+        np.stack([w, z, -y, x], axis=-1),
+        np.stack([-z, w, x, y], axis=-1),
+        np.stack([y, -x, w, z], axis=-1),
+        np.stack([-x, -y, -z, w], axis=-1),
+    ], axis=-2)
+
+
+def quat_rotation_tensor(v: np.ndarray) -> np.ndarray:
+    """quadratic form of vector rotation
+
+    Tensor T such that quat_rotate(q, v) == einsum('...ijk,...j,...k->...i', T, q, q) for any unit quaternion q.
+    It allows to rotate constant vectors by many quaternions without building rotation matrices.
+
+    Args:
+        v (np.ndarray): (..., 3) vectors
+
+    Returns:
+        np.ndarray: (..., 3, 4, 4) symmetric quadratic forms for each vector component
+    """
+    v = np.asarray(v, dtype=float)
+    x, y, z = np.moveaxis(v, -1, 0)
+    zero = np.zeros_like(x)
+    # R(q) v = (w^2 - u.u) v + 2 u (u.v) + 2 w (u x v), where q = [u, w]
+    return np.stack([
+        np.stack([
+            np.stack([x, y, z, zero], axis=-1),
+            np.stack([y, -x, zero, z], axis=-1),
+            np.stack([z, zero, -x, -y], axis=-1),
+            np.stack([zero, z, -y, x], axis=-1),
+        ], axis=-2),
+        np.stack([
+            np.stack([-y, x, zero, -z], axis=-1),
+            np.stack([x, y, z, zero], axis=-1),
+            np.stack([zero, z, -y, x], axis=-1),
+            np.stack([-z, zero, x, y], axis=-1),
+        ], axis=-2),
+        np.stack([
+            np.stack([-z, zero, x, y], axis=-1),
+            np.stack([zero, -z, y, -x], axis=-1),
+            np.stack([x, y, z, zero], axis=-1),
+            np.stack([y, -x, zero, z], axis=-1),
+        ], axis=-2),
+    ], axis=-3)
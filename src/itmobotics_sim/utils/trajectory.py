@@ -0,0 +1,388 @@
+from __future__ import annotations
+
+import numpy as np
+from scipy.spatial.transform import Rotation
+from spatialmath import SE3
+
+from itmobotics_sim.utils.robot import EEState, JointState, Motion
+from itmobotics_sim.utils.controllers import ExternalController
+
+
+def sample_times(duration: float, time_step: float) -> np.ndarray:
+    """Sampling times of the horizon
+
+    Args:
+        duration (float): duration of the trajectory
+        time_step (float): sampling period, usually the control period
+
+    Returns:
+        np.ndarray: (T,) times from zero with the step, the last one is the duration
+    """
+    times = np.arange(0.0, duration, time_step)
+    if times.shape[0] == 0 or times[-1] < duration:
+        times = np.append(times, duration)
+    return times
+
+
+def trapezoidal_scaling(distances: np.ndarray, max_velocities: np.ndarray, max_accelerations: np.ndarray) -> tuple:
+    """Trapezoidal velocity profile of the path parameter s in [0, 1]
+
+    Coordinates moving by the distances are synchronized by the slowest one.
+    Motions too short to reach the velocity limit have triangular profiles.
+    Several motions, e.g. segments of a path, are scaled at once by (k, n) distances.
+
+    Args:
+        distances (np.ndarray): (n,) or (k, n) absolute distances of the coordinates
+        max_velocities (np.ndarray): (n,) velocity limits
+        max_accelerations (np.ndarray): (n,) acceleration limits
+
+    Returns:
+        tuple: velocity and acceleration of s and the duration of the motion, (k,) arrays for (k, n) distances
+    """
+    distances = np.abs(np.asarray(distances, dtype=float))
+    moving = distances > 1e-12
+    with np.errstate(divide='ignore', invalid='ignore'):
+        velocity = np.min(np.where(moving, max_velocities / distances, np.inf), axis=-1)
+        acceleration = np.min(np.where(moving, max_accelerations / distances, np.inf), axis=-1)
+    # Motion without moving coordinates takes no time
+    still = ~np.any(moving, axis=-1)
+    velocity = np.where(still, 1.0, np.minimum(velocity, np.sqrt(acceleration)))
+    acceleration = np.where(still, 1.0, acceleration)
+    duration = np.where(still, 0.0, 1.0 / velocity + velocity / acceleration)
+    return velocity[()], acceleration[()], duration[()]
+
+
+def trapezoidal_profile(times: np.ndarray, velocity: float, acceleration: float, duration: float) -> tuple:
+    """Samples of the trapezoidal profile of s
+
+    Parameters of the profile may be (T,) arrays to sample a different motion at every time.
+
+    Args:
+        times (np.ndarray): (T,) sampling times from the start of the motion
+        velocity (float): cruise velocity of s
+        acceleration (float): acceleration of s
+        duration (float): duration of the motion
+
+    Returns:
+        tuple: (T,) s, ds/dt and d2s/dt2
+    """
+    times = np.asarray(times, dtype=float)
+    ramp = velocity / acceleration
+    remaining = np.maximum(duration - times, 0.0)
+    accelerating = times < ramp
+    decelerating = times > duration - ramp
+    done = np.broadcast_to(np.asarray(duration) <= 0.0, times.shape)
+    s = np.where(accelerating, 0.5 * acceleration * times**2,
+        np.where(decelerating, 1.0 - 0.5 * acceleration * remaining**2, velocity * (times - 0.5 * ramp)))
+    ds = np.where(accelerating, acceleration * times, np.where(decelerating, acceleration * remaining, velocity))
+    dds = np.where(accelerating, acceleration, np.where(decelerating, -acceleration, 0.0))
+    s, ds, dds = np.where(done, 1.0, s), np.where(done, 0.0, ds), np.where(done, 0.0, dds)
+    return np.clip(s, 0.0, 1.0), ds, dds
+
+
+def quintic_profile(times: np.ndarray, duration: float) -> tuple:
+    """Samples of the quintic polynomial s with zero velocity and acceleration at the ends
+
+    Args:
+        times (np.ndarray): (T,) sampling times
+        duration (float): duration of the motion
+
+    Returns:
+        tuple: (T,) s, ds/dt and d2s/dt2
+    """
+    if duration <= 0.0:
+        return np.ones_like(times), np.zeros_like(times), np.zeros_like(times)
+    tau = np.clip(times / duration, 0.0, 1.0)
+    s = tau**3 * (10.0 - 15.0 * tau + 6.0 * tau**2)
+    ds = 30.0 * tau**2 * (1.0 - tau)**2 / duration
+    dds = 60.0 * tau * (1.0 - tau) * (1.0 - 2.0 * tau) / duration**2
+    return s, ds, dds
+
+
+class JointTrajectory:
+    """Joint-space trajectory sampled over the whole horizon
+
+    Args:
+        times (np.ndarray): (T,) sampling times
+        positions (np.ndarray): (T, n_joints) joint positions
+        velocities (np.ndarray): (T, n_joints) joint velocities
+        accelerations (np.ndarray, optional): (T, n_joints) joint accelerations. Defaults to None,
+            then they are differentiated from the velocities.
+    """
+
+    def __init__(self, times: np.ndarray, positions: np.ndarray, velocities: np.ndarray, accelerations: np.ndarray = None):
+        self.__times = np.asarray(times, dtype=float)
+        self.__positions = np.asarray(positions, dtype=float)
+        self.__velocities = np.asarray(velocities, dtype=float)
+        assert self.__positions.shape == self.__velocities.shape and self.__positions.shape[0] == self.__times.shape[0], \
+            "Invalid trajectory shapes, times {}, positions {}, velocities {}".format(
+                self.__times.shape, self.__positions.shape, self.__velocities.shape
+            )
+        if accelerations is None:
+            accelerations = np.gradient(self.__velocities, self.__times, axis=0) if self.__times.shape[0] > 1 \
+                else np.zeros_like(self.__velocities)
+        self.__accelerations = np.asarray(accelerations, dtype=float)
+
+    @staticmethod
+    def trapezoidal(
+        start: np.ndarray,
+        goal: np.ndarray,
+        max_velocities: np.ndarray,
+        max_accelerations: np.ndarray,
+        time_step: float
+    ) -> JointTrajectory:
+        """Straight joint motion with the synchronized trapezoidal velocity profile
+
+        Args:
+            start (np.ndarray): (n_joints,) start positions
+            goal (np.ndarray): (n_joints,) goal positions
+            max_velocities (np.ndarray): (n_joints,) velocity limits
+            max_accelerations (np.ndarray): (n_joints,) acceleration limits
+            time_step (float): sampling period, usually the control period
+
+        Returns:
+            JointTrajectory: trajectory from the start to the goal
+        """
+        start = np.asarray(start, dtype=float)
+        delta = np.asarray(goal, dtype=float) - start
+        velocity, acceleration, duration = trapezoidal_scaling(
+            delta, np.broadcast_to(max_velocities, delta.shape), np.broadcast_to(max_accelerations, delta.shape)
+        )
+        times = sample_times(duration, time_step)
+        return JointTrajectory._from_scaling(times, start, delta, *trapezoidal_profile(times, velocity, acceleration, duration))
+
+    @staticmethod
+    def quintic(start: np.ndarray, goal: np.ndarray, duration: float, time_step: float) -> JointTrajectory:
+        """Straight joint motion with the quintic time scaling
+
+        Args:
+            start (np.ndarray): (n_joints,) start positions
+            goal (np.ndarray): (n_joints,) goal positions
+            duration (float): duration of the motion
+            time_step (float): sampling period, usually the control period
+
+        Returns:
+            JointTrajectory: trajectory from the start to the goal
+        """
+        start = np.asarray(start, dtype=float)
+        delta = np.asarray(goal, dtype=float) - start
+        times = sample_times(duration, time_step)
+        return JointTrajectory._from_scaling(times, start, delta, *quintic_profile(times, duration))
+
+    @staticmethod
+    def _from_scaling(times: np.ndarray, start: np.ndarray, delta: np.ndarray, s: np.ndarray, ds: np.ndarray, dds: np.ndarray) -> JointTrajectory:
+        return JointTrajectory(
+            times, start + s[:, np.newaxis] * delta, ds[:, np.newaxis] * delta, dds[:, np.newaxis] * delta
+        )
+
+    def __len__(self) -> int:
+        return self.__times.shape[0]
+
+    @property
+    def num_joints(self) -> int:
+        return self.__positions.shape[1]
+
+    @property
+    def duration(self) -> float:
+        return float(self.__times[-1])
+
+    @property
+    def times(self) -> np.ndarray:
+        return self.__times
+
+    @property
+    def positions(self) -> np.ndarray:
+        return self.__positions
+
+    @property
+    def velocities(self) -> np.ndarray:
+        return self.__velocities
+
+    @property
+    def accelerations(self) -> np.ndarray:
+        return self.__accelerations
+
+
+class CartesianTrajectory:
+    """Cartesian trajectory of a link sampled over the whole horizon
+
+    Twists are [linear, angular] velocities in the reference frame of the transforms.
+
+    Args:
+        times (np.ndarray): (T,) sampling times
+        transforms (np.ndarray): (T, 4, 4) homogeneous transforms
+        twists (np.ndarray): (T, 6) twists
+    """
+
+    def __init__(self, times: np.ndarray, transforms: np.ndarray, twists: np.ndarray):
+        self.__times = np.asarray(times, dtype=float)
+        self.__transforms = np.asarray(transforms, dtype=float)
+        self.__twists = np.asarray(twists, dtype=float)
+        assert self.__transforms.shape == (self.__times.shape[0], 4, 4) and self.__twists.shape == (self.__times.shape[0], 6), \
+            "Invalid trajectory shapes, times {}, transforms {}, twists {}".format(
+                self.__times.shape, self.__transforms.shape, self.__twists.shape
+            )
+
+    @staticmethod
+    def trapezoidal(
+        start: SE3,
+        goal: SE3,
+        max_velocities: np.ndarray,
+        max_accelerations: np.ndarray,
+        time_step: float
+    ) -> CartesianTrajectory:
+        """SE(3) interpolation with the synchronized trapezoidal velocity profile
+
+        Args:
+            start (SE3): start transform
+            goal (SE3): goal transform
+            max_velocities (np.ndarray): (2,) linear and angular velocity limits
+            max_accelerations (np.ndarray): (2,) linear and angular acceleration limits
+            time_step (float): sampling period, usually the control period
+
+        Returns:
+            CartesianTrajectory: trajectory from the start to the goal
+        """
+        translation, rotation = CartesianTrajectory._displacement(start, goal)
+        distances = np.array([np.linalg.norm(translation), np.linalg.norm(rotation)])
+        velocity, acceleration, duration = trapezoidal_scaling(
+            distances, np.broadcast_to(max_velocities, (2,)), np.broadcast_to(max_accelerations, (2,))
+        )
+        times = sample_times(duration, time_step)
+        s, ds, _ = trapezoidal_profile(times, velocity, acceleration, duration)
+        return CartesianTrajectory._from_scaling(times, start, translation, rotation, s, ds)
+
+    @staticmethod
+    def quintic(start: SE3, goal: SE3, duration: float, time_step: float) -> CartesianTrajectory:
+        """SE(3) interpolation with the quintic time scaling
+
+        Args:
+            start (SE3): start transform
+            goal (SE3): goal transform
+            duration (float): duration of the motion
+            time_step (float): sampling period, usually the control period
+
+        Returns:
+            CartesianTrajectory: trajectory from the start to the goal
+        """
+        translation, rotation = CartesianTrajectory._displacement(start, goal)
+        times = sample_times(duration, time_step)
+        s, ds, _ = quintic_profile(times, duration)
+        return CartesianTrajectory._from_scaling(times, start, translation, rotation, s, ds)
+
+    @staticmethod
+    def _displacement(start: SE3, goal: SE3) -> tuple:
+        # Rotation vector of the relative rotation in the start frame
+        return goal.t - start.t, Rotation.from_matrix(start.R.T @ goal.R).as_rotvec()
+
+    @staticmethod
+    def _from_scaling(
+        times: np.ndarray,
+        start: SE3,
+        translation: np.ndarray,
+        rotation: np.ndarray,
+        s: np.ndarray,
+        ds: np.ndarray
+    ) -> CartesianTrajectory:
+        # Position moves along the line, orientation along the geodesic R(s) = R0 exp(s w),
+        # so the angular velocity R(s) w ds = R0 w ds has a constant direction
+        transforms = np.tile(np.eye(4), (times.shape[0], 1, 1))
+        transforms[:, :3, :3] = start.R @ Rotation.from_rotvec(s[:, np.newaxis] * rotation).as_matrix()
+        transforms[:, :3, 3] = start.t + s[:, np.newaxis] * translation
+        twists = np.concatenate([ds[:, np.newaxis] * translation, ds[:, np.newaxis] * (start.R @ rotation)], axis=1)
+        return CartesianTrajectory(times, transforms, twists)
+
+    def __len__(self) -> int:
+        return self.__times.shape[0]
+
+    @property
+    def duration(self) -> float:
+        return float(self.__times[-1])
+
+    @property
+    def times(self) -> np.ndarray:
+        return self.__times
+
+    @property
+    def transforms(self) -> np.ndarray:
+        return self.__transforms
+
+    @property
+    def twists(self) -> np.ndarray:
+        return self.__twists
+
+
+class TrajectoryExecutor:
+    """Feeds a precomputed trajectory to a chain of controllers sample by sample
+
+    The executor owns one target motion. Every step copies the next sample into its buffers
+    and sends the motion to the controller, so no states are created during the execution.
+    Joint trajectories set joint positions and velocities, Cartesian trajectories set
+    the transform and the twist of the end-effector. After the last sample the goal is held.
+
+    Args:
+        controller (ExternalController): first controller of the chain
+        trajectory (JointTrajectory | CartesianTrajectory): executed trajectory
+        ee_link (str, optional): controlled link of Cartesian trajectories. Defaults to None.
+        ref_frame (str, optional): reference frame of Cartesian trajectories. Defaults to 'global'.
+    """
+
+    def __init__(self, controller: ExternalController, trajectory, ee_link: str = None, ref_frame: str = 'global'):
+        assert isinstance(trajectory, (JointTrajectory, CartesianTrajectory)), "Unknown type of trajectory: {}".format(type(trajectory))
+        self.__controller = controller
+        self.__trajectory = trajectory
+        self.__joint_space = isinstance(trajectory, JointTrajectory)
+        num_joints = trajectory.num_joints if self.__joint_space else controller.robot.num_joints
+        self.__motion = Motion.from_states(JointState(num_joints), EEState(ee_link, ref_frame))
+        self.__positions = np.zeros(num_joints)
+        self.__velocities = np.zeros(num_joints)
+        self.__tf = SE3()
+        self.__twist = np.zeros(6)
+        self.__index = 0
+        if not self.__joint_space:
+            self.__motion.ee_state.tf = self.__tf
+
+    def reset(self):
+        """Start the trajectory from the first sample"""
+        self.__index = 0
+
+    def step(self) -> bool:
+        """Send the next sample of the trajectory to the controller
+
+        Returns:
+            bool: result of the controller
+        """
+        i = min(self.__index, len(self.__trajectory) - 1)
+        # Controllers may replace the arrays of the motion, so the buffers are assigned every step
+        if self.__joint_space:
+            np.copyto(self.__positions, self.__trajectory.positions[i])
+            np.copyto(self.__velocities, self.__trajectory.velocities[i])
+            self.__motion.joint_state.joint_positions = self.__positions
+            self.__motion.joint_state.joint_velocities = self.__velocities
+        else:
+            np.copyto(self.__tf.A, self.__trajectory.transforms[i])
+            np.copyto(self.__twist, self.__trajectory.twists[i])
+            self.__motion.ee_state.twist = self.__twist
+        self.__index = i + 1
+        return self.__controller.send_control_to_robot(self.__motion)
+
+    @property
+    def done(self) -> bool:
+        return self.__index >= len(self.__trajectory)
+
+    @property
+    def index(self) -> int:
+        return self.__index
+
+    @property
+    def time(self) -> float:
+        """Time of the last sent sample"""
+        return float(self.__trajectory.times[max(min(self.__index, len(self.__trajectory)) - 1, 0)])
+
+    @property
+    def motion(self) -> Motion:
+        return self.__motion
+
+    @property
+    def trajectory(self):
+        return self.__trajectory
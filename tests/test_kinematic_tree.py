@@ -0,0 +1,58 @@
+import unittest
+
+from spatialmath import SE3
+
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env.urdf_editor import URDFEditor
+
+
+class testKinematicTree(unittest.TestCase):
+    def setUp(self):
+        self.__editor = URDFEditor('tests/urdf/ur5e_pybullet.urdf')
+        self.__editor2 = URDFEditor('tests/urdf/table2.urdf')
+
+    def test_kinematic_tree(self):
+        tree = self.__editor.kinematic_tree
+        self.assertEqual(tree.roots, ['bworld'])
+        self.assertEqual(len(tree.links), len(self.__editor.element_tree.getroot().findall('link')))
+        for link in tree.links[1:]:
+            parent = tree.parent_link(link)
+            self.assertLess(tree.links.index(parent), tree.links.index(link))
+            self.assertIn(link, tree.child_links(parent))
+        chain = tree.chain('bworld', 'ee_tool')
+        self.assertEqual(len(chain), tree.depth('ee_tool'))
+        self.assertEqual(tree.joint_child(chain[-1]), 'ee_tool')
+        self.assertEqual(sum(tree.joint_type(joint) == 'revolute' for joint in chain), 6)
+        with self.assertRaises(ValueError):
+            tree.chain('ee_tool', 'bworld')
+
+    def test_join(self):
+        self.__editor.joinURDF(self.__editor2, 'ee_tool', SE3(0.0, 0.0, 0.1).A)
+        tree = self.__editor.kinematic_tree
+        self.assertEqual(tree.root_link, 'bworld')
+        self.assertEqual(tree.parent_link('baseLink'), 'ee_tool')
+        self.assertEqual(tree.joint_type(tree.parent_joint('baseLink')), 'fixed')
+        self.assertEqual(tree.depth('baseLink'), tree.depth('ee_tool') + 1)
+
+    def test_multiple_children(self):
+        # Both tools are children of the same link
+        self.__editor.joinURDF(self.__editor2, 'ee_tool', SE3(0.0, 0.0, 0.1).A)
+        self.__editor.joinURDF(URDFEditor('tests/urdf/peg_round.urdf'), 'ee_tool', SE3(0.0, 0.1, 0.1).A)
+        tree = self.__editor.kinematic_tree
+        self.assertEqual(sorted(tree.child_links('ee_tool')), ['baseLink', 'peg_link'])
+        self.assertEqual(tree.root_link, 'bworld')
+
+    def test_robot_tool(self):
+        sim = PyBulletWorld(gui_mode = GUI_MODE.DIRECT, time_step = 0.01, time_scale=1.0)
+        robot = sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0, -0.3, 0.625), 'robot')
+        robot.connect_tool('peg', 'tests/urdf/peg_round.urdf', root_link='ee_tool', tf=SE3(0.0, 0.0, 0.1))
+        self.assertEqual(robot.kinematic_tree.chain('ee_tool', 'peg_target_link'), ['peg_link_joint', 'peg_link-peg_target_link'])
+        robot.remove_tool('peg')
+        self.assertNotIn('peg_target_link', robot.kinematic_tree.links)
+
+
+def main():
+    unittest.main(exit=False)
+
+if __name__ == "__main__":
+    main()
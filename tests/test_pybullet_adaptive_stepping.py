@@ -0,0 +1,60 @@
+import unittest
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env.pybullet_adaptive_stepping import AdaptiveStepping
+
+
+class testAdaptiveStepping(unittest.TestCase):
+    def setUp(self):
+        self.__sim = PyBulletWorld(gui_mode = GUI_MODE.DIRECT, time_step = 0.001)
+        self.__sim.add_object('plane', 'plane.urdf', fixed=True, save=True)
+        self.__sim.add_object('cube', 'cube_small.urdf', SE3(0.0, 0.0, 0.1), fixed=False, save=True)
+
+    def test_levels(self):
+        stepping = AdaptiveStepping(self.__sim.client, relax_steps=10)
+        self.assertEqual(stepping.levels, [(1, 10), (2, 40), (4, 70), (8, 100)])
+        self.__sim.set_adaptive_stepping(stepping)
+        client = self.__sim.client
+
+        levels = []
+        for _ in range(400):
+            self.__sim.sim_step()
+            levels.append(stepping.level)
+        # Free fall is cheap, the impact takes the highest level, the resting cube returns to the lowest one
+        self.assertEqual(levels[50], 0)
+        self.assertIn(3, levels)
+        self.assertEqual(levels[-1], 0)
+        self.assertEqual(client.getPhysicsEngineParameters()['numSubSteps'], 1)
+        self.assertGreater(self.__sim.contact_points('cube', 'plane').shape[0], 0)
+        self.assertAlmostEqual(client.getBasePositionAndOrientation(self.__sim.model_id('cube'))[0][2], 0.025, places=3)
+
+        stats = stepping.stats
+        self.assertEqual(stats['steps'], 400)
+        self.assertEqual(sum(stats['level_steps']), 400)
+        self.assertLess(stats['cost_per_second'], 8 * 100 / 0.001)
+        self.assertGreater(stats['wall_time_per_second'], 0.0)
+
+        self.__sim.reset()
+        self.assertEqual(stepping.level, 0)
+        self.__sim.set_adaptive_stepping(None)
+        self.assertEqual(client.getPhysicsEngineParameters()['numSubSteps'], 4)
+        self.assertIsNone(self.__sim.adaptive_stepping)
+
+    def test_resting_contacts(self):
+        # Constant penetration of resting bodies does not keep the highest level
+        stepping = AdaptiveStepping(self.__sim.client, penetration_threshold=0.0, relax_steps=5)
+        self.__sim.set_adaptive_stepping(stepping)
+        for _ in range(400):
+            self.__sim.sim_step()
+        self.assertEqual(stepping.level, 0)
+        self.assertRaises(AssertionError, AdaptiveStepping, self.__sim.client, min_substeps=4, max_substeps=2)
+
+
+def main():
+    unittest.main(exit=False)
+
+if __name__ == "__main__":
+    main()
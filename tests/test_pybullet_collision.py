@@ -8,6 +8,7 @@ from spatialmath import base as sb
 
 from itmobotics_sim.utils.robot import EEState, JointState, Motion
 from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env.pybullet_collision import overlapping_pairs
 
 
 class testPyBulletCollision(unittest.TestCase):
@@ -26,6 +27,37 @@ class testPyBulletCollision(unittest.TestCase):
         self.assertNotEqual(len(self.__sim.is_collide_with('robot')), 0)
         self.assertTrue('table' in self.__sim.is_collide_with('robot'))
 
+    def test_collision_matrix(self):
+        self.__sim.reset()
+        self.__sim.add_object('hole_round', 'tests/urdf/hole_round.urdf', base_transform = SE3(5.0, 0.0, 0.0))
+        while self.__sim.sim_time<10.0:
+            self.__sim.sim_step()
+        matrix, link_pairs = self.__sim.collision_matrix()
+        names = self.__sim.model_names
+        self.assertEqual(matrix.shape, (len(names), len(names)))
+        np.testing.assert_array_equal(matrix, matrix.T)
+
+        robot_idx = names.index('robot')
+        self.assertTrue(matrix[robot_idx, names.index('table')])
+        self.assertFalse(np.any(matrix[names.index('hole_round')]))
+        self.assertGreater(len(link_pairs[('robot', 'table')]), 0)
+        self.assertEqual(
+            sorted(self.__sim.is_collide_with('robot')),
+            sorted(names[i] for i in np.flatnonzero(matrix[robot_idx]))
+        )
+
+    def test_overlapping_pairs(self):
+        rng = np.random.default_rng(0)
+        aabb_min = rng.uniform(-1.0, 1.0, (100, 3))
+        aabb_max = aabb_min + rng.uniform(0.0, 0.3, (100, 3))
+        expected = set()
+        for i in range(100):
+            for j in range(i+1, 100):
+                if np.all(aabb_min[i] <= aabb_max[j]) and np.all(aabb_min[j] <= aabb_max[i]):
+                    expected.add((i, j))
+        pairs = overlapping_pairs(aabb_min, aabb_max)
+        self.assertEqual(set(map(tuple, pairs.tolist())), expected)
+
 def main():
     unittest.main(exit=False)
 
@@ -0,0 +1,105 @@
+import os
+import unittest
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.utils.robot import JointState
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env.pybullet_collision_checker import CollisionChecker, scene_description
+
+
+test_joint_pose = np.array([0.0, -np.pi/2, np.pi/2, 0.0, np.pi/2, 0.0])
+
+
+class testCollisionChecker(unittest.TestCase):
+    def setUp(self):
+        self.__sim = PyBulletWorld(gui_mode = GUI_MODE.DIRECT, kinematic=True)
+        self.__sim.add_object('table', 'tests/urdf/table.urdf', fixed=True, save=True)
+        self.__robot = self.__sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0, 0, 0.625), 'robot')
+        self.__robot.reset_joint_state(JointState.from_position(test_joint_pose))
+
+    def test_batch(self):
+        configurations = np.array([
+            test_joint_pose,
+            [0.0, 0.5, 0.0, 0.0, 0.0, 0.0],            # shoulder lift turns the arm into the table
+            [0.0, -np.pi/2, 3.0, 0.0, 0.0, 0.0],       # forearm folded onto the upper arm
+            [0.0, -np.pi/2, np.pi/2, 0.0, 4.0, 0.0],   # out of joint limits
+        ])
+        with CollisionChecker(self.__sim, 'robot') as checker:
+            self.assertEqual(checker.num_joints, 6)
+            np.testing.assert_array_equal(checker.check(configurations), [True, False, False, False])
+            self.assertTrue(checker.check(test_joint_pose))
+            self.assertEqual(checker.stats['checks'], 5)
+            self.assertGreater(checker.stats['checks_per_second'], 0.0)
+
+        with CollisionChecker(self.__sim, 'robot', self_collision=False) as checker:
+            np.testing.assert_array_equal(checker.check(configurations), [True, False, True, False])
+
+        # The world robot is not moved by the checks
+        np.testing.assert_allclose(self.__robot.joint_state.joint_positions, test_joint_pose)
+
+    def test_self_collision_pose(self):
+        # Collision of the robot folded when the checker is created is not allowed
+        folded = np.array([0.0, -np.pi/2, 3.0, 0.0, 0.0, 0.0])
+        self.__robot.reset_joint_state(JointState.from_position(folded))
+        with CollisionChecker(self.__sim, 'robot') as checker:
+            np.testing.assert_array_equal(checker.check([folded, test_joint_pose]), [False, True])
+        # Explicitly allowed pairs are ignored
+        allowed_pairs = [
+            ('forearm_link', 'shoulder_link'), ('wrist_1_link', 'shoulder_link'),
+            ('upper_arm_link', 'wrist_1_link'), ('upper_arm_link', 'wrist_2_link'), ('upper_arm_link', 'wrist_3_link'),
+        ]
+        with CollisionChecker(self.__sim, 'robot', allowed_pairs=allowed_pairs) as checker:
+            self.assertTrue(checker.check(folded))
+
+    def test_sync(self):
+        # Box is placed at the end-effector of the configuration
+        configuration = np.array([0.5, -1.0, 1.2, -1.5, -np.pi/2, 0.0])
+        self.__robot.reset_joint_state(JointState.from_position(configuration))
+        ee_position = self.__robot.ee_state('ee_tool').tf.t
+        self.__robot.reset_joint_state(JointState.from_position(test_joint_pose))
+
+        checker = CollisionChecker(self.__sim, 'robot')
+        self.assertTrue(checker.check(configuration))
+        self.__sim.add_object('box', 'cube_small.urdf', SE3(*ee_position), fixed=True)
+        self.assertTrue(checker.check(configuration))
+        checker.sync()
+        self.assertFalse(checker.check(configuration))
+        self.assertFalse(CollisionChecker(self.__sim, 'robot', obstacle_names=['table']).check([0.0, 0.5, 0.0, 0.0, 0.0, 0.0]))
+        self.assertTrue(CollisionChecker(self.__sim, 'robot', obstacle_names=['table']).check(configuration))
+        checker.close()
+
+    def test_search_paths(self):
+        configuration = np.array([0.5, -1.0, 1.2, -1.5, -np.pi/2, 0.0])
+        self.__robot.reset_joint_state(JointState.from_position(configuration))
+        ee_position = self.__robot.ee_state('ee_tool').tf.t
+        self.__robot.reset_joint_state(JointState.from_position(test_joint_pose))
+        # Models are loaded from different search paths of the world
+        self.__sim.add_object('box', 'cube_small.urdf', SE3(*ee_position), fixed=True)
+        self.__sim.add_additional_search_path('tests/urdf')
+        self.__sim.add_object('peg', 'peg_round.urdf', SE3(1.0, 1.0, 1.0), fixed=True)
+
+        description = scene_description(self.__sim, 'robot')
+        for model in [description['robot']] + description['obstacles']:
+            self.assertTrue(os.path.isabs(model['urdf_filename']))
+            self.assertTrue(os.path.isfile(model['urdf_filename']))
+        with CollisionChecker(self.__sim, 'robot') as checker:
+            self.assertFalse(checker.check(configuration))
+
+    def test_workers(self):
+        rng = np.random.default_rng(0)
+        lower, upper = self.__robot.joint_limits.limit_positions
+        configurations = rng.uniform(lower, upper, (200, 6))
+        with CollisionChecker(self.__sim, 'robot') as checker:
+            expected = checker.check(configurations)
+        self.assertTrue(np.any(expected) and not np.all(expected))
+        with CollisionChecker(self.__sim, 'robot', num_workers=2) as checker:
+            np.testing.assert_array_equal(checker.check(configurations), expected)
+
+
+def main():
+    unittest.main(exit=False)
+
+if __name__ == "__main__":
+    main()
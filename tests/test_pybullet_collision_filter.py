@@ -0,0 +1,68 @@
+import unittest
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env import pybullet_collision_filter
+
+
+class testPyBulletCollisionFilter(unittest.TestCase):
+    def setUp(self):
+        self.__sim = PyBulletWorld(gui_mode = GUI_MODE.DIRECT, time_step = 0.01, time_scale=1)
+        self.__sim.add_object('table', 'tests/urdf/table.urdf', save=True)
+        # Robot base is sunk into the table top to produce permanent contact
+        self.__robot = self.__sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0.0, 0.0, 0.6), 'robot')
+
+    def test_disable_pair(self):
+        self.__sim.sim_step()
+        self.assertGreater(self.__sim.contact_points('robot', 'table').shape[0], 0)
+
+        self.__sim.collision_filter.disable_pair('robot', 'table', links_a=['base_link'])
+        self.__sim.sim_step()
+        self.assertEqual(self.__sim.contact_points('robot', 'table').shape[0], 0)
+
+        self.__sim.reset()
+        self.__sim.sim_step()
+        self.assertEqual(self.__sim.contact_points('robot', 'table').shape[0], 0)
+
+        self.__robot.connect_tool('peg', 'tests/urdf/peg_round.urdf', root_link='ee_tool')
+        self.__sim.sim_step()
+        self.assertEqual(self.__sim.contact_points('robot', 'table').shape[0], 0)
+
+    def test_report(self):
+        num_links = self.__sim.client.getNumJoints(self.__robot.robot_id)
+        self.__sim.collision_filter.exclude_adjacent_links('robot', grandparents=False)
+        self.__sim.collision_filter.disable_pair('robot', 'table', links_a=['base_link'])
+        self.__sim.collision_filter.set_group_mask('table', 2, 0)
+
+        # Static links of the robot, e.g. the fixed base, do not collide with the static table after load
+        client = self.__sim.client
+        dynamic_links = [
+            link_id for link_id in range(-1, num_links)
+            if pybullet_collision_filter.load_group_mask(client, self.__robot.robot_id, link_id)
+            == (pybullet_collision_filter.DEFAULT_GROUP, pybullet_collision_filter.DEFAULT_MASK)
+        ]
+        self.assertEqual(
+            pybullet_collision_filter.load_group_mask(client, self.__sim.model_id('table'), -1),
+            (pybullet_collision_filter.STATIC_GROUP, pybullet_collision_filter.STATIC_MASK)
+        )
+        self.assertLess(len(dynamic_links), num_links + 1)
+
+        report = self.__sim.collision_filter_report(n_steps=10)
+        self.assertEqual(report['adjacent_pairs'], num_links)
+        self.assertEqual(report['rule_pairs'], 1)
+        self.assertEqual(report['group_mask_pairs'], len(dynamic_links))
+        # Pair of the robot base and the table is pruned by both pair and group mask rules
+        self.assertEqual(report['pruned_pairs'], num_links + len(dynamic_links))
+        self.assertAlmostEqual(
+            report['step_time_saved'], report['step_time_unfiltered'] - report['step_time_filtered']
+        )
+        self.__sim.sim_step()
+        self.assertEqual(self.__sim.contact_points('table').shape[0], 0)
+
+def main():
+    unittest.main(exit=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env.pybullet_contacts import CONTACT_DTYPE
+
+
+class testPyBulletContacts(unittest.TestCase):
+    def setUp(self):
+        self.__sim = PyBulletWorld(gui_mode = GUI_MODE.DIRECT, time_step = 0.01, time_scale=1)
+        self.__sim.add_object('table', 'tests/urdf/table.urdf', save=True)
+        self.__sim.add_object('peg', 'tests/urdf/peg_round.urdf', base_transform = SE3(0.0, 0.0, 0.7), fixed = False, save = True)
+
+    def test_contact_points(self):
+        self.__sim.reset()
+        self.assertEqual(self.__sim.contact_points('peg').shape[0], 0)
+        while self.__sim.sim_time<2.0:
+            self.__sim.sim_step()
+
+        contacts = self.__sim.contact_points('peg', 'table')
+        self.assertEqual(contacts.dtype, CONTACT_DTYPE)
+        self.assertGreater(contacts.shape[0], 0)
+        self.assertTrue(np.all(contacts['body_a'] == contacts['body_a'][0]))
+        self.assertIs(self.__sim.contact_points('peg', 'table').base, contacts.base)
+
+        table_contacts = self.__sim.contact_points('table', 'peg')
+        self.assertEqual(table_contacts.shape[0], contacts.shape[0])
+        np.testing.assert_allclose(table_contacts['normal_on_b'].sum(axis=0), -contacts['normal_on_b'].sum(axis=0))
+
+    def test_contact_forces(self):
+        self.__sim.reset()
+        while self.__sim.sim_time<2.0:
+            self.__sim.sim_step()
+        weight = 0.1 * 9.82
+        link_forces = self.__sim.link_contact_forces('peg')
+        self.assertAlmostEqual(link_forces['peg_link'], weight, delta=0.05*weight)
+        self.assertEqual(link_forces['peg_target_link'], 0.0)
+
+        wrench = self.__sim.contact_wrench('peg')
+        np.testing.assert_allclose(wrench[:3], [0.0, 0.0, weight], atol=0.05*weight)
+        np.testing.assert_allclose(self.__sim.contact_wrench('table')[:3], -wrench[:3], atol=1e-9)
+
+def main():
+    unittest.main(exit=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from spatialmath import SE3
+
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env.pybullet_convex_decomposition import ConvexDecompositionCache, DEFAULT_CACHE_DIRECTORY, read_stl
+from itmobotics_sim.pybullet_env.urdf_editor import URDFEditor
+
+
+class testConvexDecomposition(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.mkdtemp()
+        # Low resolution keeps the decomposition fast
+        self.__cache = ConvexDecompositionCache(self.__directory, resolution=10000)
+
+    def tearDown(self):
+        shutil.rmtree(self.__directory)
+
+    def test_read_stl(self):
+        vertices, faces = read_stl('tests/urdf/meshes/hole/hole_round.STL')
+        self.assertEqual(vertices.shape[1], 3)
+        self.assertEqual(faces.shape[1], 3)
+        self.assertLess(faces.max(), vertices.shape[0])
+
+    def test_process_urdf(self):
+        self.assertIsNone(self.__cache.cached_urdf('tests/urdf/hole_round.urdf'))
+        path = self.__cache.process_urdf('tests/urdf/hole_round.urdf')
+        self.assertEqual(self.__cache.cached_urdf('tests/urdf/hole_round.urdf'), path)
+
+        link = URDFEditor(path).element_tree.getroot().find('link')
+        collision = link.find('collision')
+        self.assertNotIn('concave', collision.attrib)
+        mesh_filename = collision.find('geometry/mesh').attrib['filename']
+        self.assertTrue(mesh_filename.startswith(self.__directory))
+        with open(mesh_filename) as f:
+            self.assertGreater(f.read().count('\no '), 1)
+        self.assertEqual(
+            link.find('visual/geometry/mesh').attrib['filename'],
+            os.path.abspath('tests/urdf/meshes/hole/hole_round.STL')
+        )
+
+        # The second call finds the rewritten file in the cache
+        mtime = os.stat(path).st_mtime_ns
+        self.assertEqual(self.__cache.process_urdf('tests/urdf/hole_round.urdf'), path)
+        self.assertEqual(os.stat(path).st_mtime_ns, mtime)
+        # Other parameters produce another decomposition
+        self.assertIsNone(ConvexDecompositionCache(self.__directory, resolution=20000).cached_urdf('tests/urdf/hole_round.urdf'))
+
+    def test_world_pickup(self):
+        self.__cache.process_urdf('tests/urdf/hole_round.urdf')
+        sim = PyBulletWorld(gui_mode=GUI_MODE.DIRECT, collision_cache=self.__cache)
+        sim.add_object('hole', 'tests/urdf/hole_round.urdf', SE3(0.0, 0.0, 0.1), save=True)
+        sim.add_object('peg', 'tests/urdf/peg_round.urdf', SE3(0.5, 0.0, 0.1))
+        hole_mesh = sim.client.getCollisionShapeData(sim.model_id('hole'), -1)[0][4].decode('utf-8')
+        peg_mesh = sim.client.getCollisionShapeData(sim.model_id('peg'), -1)[0][4].decode('utf-8')
+        self.assertTrue(hole_mesh.startswith(self.__directory))
+        self.assertFalse(peg_mesh.startswith(self.__directory))
+
+        sim.collision_cache = None
+        sim.reset()
+        hole_mesh = sim.client.getCollisionShapeData(sim.model_id('hole'), -1)[0][4].decode('utf-8')
+        self.assertFalse(hole_mesh.startswith(self.__directory))
+
+    def test_world_default(self):
+        self.assertIsNone(PyBulletWorld(gui_mode=GUI_MODE.DIRECT, collision_cache=False).collision_cache)
+        self.assertIsNone(PyBulletWorld(gui_mode=GUI_MODE.DIRECT, collision_cache=None).collision_cache)
+        self.assertEqual(PyBulletWorld(gui_mode=GUI_MODE.DIRECT).collision_cache.directory, DEFAULT_CACHE_DIRECTORY)
+
+        # Hashes of the files are computed once for all caches, the file changed with the same mtime and size is not hashed again
+        mesh_filename = os.path.join(self.__directory, 'mesh.obj')
+        with open(mesh_filename, 'w') as f:
+            f.write('v 0 0 0\n')
+        mesh_path = self.__cache.mesh_path(mesh_filename)
+        stat = os.stat(mesh_filename)
+        with open(mesh_filename, 'w') as f:
+            f.write('v 1 1 1\n')
+        os.utime(mesh_filename, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(ConvexDecompositionCache(self.__directory, resolution=10000).mesh_path(mesh_filename), mesh_path)
+        self.assertNotEqual(ConvexDecompositionCache(self.__directory, resolution=20000).mesh_path(mesh_filename), mesh_path)
+
+
+def main():
+    unittest.main(exit=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.utils.robot import JointState
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env import pybullet_dataset
+from itmobotics_sim.pybullet_env.pybullet_dataset import DatasetLogger, DatasetReader
+
+test_joint_pose = np.array([0.0, -np.pi/2, np.pi/2, 0.0, np.pi/2, 0.0])
+episode_lengths = [30, 45, 20]
+
+
+class testPyBulletDataset(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.mkdtemp()
+        self.__sim = PyBulletWorld(gui_mode = GUI_MODE.DIRECT, time_step = 0.01, time_scale=1)
+        self.__sim.add_object('table', 'tests/urdf/table.urdf', save=True)
+        self.__robot = self.__sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0.0, 0.0, 0.625), 'robot')
+        self.__command = np.zeros(6)
+
+    def tearDown(self):
+        shutil.rmtree(self.__directory)
+
+    def __run_episodes(self, logger: DatasetLogger) -> list:
+        expected = []
+        self.__sim.attach_logger(logger)
+        for length in episode_lengths:
+            self.__sim.reset()
+            logger.begin_episode()
+            positions = []
+            for i in range(length):
+                self.__command = test_joint_pose + 0.2 * np.sin(0.1 * i)
+                self.__robot.reset_joint_state(JointState.from_position(self.__command))
+                self.__sim.sim_step()
+                positions.append(self.__robot.joint_state.joint_positions.copy())
+            expected.append(np.array(positions))
+        logger.close()
+        self.__sim.detach_logger(logger)
+        return expected
+
+    def test_episodes(self):
+        logger = DatasetLogger(
+            self.__directory,
+            {
+                'joint_positions': pybullet_dataset.joint_positions('robot'),
+                'ee_transform': pybullet_dataset.ee_transform('robot', 'ee_tool'),
+                'command': lambda world: self.__command.astype(np.float32),
+            },
+            # Small shards make episodes span several of them
+            shard_size=2048
+        )
+        expected = self.__run_episodes(logger)
+        self.assertEqual(logger.num_episodes, len(episode_lengths))
+
+        self.assertGreater(len([name for name in os.listdir(self.__directory) if name.startswith('shard_')]), 1)
+        reader = DatasetReader(self.__directory)
+        self.assertEqual(set(reader.column_names), {'time', 'joint_positions', 'ee_transform', 'command'})
+        self.assertEqual(reader.schema['command']['dtype'], np.dtype(np.float32).str)
+        self.assertEqual(reader.num_episodes, len(episode_lengths))
+        for i, episode in enumerate(reader.iter_episodes()):
+            self.assertEqual(reader.episode_length(i), episode_lengths[i])
+            self.assertEqual(episode['ee_transform'].shape, (episode_lengths[i], 4, 4))
+            np.testing.assert_allclose(episode['joint_positions'], expected[i])
+            np.testing.assert_allclose(episode['time'], 0.01 * np.arange(1, episode_lengths[i] + 1))
+
+        # Readers are passed to worker processes without opened shards
+        copy = pickle.loads(pickle.dumps(reader))
+        np.testing.assert_allclose(copy.episode(1, ['joint_positions'])['joint_positions'], expected[1])
+
+    def test_unfinished_episode(self):
+        logger = DatasetLogger(self.__directory, {'joint_positions': pybullet_dataset.joint_positions('robot')})
+        self.__sim.attach_logger(logger)
+        logger.begin_episode()
+        for _ in range(10):
+            self.__sim.sim_step()
+        logger.begin_episode()
+        for _ in range(5):
+            self.__sim.sim_step()
+        reader = DatasetReader(self.__directory)
+        self.assertEqual(reader.num_episodes, 1)
+        logger.close()
+        reader.refresh()
+        self.assertEqual(reader.num_episodes, 2)
+        self.assertEqual(reader.episode_length(1), 5)
+
+    def test_existing_dataset(self):
+        columns = {'joint_positions': pybullet_dataset.joint_positions('robot')}
+        # Column names are file names of the shards
+        for name in ('', 'robot/joint_positions', '..'):
+            self.assertRaises(AssertionError, DatasetLogger, self.__directory, {name: columns['joint_positions']})
+        self.__run_episodes(DatasetLogger(self.__directory, columns))
+        self.assertRaises(FileExistsError, DatasetLogger, self.__directory, columns)
+
+        # Episodes are appended in new shards
+        self.__run_episodes(DatasetLogger(self.__directory, columns, mode='append'))
+        reader = DatasetReader(self.__directory)
+        self.assertEqual(reader.num_episodes, 2 * len(episode_lengths))
+        np.testing.assert_allclose(reader.episode(len(episode_lengths))['joint_positions'], reader.episode(0)['joint_positions'])
+        logger = DatasetLogger(self.__directory, {'command': lambda world: self.__command}, mode='append')
+        self.assertRaises(AssertionError, logger.capture, self.__sim)
+
+        logger = DatasetLogger(self.__directory, columns, mode='overwrite')
+        self.assertFalse(os.path.exists(os.path.join(self.__directory, pybullet_dataset.INDEX_FILENAME)))
+        self.__run_episodes(logger)
+        reader = DatasetReader(self.__directory)
+        self.assertEqual(reader.num_episodes, len(episode_lengths))
+
+
+def main():
+    unittest.main(exit=False)
+
+if __name__ == "__main__":
+    main()
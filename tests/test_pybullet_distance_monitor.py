@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.utils.robot import JointState
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+
+
+test_joint_pose = np.array([0.0, -np.pi/2, np.pi/2, 0.0, np.pi/2, 0.0])
+
+class testPyBulletDistanceMonitor(unittest.TestCase):
+    def setUp(self):
+        self.__sim = PyBulletWorld(gui_mode = GUI_MODE.DIRECT, time_step = 0.01, time_scale=1)
+        self.__sim.add_object('table', 'tests/urdf/table.urdf', save=True)
+        self.__robot1 = self.__sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0.0, -0.4, 0.625), 'robot1')
+        self.__robot2 = self.__sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0.0, 0.4, 0.625), 'robot2')
+        self.__monitor = self.__sim.add_distance_monitor('robot1_safety', 'robot1', ['robot2', 'table'], max_distance=1.0)
+
+    def test_distances(self):
+        self.__robot1.reset_joint_state(JointState.from_position(test_joint_pose))
+        self.__robot2.reset_joint_state(JointState.from_position(test_joint_pose))
+        self.__sim.sim_step()
+
+        distances = self.__monitor.distances
+        self.assertEqual(distances.shape, (len(self.__monitor.link_names), 2))
+        self.assertEqual(self.__monitor.vectors.shape, distances.shape + (3,))
+        self.assertIs(self.__monitor.distances, distances)
+
+        client = self.__sim.client
+        self.assertIn('wrist_3_link', self.__monitor.link_names)
+        for i, link in enumerate(self.__monitor.link_names):
+            link_id = self.__robot1.link_id(link)
+            points = client.getClosestPoints(self.__robot1.robot_id, self.__robot2.robot_id, 1.0, linkIndexA=link_id)
+            expected = min([cp[8] for cp in points], default=np.inf)
+            self.assertAlmostEqual(distances[i, 0], expected)
+        finite = np.isfinite(distances)
+        np.testing.assert_allclose(np.linalg.norm(self.__monitor.vectors[finite], axis=1), np.abs(distances[finite]), atol=1e-6)
+
+        self.__sim.sim_step()
+        self.assertIsNot(self.__monitor.distances, distances)
+
+    def test_reset(self):
+        self.__sim.reset()
+        self.__robot1.reset_joint_state(JointState.from_position(test_joint_pose))
+        self.__sim.sim_step()
+        self.assertLess(self.__monitor.min_distance, 1.0)
+
+def main():
+    unittest.main(exit=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env.pybullet_domain_randomization import DomainRandomizer, Uniform, LogUniform, Normal
+
+
+class testDomainRandomization(unittest.TestCase):
+    def setUp(self):
+        self.__sim = PyBulletWorld(gui_mode = GUI_MODE.DIRECT, time_step = 0.01)
+        self.__sim.add_object('table', 'tests/urdf/table.urdf', fixed=True, save=True)
+        self.__sim.add_object('peg', 'tests/urdf/peg_round.urdf', SE3(0.0, 0.0, 0.7), fixed=False, save=True)
+        self.__robot = self.__sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0.0, -0.3, 0.625), 'robot')
+
+    def __make_randomizer(self, seed: int) -> DomainRandomizer:
+        randomizer = DomainRandomizer(self.__sim, seed=seed)
+        randomizer.add('peg', 'mass', Uniform(0.8, 1.2), relative=True)
+        randomizer.add('table', 'lateral_friction', Normal(0.8, 0.1, 0.5, 1.0))
+        randomizer.add('robot', 'joint_damping', Uniform(0.0, 0.5), link='wrist_3_link')
+        randomizer.add('robot', 'kp', LogUniform(0.5, 2.0), relative=True)
+        randomizer.add('peg', 'base_position', Uniform([-0.05, -0.05, 0.0], [0.05, 0.05, 0.0]), relative=True)
+        randomizer.add('peg', 'base_orientation', Uniform([0.0, 0.0, -np.pi], [0.0, 0.0, np.pi]))
+        return randomizer
+
+    def test_sample_and_apply(self):
+        client = self.__sim.client
+        peg_id = self.__sim.model_id('peg')
+        nominal_mass, _, nominal_inertia = client.getDynamicsInfo(peg_id, -1)[:3]
+        nominal_kp = np.array(self.__robot.joint_controller_params['kp'])
+
+        randomizer = self.__make_randomizer(seed=1)
+        samples = randomizer.sample(10)
+        self.assertEqual(randomizer.num_episodes, 10)
+        self.assertEqual(samples['peg/base/mass'].shape, (10,))
+        self.assertEqual(samples['robot/base/kp'].shape, (10, 6))
+        self.assertEqual(samples['peg/base/base_orientation'].shape, (10, 4))
+        self.assertTrue(np.all(samples['table/base/lateral_friction'] >= 0.5))
+
+        for episode in (3, 7):
+            self.__sim.reset()
+            randomizer.apply(episode)
+            parameters = randomizer.parameters(episode)
+            peg_id = self.__sim.model_id('peg')
+            mass, _, inertia = client.getDynamicsInfo(peg_id, -1)[:3]
+            self.assertAlmostEqual(mass, parameters['peg/base/mass'])
+            np.testing.assert_allclose(inertia, np.array(nominal_inertia) * mass / nominal_mass, rtol=1e-6)
+            self.assertAlmostEqual(
+                client.getDynamicsInfo(self.__sim.model_id('table'), -1)[1], parameters['table/base/lateral_friction']
+            )
+            # getJointInfo reports the damping of the URDF, the changed one is not observable
+            self.assertTrue(0.0 <= parameters['robot/wrist_3_link/joint_damping'] < 0.5)
+            np.testing.assert_allclose(self.__robot.joint_controller_params['kp'], parameters['robot/base/kp'])
+            self.assertTrue(np.all(parameters['robot/base/kp'] <= 2.0 * nominal_kp + 1e-9))
+            position, orientation = client.getBasePositionAndOrientation(peg_id)
+            np.testing.assert_allclose(position, parameters['peg/base/base_position'], atol=1e-6)
+            np.testing.assert_allclose(position[2], 0.7, atol=1e-6)
+            np.testing.assert_allclose(np.abs(np.dot(orientation, parameters['peg/base/base_orientation'])), 1.0, atol=1e-6)
+
+        for _ in range(10):
+            self.__sim.sim_step()
+
+    def test_reproducibility(self):
+        samples = self.__make_randomizer(seed=5).sample(4)
+        same_samples = self.__make_randomizer(seed=5).sample(4)
+        for name in samples:
+            np.testing.assert_array_equal(samples[name], same_samples[name])
+
+        randomizer = self.__make_randomizer(seed=5)
+        randomizer.sample(4)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'randomization.npz')
+            randomizer.save(path)
+            loaded = self.__make_randomizer(seed=None)
+            loaded.load(path)
+            for name in samples:
+                np.testing.assert_array_equal(loaded.samples[name], samples[name])
+            other = DomainRandomizer(self.__sim)
+            other.add('peg', 'mass', Uniform(0.1, 0.2))
+            self.assertRaises(KeyError, other.load, path)
+
+
+def main():
+    unittest.main(exit=False)
+
+if __name__ == "__main__":
+    main()
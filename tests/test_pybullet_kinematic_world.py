@@ -0,0 +1,81 @@
+import unittest
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.utils.robot import EEState, JointState, Motion
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env.pybullet_robot import SimulationException
+from itmobotics_sim.utils.controllers import EEPositionToEEVelocityController, EEVelocityToJointVelocityController, JointPositionsController, JointTorquesController, JointVelocitiesController
+
+
+test_joint_pose = np.array([0.0, -np.pi/2, np.pi/2, 0.0, np.pi/2, 0.0])
+
+
+class testKinematicWorld(unittest.TestCase):
+    def setUp(self):
+        self.__sim = PyBulletWorld(gui_mode = GUI_MODE.DIRECT, time_step = 0.001, kinematic=True)
+        self.__sim.add_object('table', 'tests/urdf/table.urdf', fixed=True, save=True)
+        self.__robot = self.__sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0, 0, 0.625), 'robot')
+        self.assertTrue(self.__sim.kinematic and self.__robot.kinematic)
+        self.__motion = Motion('ee_tool', 6)
+
+    def test_joint_control(self):
+        # Position targets are reached without steps
+        self.__motion.joint_state = JointState.from_position(test_joint_pose)
+        self.assertTrue(JointPositionsController(self.__robot).send_control_to_robot(self.__motion))
+        np.testing.assert_allclose(self.__robot.joint_state.joint_positions, test_joint_pose)
+
+        velocities = np.array([0.1, 0.0, -0.1, 0.2, 0.0, 0.05])
+        self.__motion.joint_state = JointState.from_position(test_joint_pose)
+        self.__motion.joint_state.joint_velocities = velocities
+        JointVelocitiesController(self.__robot).send_control_to_robot(self.__motion)
+        for _ in range(1000):
+            self.__sim.sim_step()
+        np.testing.assert_allclose(self.__robot.joint_state.joint_positions, test_joint_pose + velocities, atol=1e-9)
+        np.testing.assert_allclose(self.__robot.joint_state.joint_velocities, velocities, atol=1e-9)
+        np.testing.assert_allclose(self.__robot.ee_state('ee_tool').twist[:3], self.__robot.jacobian(
+            self.__robot.joint_state.joint_positions, 'ee_tool')[:3] @ velocities, atol=1e-6)
+
+        self.assertRaises(SimulationException, JointTorquesController(self.__robot).send_control_to_robot, self.__motion)
+
+    def test_ee_pose_controller(self):
+        self.__robot.reset_joint_state(JointState.from_position(test_joint_pose))
+        controller = EEPositionToEEVelocityController(self.__robot)
+        controller.connect_controller(EEVelocityToJointVelocityController(self.__robot))
+        target = SE3(0.1, 0.05, -0.1) @ self.__robot.ee_state('ee_tool').tf
+        self.__motion.ee_state = EEState.from_tf(target, 'ee_tool')
+        for _ in range(2000):
+            controller.send_control_to_robot(self.__motion)
+            self.__sim.sim_step()
+        np.testing.assert_allclose(self.__robot.ee_state('ee_tool').tf.t, target.t, atol=1e-2)
+
+    def test_collisions(self):
+        # The robot base stands on the table, other links are above it
+        base_link = self.__sim.link_id('robot', 'base_link')
+        self.__robot.reset_joint_state(JointState.from_position(test_joint_pose))
+        self.__sim.sim_step()
+        contacts = self.__sim.contact_points('robot', 'table')
+        self.assertEqual(np.count_nonzero(contacts['link_a'] > base_link), 0)
+
+        # Shoulder lift turns the arm into the table
+        self.__robot.reset_joint_state(JointState.from_position(np.array([0.0, 0.5, 0.0, 0.0, 0.0, 0.0])))
+        self.__sim.sim_step()
+        contacts = self.__sim.contact_points('robot', 'table')
+        self.assertGreater(np.count_nonzero(contacts['link_a'] > base_link), 0)
+        np.testing.assert_allclose(contacts['normal_force'], 0.0)
+        self.assertIn('table', self.__sim.is_collide_with('robot'))
+        self.assertEqual(self.__sim.collision_matrix()[0].sum(), 2)
+
+        # Bodies are not moved by the simulation
+        self.__sim.add_object('cube', 'cube_small.urdf', SE3(0.5, 0.5, 1.5), fixed=False)
+        for _ in range(10):
+            self.__sim.sim_step()
+        np.testing.assert_allclose(self.__sim.client.getBasePositionAndOrientation(self.__sim.model_id('cube'))[0], [0.5, 0.5, 1.5])
+
+
+def main():
+    unittest.main(exit=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import unittest
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.pybullet_env.pybullet_robot import SimulationException
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+
+
+class testPyBulletObjectBatch(unittest.TestCase):
+    def setUp(self):
+        self.__sim = PyBulletWorld(gui_mode = GUI_MODE.DIRECT, time_step = 0.01, time_scale=1)
+        self.__sim.add_object('table', 'tests/urdf/table.urdf', save=True)
+        self.__transforms = np.stack([(SE3(0.1 * i, 0.0, 0.7) @ SE3.Rz(0.3 * i)).A for i in range(5)])
+
+    def test_batched_objects(self):
+        batch = self.__sim.add_objects('cube', 'cube_small.urdf', self.__transforms, fixed=False, save=True)
+        self.assertEqual(batch.names, ['cube_{:d}'.format(i) for i in range(5)])
+        self.__sim.add_object('reference', 'cube_small.urdf', SE3(self.__transforms[3]), fixed=False)
+
+        # Batched bodies match the body loaded from the URDF
+        client = self.__sim.client
+        reference_id = self.__sim.model_id('reference')
+        cube_id = self.__sim.model_id('cube_3')
+        np.testing.assert_allclose(client.getAABB(cube_id), client.getAABB(reference_id), atol=1e-6)
+        self.assertEqual(client.getDynamicsInfo(cube_id, -1)[:3], client.getDynamicsInfo(reference_id, -1)[:3])
+        cube_pose = client.getBasePositionAndOrientation(cube_id)
+        reference_pose = client.getBasePositionAndOrientation(reference_id)
+        np.testing.assert_allclose(cube_pose[0], reference_pose[0], atol=1e-9)
+        np.testing.assert_allclose(cube_pose[1], reference_pose[1], atol=1e-9)
+
+        for _ in range(50):
+            self.__sim.sim_step()
+        self.assertGreater(self.__sim.contact_points('cube_0', 'table').shape[0], 0)
+        self.assertIn('cube_4', self.__sim.model_names)
+
+        self.__sim.remove_object('cube_4')
+        self.assertNotIn('cube_4', self.__sim.model_names)
+        self.assertRaises(KeyError, self.__sim.model_id, 'cube_4')
+
+        # Saved objects are spawned again at their initial transforms, removed ones are restored too
+        self.__sim.reset()
+        self.assertEqual(len(batch.names), 5)
+        np.testing.assert_allclose(client.getBasePositionAndOrientation(self.__sim.model_id('cube_1'))[0], self.__transforms[1, :3, 3])
+
+        self.__sim.remove_objects('cube')
+        self.assertRaises(KeyError, self.__sim.model_id, 'cube_0')
+
+    def test_loaded_objects(self):
+        # URDF with several links is loaded for every object
+        batch = self.__sim.add_objects('peg', 'tests/urdf/peg_round.urdf', self.__transforms)
+        self.assertEqual(len(batch), 5)
+        state = self.__sim.link_state('peg_2', 'peg_target_link')
+        np.testing.assert_allclose(state.tf.t, self.__transforms[2, :3, 3], atol=1e-6)
+        self.__sim.reset()
+        self.assertRaises(KeyError, self.__sim.model_id, 'peg_0')
+
+    def test_name_clash(self):
+        self.__sim.add_object('cube_1', 'cube_small.urdf', SE3(0.0, 0.5, 0.7))
+        self.assertRaises(SimulationException, self.__sim.add_objects, 'cube', 'cube_small.urdf', self.__transforms)
+
+        self.__sim.add_objects('peg', 'cube_small.urdf', self.__transforms)
+        self.__sim.remove_object('peg_2')
+        self.assertRaises(SimulationException, self.__sim.add_object, 'peg_2', 'cube_small.urdf')
+        self.__sim.add_object('peg_5', 'cube_small.urdf', SE3(0.0, 0.5, 0.7))
+        self.assertIn('peg_5', self.__sim.model_names)
+        self.assertNotIn('peg_2', self.__sim.model_names)
+
+
+def main():
+    unittest.main(exit=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import unittest
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+
+
+class testPyBulletObjectPool(unittest.TestCase):
+    def setUp(self):
+        self.__sim = PyBulletWorld(gui_mode = GUI_MODE.DIRECT, time_step = 0.01, time_scale=1)
+        self.__sim.set_object_pooling(True)
+        self.__sim.add_object('table', 'tests/urdf/table.urdf', save=True)
+
+    def test_recycled_bodies(self):
+        client = self.__sim.client
+        self.__sim.add_object('cube', 'cube_small.urdf', SE3(0.0, 0.0, 0.7), fixed=False)
+        for _ in range(50):
+            self.__sim.sim_step()
+        body_id = self.__sim.model_id('cube')
+        self.assertGreater(self.__sim.contact_points('cube', 'table').shape[0], 0)
+        mass = client.getDynamicsInfo(body_id, -1)[0]
+
+        self.__sim.remove_object('cube')
+        self.assertEqual(self.__sim.object_pool.num_parked, 1)
+        # Parked body neither falls nor touches anything
+        for _ in range(20):
+            self.__sim.sim_step()
+        parked_position = client.getBasePositionAndOrientation(body_id)[0]
+        np.testing.assert_allclose(parked_position, [0.0, 0.0, -1000.0])
+        client.performCollisionDetection()
+        self.assertEqual(len(client.getContactPoints(bodyA=body_id)), 0)
+
+        # The same body is placed with zero velocity and its mass
+        self.__sim.add_object('cube_again', 'cube_small.urdf', SE3(0.1, 0.0, 0.8), fixed=False)
+        self.assertEqual(self.__sim.model_id('cube_again'), body_id)
+        self.assertEqual(client.getDynamicsInfo(body_id, -1)[0], mass)
+        np.testing.assert_allclose(client.getBasePositionAndOrientation(body_id)[0], [0.1, 0.0, 0.8], atol=1e-6)
+        np.testing.assert_allclose(client.getBaseVelocity(body_id)[0], np.zeros(3))
+        self.assertEqual(self.__sim.object_pool.stats['hits'], 1)
+
+        for _ in range(100):
+            self.__sim.sim_step()
+        self.assertGreater(self.__sim.contact_points('cube_again', 'table').shape[0], 0)
+
+        # Other scale or base needs another body
+        self.__sim.add_object('cube_fixed', 'cube_small.urdf', SE3(0.3, 0.0, 0.8), fixed=True)
+        self.assertNotEqual(self.__sim.model_id('cube_fixed'), body_id)
+
+    def test_recycled_fixed_bodies(self):
+        client = self.__sim.client
+        # Static bodies do not collide with each other, like freshly loaded ones
+        self.__sim.add_object('cube_1', 'cube_small.urdf', SE3(0.0, 0.0, 0.7), fixed=True)
+        self.__sim.add_object('cube_2', 'cube_small.urdf', SE3(0.01, 0.0, 0.7), fixed=True)
+        client.performCollisionDetection()
+        self.assertEqual(len(client.getContactPoints(self.__sim.model_id('cube_1'), self.__sim.model_id('cube_2'))), 0)
+
+        self.__sim.remove_object('cube_2')
+        self.__sim.add_object('cube_3', 'cube_small.urdf', SE3(0.01, 0.0, 0.7), fixed=True)
+        self.assertEqual(self.__sim.object_pool.stats['hits'], 1)
+        client.performCollisionDetection()
+        self.assertEqual(len(client.getContactPoints(self.__sim.model_id('cube_1'), self.__sim.model_id('cube_3'))), 0)
+
+        # Dynamic bodies still collide with the recycled static one
+        self.__sim.add_object('cube_4', 'cube_small.urdf', SE3(0.0, 0.01, 0.7), fixed=False)
+        client.performCollisionDetection()
+        self.assertGreater(len(client.getContactPoints(self.__sim.model_id('cube_3'), self.__sim.model_id('cube_4'))), 0)
+
+    def test_pooled_reset(self):
+        client = self.__sim.client
+        self.__sim.add_object('cube', 'cube_small.urdf', SE3(0.0, 0.0, 0.7), fixed=False, save=True)
+        self.__sim.add_object('tmp_cube', 'cube_small.urdf', SE3(0.2, 0.0, 0.7), fixed=False)
+        table_id = self.__sim.model_id('table')
+        cube_id = self.__sim.model_id('cube')
+        for _ in range(50):
+            self.__sim.sim_step()
+
+        self.__sim.reset()
+        self.assertEqual(self.__sim.sim_time, 0.0)
+        self.assertEqual(self.__sim.model_id('table'), table_id)
+        self.assertNotIn('tmp_cube', self.__sim.model_names)
+        np.testing.assert_allclose(client.getBasePositionAndOrientation(self.__sim.model_id('cube'))[0], [0.0, 0.0, 0.7], atol=1e-6)
+        self.assertIn(self.__sim.model_id('cube'), (cube_id, cube_id + 1))
+        self.assertEqual(self.__sim.object_pool.num_parked, 1)
+
+        # Disabled pooling removes parked bodies and resets the simulation again
+        self.__sim.set_object_pooling(False)
+        self.assertIsNone(self.__sim.object_pool)
+        self.__sim.reset()
+        self.assertIn('cube', self.__sim.model_names)
+
+
+def main():
+    unittest.main(exit=False)
+
+if __name__ == "__main__":
+    main()
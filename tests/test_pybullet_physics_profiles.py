@@ -0,0 +1,52 @@
+import unittest
+
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE, PHYSICS_PARAMETERS, PHYSICS_PROFILES
+
+
+class testPhysicsProfiles(unittest.TestCase):
+    def setUp(self):
+        self.__sim = PyBulletWorld(gui_mode = GUI_MODE.DIRECT, time_step = 0.01)
+
+    def __engine_parameters(self) -> dict:
+        return self.__sim.client.getPhysicsEngineParameters()
+
+    def test_named_profiles(self):
+        # The default profile keeps parameters of the previous releases
+        self.assertEqual(self.__sim.physics_profile, 'contact-accurate')
+        self.assertEqual(self.__engine_parameters()['numSolverIterations'], 100)
+        self.assertEqual(self.__engine_parameters()['numSubSteps'], 4)
+
+        self.__sim.set_physics_profile('fast')
+        self.assertEqual(self.__engine_parameters()['numSolverIterations'], 10)
+        self.__sim.reset()
+        self.assertEqual(self.__engine_parameters()['numSolverIterations'], 10)
+        self.assertEqual(self.__engine_parameters()['numSubSteps'], 1)
+        self.assertRaises(KeyError, self.__sim.set_physics_profile, 'unknown')
+
+        sim = PyBulletWorld(gui_mode = GUI_MODE.DIRECT, time_step = 0.01, physics_profile='balanced')
+        self.assertEqual(sim.physics_parameters['numSubSteps'], 2)
+        self.assertEqual(sim.client.getPhysicsEngineParameters()['numSolverIterations'], 50)
+
+    def test_custom_profile(self):
+        self.__sim.set_physics_profile({'numSolverIterations': 20, 'erp': 0.4, 'deterministicOverlappingPairs': 1})
+        self.__sim.reset()
+        parameters = self.__engine_parameters()
+        self.assertEqual(parameters['numSolverIterations'], 20)
+        self.assertEqual(self.__sim.physics_parameters['erp'], 0.4)
+        # Missing parameters are taken from the default profile
+        self.assertEqual(parameters['numSubSteps'], 4)
+        self.assertRaises(AssertionError, self.__sim.set_physics_profile, {'numIterations': 20})
+
+        # Named profile sets the parameters changed by the custom one back
+        self.__sim.set_physics_profile('balanced')
+        self.assertEqual(self.__sim.physics_parameters['erp'], 0.2)
+        self.assertEqual(self.__sim.physics_parameters['deterministicOverlappingPairs'], 0)
+        for parameters in PHYSICS_PROFILES.values():
+            self.assertEqual(set(parameters), set(PHYSICS_PARAMETERS))
+
+
+def main():
+    unittest.main(exit=False)
+
+if __name__ == "__main__":
+    main()
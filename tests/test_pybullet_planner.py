@@ -0,0 +1,105 @@
+import unittest
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.utils.robot import JointState, Motion
+from itmobotics_sim.utils.controllers import JointPositionsController
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env.pybullet_collision_checker import CollisionChecker
+from itmobotics_sim.pybullet_env.pybullet_planner import RRTConnect, LazyPRM, shortcut_path, time_parameterize
+
+
+# The box is on the straight motion between the poses
+start_joint_pose = np.array([-1.2, -1.2, 1.5, -1.9, -np.pi/2, 0.0])
+goal_joint_pose = np.array([1.2, -1.2, 1.5, -1.9, -np.pi/2, 0.0])
+
+
+def path_length(path: np.ndarray) -> float:
+    return float(np.sum(np.linalg.norm(np.diff(path, axis=0), axis=1)))
+
+
+class testPlanner(unittest.TestCase):
+    def setUp(self):
+        self.__sim = PyBulletWorld(gui_mode = GUI_MODE.DIRECT, kinematic=True)
+        self.__sim.add_object('table', 'tests/urdf/table.urdf', fixed=True, save=True)
+        self.__sim.add_object('box', 'cube.urdf', SE3(-0.6, 0.0, 0.85), fixed=True, scale_size=0.3)
+        self.__robot = self.__sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0, 0, 0.625), 'robot')
+        self.__robot.reset_joint_state(JointState.from_position(start_joint_pose))
+        self.__checker = CollisionChecker(self.__sim, 'robot', margin=0.01)
+        self.assertFalse(self.__checker.check_edges(start_joint_pose, goal_joint_pose)[0])
+
+    def tearDown(self):
+        self.__checker.close()
+
+    def assertValidPath(self, path: np.ndarray):
+        self.assertIsNotNone(path)
+        np.testing.assert_allclose(path[0], start_joint_pose)
+        np.testing.assert_allclose(path[-1], goal_joint_pose)
+        self.assertTrue(np.all(self.__checker.check_edges(path[:-1], path[1:])))
+
+    def test_rrt_connect(self):
+        planner = RRTConnect(self.__checker, seed=0)
+        path = planner.plan(start_joint_pose, goal_joint_pose)
+        self.assertValidPath(path)
+        self.assertGreater(planner.num_nodes, 2)
+
+        shortcut = shortcut_path(self.__checker, path, seed=0)
+        self.assertValidPath(shortcut)
+        self.assertLessEqual(path_length(shortcut), path_length(path) + 1e-9)
+
+        # Goal inside the table
+        self.assertIsNone(planner.plan(start_joint_pose, np.array([0.0, 0.5, 0.0, 0.0, 0.0, 0.0])))
+
+    def test_lazy_prm(self):
+        planner = LazyPRM(self.__checker, num_samples=500, seed=0)
+        self.assertValidPath(planner.plan(start_joint_pose, goal_joint_pose))
+        num_nodes = planner.num_nodes
+        # Only edges of searched paths are checked
+        self.assertLess(planner.num_checked_edges, planner.num_edges)
+
+        # The roadmap is reused by the next query
+        path = planner.plan(goal_joint_pose, start_joint_pose)
+        self.assertIsNotNone(path)
+        np.testing.assert_allclose(path[0], goal_joint_pose)
+        self.assertEqual(planner.num_nodes, num_nodes)
+
+    def test_lazy_prm_grow_during_query(self):
+        # Roadmaps of one sample mostly have no path, the query grows them
+        num_nodes = []
+        for seed in range(6):
+            planner = LazyPRM(self.__checker, num_samples=1, seed=seed)
+            planner.plan(start_joint_pose, goal_joint_pose, max_time=0.5)
+            num_nodes.append(planner.num_nodes)
+            for pose in (start_joint_pose, goal_joint_pose):
+                self.assertFalse(np.any(np.all(np.isclose(planner.nodes, pose), axis=1)))
+        self.assertGreater(max(num_nodes), 1)
+
+    def test_time_parameterization(self):
+        path = shortcut_path(self.__checker, RRTConnect(self.__checker, seed=0).plan(start_joint_pose, goal_joint_pose), seed=0)
+        max_velocities = self.__robot.joint_limits.limit_velocities[1]
+        max_accelerations = np.full(6, np.pi)
+        times, positions, velocities = time_parameterize(path, max_velocities, max_accelerations, self.__sim.time_step)
+        self.assertEqual(times.shape[0], positions.shape[0])
+        np.testing.assert_allclose(np.diff(times)[:-1], self.__sim.time_step)
+        np.testing.assert_allclose(positions[-1], goal_joint_pose)
+        np.testing.assert_allclose(velocities[[0, -1]], 0.0, atol=1e-9)
+        self.assertTrue(np.all(np.abs(velocities) <= max_velocities + 1e-9))
+        self.assertTrue(np.all(np.abs(np.diff(velocities, axis=0)) <= max_accelerations * self.__sim.time_step + 1e-9))
+        # Velocities are derivatives of positions
+        np.testing.assert_allclose(np.diff(positions, axis=0)[:-1] / self.__sim.time_step, velocities[1:-1], atol=1e-2)
+
+        controller = JointPositionsController(self.__robot)
+        motion = Motion('ee_tool', 6)
+        for q in positions:
+            motion.joint_state = JointState.from_position(q)
+            controller.send_control_to_robot(motion)
+            self.__sim.sim_step()
+        np.testing.assert_allclose(self.__robot.joint_state.joint_positions, goal_joint_pose)
+
+
+def main():
+    unittest.main(exit=False)
+
+if __name__ == "__main__":
+    main()
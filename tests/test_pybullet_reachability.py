@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.utils.robot import JointState
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env.pybullet_reachability import ReachabilityMap, ReachabilityMapBuilder
+
+
+class testReachabilityMap(unittest.TestCase):
+    def setUp(self):
+        self.__sim = PyBulletWorld(gui_mode = GUI_MODE.DIRECT, kinematic=True)
+        self.__robot = self.__sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0, 0, 0.625), 'robot')
+
+    def test_build(self):
+        with ReachabilityMapBuilder(self.__sim, 'robot', 'ee_tool', resolution=0.15, num_directions=16, seed=0) as builder:
+            reachability_map = builder.map
+            builder.sample(5000)
+            num_reached = np.count_nonzero(reachability_map.reachable)
+            self.assertGreater(num_reached, 0)
+            self.assertGreater(builder.solve_ik(max_iterations=10), 0)
+            self.assertGreater(np.count_nonzero(reachability_map.reachable), num_reached)
+
+        # Poses of random configurations are in reached voxels
+        rng = np.random.default_rng(1)
+        lower, upper = self.__robot.joint_limits.limit_positions
+        positions = []
+        for q in rng.uniform(lower, upper, (20, 6)):
+            self.__robot.reset_joint_state(JointState.from_position(q))
+            positions.append(self.__robot.ee_state('ee_tool').tf.t)
+        reachability, manipulability = reachability_map.lookup(np.array(positions))
+        self.assertGreaterEqual(np.count_nonzero(reachability > 0.0), 18)
+        self.assertTrue(np.all(manipulability[reachability > 0.0] > 0.0))
+
+        # Far poses are not reachable, transforms are looked up by the direction of their z-axis
+        reachability, manipulability = reachability_map.lookup(np.array([[5.0, 5.0, 5.0], [0.0, 0.0, 3.0]]))
+        np.testing.assert_array_equal(reachability, 0.0)
+        np.testing.assert_array_equal(manipulability, 0.0)
+        transforms = np.tile(np.eye(4), (3, 1, 1))
+        transforms[:, :3, 3] = positions[:3]
+        reachability, _ = reachability_map.lookup(transforms)
+        self.assertTrue(np.all((reachability == 0.0) | (reachability == 1.0)))
+
+    def test_save_load(self):
+        with ReachabilityMapBuilder(self.__sim, 'robot', 'ee_tool', resolution=0.1, seed=0) as builder:
+            builder.sample(5000)
+            reachability_map = builder.map
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'ur5e.npz')
+            reachability_map.save(path)
+            self.assertLess(os.path.getsize(path), (reachability_map.reachable.nbytes + reachability_map.manipulability.nbytes) / 8)
+            loaded = ReachabilityMap.load(path)
+        np.testing.assert_array_equal(loaded.reachable, reachability_map.reachable)
+        np.testing.assert_allclose(loaded.manipulability, reachability_map.manipulability, rtol=1e-3, atol=1e-4)
+        np.testing.assert_allclose(loaded.origin, reachability_map.origin)
+        self.assertEqual(loaded.shape, reachability_map.shape)
+        self.assertEqual(loaded.metadata['link'], 'ee_tool')
+
+    def test_workers(self):
+        with ReachabilityMapBuilder(self.__sim, 'robot', 'ee_tool', resolution=0.15, seed=0) as builder:
+            builder.sample(2000)
+            expected = builder.map.reachable
+        with ReachabilityMapBuilder(self.__sim, 'robot', 'ee_tool', resolution=0.15, num_workers=2, seed=0) as builder:
+            builder.sample(2000, batch_size=500)
+            np.testing.assert_array_equal(builder.map.reachable, expected)
+
+
+def main():
+    unittest.main(exit=False)
+
+if __name__ == "__main__":
+    main()
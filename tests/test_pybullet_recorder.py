@@ -0,0 +1,243 @@
+import os
+import pickle
+import unittest
+
+import numpy as np
+import pybullet
+import pybullet_utils.bullet_client as bc
+from spatialmath import SE3
+
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env.pybullet_recorder import PyBulletRecorder, urdf_visuals
+from itmobotics_sim.pybullet_env.pybullet_record_file import RecordFile, convert_to_pickle
+
+
+n_steps = 50
+
+class testPyBulletRecorder(unittest.TestCase):
+    def setUp(self):
+        self.__p = bc.BulletClient(connection_mode=pybullet.DIRECT)
+        self.__p.setGravity(0, 0, -9.82)
+        self.__table_id = self.__p.loadURDF('tests/urdf/table.urdf', useFixedBase=True)
+        self.__robot_id = self.__p.loadURDF('tests/urdf/iiwa14_pybullet.urdf', basePosition=[0, 0, 0.625], useFixedBase=True)
+
+        self.__recorder = PyBulletRecorder(self.__p, chunk_size=16)
+        self.__recorder.register_object(self.__table_id, 'tests/urdf/table.urdf')
+        self.__recorder.register_object(self.__robot_id, 'tests/urdf/iiwa14_pybullet.urdf')
+
+    def tearDown(self):
+        self.__p.disconnect()
+        for path in ('test_scene.pkl', 'test_scene.rec'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_keyframes(self):
+        expected = {link.name: [] for link in self.__recorder.links}
+        for _ in range(n_steps):
+            self.__p.stepSimulation()
+            self.__recorder.add_keyframe()
+            for link in self.__recorder.links:
+                expected[link.name].append(link.get_keyframe())
+        self.assertEqual(self.__recorder.num_frames, n_steps)
+
+        output = self.__recorder.get_formatted_output()
+        self.assertEqual(set(output.keys()), set(expected.keys()))
+        for i, link in enumerate(self.__recorder.links):
+            self.assertEqual(output[link.name]['type'], 'mesh')
+            self.assertEqual(output[link.name]['mesh_path'], link.mesh_path)
+            self.assertEqual(output[link.name]['mesh_scale'], link.mesh_scale)
+            frames = output[link.name]['frames']
+            self.assertEqual(len(frames), n_steps)
+            np.testing.assert_allclose(
+                [f['position'] for f in frames], [f['position'] for f in expected[link.name]], atol=1e-5
+            )
+            np.testing.assert_allclose(
+                [f['orientation'] for f in frames], [f['orientation'] for f in expected[link.name]], atol=1e-5
+            )
+            self.assertEqual(self.__recorder.link_frames(i).shape, (n_steps, 7))
+
+    def test_late_registration(self):
+        self.__recorder.add_keyframe()
+        object_id = self.__p.loadURDF('tests/urdf/peg_round.urdf', basePosition=[0, 0, 1.0])
+        self.__recorder.register_object(object_id, 'tests/urdf/peg_round.urdf')
+        self.__recorder.add_keyframe()
+        output = self.__recorder.get_formatted_output()
+        self.assertEqual(len(output[self.__recorder.links[0].name]['frames']), 2)
+        self.assertEqual(len(output[self.__recorder.links[-1].name]['frames']), 1)
+
+    def test_stream(self):
+        expected = {link.name: [] for link in self.__recorder.links}
+        self.__recorder.start_stream('test_scene.rec')
+        for i in range(n_steps):
+            self.__p.stepSimulation()
+            self.__recorder.add_keyframe(i * 0.01)
+            for link in self.__recorder.links:
+                expected[link.name].append(link.get_keyframe())
+            if i == 20:
+                # Full chunks are readable while the record goes on
+                self.assertEqual(RecordFile('test_scene.rec').num_frames, 16)
+        self.__recorder.stop_stream()
+
+        record = RecordFile('test_scene.rec')
+        self.assertEqual(record.num_frames, n_steps)
+        self.assertEqual(record.poses.shape, (n_steps, len(self.__recorder.links), 7))
+        self.assertEqual(record.frame_at(0.105), 10)
+        self.assertEqual([link['name'] for link in record.links], [link.name for link in self.__recorder.links])
+
+        convert_to_pickle('test_scene.rec', 'test_scene.pkl')
+        with open('test_scene.pkl', 'rb') as f:
+            scene = pickle.load(f)
+        self.assertEqual(scene, self.__recorder.get_formatted_output())
+        for link in self.__recorder.links:
+            self.assertEqual(scene[link.name]['mesh_path'], link.mesh_path)
+            np.testing.assert_allclose(
+                [f['position'] for f in scene[link.name]['frames']],
+                [f['position'] for f in expected[link.name]],
+                atol=1e-5
+            )
+
+    def __record_motion(self, n_frames: int) -> dict:
+        expected = {link.name: [] for link in self.__recorder.links}
+        for i in range(n_frames):
+            for joint_id in range(self.__p.getNumJoints(self.__robot_id)):
+                self.__p.resetJointState(self.__robot_id, joint_id, 0.5 * np.sin(0.05 * i + joint_id))
+            self.__recorder.add_keyframe(i * 0.01)
+            for link in self.__recorder.links:
+                expected[link.name].append(link.get_keyframe())
+        return expected
+
+    def test_fps_policy(self):
+        self.__recorder.set_policy(fps=20)
+        self.__record_motion(n_steps)
+        # Every fifth frame of the 100 Hz motion is kept
+        self.assertEqual(self.__recorder.num_frames, n_steps // 5)
+        self.assertEqual(self.__recorder.link_frames(0).shape, (n_steps // 5, 7))
+
+        # Steps of 100 Hz do not divide the period of 30 fps, frames are taken at the first step of every slot
+        self.__recorder.reset()
+        self.__recorder.set_policy(fps=30)
+        for i in range(301):
+            self.__recorder.add_keyframe(i * 0.01)
+        self.assertEqual(self.__recorder.num_frames, 91)
+        # Long steps skip slots without moving the schedule
+        self.__recorder.reset()
+        for time in (0.0, 0.1, 0.12, 0.14):
+            self.__recorder.add_keyframe(time)
+        self.assertEqual(self.__recorder.num_frames, 3)
+
+    def test_sparse_policy(self):
+        tolerance = 1e-3
+        self.__recorder.set_policy(position_tolerance=tolerance, angle_tolerance=1e-2, position_resolution=1e-4)
+        self.__recorder.start_stream('test_scene.rec')
+        expected = self.__record_motion(n_steps)
+        self.__recorder.stop_stream()
+
+        record = RecordFile('test_scene.rec')
+        self.assertTrue(record.sparse)
+        self.assertEqual(record.num_frames, n_steps)
+        table_link = self.__recorder.links[0]
+        self.assertEqual(np.count_nonzero(record.records['link'] == 0), 1)
+        self.assertLess(record.records.nbytes, n_steps * len(self.__recorder.links) * 7 * 4)
+
+        scene = record.get_formatted_output()
+        for link in self.__recorder.links:
+            frames = scene[link.name]['frames']
+            self.assertEqual(len(frames), n_steps)
+            np.testing.assert_allclose(
+                [f['position'] for f in frames], [f['position'] for f in expected[link.name]], atol=2 * tolerance + 1e-4
+            )
+        self.assertEqual(len(scene[table_link.name]['frames']), n_steps)
+
+        self.__recorder.reset()
+        expected = self.__record_motion(n_steps)
+        for i, link in enumerate(self.__recorder.links):
+            np.testing.assert_allclose(
+                self.__recorder.link_frames(i)[:, :3], [f['position'] for f in expected[link.name]], atol=2 * tolerance + 1e-4
+            )
+        # Interpolated poses are reused by all links until the next frame
+        scene = self.__recorder.get_formatted_output()
+        self.assertEqual(len(scene[table_link.name]['frames']), n_steps)
+        self.__recorder.add_keyframe()
+        self.assertEqual(self.__recorder.link_frames(0).shape, (n_steps + 1, 7))
+
+    def test_multiple_worlds(self):
+        worlds = [PyBulletWorld(gui_mode = GUI_MODE.DIRECT, time_step = 0.01, time_scale=1) for _ in range(2)]
+        for i, sim in enumerate(worlds):
+            sim.add_robot('tests/urdf/iiwa14_pybullet.urdf', SE3(i, 0, 0.625), 'robot')
+            sim.register_objects_for_record()
+            sim.start_record()
+        for _ in range(n_steps):
+            for sim in worlds:
+                sim.sim_step()
+        scenes = []
+        for i, sim in enumerate(worlds):
+            sim.stop_record()
+            self.assertTrue(sim.save_scene_record('test_scene.pkl'))
+            with open('test_scene.pkl', 'rb') as f:
+                scenes.append(pickle.load(f))
+        # Every recorder reads its own world, bases of the robots differ by one meter along X
+        base_name = next(name for name in scenes[0] if 'iiwa_link_0' in name)
+        for i, scene in enumerate(scenes):
+            self.assertEqual(len(scene[base_name]['frames']), n_steps)
+            self.assertAlmostEqual(scene[base_name]['frames'][-1]['position'][0], i, places=5)
+
+    def test_urdf_visuals_cache(self):
+        visuals = urdf_visuals('tests/urdf/iiwa14_pybullet.urdf')
+        self.assertIs(urdf_visuals('tests/urdf/iiwa14_pybullet.urdf'), visuals)
+        self.assertEqual(len(visuals) + len(urdf_visuals('tests/urdf/table.urdf')), len(self.__recorder.links))
+
+        sim = PyBulletWorld(gui_mode = GUI_MODE.DIRECT, time_step = 0.01, time_scale=1)
+        sim.add_object('table', 'tests/urdf/table.urdf', save=True)
+        sim.add_robot('tests/urdf/iiwa14_pybullet.urdf', SE3(0,0,0.625), 'robot')
+        # Registration after every reset does not duplicate tracked links
+        for _ in range(2):
+            sim.reset()
+            sim.register_objects_for_record()
+        sim.start_record()
+        sim.sim_step()
+        sim.stop_record()
+        self.assertTrue(sim.save_scene_record('test_scene.pkl'))
+        with open('test_scene.pkl', 'rb') as f:
+            scene = pickle.load(f)
+        self.assertEqual(len(scene), len(self.__recorder.links))
+
+    def test_world_record(self):
+        sim = PyBulletWorld(gui_mode = GUI_MODE.DIRECT, time_step = 0.01, time_scale=1)
+        sim.add_object('table', 'tests/urdf/table.urdf', save=True)
+        sim.add_robot('tests/urdf/iiwa14_pybullet.urdf', SE3(0,0,0.625), 'robot')
+        sim.register_objects_for_record()
+        sim.start_record()
+        for _ in range(n_steps):
+            sim.sim_step()
+        sim.stop_record()
+        self.assertTrue(sim.save_scene_record('test_scene.pkl'))
+        with open('test_scene.pkl', 'rb') as f:
+            scene = pickle.load(f)
+        self.assertEqual(len(scene), len(self.__recorder.links))
+        for link in scene.values():
+            self.assertEqual(len(link['frames']), n_steps)
+
+        sim.start_record(stream_path='test_scene.rec')
+        for _ in range(n_steps):
+            sim.sim_step()
+        sim.stop_record()
+        record = RecordFile('test_scene.rec')
+        self.assertEqual(record.num_frames, n_steps)
+        self.assertAlmostEqual(float(record.times[-1]), sim.sim_time)
+
+        # The following record in memory does not read the streamed file
+        sim.start_record()
+        for _ in range(n_steps // 2):
+            sim.sim_step()
+        sim.stop_record()
+        self.assertTrue(sim.save_scene_record('test_scene.pkl'))
+        with open('test_scene.pkl', 'rb') as f:
+            scene = pickle.load(f)
+        for link in scene.values():
+            self.assertEqual(len(link['frames']), n_steps // 2)
+
+def main():
+    unittest.main(exit=False)
+
+if __name__ == "__main__":
+    main()
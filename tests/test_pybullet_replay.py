@@ -0,0 +1,97 @@
+import os
+import unittest
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.utils.robot import JointState
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env.pybullet_recorder import PyBulletRecorder
+from itmobotics_sim.pybullet_env.pybullet_replay import StateLog, KinematicReplay, TimeIndex, movable_joints
+from itmobotics_sim.pybullet_env.pybullet_record_file import RecordFile
+
+test_joint_pose = np.array([0.0, -np.pi/2, np.pi/2, 0.0, np.pi/2, 0.0])
+n_steps = 100
+
+
+class testPyBulletReplay(unittest.TestCase):
+    def setUp(self):
+        self.__sim = PyBulletWorld(gui_mode = GUI_MODE.DIRECT, time_step = 0.01, time_scale=1)
+        self.__sim.add_object('table', 'tests/urdf/table.urdf', save=True)
+        self.__robot = self.__sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0.0, 0.0, 0.625), 'robot')
+        self.__log = StateLog.from_world(self.__sim, capacity=16)
+        for i in range(n_steps):
+            self.__robot.reset_joint_state(JointState.from_position(test_joint_pose + 0.3 * np.sin(0.05 * i)))
+            self.__sim.sim_step()
+            self.__log.capture(self.__sim)
+
+    def tearDown(self):
+        if os.path.exists('test_log.npz'):
+            os.remove('test_log.npz')
+        if os.path.exists('test_scene.rec'):
+            os.remove('test_scene.rec')
+
+    def __joint_positions(self) -> np.ndarray:
+        client = self.__sim.client
+        body_id = self.__sim.model_id('robot')
+        return np.array([state[0] for state in client.getJointStates(body_id, movable_joints(client, body_id))])
+
+    def test_time_index(self):
+        self.assertTrue(TimeIndex(self.__log.times).uniform)
+        self.assertEqual(TimeIndex(self.__log.times).frame_at(0.205), 19)
+        irregular = TimeIndex([0.0, 0.1, 0.5, 0.6])
+        self.assertFalse(irregular.uniform)
+        self.assertEqual(irregular.frame_at(0.55), 2)
+        self.assertEqual(irregular.frame_at(-1.0), 0)
+        self.assertEqual(irregular.frame_at(10.0), 3)
+
+    def test_seek(self):
+        self.assertEqual(self.__log.num_frames, n_steps)
+        replay = KinematicReplay(self.__sim, self.__log)
+        for frame in (70, 10, 99, 0):
+            self.assertEqual(replay.seek(self.__log.times[frame]), frame)
+            np.testing.assert_allclose(self.__joint_positions(), self.__log.joint_positions('robot')[frame])
+            self.assertAlmostEqual(self.__sim.sim_time, self.__log.times[frame])
+
+        frames = list(replay.play(start_time=0.5, stop_time=0.6))
+        self.assertEqual(len(frames), 11)
+        np.testing.assert_allclose(self.__joint_positions(), self.__log.joint_positions('robot')[59])
+
+    def test_save_load(self):
+        self.__log.save('test_log.npz')
+        log = StateLog.load('test_log.npz')
+        self.assertEqual(log.model_names, self.__log.model_names)
+        np.testing.assert_allclose(log.times, self.__log.times)
+        for name in log.model_names:
+            self.assertEqual(log.joint_indices(name), self.__log.joint_indices(name))
+            np.testing.assert_allclose(log.base_poses(name), self.__log.base_poses(name))
+            np.testing.assert_allclose(log.joint_positions(name), self.__log.joint_positions(name))
+
+    def test_record_file_replay(self):
+        recorder = PyBulletRecorder(self.__sim.client)
+        recorder.register_object(self.__sim.model_id('robot'), 'tests/urdf/ur5e_pybullet.urdf')
+        recorder.start_stream('test_scene.rec')
+        replay = KinematicReplay(self.__sim, self.__log)
+        for frame in range(0, n_steps, 10):
+            replay.apply_frame(frame)
+            recorder.add_keyframe(self.__sim.sim_time)
+        recorder.stop_stream()
+
+        record = RecordFile('test_scene.rec')
+        num_bodies = self.__sim.client.getNumBodies()
+        visual_replay = KinematicReplay(self.__sim, record)
+        self.assertEqual(self.__sim.client.getNumBodies(), num_bodies + len(record.links))
+        visual_replay.seek(0.515)
+        self.assertEqual(visual_replay.frame, 5)
+        body_id = self.__sim.client.getBodyUniqueId(num_bodies)
+        position, orientation = self.__sim.client.getBasePositionAndOrientation(body_id)
+        np.testing.assert_allclose(position, record.poses[5, 0, :3], atol=1e-5)
+        visual_replay.close()
+        self.assertEqual(self.__sim.client.getNumBodies(), num_bodies)
+
+
+def main():
+    unittest.main(exit=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import multiprocessing
+import os
+import unittest
+
+import numpy as np
+from scipy.spatial.transform import Rotation
+from spatialmath import SE3
+
+from itmobotics_sim.utils.robot import JointState
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+from itmobotics_sim.pybullet_env.pybullet_shared_memory import SharedSegment, SharedMemoryBridge
+
+
+test_joint_pose = np.array([0.0, -np.pi/2, np.pi/2, 0.0, np.pi/2, 0.0])
+goal_joint_pose = np.array([0.5, -1.2, 1.2, -0.3, np.pi/2, 0.4])
+
+
+def segment_name(name: str) -> str:
+    return 'itmobotics_test_{:d}_{:s}'.format(os.getpid(), name)
+
+
+def command_in_process(name: str, target: np.ndarray) -> tuple:
+    # Consumer in another process reads the state and sends a joint position command
+    with SharedSegment.attach(name + '_state') as state:
+        version, snapshot = state.read()
+        positions = snapshot['robot/joint_positions'].copy()
+    with SharedSegment.attach(name + '_command') as command:
+        command.write({'robot/control_type': 1, 'robot/target': target})
+    return version, positions
+
+
+class testSharedSegment(unittest.TestCase):
+    def test_segment(self):
+        fields = {'time': (np.float64, ()), 'positions': (np.float64, (6,)), 'image': (np.uint8, (4, 5, 3))}
+        with SharedSegment.create(segment_name('segment'), fields) as segment:
+            self.assertEqual(segment.version, 0)
+            reader = SharedSegment.attach(segment_name('segment'))
+            self.assertEqual(reader.field_names, ['time', 'positions', 'image'])
+            self.assertEqual(reader.arrays['image'].shape, (4, 5, 3))
+            self.assertEqual(reader.arrays['image'].dtype, np.uint8)
+            for array in reader.arrays.values():
+                self.assertEqual(array.ctypes.data % 64, 0)
+
+            segment.write({'time': 0.5, 'positions': np.arange(6.0), 'image': 7})
+            version, snapshot = reader.read()
+            self.assertEqual(version, 1)
+            self.assertEqual(snapshot['time'], 0.5)
+            np.testing.assert_array_equal(snapshot['positions'], np.arange(6.0))
+            np.testing.assert_array_equal(snapshot['image'], 7)
+
+            # Arrays are shared without copies, the snapshot is private
+            segment.arrays['positions'][0] = 10.0
+            self.assertEqual(reader.arrays['positions'][0], 10.0)
+            self.assertEqual(snapshot['positions'][0], 0.0)
+
+            # Unfinished write is not read
+            segment.begin_write()
+            self.assertEqual(segment.sequence % 2, 1)
+            version, _ = reader.read(snapshot, max_retries=10)
+            self.assertIsNone(version)
+            segment.end_write()
+            version, _ = reader.read(snapshot)
+            self.assertEqual(version, 2)
+            self.assertEqual(snapshot['positions'][0], 10.0)
+            snapshot = None
+            reader.close()
+        with self.assertRaises(FileNotFoundError):
+            SharedSegment.attach(segment_name('segment'))
+
+
+class testSharedMemoryBridge(unittest.TestCase):
+    def setUp(self):
+        self.__sim = PyBulletWorld(gui_mode = GUI_MODE.DIRECT, time_step = 0.01, kinematic=True)
+        self.__sim.add_object('table', 'tests/urdf/table.urdf', fixed=True, save=True)
+        self.__robot = self.__sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0, 0, 0.625), 'robot')
+        self.__robot.reset_joint_state(JointState.from_position(test_joint_pose))
+
+    def test_state(self):
+        self.__sim.connect_camera('camera', 'robot', 'camera_link', resolution=(64, 48), fps=50)
+        name = segment_name('state')
+        with SharedMemoryBridge(self.__sim, name, links=[('robot', 'ee_tool')], cameras=['camera']) as bridge:
+            self.__sim.attach_logger(bridge)
+            state = SharedSegment.attach(name + '_state')
+            camera = SharedSegment.attach(name + '_camera_camera')
+            snapshot = state.empty()
+            self.assertEqual(state.version, 1)
+            self.assertEqual(camera.version, 1)
+            for i in range(4):
+                self.__robot.reset_joint_state(JointState.from_position(test_joint_pose + 0.1 * i))
+                self.__sim.sim_step()
+                version, _ = state.read(snapshot)
+                self.assertEqual(version, i + 2)
+                self.assertAlmostEqual(float(snapshot['time']), self.__sim.sim_time)
+                np.testing.assert_allclose(snapshot['robot/joint_positions'], test_joint_pose + 0.1 * i)
+                ee_tf = self.__sim.link_state('robot', 'ee_tool').tf
+                pose = snapshot['robot/ee_tool/pose']
+                np.testing.assert_allclose(pose[:3], ee_tf.t, atol=1e-9)
+                np.testing.assert_allclose(Rotation.from_quat(pose[3:]).as_matrix(), ee_tf.R, atol=1e-9)
+
+            # Camera segment is written only with new frames, the camera is slower than the simulation
+            self.assertGreater(camera.version, 1)
+            self.assertLess(camera.version, state.version)
+            _, frame = camera.read()
+            color, depth = self.__sim.get_image('camera')
+            np.testing.assert_array_equal(frame['color'], color)
+            np.testing.assert_allclose(frame['depth'], depth, rtol=1e-6)
+            self.assertEqual(frame['color'].dtype, np.uint8)
+            self.__sim.detach_logger(bridge)
+            state.close()
+            camera.close()
+
+    def test_command(self):
+        name = segment_name('command')
+        with SharedMemoryBridge(self.__sim, name) as bridge:
+            self.__sim.attach_logger(bridge)
+            command = SharedSegment.attach(name + '_command')
+            # Nothing is sent before the first command
+            self.__sim.sim_step()
+            np.testing.assert_allclose(self.__robot.joint_state.joint_positions, test_joint_pose)
+            self.assertEqual(bridge.command_version, 0)
+
+            # The command is applied after the step, the robot reaches it in the next one
+            command.write({'robot/control_type': 1, 'robot/target': goal_joint_pose})
+            self.__sim.sim_step()
+            self.assertEqual(bridge.command_version, 1)
+            self.__sim.sim_step()
+            np.testing.assert_allclose(self.__robot.joint_state.joint_positions, goal_joint_pose)
+
+            # Velocity command keeps acting every step
+            command.write({'robot/control_type': 2, 'robot/target': np.array([0.1, 0.0, 0.0, 0.0, 0.0, 0.0])})
+            for _ in range(11):
+                self.__sim.sim_step()
+            np.testing.assert_allclose(self.__robot.joint_state.joint_positions[0], goal_joint_pose[0] + 0.01, atol=1e-9)
+            self.__sim.detach_logger(bridge)
+            command.close()
+
+    def test_other_process(self):
+        name = segment_name('process')
+        with SharedMemoryBridge(self.__sim, name) as bridge:
+            self.__sim.attach_logger(bridge)
+            self.__sim.sim_step()
+            context = multiprocessing.get_context('spawn')
+            with context.Pool(1) as pool:
+                version, positions = pool.apply(command_in_process, (name, goal_joint_pose))
+            self.assertEqual(version, 2)
+            np.testing.assert_allclose(positions, test_joint_pose)
+            self.__sim.sim_step()
+            self.__sim.sim_step()
+            np.testing.assert_allclose(self.__robot.joint_state.joint_positions, goal_joint_pose)
+            self.__sim.detach_logger(bridge)
+        # Segments are removed by the bridge, not by the consumer
+        with self.assertRaises(FileNotFoundError):
+            SharedSegment.attach(name + '_state')
+
+
+def main():
+    unittest.main(exit=False)
+
+if __name__ == "__main__":
+    main()
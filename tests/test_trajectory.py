@@ -0,0 +1,120 @@
+import unittest
+
+import numpy as np
+from spatialmath import SE3
+
+from itmobotics_sim.utils.robot import JointState
+from itmobotics_sim.utils.controllers import JointPositionsController, EEPositionToEEVelocityController, EEVelocityToJointVelocityController
+from itmobotics_sim.utils.trajectory import JointTrajectory, CartesianTrajectory, TrajectoryExecutor
+from itmobotics_sim.pybullet_env.pybullet_world import PyBulletWorld, GUI_MODE
+
+
+test_joint_pose = np.array([0.0, -np.pi/2, np.pi/2, 0.0, np.pi/2, 0.0])
+goal_joint_pose = np.array([0.5, -1.2, 1.2, -0.3, np.pi/2, 0.4])
+
+
+class testTrajectory(unittest.TestCase):
+    def test_joint_trapezoidal(self):
+        max_velocities = np.full(6, 1.0)
+        max_accelerations = np.full(6, 2.0)
+        trajectory = JointTrajectory.trapezoidal(test_joint_pose, goal_joint_pose, max_velocities, max_accelerations, 1e-3)
+        self.assertEqual(trajectory.positions.shape, (len(trajectory), 6))
+        np.testing.assert_allclose(trajectory.positions[[0, -1]], [test_joint_pose, goal_joint_pose])
+        np.testing.assert_allclose(trajectory.velocities[[0, -1]], 0.0, atol=1e-9)
+        self.assertTrue(np.all(np.abs(trajectory.velocities) <= max_velocities + 1e-9))
+        self.assertTrue(np.all(np.abs(trajectory.accelerations) <= max_accelerations + 1e-9))
+        # The slowest joint reaches its velocity limit, joints are synchronized
+        self.assertAlmostEqual(np.max(np.abs(trajectory.velocities)), 1.0)
+        delta = goal_joint_pose - test_joint_pose
+        s = (trajectory.positions[:, 0] - test_joint_pose[0]) / delta[0]
+        np.testing.assert_allclose(trajectory.positions, test_joint_pose + s[:, np.newaxis] * delta, atol=1e-9)
+        np.testing.assert_allclose(np.diff(trajectory.positions, axis=0)[:-1] / 1e-3, trajectory.velocities[1:-1], atol=1e-2)
+
+        # Standing still
+        trajectory = JointTrajectory.trapezoidal(test_joint_pose, test_joint_pose, max_velocities, max_accelerations, 1e-3)
+        self.assertEqual(len(trajectory), 1)
+        self.assertEqual(trajectory.duration, 0.0)
+
+    def test_joint_quintic(self):
+        trajectory = JointTrajectory.quintic(test_joint_pose, goal_joint_pose, 2.0, 1e-2)
+        self.assertAlmostEqual(trajectory.duration, 2.0)
+        np.testing.assert_allclose(trajectory.times[1] - trajectory.times[0], 1e-2)
+        np.testing.assert_allclose(trajectory.positions[[0, -1]], [test_joint_pose, goal_joint_pose])
+        np.testing.assert_allclose(trajectory.velocities[[0, -1]], 0.0, atol=1e-9)
+        np.testing.assert_allclose(trajectory.accelerations[[0, -1]], 0.0, atol=1e-9)
+        # Peak velocity of the quintic scaling is 15/8 of the mean one
+        np.testing.assert_allclose(trajectory.velocities[100], 15.0 / 8.0 * (goal_joint_pose - test_joint_pose) / 2.0)
+
+    def test_cartesian(self):
+        start = SE3(0.3, 0.0, 1.0) @ SE3.Rx(np.pi)
+        goal = SE3(0.4, 0.2, 0.9) @ SE3.Rx(np.pi) @ SE3.Rz(np.pi / 2)
+        for trajectory in (
+            CartesianTrajectory.quintic(start, goal, 1.0, 1e-3),
+            CartesianTrajectory.trapezoidal(start, goal, np.array([0.5, 1.0]), np.array([1.0, 2.0]), 1e-3),
+        ):
+            np.testing.assert_allclose(trajectory.transforms[0], start.A, atol=1e-9)
+            np.testing.assert_allclose(trajectory.transforms[-1], goal.A, atol=1e-9)
+            np.testing.assert_allclose(trajectory.twists[[0, -1]], 0.0, atol=1e-9)
+            # Rotations stay orthonormal
+            rotations = trajectory.transforms[:, :3, :3]
+            np.testing.assert_allclose(rotations @ rotations.transpose(0, 2, 1), np.tile(np.eye(3), (len(trajectory), 1, 1)), atol=1e-9)
+            # Twists are derivatives of the transforms
+            i = len(trajectory) // 3
+            dt = trajectory.times[i + 1] - trajectory.times[i]
+            np.testing.assert_allclose((trajectory.transforms[i + 1, :3, 3] - trajectory.transforms[i, :3, 3]) / dt, trajectory.twists[i, :3], atol=1e-2)
+            skew = (rotations[i + 1] - rotations[i]) / dt @ rotations[i].T
+            np.testing.assert_allclose([skew[2, 1], skew[0, 2], skew[1, 0]], trajectory.twists[i, 3:], atol=1e-2)
+
+
+class testTrajectoryExecutor(unittest.TestCase):
+    def setUp(self):
+        self.__sim = PyBulletWorld(gui_mode = GUI_MODE.DIRECT, time_step = 0.01, kinematic=True)
+        self.__robot = self.__sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0, 0, 0.625), 'robot')
+        self.__robot.reset_joint_state(JointState.from_position(test_joint_pose))
+
+    def test_joint_execution(self):
+        trajectory = JointTrajectory.quintic(test_joint_pose, goal_joint_pose, 1.0, self.__sim.time_step)
+        executor = TrajectoryExecutor(JointPositionsController(self.__robot), trajectory)
+        motion = executor.motion
+        while not executor.done:
+            self.assertTrue(executor.step())
+            self.__sim.sim_step()
+            np.testing.assert_allclose(self.__robot.joint_state.joint_positions, trajectory.positions[executor.index - 1], atol=1e-9)
+        self.assertEqual(executor.index, len(trajectory))
+        self.assertAlmostEqual(executor.time, 1.0)
+        np.testing.assert_allclose(self.__robot.joint_state.joint_positions, goal_joint_pose)
+        # The goal is held and the same motion is reused
+        executor.step()
+        self.assertIs(executor.motion, motion)
+        np.testing.assert_allclose(motion.joint_state.joint_positions, goal_joint_pose)
+        # The trajectory is not changed by the execution
+        executor.reset()
+        self.assertFalse(executor.done)
+        np.testing.assert_allclose(trajectory.positions[0], test_joint_pose)
+
+    def test_cartesian_execution(self):
+        sim = PyBulletWorld(gui_mode = GUI_MODE.DIRECT, time_step = 0.001, time_scale=1.0)
+        robot = sim.add_robot('tests/urdf/ur5e_pybullet.urdf', SE3(0, 0, 0.625), 'robot')
+        robot.reset_joint_state(JointState.from_position(test_joint_pose))
+        start = robot.ee_state('ee_tool').tf
+        goal = SE3(0.05, 0.05, -0.05) @ start @ SE3.Rz(0.3)
+        trajectory = CartesianTrajectory.quintic(start, goal, 0.5, sim.time_step)
+
+        controller = EEPositionToEEVelocityController(robot)
+        controller.connect_controller(EEVelocityToJointVelocityController(robot))
+        executor = TrajectoryExecutor(controller, trajectory, 'ee_tool')
+        while not executor.done:
+            self.assertTrue(executor.step())
+            sim.sim_step()
+        for _ in range(500):
+            executor.step()
+            sim.sim_step()
+        np.testing.assert_allclose(robot.ee_state('ee_tool').tf.t, goal.t, atol=5e-3)
+        np.testing.assert_allclose(executor.motion.ee_state.tf.A, goal.A, atol=1e-9)
+
+
+def main():
+    unittest.main(exit=False)
+
+if __name__ == "__main__":
+    main()
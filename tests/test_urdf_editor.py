@@ -7,7 +7,10 @@ import numpy as np
 from spatialmath import SE3
 from spatialmath import base as sb
 
-from itmobotics_sim.pybullet_env.urdf_editor import URDFEditor
+import pybullet
+import pybullet_utils.bullet_client as bc
+
+from itmobotics_sim.pybullet_env.urdf_editor import URDFEditor, URDFScratch
 
 
 class testUrdfEditor(unittest.TestCase):
@@ -20,6 +23,50 @@ class testUrdfEditor(unittest.TestCase):
         self.__editor.save('new.urdf')
         os.remove('new.urdf')
     
+    def test_scratch(self):
+        scratch = URDFScratch()
+        self.__editor.joinURDF(URDFEditor('tests/urdf/peg_round.urdf'), 'ee_tool', SE3(0.0, 0.0, 0.1).A)
+        path = scratch.write(self.__editor)
+        self.assertEqual(os.path.dirname(path), scratch.directory)
+
+        # The composition is loaded from the scratch directory with meshes of the original files
+        client = bc.BulletClient(connection_mode=pybullet.DIRECT)
+        body_id = client.loadURDF(path)
+        self.assertEqual(client.getNumJoints(body_id), len(self.__editor.kinematic_tree.joints))
+        client.disconnect()
+        for mesh in URDFEditor(path).element_tree.getroot().iter('mesh'):
+            self.assertTrue(os.path.isabs(mesh.attrib['filename']))
+
+        # The cached tree of the written composition matches the file
+        editor = URDFEditor(path)
+        with open(path, 'rb') as f:
+            self.assertEqual(editor.tostring(), f.read())
+        self.assertEqual(editor.kinematic_tree.links, self.__editor.kinematic_tree.links)
+        # The editor itself keeps the relative paths of the original files
+        self.assertFalse(any(os.path.isabs(mesh.attrib['filename']) for mesh in self.__editor.iter('mesh')))
+
+        scratch.remove(path)
+        self.assertFalse(os.path.exists(path))
+        scratch.cleanup()
+        self.assertFalse(os.path.exists(scratch.directory))
+
+    def test_edit_copy(self):
+        # In place edits of one editor are not seen by other editors of the same file
+        link = self.__editor.element_tree.getroot().find('link')
+        name = link.attrib['name']
+        link.attrib['name'] = 'renamed_link'
+        editor = URDFEditor('tests/urdf/ur5e_pybullet.urdf')
+        self.assertEqual(editor.element_tree.getroot().find('link').attrib['name'], name)
+        self.assertIn(name, editor.kinematic_tree.links)
+
+        # Joined elements owned by the other editor are copied
+        self.__editor2.element_tree.getroot().find('link').attrib['comment'] = 'joined'
+        editor.joinURDF(self.__editor2, 'ee_tool', SE3(0.0, 0.0, 0.1).A)
+        self.__editor2.element_tree.getroot().find('link').attrib['comment'] = 'edited'
+        self.assertIn(b'comment="joined"', editor.tostring())
+        self.assertNotIn(b'comment="edited"', editor.tostring())
+
+
 def main():
     unittest.main(exit=False)
 